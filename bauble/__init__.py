@@ -28,6 +28,7 @@ import os
 import sys
 import traceback
 import warnings
+from multiprocessing import parent_process
 from shutil import copy2
 
 import gi
@@ -62,16 +63,20 @@ consoleLevel = logging.WARNING
 if not os.path.exists(paths.appdata_dir()):
     os.makedirs(paths.appdata_dir())
 log_file = os.path.join(paths.appdata_dir(), "bauble.log")
-if os.path.exists(log_file):
-    try:
-        copy2(log_file, log_file + "_PREV")
-    except Exception as e:  # pylint: disable=broad-except
-        print(f"Copying previous log file failed: {type(e).__name__}({e})")
+# worker processes append to the main process' log
+log_mode = "a"
+if parent_process() is None:
+    log_mode = "w+"
+    if os.path.exists(log_file):
+        try:
+            copy2(log_file, log_file + "_PREV")
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Copying previous log file failed: {type(e).__name__}({e})")
 formatter = logging.Formatter(
     "%(asctime)s - %(name)s:%(lineno)d - %(levelname)s - %(thread)d "
     "- %(message)s"
 )
-file_handler = logging.FileHandler(log_file, "w+", "utf-8")
+file_handler = logging.FileHandler(log_file, log_mode, "utf-8")
 file_handler.setFormatter(formatter)
 logging.getLogger().addHandler(file_handler)
 file_handler.setLevel(logging.DEBUG)
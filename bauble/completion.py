@@ -0,0 +1,385 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Shared completion providers.
+
+PrefixIndex provides a sorted, in memory, index of a column's values for prefix
+lookups that avoid `ilike` queries on every keystroke.  CompletionDispatcher
+debounces completion requests, runs them off the main thread, drops stale
+results and updates the completion's model in place.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from collections.abc import Hashable
+from collections.abc import Iterable
+from collections.abc import Sequence
+from functools import cache
+
+from gi.repository import GLib
+from gi.repository import Gtk
+from sqlalchemy import Column
+from sqlalchemy import event
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.orm import ColumnProperty
+from sqlalchemy.orm import QueryableAttribute
+from sqlalchemy.orm import Session
+
+from bauble import db
+from bauble import utils
+
+PREFIX_INDEX_REFRESH_SECS = 30.0
+"""
+How often, at most, to check the history table for changes made elsewhere
+(e.g. by other users) when no local commits have occurred.
+"""
+
+COMPLETION_DELAY_MS = 150
+"""Delay after the last keystroke before completions are fetched."""
+
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class PrefixIndex:
+    """A sorted, in memory, index of the distinct values of a string column.
+
+    Loaded lazily on the first lookup then kept up to date from the history
+    table.  Any local commit triggers a check for new history entries on the
+    next lookup, otherwise it is checked at most every
+    `PREFIX_INDEX_REFRESH_SECS`.  Reverting history reloads it completely.
+    """
+
+    def __init__(self, attr: QueryableAttribute) -> None:
+        self.attr = attr
+        column = attr.property.columns[0]
+        self.table_name: str = column.table.name
+        self.column_name: str = column.name
+        self._counts: dict[str, int] = {}
+        self._keys: list[str] = []
+        self._values: list[str] = []
+        self._engine = None
+        self._last_history_id: int | None = None
+        self._last_check = 0.0
+        self._check_history = False
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"PrefixIndex({self.table_name}.{self.column_name})"
+
+    def invalidate(self) -> None:
+        """Completely reload on next lookup."""
+        self._engine = None
+
+    def mark_changed(self) -> None:
+        """Check history for changes on next lookup."""
+        self._check_history = True
+
+    def _max_history_id(self, session: Session) -> int | None:
+        return session.execute(
+            select(func.max(db.History.id)).where(
+                db.History.table_name == self.table_name
+            )
+        ).scalar()
+
+    def _rebuild(self) -> None:
+        values = sorted(self._counts, key=str.lower)
+        self._values = values
+        self._keys = [i.lower() for i in values]
+
+    def _load(self) -> None:
+        logger.debug("%s loading", self)
+        with db.Session() as session:
+            self._last_history_id = self._max_history_id(session)
+            rows = session.execute(
+                select(self.attr, func.count())
+                .where(self.attr.isnot(None))
+                .group_by(self.attr)
+            )
+            self._counts = {str(val): count for val, count in rows}
+        self._rebuild()
+        self._engine = db.engine
+        self._last_check = time.monotonic()
+        self._check_history = False
+
+    def _add(self, value) -> bool:
+        if value is None:
+            return False
+        value = str(value)
+        self._counts[value] = self._counts.get(value, 0) + 1
+        return self._counts[value] == 1
+
+    def _remove(self, value) -> bool:
+        if value is None or (value := str(value)) not in self._counts:
+            return False
+        self._counts[value] -= 1
+        if self._counts[value] < 1:
+            del self._counts[value]
+            return True
+        return False
+
+    def _refresh(self) -> None:
+        """Apply any new history entries for the table to the index."""
+        self._last_check = time.monotonic()
+        self._check_history = False
+        with db.Session() as session:
+            max_id = self._max_history_id(session)
+            if max_id == self._last_history_id:
+                return
+            history = db.History
+            stmt = (
+                select(history.operation, history.values)
+                .where(history.table_name == self.table_name)
+                .order_by(history.id)
+            )
+            if self._last_history_id is not None:
+                stmt = stmt.where(history.id > self._last_history_id)
+            if max_id is not None:
+                stmt = stmt.where(history.id <= max_id)
+            changed = False
+            for operation, values in session.execute(stmt):
+                value = values.get(self.column_name)
+                if operation == "insert":
+                    changed |= self._add(value)
+                elif operation == "delete":
+                    changed |= self._remove(value)
+                elif operation == "update" and isinstance(value, list):
+                    # [new, old], only when changed
+                    changed |= self._add(value[0])
+                    if len(value) == 2:
+                        changed |= self._remove(value[1])
+        self._last_history_id = max_id
+        logger.debug("%s refreshed, changed=%s", self, changed)
+        if changed:
+            self._rebuild()
+
+    def _ensure_current(self) -> None:
+        if self._engine is None or self._engine is not db.engine:
+            self._load()
+        elif (
+            self._check_history
+            or time.monotonic() - self._last_check > PREFIX_INDEX_REFRESH_SECS
+        ):
+            self._refresh()
+
+    def lookup(self, prefix: str, limit: int | None = None) -> list[str]:
+        """Return the values starting with prefix (case insensitive), sorted.
+
+        :param prefix: the text to match
+        :param limit: the maximum number of values to return
+        """
+        with self._lock:
+            self._ensure_current()
+            keys, values = self._keys, self._values
+        prefix = prefix.lower()
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + _MAX_CHAR, lo=start)
+        if limit is not None:
+            end = min(end, start + limit)
+        return values[start:end]
+
+
+_indexes: dict[tuple[str, str], PrefixIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_prefix_index(attr) -> PrefixIndex | None:
+    """Return the shared PrefixIndex for a mapped column attribute.
+
+    Returns None if the attribute is not a plain column (e.g. a hybrid
+    property or relationship) and hence can not be indexed.
+    """
+    prop = getattr(attr, "property", None)
+    if not isinstance(prop, ColumnProperty):
+        return None
+    column = prop.columns[0]
+    if not isinstance(column, Column):
+        return None
+    key = (column.table.name, column.name)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = PrefixIndex(attr)
+        return _indexes[key]
+
+
+@event.listens_for(Session, "after_commit")
+def _prefix_index_after_commit(_session) -> None:
+    for index in _indexes.values():
+        index.mark_changed()
+
+
+def _prefix_index_history_revert(table) -> None:
+    for index in _indexes.values():
+        if index.table_name == table.name:
+            index.invalidate()
+
+
+db.History.history_revert_callbacks.append(_prefix_index_history_revert)
+
+
+@cache
+def _column_gtype(column_type: type):
+    return Gtk.ListStore(column_type).get_column_type(0)
+
+
+def update_completion_model(
+    completion: Gtk.EntryCompletion,
+    values: Sequence[Hashable],
+    column_type: type = str,
+) -> None:
+    """Update the completion's model in place to contain values, in order.
+
+    Rather than replacing the model on every keystroke only rows no longer
+    wanted are removed and new rows inserted.  If the completion has no
+    suitable model a new one is created.
+    """
+    model = completion.get_model()
+    if (
+        not isinstance(model, Gtk.ListStore)
+        or model.get_n_columns() != 1
+        or model.get_column_type(0) != _column_gtype(column_type)
+    ):
+        model = Gtk.ListStore(column_type)
+        for value in values:
+            model.append([value])
+        completion.set_model(model)
+        return
+
+    wanted = set(values)
+    treeiter = model.get_iter_first()
+    while treeiter:
+        if model[treeiter][0] in wanted:
+            treeiter = model.iter_next(treeiter)
+        elif not model.remove(treeiter):
+            treeiter = None
+
+    positions = {v: i for i, v in enumerate(values)}
+    order = [positions[row[0]] for row in model]
+    if order != sorted(order) or len(order) != len(set(order)):
+        model.clear()
+
+    for i, value in enumerate(values):
+        if i >= len(model) or model[i][0] != value:
+            model.insert(i, [value])
+
+
+class CompletionDispatcher:
+    """Fetch completions off the main thread.
+
+    Requests are debounced, only fetched once typing pauses for `delay`
+    milliseconds.  Each request supersedes those before it, stale requests are
+    cancelled and their results discarded.  Results are applied to the
+    completion's model in place on the main loop.
+
+    :param get_completions: callable that accepts the text and returns an
+        iterable of completion strings.  Called in a worker thread so must use
+        its own session.
+    :param delay: milliseconds to wait after the last request.
+    """
+
+    def __init__(
+        self,
+        get_completions: Callable[[str], Iterable[str]],
+        delay: int = COMPLETION_DELAY_MS,
+    ) -> None:
+        self.get_completions = get_completions
+        self.delay = delay
+        self._generation = 0
+        self._timer_id: int | None = None
+        self._cancel: threading.Event | None = None
+
+    def cancel(self) -> None:
+        """Cancel any pending or running request."""
+        self._generation += 1
+        if self._timer_id is not None:
+            GLib.source_remove(self._timer_id)
+            self._timer_id = None
+        if self._cancel:
+            self._cancel.set()
+            self._cancel = None
+
+    def request(self, text: str, completion: Gtk.EntryCompletion) -> None:
+        """Request completions for text to be applied to completion."""
+        self.cancel()
+        self._timer_id = GLib.timeout_add(
+            self.delay, self._dispatch, text, completion, self._generation
+        )
+
+    def _dispatch(
+        self, text: str, completion: Gtk.EntryCompletion, generation: int
+    ) -> bool:
+        self._timer_id = None
+        cancel = threading.Event()
+        self._cancel = cancel
+        threading.Thread(
+            target=self._worker,
+            args=(text, completion, generation, cancel),
+            daemon=True,
+        ).start()
+        return GLib.SOURCE_REMOVE
+
+    def _worker(
+        self,
+        text: str,
+        completion: Gtk.EntryCompletion,
+        generation: int,
+        cancel: threading.Event,
+    ) -> None:
+        try:
+            values = list(dict.fromkeys(self.get_completions(text)))
+        except Exception as e:  # pylint: disable=broad-except
+            logger.debug("%s(%s)", type(e).__name__, e)
+            return
+        if cancel.is_set():
+            logger.debug("completions for %s cancelled", text)
+            return
+        GLib.idle_add(self._apply, completion, values, generation)
+
+    def _apply(
+        self,
+        completion: Gtk.EntryCompletion,
+        values: list[str],
+        generation: int,
+    ) -> bool:
+        if generation != self._generation:
+            logger.debug("discarding stale completions")
+            return GLib.SOURCE_REMOVE
+        self._cancel = None
+        update_completion_model(completion, values)
+        completion.complete()
+        return GLib.SOURCE_REMOVE
+
+
+def prefix_filter(attr, prefix: str, max_values: int = 500):
+    """Return a filter clause matching values of attr starting with prefix,
+    case insensitive.
+
+    Where possible the values are looked up in the shared PrefixIndex and
+    matched with `IN`, which can use the column's database index, rather than
+    `ilike`.  Falls back to `ilike` when the attribute can not be indexed or
+    too many values match.
+    """
+    if index := get_prefix_index(attr):
+        values = index.lookup(prefix, max_values + 1)
+        if len(values) <= max_values:
+            return attr.in_(values)
+    return utils.ilike(attr, f"{prefix}%%")
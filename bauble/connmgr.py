@@ -255,6 +255,8 @@ ConnectionDict = TypedDict(
         "user": NotRequired[str],
         "passwd": NotRequired[bool],
         "options": NotRequired[dict[str, str]],
+        "pool": NotRequired[dict[str, str]],
+        "pragmas": NotRequired[dict[str, str]],
     },
 )
 
@@ -269,6 +271,11 @@ class ConnectionModel:
 
         model = ConnectionModel("spam")
 
+    ``pool`` overrides the connection pool settings (see
+    `bauble.db.POOL_DEFAULTS`) e.g. ``{"pool_size": "10"}``, it is not used
+    for SQLite.  ``pragmas`` overrides the SQLite settings (see
+    `bauble.db.SQLITE_PRAGMAS`) e.g. ``{"journal_mode": "WAL"}`` to opt in to
+    WAL for a database on a local disk.
     """
 
     connection_name: str
@@ -282,6 +289,8 @@ class ConnectionModel:
     rootdir: str = field(init=False, default="")
     passwd: bool = field(init=False, default=False)
     options: dict[str, str] = field(default_factory=dict)
+    pool: dict[str, str] = field(default_factory=dict)
+    pragmas: dict[str, str] = field(default_factory=dict)
 
     _use_defaults: bool = field(init=False, repr=False, default=True)
 
@@ -331,6 +340,8 @@ class ConnectionModel:
             result["file"] = self.filename
             result["directory"] = self.rootdir
             result["default"] = self.use_defaults
+            if self.pragmas:
+                result["pragmas"] = self.pragmas
         else:
             result["directory"] = self.rootdir
             result["db"] = self.database
@@ -339,6 +350,8 @@ class ConnectionModel:
             result["user"] = self.user
             result["passwd"] = self.passwd
             result["options"] = self.options
+            if self.pool:
+                result["pool"] = self.pool
 
         return result
 
@@ -349,11 +362,13 @@ class ConnectionModel:
             self.filename = params.get("file", "")
             self.use_defaults = params.get("default", True)
             self.rootdir = params.get("directory", "")
+            self.pragmas = params.get("pragmas", {})
             self.database = ""
             self.host = ""
             self.port = ""
             self.user = ""
             self.options = {}
+            self.pool = {}
             self.passwd = False
         else:
             self.database = params.get("db", "")
@@ -363,6 +378,8 @@ class ConnectionModel:
             self.rootdir = params.get("directory", "")
             self.passwd = params.get("passwd", False)
             self.options = params.get("options", {})
+            self.pool = params.get("pool", {})
+            self.pragmas = {}
             self.filename = ""
             self.use_defaults = False
 
@@ -27,9 +27,13 @@ import json
 import logging
 import os
 import re
+import threading
 from collections.abc import Callable
 from collections.abc import Sequence
 from dataclasses import dataclass
+from dataclasses import field
+from functools import cache
+from functools import partial
 from typing import Any
 from typing import Protocol
 from typing import cast
@@ -50,6 +54,7 @@ from sqlalchemy.orm import Mapper
 from sqlalchemy.orm import Session as SASession
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import object_session
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import synonym as sa_synonym
 from sqlalchemy.orm.attributes import get_history
@@ -559,14 +564,63 @@ class History(HistoryBase):
         cls,
         id_: int,
         db_engine: sa.engine.Engine | None = None,
-    ) -> None:
+    ) -> set[sa.Table]:
         """Revert history to the history line with the provided id.
 
+        The history lines are collapsed to the net change to each row and
+        applied in batches (see `NetChanges`).  If that fails on a constraint
+        (e.g. values swapped between rows) reverts one line at a time instead.
+
         If `db_engine` is provided it is used instead of current system engine
         and callbacks are not called.
+
+        :return: the tables changed.
         """
         logger.debug("reverting to id: %s", id_)
 
+        do_callbacks = False
+        if not db_engine:
+            db_engine = engine
+            do_callbacks = True
+
+        try:
+            with db_engine.begin() as connection:
+                tables = cls._revert_net(id_, connection)
+        except sa.exc.IntegrityError as e:
+            logger.debug(
+                "%s(%s) reverting one line at a time", type(e).__name__, e
+            )
+            with db_engine.begin() as connection:
+                tables = cls._revert_each(id_, connection)
+
+        if do_callbacks:
+            for table in tables:
+                for callback in cls.history_revert_callbacks:
+                    callback(table)
+
+        return tables
+
+    @classmethod
+    def _revert_net(cls, id_: int, connection: sa.engine.Connection):
+        history = cls.__table__
+        stmt = (
+            select(history)
+            .where(history.c.id >= id_)
+            .order_by(history.c.id.desc())
+        )
+        changes = NetChanges(revert=True)
+        result = connection.execution_options(stream_results=True).execute(
+            stmt
+        )
+        for rows in result.partitions(HISTORY_BATCH_SIZE):
+            for row in rows:
+                changes.add(row)
+        tables = changes.apply(connection)
+        connection.execute(history.delete().where(history.c.id >= id_))
+        return tables
+
+    @classmethod
+    def _revert_each(cls, id_: int, connection: sa.engine.Connection):
         history = cls.__table__
         stmt: Executable = (
             select(history)
@@ -574,47 +628,186 @@ class History(HistoryBase):
             .order_by(history.c.id.desc())
         )
 
-        do_callbacks = False
-        if not db_engine:
-            db_engine = engine
-            do_callbacks = True
+        tables = set()
+        rows = connection.execute(stmt).all()
+        for row in rows:
+            table = metadata.tables[row["table_name"]]
+            stmt = NetChanges.line_statement(row, revert=True)
+            logger.debug("history revert values: %s", row["values"])
+            logger.debug("%s history revert stmt: %s", row["operation"], stmt)
+            connection.execute(stmt)
+            tables.add(table)
 
-        with db_engine.begin() as connection:
-            rows = connection.execute(stmt)
-            for row in rows:
-                table = metadata.tables[row["table_name"]]
-                if row["operation"] == "insert":
-                    stmt = table.delete().where(table.c.id == row["table_id"])
-                elif row["operation"] == "delete":
-                    stmt = table.insert().values(**row["values"])
-                elif row["operation"] == "update":
-                    # an insert and update in the one flush/commit can create a
-                    # scenario where history.sum() stores a single item list
-                    # (where the second entry would normally be None.)  Best to
-                    # avoid this situation altogether but have including the
-                    # len check here as a boots and braces approach
-                    values = {
-                        k: v[1] if len(v) == 2 else None
-                        for k, v in row["values"].items()
-                        if isinstance(v, list)
-                    }
-                    stmt = (
-                        table.update()
-                        .where(table.c.id == row["table_id"])
-                        .values(**values)
+            stmt = history.delete().where(history.c.id == row["id"])
+            connection.execute(stmt)
+        return tables
+
+
+HISTORY_BATCH_SIZE = 1000
+"""The number of history lines read, or written, at a time when reverting or
+replaying history.
+"""
+
+
+@dataclass
+class _RowChange:
+    """The net change to a row over a series of history lines."""
+
+    existed: bool
+    exists: bool
+    values: dict[str, Any]
+
+
+class NetChanges:
+    """Collapse a series of history lines to the net change to each row,
+    then apply them to a database in batches.
+
+    Add the lines in the order they are to be applied, i.e. newest first to
+    revert, oldest first to replay.
+    """
+
+    def __init__(self, revert: bool) -> None:
+        self.revert = revert
+        self.changes: dict[tuple[sa.Table, int], _RowChange] = {}
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    @staticmethod
+    def reverted_values(values: dict[str, Any]) -> dict[str, Any]:
+        """The values of an update history line, prior to the update."""
+        # an insert and update in the one flush/commit can create a
+        # scenario where history.sum() stores a single item list (where the
+        # second entry would normally be None.)  Best to avoid this
+        # situation altogether but have including the len check here as a
+        # boots and braces approach
+        return {
+            k: v[1] if len(v) == 2 else None
+            for k, v in values.items()
+            if isinstance(v, list)
+        }
+
+    @staticmethod
+    def replayed_values(values: dict[str, Any]) -> dict[str, Any]:
+        """The values of an update history line, after the update."""
+        result = {k: v[0] for k, v in values.items() if isinstance(v, list)}
+        if "_last_updated" not in result:
+            # ensure _last_updated is always recorded, even when not a list
+            # (i.e. tests or otherwise generated rapidly)
+            result["_last_updated"] = values["_last_updated"]
+        return result
+
+    @classmethod
+    def line_statement(cls, row: sa.engine.Row, revert: bool) -> Executable:
+        """The statement to revert, or replay, a single history line.
+
+        For when the net changes can not be applied, e.g. a constraint that
+        only holds between the individual changes.
+        """
+        table = metadata.tables[row["table_name"]]
+        operation = row["operation"]
+        if operation == "update":
+            if revert:
+                values = cls.reverted_values(row["values"])
+            else:
+                values = cls.replayed_values(row["values"])
+            return (
+                table.update()
+                .where(table.c.id == row["table_id"])
+                .values(**values)
+            )
+        if revert:
+            operation = "delete" if operation == "insert" else "insert"
+        if operation == "insert":
+            return table.insert().values(**row["values"])
+        return table.delete().where(table.c.id == row["table_id"])
+
+    def add(self, row: sa.engine.Row) -> None:
+        """Add a history line."""
+        table = metadata.tables[row["table_name"]]
+        operation = row["operation"]
+        values = row["values"]
+        if operation == "update":
+            if self.revert:
+                values = self.reverted_values(values)
+            else:
+                values = self.replayed_values(values)
+        elif self.revert:
+            operation = "delete" if operation == "insert" else "insert"
+
+        key = (table, row["table_id"])
+        change = self.changes.get(key)
+        if change is None:
+            existed = operation != "insert"
+            change = _RowChange(existed, existed, {})
+            self.changes[key] = change
+
+        if operation == "insert":
+            change.exists = True
+            change.values = dict(values)
+        elif operation == "delete":
+            change.exists = False
+            change.values = {}
+        else:
+            change.values.update(values)
+
+    def apply(self, connection: sa.engine.Connection) -> set[sa.Table]:
+        """Apply the net changes, inserts then updates in table dependency
+        order then deletes in reverse order.
+
+        :return: the tables changed.
+        """
+        inserts: dict[sa.Table, list[dict[str, Any]]] = {}
+        updates: dict[sa.Table, list[dict[str, Any]]] = {}
+        deletes: dict[sa.Table, list[dict[str, Any]]] = {}
+        for (table, id_), change in sorted(
+            self.changes.items(), key=lambda i: i[0][1]
+        ):
+            if change.exists and not change.existed:
+                inserts.setdefault(table, []).append(change.values)
+            elif change.existed and not change.exists:
+                deletes.setdefault(table, []).append({"_id": id_})
+            elif change.exists and change.values:
+                params = {f"_{k}": v for k, v in change.values.items()}
+                params["_id"] = id_
+                updates.setdefault(table, []).append(params)
+
+        for table in metadata.sorted_tables:
+            for rows in self._group_by_keys(inserts.get(table, [])):
+                logger.debug("inserting %s rows in %s", len(rows), table)
+                connection.execute(table.insert(), rows)
+
+        for table in metadata.sorted_tables:
+            for rows in self._group_by_keys(updates.get(table, [])):
+                logger.debug("updating %s rows in %s", len(rows), table)
+                stmt = (
+                    table.update()
+                    .where(table.c.id == sa.bindparam("_id"))
+                    .values(
+                        {k[1:]: sa.bindparam(k) for k in rows[0] if k != "_id"}
                     )
-                logger.debug("history revert values: %s", row["values"])
-                logger.debug(
-                    "%s history revert stmt: %s", row["operation"], stmt
                 )
-                connection.execute(stmt)
+                connection.execute(stmt, rows)
 
-                if do_callbacks:
-                    for callback in cls.history_revert_callbacks:
-                        callback(table)
+        for table in reversed(metadata.sorted_tables):
+            if rows := deletes.get(table, [])[::-1]:
+                logger.debug("deleting %s rows from %s", len(rows), table)
+                stmt = table.delete().where(table.c.id == sa.bindparam("_id"))
+                connection.execute(stmt, rows)
 
-                stmt = history.delete().where(history.c.id == row["id"])
-                connection.execute(stmt)
+        return set(inserts) | set(updates) | set(deletes)
+
+    @staticmethod
+    def _group_by_keys(rows: list[dict[str, Any]]) -> list[list[dict]]:
+        # executemany requires the same keys in each row of a batch
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        return [
+            group[i : i + HISTORY_BATCH_SIZE]
+            for group in groups.values()
+            for i in range(0, len(group), HISTORY_BATCH_SIZE)
+        ]
 
 
 @event.listens_for(sa.engine.Engine, "connect")
@@ -630,12 +823,220 @@ def _sqlite_fk_pragma(dbapi_connection, _connection_record):
 
 first_connect_callbacks: list[Callable[[], None]] = []
 
+POOL_DEFAULTS: dict[str, int | bool] = {
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+}
+"""Connection pool settings for server (i.e. not SQLite) databases, can be
+overridden per connection, see `bauble.connmgr.ConnectionModel.pool`.
+
+``pool_pre_ping`` tests connections as they are checked out of the pool,
+replacing any dropped by the server or network (e.g. idle connections over a
+VPN).  ``pool_recycle`` (seconds) replaces connections before they are likely
+to be dropped.
+"""
+
+
+def get_pool_args(pool: dict[str, Any] | None) -> dict[str, int | bool]:
+    """Return the `POOL_DEFAULTS` updated with the connection's pool
+    settings, converting any values stored as strings.
+
+    Unknown or invalid settings are logged and ignored.
+    """
+    args = dict(POOL_DEFAULTS)
+    for key, value in (pool or {}).items():
+        default = POOL_DEFAULTS.get(key)
+        if default is None:
+            logger.warning("ignoring unknown pool setting %s", key)
+            continue
+        if isinstance(default, bool):
+            args[key] = str(value).lower() in ("true", "1", "yes")
+            continue
+        try:
+            args[key] = int(value)
+        except ValueError:
+            logger.warning("ignoring invalid pool setting %s=%s", key, value)
+    return args
+
+
+SQLITE_PRAGMAS: dict[str, str] = {
+    "cache_size": "-65536",
+    "mmap_size": "268435456",
+    "temp_store": "MEMORY",
+}
+"""SQLite settings applied to each new connection, can be overridden per
+connection, see `bauble.connmgr.ConnectionModel.pragmas`.
+
+``cache_size`` is in KiB when negative (i.e. 64MiB), ``mmap_size`` in bytes
+(256MiB).
+"""
+
+SQLITE_OPTIONAL_PRAGMAS = ("journal_mode", "synchronous")
+"""SQLite settings only applied when set for the connection.
+
+The journal mode is stored in the database file and WAL does not work over
+network filesystems so it is opt in, per connection, for local files (i.e.
+``{"journal_mode": "WAL"}``).  In WAL mode readers (e.g. the picture and
+label threads) do not block on, or block, a writer and ``synchronous``
+defaults to ``NORMAL``, commits are much faster while still safe against
+application crashes.  A database already in WAL mode stays in it until
+``journal_mode`` is set to ``DELETE``.
+"""
+
+_PRAGMA_VALUE_RE = re.compile(r"-?\w+")
+
+
+def get_sqlite_pragmas(pragmas: dict[str, Any] | None) -> dict[str, str]:
+    """Return the `SQLITE_PRAGMAS` updated with the connection's pragmas.
+
+    Unknown or invalid pragmas are logged and ignored.
+    """
+    result = dict(SQLITE_PRAGMAS)
+    for name, value in (pragmas or {}).items():
+        if name not in SQLITE_PRAGMAS and name not in SQLITE_OPTIONAL_PRAGMAS:
+            logger.warning("ignoring unknown pragma %s", name)
+        elif not _PRAGMA_VALUE_RE.fullmatch(str(value)):
+            logger.warning("ignoring invalid pragma %s=%s", name, value)
+        else:
+            result[name] = str(value)
+    if result.get("journal_mode", "").upper() == "WAL":
+        result.setdefault("synchronous", "NORMAL")
+    return result
+
+
+def _set_sqlite_pragmas(
+    pragmas: dict[str, str], dbapi_connection, _connection_record
+) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+@dataclass
+class PoolStats:
+    """Connection pool usage of an engine since it was opened."""
+
+    connects: int = 0
+    checkouts: int = 0
+    invalidations: int = 0
+    checked_out: int = 0
+    max_checked_out: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def on_connect(self, *_args) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *_args) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def on_checkin(self, *_args) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def on_invalidate(self, _dbapi_conn, _record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+        if exception is not None:
+            logger.warning(
+                "database connection invalidated: %s(%s)",
+                type(exception).__name__,
+                exception,
+            )
+
+
+def track_pool(engine_: Engine) -> PoolStats:
+    """Record the engine's connection pool usage in the returned stats."""
+    stats = PoolStats()
+    event.listen(engine_, "connect", stats.on_connect)
+    event.listen(engine_, "checkout", stats.on_checkout)
+    event.listen(engine_, "checkin", stats.on_checkin)
+    event.listen(engine_, "invalidate", stats.on_invalidate)
+    return stats
+
+
+pool_stats = PoolStats()
+"""Connection pool usage of the current `engine`."""
+
+
+def retry_on_disconnect(session: SASession, func: Callable[[], Any]) -> Any:
+    """Return the result of calling func, an idempotent read in session,
+    calling it a second time if the first failed because the connection was
+    lost (e.g. dropped by the server or network).
+
+    The session is rolled back to release the lost connection, expiring its
+    instances, so only retries if the session has no pending changes.
+    """
+    try:
+        return func()
+    except sa.exc.DBAPIError as e:
+        if (
+            not e.connection_invalidated
+            or session.new
+            or session.dirty
+            or session.deleted
+        ):
+            raise
+        logger.warning("connection lost, retrying: %s", e)
+        session.rollback()
+        return func()
+
+
+SQLITE_ANALYSIS_LIMIT = 1000
+"""The approximate number of rows of each index read by ``ANALYZE`` and
+``PRAGMA optimize`` (``PRAGMA analysis_limit``) so that neither holds the
+write lock for long on a large database.
+"""
+
+
+def optimize(
+    engine_: Engine | None = None, analyze: bool = False, vacuum: bool = False
+) -> None:
+    """Update the query planner's statistics and optionally rebuild the
+    database to reclaim space.  SQLite only, other databases are left to
+    their own maintenance (e.g. PostgreSQL's autovacuum).
+
+    The statistics are sampled, see `SQLITE_ANALYSIS_LIMIT`.
+
+    :param engine_: defaults to the current engine
+    :param analyze: if True runs ``ANALYZE`` on all tables otherwise ``PRAGMA
+        optimize``, which only analyzes tables where it is likely to help.
+    :param vacuum: if True also ``VACUUM``, which needs exclusive access and
+        can take some time on a large database.
+    """
+    engine_ = engine_ or engine
+    if engine_.name != "sqlite":
+        logger.debug("optimize: not required for %s", engine_.name)
+        return
+    statements = [
+        f"PRAGMA analysis_limit={int(SQLITE_ANALYSIS_LIMIT)}",
+        "ANALYZE" if analyze else "PRAGMA optimize",
+    ]
+    if vacuum:
+        statements.append("VACUUM")
+    with engine_.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in statements:
+            logger.debug("optimize: %s", statement)
+            connection.execute(sa.text(statement))
+
 
 def open_conn(
     uri: URL,
     verify: bool = True,
     show_error_dialogs: bool = False,
     poolclass=None,
+    pool: dict[str, Any] | None = None,
+    pragmas: dict[str, Any] | None = None,
 ) -> Engine | None:
     """Open a database connection.  This function sets bauble.db.engine to
     the opened engined.
@@ -655,6 +1056,9 @@ def open_conn(
     :type show_error_dialogs: bool
     :param poolclass: the poolclass to use, if left as None sqlalchemy default
         is used. Used in testing.
+    :param pool: the connection's pool settings, see `POOL_DEFAULTS`.  Not
+        used for SQLite or if poolclass is provided.
+    :param pragmas: the connection's SQLite settings, see `SQLITE_PRAGMAS`.
     """
 
     # ** WARNING: this can print your passwd
@@ -662,10 +1066,14 @@ def open_conn(
     new_engine = None
 
     connect_args = {}
+    pool_args: dict[str, int | bool] = {}
     if uri.drivername == "sqlite":
         logger.debug("sqlite, setting check_same_thread to False")
         # avoid sqlite thread errors
         connect_args = {"check_same_thread": False}
+    elif poolclass is None:
+        pool_args = get_pool_args(pool)
+        logger.debug("pool settings: %s", pool_args)
 
     new_engine = sa.create_engine(
         uri,
@@ -673,7 +1081,15 @@ def open_conn(
         connect_args=connect_args,
         poolclass=poolclass,
         implicit_returning=False,
+        **pool_args,
     )
+    if uri.drivername == "sqlite":
+        sqlite_pragmas = get_sqlite_pragmas(pragmas)
+        logger.debug("sqlite pragmas: %s", sqlite_pragmas)
+        event.listen(
+            new_engine, "connect", partial(_set_sqlite_pragmas, sqlite_pragmas)
+        )
+    new_pool_stats = track_pool(new_engine)
 
     new_engine.connect().close()  # make sure we can connect
 
@@ -683,8 +1099,9 @@ def open_conn(
 
     def _bind():
         """bind metadata to engine and create sessionmaker"""
-        global _Session, engine
+        global _Session, engine, pool_stats
         engine = new_engine
+        pool_stats = new_pool_stats
         metadata.bind = engine  # make engine implicit for metadata
 
         # autoflush=False required or can not put an empty object into the
@@ -1008,12 +1425,109 @@ def get_related_class(model, path):
     return get_related_class(model, path)
 
 
+def yield_per_options(model) -> list:
+    """Loader options that replace any subquery eager loading of the model's
+    relationships with select IN loading.
+
+    Subquery eager loading can not be used with ``Query.yield_per``.
+
+    :param model: sqlalchemy ORM model class
+    """
+    return [
+        selectinload(prop.class_attribute)
+        for prop in model.__mapper__.relationships
+        if prop.lazy == "subquery"
+    ]
+
+
+LOOKUP_CACHE = "lookup_cache"
+"""The `Session.info` key for the lookup cache, see `enable_lookup_cache`."""
+
+
+def enable_lookup_cache(session: SASession) -> None:
+    """Cache the results of `get_or_create` and `get_create_or_update` in the
+    session, by model and values.
+
+    For bulk operations (e.g. importing) that repeatedly look up the same
+    related records.  An entry is dropped when its instance is deleted or
+    the values it was looked up by change, the whole cache is cleared on
+    rollback.  The cache lasts as long as the session.
+    """
+    session.info.setdefault(LOOKUP_CACHE, {})
+
+
+def _lookup_key(session, kwargs, *prefix) -> tuple | None:
+    """The lookup cache key for the values or None if not caching."""
+    if LOOKUP_CACHE not in session.info:
+        return None
+    key = (*prefix, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        # e.g. JSON values
+        return None
+    return key
+
+
+def _key_values_changed(inst, key, deleted) -> bool:
+    """Has the instance been deleted or had any of the values in its lookup
+    cache key changed.
+
+    :param deleted: the session's deleted instances
+    """
+    state = sa.inspect(inst)
+    if state.detached or state.was_deleted or inst in deleted:
+        return True
+    if not state.modified:
+        return False
+    for name, value in key[-1]:
+        if name not in state.attrs:
+            # e.g. hybrid property, can't tell
+            return True
+        if name in state.dict and state.dict[name] != value:
+            return True
+    return False
+
+
+def _get_cached(session, key):
+    if not key:
+        return None
+    cache = session.info[LOOKUP_CACHE]
+    if (inst := cache.get(key)) is not None and _key_values_changed(
+        inst, key, session.deleted
+    ):
+        del cache[key]
+        return None
+    return inst
+
+
+@event.listens_for(SASession, "after_flush")
+def _invalidate_lookup_cache(session, _flush_context):
+    # before the instances are expired on commit
+    if not (cache := session.info.get(LOOKUP_CACHE)):
+        return
+    deleted = session.deleted
+    for key, inst in list(cache.items()):
+        if _key_values_changed(inst, key, deleted):
+            del cache[key]
+
+
+@event.listens_for(SASession, "after_soft_rollback")
+def _clear_lookup_cache(session, _previous_transaction):
+    if cache := session.info.get(LOOKUP_CACHE):
+        cache.clear()
+
+
 def get_or_create(session, model, **kwargs):
-    instance = session.query(model).filter_by(**kwargs).first()
-    if instance:
+    key = _lookup_key(session, kwargs, "get_or_create", model)
+    if (instance := _get_cached(session, key)) is not None:
         return instance
-    instance = model(**kwargs)
-    session.add(instance)
+    instance = session.query(model).filter_by(**kwargs).first()
+    if not instance:
+        instance = model(**kwargs)
+        session.add(instance)
+    if key:
+        session.info[LOOKUP_CACHE][key] = instance
     return instance
 
 
@@ -1025,6 +1539,11 @@ def get_unique_columns(model):
 
     Used by `get_create_or_update`.
     """
+    return list(_get_unique_columns(model))
+
+
+@cache
+def _get_unique_columns(model) -> tuple[str, ...]:
     uniq_cols = []
     if hasattr(model, "__table_args__"):
         from sqlalchemy import UniqueConstraint
@@ -1050,7 +1569,7 @@ def get_unique_columns(model):
     if model.__tablename__ in ["family", "genus"]:
         uniq_cols.append("epithet")
     logger.debug("unique columns: %s", uniq_cols)
-    return uniq_cols
+    return tuple(uniq_cols)
 
 
 def get_existing(session, model, **kwargs):
@@ -1133,6 +1652,19 @@ def get_create_or_update(session, model, create_one_to_one=False, **kwargs):
     for key in kwargs:
         if key not in model.__mapper__.all_orm_descriptors:
             raise ValueError("Model %s has no column %s" % (model, key))
+    cache_key = _lookup_key(
+        session, kwargs, "get_create_or_update", model, create_one_to_one
+    )
+    if (inst := _get_cached(session, cache_key)) is not None:
+        logger.debug("returning cached %s", inst)
+        return inst
+    inst = _get_create_or_update(session, model, create_one_to_one, **kwargs)
+    if cache_key and inst is not None:
+        session.info[LOOKUP_CACHE][cache_key] = inst
+    return inst
+
+
+def _get_create_or_update(session, model, create_one_to_one, **kwargs):
     # first try to get an exact match and return it immediately if found
     try:
         inst = session.query(model).filter_by(**kwargs).one()
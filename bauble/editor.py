@@ -50,6 +50,7 @@ from bauble import db
 from bauble import paths
 from bauble import prefs
 from bauble import utils
+from bauble.completion import update_completion_model
 from bauble.error import CheckConditionError
 from bauble.error import check
 from bauble.i18n import _
@@ -1700,7 +1701,7 @@ class GenericEditorPresenter:
             widget = cast(Gtk.Entry, self.view.widgets[widget])
 
         def add_completions(text):
-            """Reconstruct the widgets model (Gtk.ListStore)"""
+            """Update the widgets model (Gtk.ListStore) in place"""
             if get_completions is None:
                 logger.debug("completion model has static list")
                 # get_completions is None usually means that the
@@ -1708,14 +1709,10 @@ class GenericEditorPresenter:
                 # completions
                 return
 
-            values = get_completions(text)
+            values = list(dict.fromkeys(get_completions(text)))
 
             completion = widget.get_completion()
-            utils.clear_model(completion)
-            completion_model = Gtk.ListStore(object)
-            for v in values:
-                completion_model.append([v])
-            completion.set_model(completion_model)
+            update_completion_model(completion, values, object)
 
             logger.debug("completions to add: %s", values)
 
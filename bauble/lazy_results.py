@@ -0,0 +1,234 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+A virtual, flat, Gtk.TreeModel for very large search results.
+
+Only the identity keys of the results are held in memory, the objects
+themselves are loaded a page at a time as rows are drawn and only a limited
+number of pages are kept.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+from collections import Counter
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Iterable
+from itertools import groupby
+
+from gi.repository import GObject
+from gi.repository import Gtk
+from sqlalchemy import select
+from sqlalchemy import union
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from bauble import db
+
+LAZY_PAGE_SIZE = 500
+"""The number of objects loaded at a time."""
+
+LAZY_MAX_PAGES = 20
+"""The maximum number of pages kept loaded."""
+
+
+def get_result_keys(
+    session: Session,
+    queries: Iterable[Query],
+    objects: Iterable[db.Domain],
+    order_by: Callable[[type], Callable[[Query], Query] | None],
+) -> list[tuple]:
+    """Get the identity keys for the results of the id only queries and
+    the objects supplied, sorted, without duplicates and grouped by type.
+
+    :param session: the session to query
+    :param queries: queries that return the ids of their entity
+    :param objects: any other results
+    :param order_by: for each type returns a callable that will apply the
+        appropriate `order_by` to a query of its ids, or None to sort by id.
+    """
+    by_type: dict[type, list[Query]] = {}
+    for query in queries:
+        cls = query.column_descriptions[0]["entity"]
+        by_type.setdefault(cls, []).append(query)
+
+    extra: dict[type, list[int]] = {}
+    for obj in objects:
+        extra.setdefault(type(obj), []).append(obj.id)
+
+    keys: list[tuple] = []
+    for cls in sorted(set(by_type).union(extra), key=str):
+        ids: dict[int, None] = {}
+        if cls_queries := by_type.get(cls):
+            stmt = union(*(i.statement for i in cls_queries)).subquery()
+            query = session.query(cls.id).filter(cls.id.in_(select(stmt.c[0])))
+            if sort := order_by(cls):
+                query = sort(query)
+            else:
+                query = query.order_by(cls.id)
+            ids.update((i, None) for i, in query)
+        ids.update((i, None) for i in sorted(extra.get(cls, [])))
+        keys.extend(identity_key(cls, i) for i in ids)
+
+    return keys
+
+
+class LazyResultsModel(GObject.Object, Gtk.TreeModel):
+    """A single column, flat, Gtk.TreeModel of database objects that are only
+    loaded, a page at a time, when required.
+
+    Rows for objects that no longer exist return None.
+
+    :param session: the session to load objects in
+    :param keys: the identity keys of the rows, in order
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        keys: list[tuple],
+        page_size: int = LAZY_PAGE_SIZE,
+        max_pages: int = LAZY_MAX_PAGES,
+    ) -> None:
+        super().__init__()
+        self.session = session
+        self.keys = keys
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages: OrderedDict[int, list[db.Domain | None]] = OrderedDict()
+        self._index: dict[tuple, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def type_counts(self) -> Counter[type]:
+        """The number of rows of each type."""
+        return Counter(i[0] for i in self.keys)
+
+    def _load_page(self, page: int) -> list[db.Domain | None]:
+        logger.debug("loading page %s", page)
+        start = page * self.page_size
+        keys = self.keys[start : start + self.page_size]
+        loaded: dict[tuple, db.Domain] = {}
+
+        for cls, group in groupby(keys, key=lambda i: i[0]):
+            ids = [i[1][0] for i in group]
+            for obj in self.session.query(cls).filter(cls.id.in_(ids)):
+                loaded[identity_key(cls, obj.id)] = obj
+
+        return [loaded.get(key) for key in keys]
+
+    def get_object(self, index: int) -> db.Domain | None:
+        """The object in the row at index, loading it if required."""
+        page = index // self.page_size
+        if page in self._pages:
+            self._pages.move_to_end(page)
+        else:
+            self._pages[page] = self._load_page(page)
+            # dropping the references is enough, the session's identity map
+            # is weak referencing
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return self._pages[page][index % self.page_size]
+
+    def find(self, key: tuple) -> list[Gtk.TreeIter]:
+        """Get a Gtk.TreeIter to the row of the identity key, if any."""
+        if self._index is None:
+            self._index = {k: i for i, k in enumerate(self.keys)}
+        index = self._index.get(key)
+        if index is None:
+            return []
+        return [self._create_iter(index)]
+
+    def expire(self, keys: Iterable[tuple]) -> None:
+        """Reload the rows of these identity keys when next required."""
+        for treeiter in [i for key in keys for i in self.find(key)]:
+            index = treeiter.user_data
+            self._pages.pop(index // self.page_size, None)
+            self.row_changed(Gtk.TreePath.new_from_indices([index]), treeiter)
+
+    def clear_cache(self) -> None:
+        """Reload all rows when next required."""
+        self._pages.clear()
+
+    @staticmethod
+    def _create_iter(index: int) -> Gtk.TreeIter:
+        treeiter = Gtk.TreeIter()
+        treeiter.user_data = index
+        return treeiter
+
+    def do_get_flags(self) -> Gtk.TreeModelFlags:
+        return Gtk.TreeModelFlags.LIST_ONLY | Gtk.TreeModelFlags.ITERS_PERSIST
+
+    def do_get_n_columns(self) -> int:
+        return 1
+
+    def do_get_column_type(self, _index: int) -> GObject.GType:
+        return GObject.TYPE_PYOBJECT
+
+    def do_get_iter(
+        self, path: Gtk.TreePath
+    ) -> tuple[bool, Gtk.TreeIter | None]:
+        indices = path.get_indices()
+        if len(indices) == 1 and 0 <= indices[0] < len(self.keys):
+            return True, self._create_iter(indices[0])
+        return False, None
+
+    def do_get_path(self, treeiter: Gtk.TreeIter) -> Gtk.TreePath:
+        return Gtk.TreePath.new_from_indices([treeiter.user_data])
+
+    def do_get_value(self, treeiter: Gtk.TreeIter, _column: int):
+        return self.get_object(treeiter.user_data)
+
+    def do_iter_next(self, treeiter: Gtk.TreeIter) -> bool:
+        if treeiter.user_data + 1 < len(self.keys):
+            treeiter.user_data += 1
+            return True
+        return False
+
+    def do_iter_previous(self, treeiter: Gtk.TreeIter) -> bool:
+        if treeiter.user_data > 0:
+            treeiter.user_data -= 1
+            return True
+        return False
+
+    def do_iter_children(
+        self, parent: Gtk.TreeIter | None
+    ) -> tuple[bool, Gtk.TreeIter | None]:
+        return self.do_iter_nth_child(parent, 0)
+
+    def do_iter_has_child(self, _treeiter: Gtk.TreeIter) -> bool:
+        return False
+
+    def do_iter_n_children(self, treeiter: Gtk.TreeIter | None) -> int:
+        if treeiter is None:
+            return len(self.keys)
+        return 0
+
+    def do_iter_nth_child(
+        self, parent: Gtk.TreeIter | None, n: int
+    ) -> tuple[bool, Gtk.TreeIter | None]:
+        if parent is None and 0 <= n < len(self.keys):
+            return True, self._create_iter(n)
+        return False, None
+
+    def do_iter_parent(
+        self, _child: Gtk.TreeIter
+    ) -> tuple[bool, Gtk.TreeIter | None]:
+        return False, None
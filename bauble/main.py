@@ -26,17 +26,21 @@ from typing import cast
 
 from gi.repository import Gdk
 from gi.repository import Gio
+from gi.repository import GLib
 from gi.repository import Gtk
 from sqlalchemy.engine import URL
 
 import bauble
 from bauble import db
 from bauble import error as err
+from bauble import maintenance
 from bauble import paths
 from bauble import pluginmgr
 from bauble import prefs
+from bauble import startup
 from bauble import utils
 from bauble.connmgr import ConnectionManagerDialog
+from bauble.connmgr import ConnectionModel
 from bauble.connmgr import start_connection_manager
 from bauble.i18n import _
 
@@ -55,9 +59,11 @@ class Application(Gtk.Application):
     def do_startup(self, *args, **kwargs) -> None:
         # first
         Gtk.Application.do_startup(self, *args, **kwargs)
+        startup.start()
 
         # initialise prefs
-        prefs.prefs.init()
+        with startup.timed("prefs"):
+            prefs.prefs.init()
 
         # set the logging level to debug level per module as listed in prefs
         # reset to WARNING (set DEBUG in bauble.__init__ to capture early)
@@ -76,18 +82,27 @@ class Application(Gtk.Application):
             logger.debug("bailing early, no connection")
             return
 
-        self._load_plugins()
-        bauble.gui.init()
+        with startup.timed("load plugins"):
+            self._load_plugins()
+        with startup.timed("gui init"):
+            bauble.gui.init()
         # add any prefs menus etc.
-        prefs.post_gui()
-        db.post_gui()
-        bauble.gui.show()
+        with startup.timed("prefs post_gui"):
+            prefs.post_gui()
+        with startup.timed("db post_gui"):
+            db.post_gui()
+        with startup.timed("show main window"):
+            bauble.gui.show()
 
-        if not self._post_loop(open_exc):
+        with startup.timed("init plugins"):
+            post_loop = self._post_loop(open_exc)
+        if not post_loop:
             self.quit()
             prefs.prefs[bauble.CONN_DONT_ASK_PREF] = False
             return
 
+        GLib.idle_add(self._finish_startup)
+
         logger.info(
             "This version installed on: %s; "
             "This version installed at: %s; "
@@ -109,6 +124,16 @@ class Application(Gtk.Application):
             clip = Gtk.Clipboard.get_default(display)
             clip.set_can_store(None)
 
+    @staticmethod
+    def _finish_startup() -> bool:
+        """Idle callback to log the startup timings once the deferred work has
+        completed.
+        """
+        if pluginmgr.deferred_pending():
+            return True
+        startup.finish()
+        return False
+
     def _get_connection(self) -> None | Literal[False] | Exception:
         # allow opening the app in current state when debuging tests
         if getattr(bauble.db, "engine", None):
@@ -125,16 +150,18 @@ class Application(Gtk.Application):
                     self.quit()
                     return False
                 bauble.conn_name = conn_name
+            model = ConnectionModel(conn_name)
+            settings = {"pool": model.pool, "pragmas": model.pragmas}
             try:
                 # testing, database initialized at current version.  or we
                 # get two different exceptions.
-                if db.open_conn(uri, True, True):
+                if db.open_conn(uri, True, True, **settings):
                     prefs.prefs[bauble.CONN_DEFAULT_PREF] = conn_name
                     break
                 uri = conn_name = None
             except err.VersionError as e:
                 logger.warning("%s(%s)", type(e).__name__, e)
-                db.open_conn(cast(URL, uri), False)
+                db.open_conn(cast(URL, uri), False, **settings)
                 break
             except (
                 err.EmptyDatabaseError,
@@ -146,7 +173,7 @@ class Application(Gtk.Application):
                 open_exc = e
                 # reopen without verification so that db.Session and
                 # db.engine, db.metadata will be bound to an engine
-                db.open_conn(cast(URL, uri), False)
+                db.open_conn(cast(URL, uri), False, **settings)
                 break
             except err.DatabaseError as e:
                 logger.debug("%s(%s)", type(e).__name__, e)
@@ -204,6 +231,7 @@ class Application(Gtk.Application):
                         return False
             else:
                 pluginmgr.init()
+                maintenance.schedule()
         except Exception as e:  # pylint: disable=broad-except
             logger.warning(
                 "%s\n%s(%s)", traceback.format_exc(), type(e).__name__, e
@@ -0,0 +1,133 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Scheduled database maintenance.
+
+Each time a SQLite database is opened `schedule` runs `bauble.db.optimize` in
+a low priority background task, ``ANALYZE`` of all tables and ``VACUUM`` are
+run when due, according to the preferences.  Both ``ANALYZE`` and ``PRAGMA
+optimize`` are limited to a sample of each index (see
+`bauble.db.SQLITE_ANALYSIS_LIMIT`) so they do not hold the write lock for
+long.  The time each was last run is stored in the database's meta table.
+
+When opted in to (`SEARCH_TEXT_INDEX_PREF`) the search text indexes are also
+created (see `bauble.search.text_index.create_indexes`), for any database that
+supports them.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from sqlalchemy.orm import Session
+
+from bauble import db
+from bauble import meta
+from bauble import prefs
+from bauble import task
+from bauble.i18n import _
+from bauble.search import text_index
+from bauble.search.text_index import SEARCH_TEXT_INDEX_PREF
+
+ANALYZE_DAYS_PREF = "bauble.maintenance.analyze_days"
+"""Preference key, the number of days between ``ANALYZE`` runs, of all
+tables, 0 to never run (``PRAGMA optimize`` is still run on each
+connection).
+"""
+
+VACUUM_DAYS_PREF = "bauble.maintenance.vacuum_days"
+"""Preference key, the number of days between ``VACUUM`` runs, 0 (the
+default) to never run.
+"""
+
+LAST_ANALYZE_KEY = "last_analyze"
+LAST_VACUUM_KEY = "last_vacuum"
+
+
+def is_due(key: str, days: int) -> bool:
+    """Has it been at least days since the maintenance stored under the meta
+    key was last run.
+    """
+    if days <= 0:
+        return False
+    last = meta.get_cached_value(key)
+    if not last:
+        return True
+    try:
+        last_run = datetime.fromisoformat(last)
+    except ValueError:
+        logger.debug("invalid %s value %s", key, last)
+        return True
+    return datetime.now(timezone.utc) - last_run >= timedelta(days=days)
+
+
+def _set_last_run(session: Session, key: str) -> None:
+    row = session.query(meta.BaubleMeta).filter_by(name=key).first()
+    row = row or meta.BaubleMeta(name=key)
+    row.value = datetime.now(timezone.utc).isoformat()
+    session.add(row)
+
+
+def run_maintenance(
+    session: Session, bg_task: task.BackgroundTask, analyze: bool, vacuum: bool
+) -> None:
+    """Background task function, see `bauble.task.submit`."""
+    bg_task.progress(message=_("optimizing database"))
+    db.optimize(session.get_bind(), analyze=analyze, vacuum=vacuum)
+    if analyze:
+        _set_last_run(session, LAST_ANALYZE_KEY)
+    if vacuum:
+        _set_last_run(session, LAST_VACUUM_KEY)
+    session.commit()
+
+
+def create_text_indexes(
+    _session: Session, bg_task: task.BackgroundTask
+) -> None:
+    """Background task function, see `bauble.task.submit`."""
+    bg_task.progress(message=_("creating search indexes"))
+    text_index.create_indexes()
+
+
+def schedule() -> task.BackgroundTask | None:
+    """Queue the maintenance for the current connection.
+
+    :return: the SQLite maintenance task, if queued.
+    """
+    if prefs.prefs.get(SEARCH_TEXT_INDEX_PREF, False):
+        task.submit(
+            create_text_indexes,
+            name=_("search index creation"),
+            priority=task.PRIORITY_LOW,
+        )
+    if db.engine.name != "sqlite":
+        return None
+    analyze = is_due(LAST_ANALYZE_KEY, prefs.prefs.get(ANALYZE_DAYS_PREF, 7))
+    vacuum = is_due(LAST_VACUUM_KEY, prefs.prefs.get(VACUUM_DAYS_PREF, 0))
+    logger.debug(
+        "scheduling maintenance analyze=%s vacuum=%s", analyze, vacuum
+    )
+    return task.submit(
+        run_maintenance,
+        analyze,
+        vacuum,
+        name=_("database maintenance"),
+        priority=task.PRIORITY_LOW,
+    )
@@ -32,6 +32,10 @@ populates the plugins dict (happens in load())
 installed plugins in to the registry (happens in load())
 
 3. initialize the plugins (happens in init())
+
+4. run any deferred work (``Plugin.deferred_init`` and anything queued with
+``defer()``) once the main window has been shown (or at the end of init() when
+there is no GUI)
 """
 from __future__ import annotations
 
@@ -45,6 +49,7 @@ import traceback
 import types
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Callable
 from collections.abc import Sequence
 from graphlib import CycleError
 from graphlib import TopologicalSorter
@@ -55,6 +60,7 @@ from typing import Iterable
 from typing import Literal
 from typing import Protocol
 
+from gi.repository import GLib
 from gi.repository import Gtk  # noqa
 from sqlalchemy import Column
 from sqlalchemy import Unicode
@@ -65,6 +71,7 @@ import bauble.plugins
 from bauble import db
 from bauble import paths
 from bauble import prefs
+from bauble import startup
 from bauble import utils
 from bauble.error import BaubleError
 from bauble.i18n import _
@@ -72,6 +79,53 @@ from bauble.search import parser
 
 plugins: dict[str, Plugin] = {}
 commands: dict[str | None, type[CommandHandler]] = {}
+_deferred: list[tuple[str, Callable[[], None]]] = []
+
+
+def defer(func: Callable[[], None], name: str | None = None) -> None:
+    """Queue work that is not needed to show the main window.
+
+    Deferred work is run, one item per main loop iteration, once the main
+    window has been shown.  If there is no GUI it is run at the end of
+    ``init``.
+
+    Queuing work with the same name as work that has not yet run replaces it
+    (e.g. when ``init`` is called again after changing connection.)
+
+    :param func: callable that takes no arguments
+    :param name: the name to use in logs and startup timings
+    """
+    name = name or getattr(func, "__qualname__", str(func))
+    _deferred[:] = [i for i in _deferred if i[0] != name]
+    _deferred.append((name, func))
+
+
+def deferred_pending() -> bool:
+    """Is there any deferred work still to run."""
+    return bool(_deferred)
+
+
+def _run_next_deferred() -> bool:
+    """Run the next item of deferred work, returns True if there is more to
+    run (i.e. suitable for ``GLib.idle_add``)
+    """
+    if not _deferred:
+        return False
+    name, func = _deferred.pop(0)
+    logger.debug("running deferred %s", name)
+    try:
+        with startup.timed(f"deferred {name}"):
+            func()
+    except Exception as e:  # pylint: disable=broad-except
+        logger.error("deferred %s failed: %s(%s)", name, type(e).__name__, e)
+        logger.info(traceback.format_exc())
+    return bool(_deferred)
+
+
+def run_deferred() -> None:
+    """Run all the deferred work now."""
+    while _run_next_deferred():
+        pass
 
 
 def register_command(handler: type[CommandHandler]) -> None:
@@ -180,6 +234,8 @@ def init(force: bool = False) -> None:
     4. Update prefs if the plugin supplies any defaults
     5. Build the tools menu from the tools provided by plugins
     6. Update the search parser's domains list from the plugins
+    7. Run, or schedule, each plugin's deferred_init() and any other deferred
+       work
 
     NOTE: This is called after the GUI has been created and a connection has
     been established to a database with db.open_conn()
@@ -222,7 +278,9 @@ def init(force: bool = False) -> None:
                     "dependencies for {plugin.name} plugin are missing"
                 )
 
-            plugin.init()
+            with startup.timed(f"init {type(plugin).__name__}"):
+                plugin.init()
+            defer(plugin.deferred_init, type(plugin).__name__)
             logger.debug("plugin %s initialized", plugin)
         except Exception as e:  # pylint: disable=broad-except
             logger.error("%s(%s)", type(e).__name__, e)
@@ -248,9 +306,16 @@ def init(force: bool = False) -> None:
     _update_prefs(registered)
 
     if bauble.gui is not None:
-        bauble.gui.build_tools_menu()
+        with startup.timed("build tools menu"):
+            bauble.gui.build_tools_menu()
 
-    parser.update_domains()
+    with startup.timed("update search domains"):
+        parser.update_domains()
+
+    if bauble.gui is None:
+        run_deferred()
+    else:
+        GLib.idle_add(_run_next_deferred)
 
 
 def get_config_files(registered: Iterable[Plugin]) -> list[Path]:
@@ -502,6 +567,14 @@ class Plugin:
     def init(cls) -> None:
         """Called at application startup"""
 
+    @classmethod
+    def deferred_init(cls) -> None:
+        """Called after ``init``, once the main window has been shown.
+
+        Use for setup that is slow and not needed to show the main window (see
+        also ``defer``).
+        """
+
     @classmethod
     def install(cls, import_defaults: bool = True) -> None:
         """Called when a new plugin is installed.
@@ -617,7 +690,8 @@ def _find_plugins(path: str) -> tuple[list[Plugin], dict[str, BaseException]]:
         mod: types.ModuleType | None = None
 
         try:
-            mod = import_module(name, "bauble.plugins")
+            with startup.timed(f"import {name}"):
+                mod = import_module(name, "bauble.plugins")
         except ModuleNotFoundError as e:
             logger.debug(
                 "Could not import the %s module. %s(%s)",
@@ -50,7 +50,6 @@ from .accession import AccessionEditor
 from .accession import AccessionInfoBox
 from .accession import acc_context_menu
 from .accession import edit_callback as acc_edit_callback
-from .garden_map import LocationSearchMap
 from .institution import Institution
 from .institution import InstitutionCommand
 from .institution import InstitutionTool
@@ -161,6 +160,7 @@ class GardenPlugin(pluginmgr.Plugin):
                 else utils.natsort_key(obj)
             ),
             activated_callback=acc_edit_callback,
+            order_by=lambda query: query.order_by(Accession.code),
         )
 
         mapper_search.add_meta(("location", "loc"), Location, ["name", "code"])
@@ -171,6 +171,7 @@ class GardenPlugin(pluginmgr.Plugin):
             infobox=cls.location_infobox,
             context_menu=loc_context_menu,
             activated_callback=loc_edit_callback,
+            order_by=lambda query: query.order_by(Location.code),
         )
 
         mapper_search.add_meta(("plant", "planting"), Plant, ["code"])
@@ -191,6 +192,9 @@ class GardenPlugin(pluginmgr.Plugin):
                 else utils.natsort_key(obj)
             ),
             activated_callback=plant_edit_callback,
+            order_by=lambda query: query.join(Accession).order_by(
+                Accession.code, Plant.code
+            ),
         )
 
         mapper_search.add_meta(
@@ -379,23 +383,36 @@ class GardenPlugin(pluginmgr.Plugin):
                 bauble.gui.add_action("set_plant_code_format", set_code_format)
                 bauble.gui.options_menu.append_item(code_item)
 
-        if not multiprocessing.parent_process():
-            from .garden_map import expunge_garden_map
-            from .garden_map import setup_garden_map
-
-            # incase of changing connection from menu (should do nothing if a
-            # map doesn't already exist)
-            expunge_garden_map()
-
-            if institution.geo_latitude and institution.geo_longitude:
-                logger.debug("setting up garden map")
-                setup_garden_map()
-                loc_map = LocationSearchMap()
-                loc_map.clear_locations()
-                DefaultView.main_widget = loc_map
-            else:
-                logger.debug("removing garden map")
-                DefaultView.main_widget = None
+    @classmethod
+    def deferred_init(cls):
+        if multiprocessing.parent_process():
+            return
+
+        # NOTE imported here as OsmGpsMap is slow to load
+        from .garden_map import LocationSearchMap
+        from .garden_map import expunge_garden_map
+        from .garden_map import setup_garden_map
+
+        # incase of changing connection from menu (should do nothing if a
+        # map doesn't already exist)
+        expunge_garden_map()
+
+        institution = Institution()
+        if institution.geo_latitude and institution.geo_longitude:
+            logger.debug("setting up garden map")
+            setup_garden_map()
+            loc_map = LocationSearchMap()
+            loc_map.clear_locations()
+            DefaultView.main_widget = loc_map
+        else:
+            logger.debug("removing garden map")
+            DefaultView.main_widget = None
+
+        # home may already be showing
+        if bauble.gui is not None:
+            view = bauble.gui.get_view()
+            if isinstance(view, DefaultView):
+                view.update()
 
 
 def init_location_comboentry(presenter, combo, on_select):
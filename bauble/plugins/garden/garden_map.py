@@ -22,14 +22,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 import threading
+import time
 import urllib.parse
 from abc import ABC
 from abc import abstractmethod
 from collections.abc import Callable
+from collections.abc import Iterator
 from collections.abc import Sequence
 from dataclasses import astuple
 from dataclasses import dataclass
-from itertools import chain
+from functools import partial
+from itertools import count
 from math import hypot
 from pathlib import Path
 from typing import TypedDict
@@ -55,6 +58,7 @@ import bauble
 from bauble import db
 from bauble import paths
 from bauble import prefs
+from bauble import task
 from bauble import utils
 from bauble.i18n import _
 from bauble.pluginmgr import Viewable
@@ -70,6 +74,11 @@ from bauble.view import select_in_search_results
 from .institution import Institution
 from .location import Location
 from .plant import Plant
+from .tile_cache import MBTilesCache
+from .tile_cache import TileServer
+from .tile_cache import get_url_fetcher
+from .tile_cache import seed
+from .tile_cache import tile_cache_dir
 
 MAP_TILES_PREF_KEY = "garden.garden_map.base_tiles"
 """
@@ -81,6 +90,35 @@ MAP_TILES_PROXY_PREF_KEY = "garden.garden_map.base_tiles_proxy"
 The preferences key for the proxy for the tiles URI if required.
 """
 
+MAP_TILE_CACHE_PREF_KEY = "garden.garden_map.tile_cache"
+"""
+The preferences key for whether to serve map tiles via the offline tile cache.
+"""
+
+MAP_TILE_CACHE_SIZE_PREF_KEY = "garden.garden_map.tile_cache_size"
+"""
+The preferences key for the maximum size, in megabytes, of each map source's
+offline tile cache.
+"""
+
+MAP_TILE_CACHE_SEED_ZOOMS = 3
+"""
+The number of zoom levels, beyond the current, to cache when caching the tiles
+in view.
+"""
+
+MAP_POPULATE_FIRST_BATCH_SIZE = 100
+"""
+The number of plants to add to the map in the first batch when populating, kept
+small so the first plants are drawn quickly.
+"""
+
+MAP_POPULATE_BATCH_SIZE = 1000
+"""
+The number of plants to add to the map in each subsequent batch when
+populating.
+"""
+
 MAP_PLANT_COLOUR_PREF_KEY = "garden.garden_map.plant_colour"
 """
 The preferences key for the colour of plants on the map that are not selected.
@@ -256,6 +294,8 @@ colours: dict[str, Colour] = {
 
 glib_events: dict[int, GLib.Source] = {}
 
+glib_batch_events: dict[int, GLib.Source] = {}
+
 
 class MapItem(ABC):
     """Base class for the various OsmGpsMap map item adaptors."""
@@ -476,11 +516,21 @@ MAP_ADAPTORS = {"Polygon": MapPoly, "LineString": MapLine, "Point": MapPoint}
 
 def map_item_factory(obj: Plant | Location, colour: Colour) -> MapItem | None:
     """Creates an appropriate MapItem for the supplied obj."""
-    geojson = getattr(obj, "geojson", None)
+    return map_item_from_geojson(obj.id, getattr(obj, "geojson", None), colour)
+
+
+def map_item_from_geojson(
+    id_: int, geojson: dict | None, colour: Colour
+) -> MapItem | None:
+    """Creates an appropriate MapItem for the supplied id and geojson.
+
+    Does not create any OsmGpsMap objects so is safe to use outside the main
+    thread.
+    """
     if geojson:
         if map_type := geojson.get("type"):
             if adaptor := MAP_ADAPTORS.get(map_type):
-                return adaptor(obj.id, geojson, colour)
+                return adaptor(id_, geojson, colour)
     return None
 
 
@@ -498,6 +548,7 @@ class GardenMap(Gtk.Paned):  # pylint: disable=too-many-instance-attributes
     loc_colour_combo = cast(Gtk.ComboBox, Gtk.Template.Child())
     loc_selected_colour_combo = cast(Gtk.ComboBox, Gtk.Template.Child())
     colour_liststore = cast(Gtk.ListStore, Gtk.Template.Child())
+    cache_tiles_button = cast(Gtk.Button, Gtk.Template.Child())
 
     def __init__(self, map_: OsmGpsMap.Map) -> None:
         super().__init__()
@@ -506,6 +557,9 @@ class GardenMap(Gtk.Paned):  # pylint: disable=too-many-instance-attributes
         self.set_tiles_from_prefs()
 
         self.map_box.pack_start(self.map_, True, True, 0)
+        self.cache_tiles_button.set_visible(tile_cache_enabled())
+        self.seed_thread: threading.Thread | None = None
+        self.seed_event = threading.Event()
 
         self.reset_item_colour: Callable[[], None] | None = None
 
@@ -558,6 +612,51 @@ class GardenMap(Gtk.Paned):  # pylint: disable=too-many-instance-attributes
         logger.debug("setting base tiles to %s", text)
         self.set_tiles_from_prefs()
 
+    @Gtk.Template.Callback()
+    def on_cache_tiles_button_clicked(self, _button: Gtk.Button) -> None:
+        if self.seed_thread and self.seed_thread.is_alive():
+            logger.debug("tile cache seeding already running")
+            return
+        top_left, bottom_right = self.map_.get_bbox()
+        max_lat, min_long = top_left.get_degrees()
+        min_lat, max_long = bottom_right.get_degrees()
+        zoom = self.map_.props.zoom
+        max_zoom = min(
+            zoom + MAP_TILE_CACHE_SEED_ZOOMS, self.map_.props.max_zoom
+        )
+        base_tiles = prefs.prefs.get(MAP_TILES_PREF_KEY, 1)
+        self.seed_event.clear()
+        self.seed_thread = threading.Thread(
+            target=self._seed_worker,
+            args=(base_tiles, (max_lat, min_lat, max_long, min_long)),
+            kwargs={"min_zoom": zoom, "max_zoom": max_zoom},
+        )
+        self.seed_thread.start()
+
+    def _seed_worker(
+        self,
+        base_tiles: int,
+        bbox: tuple[float, float, float, float],
+        min_zoom: int,
+        max_zoom: int,
+    ) -> None:
+        server = get_tile_server()
+        cache = get_tile_cache(base_tiles)
+        fetch = server.fetchers.get(str(base_tiles))
+        if not fetch:
+            return
+        done = total = 0
+        msg = _("Caching map tiles: %(done)s of %(total)s")
+        for done, total in seed(
+            cache, fetch, bbox, min_zoom, max_zoom, self.seed_event
+        ):
+            if done % 20 == 0:
+                GLib.idle_add(
+                    task.set_message, msg % {"done": done, "total": total}
+                )
+        GLib.idle_add(task.clear_messages)
+        logger.debug("cached %s of %s tiles: %s", done, total, cache.stats())
+
     def _set_colour_prefs_from_combo(
         self, combo: Gtk.ComboBox, pref_key: str
     ) -> None:
@@ -639,8 +738,7 @@ class GardenMap(Gtk.Paned):  # pylint: disable=too-many-instance-attributes
         return options
 
     def set_tiles_from_prefs(self) -> None:
-        base_tiles = prefs.prefs.get(MAP_TILES_PREF_KEY, 1)
-        self.map_.set_property("map-source", OsmGpsMap.MapSource_t(base_tiles))
+        set_map_source(self.map_)
 
 
 class LocationSearchMap(Gtk.Frame):
@@ -652,7 +750,8 @@ class LocationSearchMap(Gtk.Frame):
 
     def __init__(self) -> None:
         super().__init__(label=_("Location Search"))
-        proxy = get_map_tile_proxy()
+        # requests to the local tile server must not go via a proxy
+        proxy = None if tile_cache_enabled() else get_map_tile_proxy()
         self.map_ = OsmGpsMap.Map(proxy_uri=proxy)
         self.map_.layer_add(
             OsmGpsMap.MapOsd(
@@ -708,8 +807,7 @@ class LocationSearchMap(Gtk.Frame):
         """
         logger.debug("updating LocationSearchMap")
 
-        base_tiles = prefs.prefs.get(MAP_TILES_PREF_KEY, 1)
-        self.map_.set_property("map-source", OsmGpsMap.MapSource_t(base_tiles))
+        set_map_source(self.map_)
         self.map_.polygon_remove_all()
         self.map_.image_remove_all()
 
@@ -844,6 +942,9 @@ class SearchViewMapPresenter:
         self.search_loc: str = ""
         self.add_to_search = False
         self._resize_timer_id: int | None = None
+        self._batch_ids = count()
+        self._populate_start = 0.0
+        self.populate_timings: dict[str, float] = {}
 
     @staticmethod
     def is_visible() -> bool:
@@ -942,7 +1043,7 @@ class SearchViewMapPresenter:
         if not model or plant is None:
             return
 
-        if utils.tree_model_has(model, plant):
+        if search_view.find_rows(plant):
             itr = select_in_search_results(plant)
             path = model.get_path(itr)
             search_view.results_view.scroll_to_cell(path, None, True, 0.5, 0.0)
@@ -951,7 +1052,7 @@ class SearchViewMapPresenter:
 
         for objs in plant.parent_objects():
             for obj in objs:
-                if found := utils.search_tree_model(model, obj):
+                if found := search_view.find_rows(obj):
                     logger.debug("found = %s", obj)
                     itr = found[0]
                     path = model.get_path(itr)
@@ -960,7 +1061,7 @@ class SearchViewMapPresenter:
                         search_view.results_view, itr, path
                     )
                     search_view.results_view.expand_to_path(path)
-                    if utils.tree_model_has(model, plant):
+                    if search_view.find_rows(plant):
                         # select, scroll to centre and return
                         itr = select_in_search_results(plant)
                         path = model.get_path(itr)
@@ -1065,41 +1166,74 @@ class SearchViewMapPresenter:
     def on_destroy(self, *_args) -> None:
         """Cancel running threads on exit"""
         self.thread_event.set()
+        self.garden_map.seed_event.set()
 
     def _populate_worker(self, results: Sequence[db.Domain]) -> None:
+        """Create the map items for all plants pertinent to results and hand
+        them to the main loop, in batches, to add to the map.
+        """
         if len(results) == 1 and isinstance(results[0], str):
             return
 
-        # avoid cicular import
-        from ..report import get_plants_pertinent_to
+        self._populate_start = time.perf_counter()
+        self.populate_timings.clear()
+        batch: list[MapItem] = []
+        batch_size = MAP_POPULATE_FIRST_BATCH_SIZE
 
-        # get_plants.. using separate session (none provided) avoids messing up
-        # history on deferred geojson column
-        # chunk for large searches, MSSQL will fail over ~2600
-        for plant in chain.from_iterable(
-            get_plants_pertinent_to(chunk)
-            for chunk in utils.chunks(results, 1000)
-        ):
-            if plant.id in self.plt_items:
+        for id_, geojson, active in get_plant_map_rows(results):
+            if id_ in self.plt_items:
                 # previously added
                 continue
 
             if self.thread_event.is_set():
-                glib_events.clear()
                 break
-            if plant.active:
+            if active:
                 colour = self.garden_map.map_plant_colour
             else:
                 colour = self.garden_map.map_plant_dead_colour
-            map_item = map_item_factory(plant, colour)
+            map_item = map_item_from_geojson(id_, geojson, colour)
             if map_item:
-                self.plt_items[plant.id] = map_item
-                source = GLib.idle_source_new()
-                source.set_callback(map_item.add_to_map, self.garden_map.map_)
-                source.attach()
-                glib_events[plant.id] = source
+                self.plt_items[id_] = map_item
+                batch.append(map_item)
+                if len(batch) >= batch_size:
+                    self._schedule_batch(batch)
+                    batch = []
+                    batch_size = MAP_POPULATE_BATCH_SIZE
+
+        if not self.thread_event.is_set():
+            self._schedule_batch(batch, last=True)
         self.populated = True
 
+    def _schedule_batch(
+        self, batch: list[MapItem], last: bool = False
+    ) -> None:
+        """Add an idle source to the main loop to add a batch of map items."""
+        if not batch and not last:
+            return
+        batch_id = next(self._batch_ids)
+        source = GLib.idle_source_new()
+        source.set_callback(
+            partial(self._add_batch_to_map, batch, last), batch_id
+        )
+        glib_batch_events[batch_id] = source
+        source.attach()
+
+    def _add_batch_to_map(
+        self, batch: list[MapItem], last: bool, batch_id: int
+    ) -> bool:
+        if glib_batch_events.pop(batch_id, None) is None:
+            # cancelled
+            return GLib.SOURCE_REMOVE
+        for map_item in batch:
+            map_item.add_to_map(self.garden_map.map_, glib=False)
+        elapsed = time.perf_counter() - self._populate_start
+        if batch and "first_paint" not in self.populate_timings:
+            self.populate_timings["first_paint"] = elapsed
+        if last:
+            self.populate_timings["total"] = elapsed
+            logger.debug("map populate timings: %s", self.populate_timings)
+        return GLib.SOURCE_REMOVE
+
     def clear_all_threads_and_events(self) -> None:
         logger.debug("populate_map: stopping threads")
         # stop threads and wait
@@ -1114,6 +1248,9 @@ class SearchViewMapPresenter:
         for source in glib_events.values():
             source.destroy()
         glib_events.clear()
+        for source in glib_batch_events.values():
+            source.destroy()
+        glib_batch_events.clear()
 
     def populate_map(self, results: Sequence) -> None:
         """Populate the map with results.
@@ -1128,6 +1265,7 @@ class SearchViewMapPresenter:
             or self.update_thread
             and self.update_thread.is_alive()
             or glib_events
+            or glib_batch_events
         ):
             self.clear_all_threads_and_events()
 
@@ -1394,6 +1532,35 @@ class SearchViewMapPresenter:
 _get_loc_polys_lock = threading.Lock()
 
 
+def get_plant_map_rows(
+    results: Sequence[db.Domain],
+) -> Iterator[tuple[int, dict, bool]]:
+    """Stream the id, geojson and active state of all plants pertinent to the
+    results that have geojson.
+
+    Only selects the columns needed to draw the plants (no Plant objects are
+    loaded) using a separate session which avoids messing up history on the
+    deferred geojson column.
+    """
+    # avoid cicular import
+    from ..report import get_plant_query
+
+    with db.Session() as session:
+        # chunk for large searches, MSSQL will fail over ~2600
+        for chunk in utils.chunks(results, 1000):
+            grouped: dict[type, list[db.Domain]] = {}
+            for obj in chunk:
+                grouped.setdefault(type(obj), []).append(obj)
+            # NOTE no UNION, postgresql can not compare json columns
+            for cls, objs in grouped.items():
+                query = (
+                    get_plant_query(cls, objs, session)
+                    .with_entities(Plant.id, Plant.geojson, Plant.active)
+                    .filter(Plant.geojson.isnot(None))
+                )
+                yield from query.yield_per(MAP_POPULATE_BATCH_SIZE)
+
+
 @timed_cache(size=1000, secs=None)
 def get_locations_polys() -> dict[int, MapPoly]:
     """Independently search the database for all locations and generate MapPoly
@@ -1475,6 +1642,67 @@ def get_map_tile_proxy() -> str | None:
     return proxy
 
 
+tile_server: TileServer | None = None
+
+
+def tile_cache_enabled() -> bool:
+    return bool(prefs.prefs.get(MAP_TILE_CACHE_PREF_KEY, False))
+
+
+def get_tile_server() -> TileServer:
+    """Get the running local tile server, starting it if required."""
+    global tile_server  # pylint: disable=global-statement
+
+    if tile_server is None:
+        tile_server = TileServer()
+        tile_server.start()
+    return tile_server
+
+
+def get_tile_cache(base_tiles: int) -> MBTilesCache:
+    """Get the tile cache for the map source, registering it with the tile
+    server if not already.
+    """
+    server = get_tile_server()
+    source = str(base_tiles)
+    if source not in server.caches:
+        max_bytes = prefs.prefs.get(MAP_TILE_CACHE_SIZE_PREF_KEY, 256) * 2**20
+        cache = MBTilesCache(
+            Path(tile_cache_dir(), f"{source}.mbtiles"),
+            max_bytes,
+            name=OsmGpsMap.Map.source_get_friendly_name(base_tiles),
+        )
+        uri = OsmGpsMap.Map.source_get_repo_uri(base_tiles)
+        server.add_source(
+            source, cache, get_url_fetcher(uri, get_map_tile_proxy())
+        )
+    return server.caches[source]
+
+
+def set_map_source(map_: OsmGpsMap.Map) -> None:
+    """Set the map source from prefs, if the tile cache is enabled point the
+    map at the local tile server instead of the upstream source.
+    """
+    base_tiles = prefs.prefs.get(MAP_TILES_PREF_KEY, 1)
+    map_.set_property("map-source", OsmGpsMap.MapSource_t(base_tiles))
+    if tile_cache_enabled():
+        get_tile_cache(base_tiles)
+        # OSM_GPS_MAP_CACHE_DISABLED, the MBTiles file is the only cache
+        map_.set_property("tile-cache", "none://")
+        map_.set_property(
+            "repo-uri", get_tile_server().get_uri(str(base_tiles))
+        )
+        logger.debug("map tiles via tile cache: %s", map_.props.repo_uri)
+
+
+def stop_tile_server() -> None:
+    global tile_server  # pylint: disable=global-statement
+
+    if tile_server:
+        tile_server.stop()
+        tile_server = None
+
+
 def setup_garden_map() -> None:
     # only set up once...
     logger.debug("setup_garden_map")
@@ -1487,8 +1715,9 @@ def setup_garden_map() -> None:
 
     # NOTE proxy can only be set once per session. If a different proxy is
     # needed after changing the tiles source you will need to possibly reset
-    # the proxy in prefs (if not using a pac file to determine) and restart
-    proxy = get_map_tile_proxy()
+    # the proxy in prefs (if not using a pac file to determine) and restart.
+    # Requests to the local tile server must not go via a proxy.
+    proxy = None if tile_cache_enabled() else get_map_tile_proxy()
 
     map_ = OsmGpsMap.Map(proxy_uri=proxy)
     map_.layer_add(
@@ -1602,3 +1831,4 @@ def expunge_garden_map() -> None:
         Plant, "after_delete", map_presenter.update_after_plant_delete
     )
     map_presenter = None
+    stop_tile_server()
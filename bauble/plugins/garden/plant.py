@@ -90,6 +90,7 @@ from bauble import meta
 from bauble import paths
 from bauble import prefs
 from bauble import utils
+from bauble.completion import prefix_filter
 from bauble.editor import GenericEditorPresenter
 from bauble.editor import GenericEditorView
 from bauble.editor import GenericModelViewPresenterEditor
@@ -1657,8 +1658,8 @@ class PlantEditorPresenter(GenericEditorPresenter, PresenterMapMixin):
                 .join(Genus)
                 .filter(
                     or_(
-                        ilike(Genus.epithet, f"{text}%%"),
-                        ilike(Accession.code, f"{text}%%"),
+                        prefix_filter(Genus.epithet, text),
+                        prefix_filter(Accession.code, text),
                     )
                 )
                 .order_by(Accession.code)
@@ -1674,11 +1675,11 @@ class PlantEditorPresenter(GenericEditorPresenter, PresenterMapMixin):
                 .filter(
                     or_(
                         and_(
-                            ilike(Accession.code, f"{part0}%%"),
-                            ilike(Genus.epithet, f"{part1}%%"),
+                            prefix_filter(Accession.code, part0),
+                            prefix_filter(Genus.epithet, part1),
                         ),
                         and_(
-                            ilike(Genus.epithet, f"{part0}%%"),
+                            prefix_filter(Genus.epithet, part0),
                             or_(
                                 ilike(Species.epithet, f"{part1}%%"),
                                 ilike(Species.cultivar_epithet, f"{partc}%%"),
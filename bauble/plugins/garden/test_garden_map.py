@@ -19,6 +19,7 @@
 Test plant map
 """
 
+import logging
 import os
 import threading
 import time
@@ -53,12 +54,14 @@ from bauble.view import SearchView
 from bauble.view import get_search_view
 
 from ..plants.species import SpeciesEditor
+from . import Accession
 from . import GardenPlugin
 from . import Institution
 from . import Location
 from . import Plant
 from . import garden_map
 from .garden_map import MAP_LOCATION_COLOUR_PREF_KEY
+from .garden_map import MAP_TILE_CACHE_PREF_KEY
 from .garden_map import MAP_TILES_PREF_KEY
 from .garden_map import MAP_TILES_PROXY_PREF_KEY
 from .garden_map import BoundingBox
@@ -72,10 +75,14 @@ from .garden_map import colours
 from .garden_map import expunge_garden_map
 from .garden_map import get_locations_polys
 from .garden_map import get_map_tile_proxy
+from .garden_map import get_plant_map_rows
+from .garden_map import glib_batch_events
 from .garden_map import glib_events
 from .garden_map import map_item_factory
 from .garden_map import setup_garden_map
 
+logger = logging.getLogger(__name__)
+
 point = {
     "type": "Point",
     "coordinates": [152.97899035780537, -27.477676044133204],
@@ -357,6 +364,54 @@ class TestGardenMap(BaubleTestCase):
         self.assertEqual(prefs.prefs.get(MAP_TILES_PREF_KEY), 7)
         self.assertEqual(map_.map_.props.map_source, 7)
 
+    def test_set_tiles_from_prefs_no_tile_cache(self):
+        map_ = GardenMap(Map())
+        self.assertFalse(map_.cache_tiles_button.get_visible())
+        # pylint: disable=no-member
+        self.assertFalse(
+            map_.map_.props.repo_uri.startswith("http://127.0.0.1:")
+        )
+        self.assertIsNone(garden_map.tile_server)
+
+    def test_set_tiles_from_prefs_w_tile_cache(self):
+        prefs.prefs[MAP_TILE_CACHE_PREF_KEY] = True
+        map_ = GardenMap(Map())
+        self.assertTrue(map_.cache_tiles_button.get_visible())
+        # pylint: disable=no-member
+        self.assertEqual(map_.map_.props.map_source, 1)
+        self.assertEqual(
+            map_.map_.props.repo_uri, garden_map.tile_server.get_uri("1")
+        )
+        self.assertIn("1", garden_map.tile_server.caches)
+        # changing source adds another cache
+        mock_combo = mock.Mock()
+        mock_combo.get_active_text.return_value = "Google Maps"
+        map_.on_tiles_combo_changed(mock_combo)
+        self.assertEqual(
+            map_.map_.props.repo_uri, garden_map.tile_server.get_uri("7")
+        )
+        self.assertIn("7", garden_map.tile_server.caches)
+        garden_map.stop_tile_server()
+        self.assertIsNone(garden_map.tile_server)
+
+    @mock.patch("bauble.plugins.garden.garden_map.seed")
+    def test_on_cache_tiles_button_clicked(self, mock_seed):
+        mock_seed.return_value = iter([(1, 2), (2, 2)])
+        prefs.prefs[MAP_TILE_CACHE_PREF_KEY] = True
+        map_ = GardenMap(Map())
+        map_.map_.set_center_and_zoom(-27.477, 152.977, 16)
+        map_.on_cache_tiles_button_clicked(None)
+        map_.seed_thread.join()
+        mock_seed.assert_called_once()
+        args = mock_seed.call_args.args
+        self.assertIs(args[0], garden_map.tile_server.caches["1"])
+        self.assertEqual(args[3:5], (16, 19))
+        self.assertIs(args[5], map_.seed_event)
+        max_lat, min_lat, max_long, min_long = args[2]
+        self.assertGreater(max_lat, min_lat)
+        self.assertGreater(max_long, min_long)
+        garden_map.stop_tile_server()
+
     def test_set_colour_prefs_from_combo(self):
         map_ = GardenMap(Map())
         map_.reset_item_colour = mock.Mock(return_value=False)
@@ -388,12 +443,14 @@ class LocationSearchMapTests(BaubleTestCase):
 
     def test_main_widget_set_when_institution_coords_set(self):
         GardenPlugin.init()
+        GardenPlugin.deferred_init()
         self.assertIsInstance(DefaultView.main_widget, LocationSearchMap)
         # select then re init should clear
         DefaultView.main_widget.loc_items = {
             1: MapPoly(1, poly, colours["grey"])
         }
         GardenPlugin.init()
+        GardenPlugin.deferred_init()
         self.assertIsInstance(DefaultView.main_widget, LocationSearchMap)
         self.assertFalse(DefaultView.main_widget.loc_items)
         # as if database has changed...
@@ -403,6 +460,7 @@ class LocationSearchMapTests(BaubleTestCase):
         institution.geo_zoom = None
         institution.write()
         GardenPlugin.init()
+        GardenPlugin.deferred_init()
         self.assertIsNone(DefaultView.main_widget)
 
     def test_loc_items_starts_empty(self):
@@ -842,6 +900,102 @@ class TestSearchViewMapPresenter(BaubleTestCase):
         self.assertIsInstance(presenter.plt_items[3], MapPoly)
         self.assertEqual(presenter.selected, set())
         self.assertEqual(glib_events, {})
+        self.assertEqual(glib_batch_events, {})
+        self.assertIn("first_paint", presenter.populate_timings)
+        self.assertIn("total", presenter.populate_timings)
+        map_.destroy()
+
+    def test_populate_map_stops_glib_batch_events(self):
+        for func in get_setUp_data_funcs():
+            func()
+        map_ = GardenMap(Map())
+        presenter = SearchViewMapPresenter(map_)
+        presenter.is_visible = lambda: True
+
+        results = self.session.query(Location).all()
+        mock_source = mock.Mock()
+        glib_batch_events[1] = mock_source
+        presenter.populate_map(results)
+        presenter.populate_thread.join()
+        mock_source.destroy.assert_called()
+        map_.destroy()
+
+    def test_add_batch_to_map_cancelled(self):
+        map_ = GardenMap(Map())
+        presenter = SearchViewMapPresenter(map_)
+        map_item = mock.Mock()
+        # not in glib_batch_events, i.e. cancelled
+        presenter._add_batch_to_map([map_item], True, 99)
+        map_item.add_to_map.assert_not_called()
+        glib_batch_events[99] = mock.Mock()
+        presenter._add_batch_to_map([map_item], True, 99)
+        map_item.add_to_map.assert_called_with(map_.map_, glib=False)
+        self.assertEqual(glib_batch_events, {})
+        self.assertIn("total", presenter.populate_timings)
+        map_.destroy()
+
+    def test_get_plant_map_rows(self):
+        for func in get_setUp_data_funcs():
+            func()
+        plt1 = self.session.query(Plant).get(1)
+        plt2 = self.session.query(Plant).get(2)
+        plt1.geojson = point
+        plt2.geojson = line
+        plt2.quantity = 0
+        self.session.commit()
+        # plants with no geojson are not returned
+        results = self.session.query(Location).all()
+        rows = sorted(get_plant_map_rows(results))
+        self.assertEqual(
+            [tuple(i) for i in rows], [(1, point, True), (2, line, False)]
+        )
+        # mixed types
+        results = [plt1, plt1.accession]
+        rows = {i[0] for i in get_plant_map_rows(results)}
+        self.assertEqual(rows, {1, 2})
+
+    def test_populate_map_in_batches(self):
+        for func in get_setUp_data_funcs():
+            func()
+        acc = self.session.query(Accession).first()
+        loc = self.session.query(Location).first()
+        first = garden_map.MAP_POPULATE_FIRST_BATCH_SIZE
+        size = garden_map.MAP_POPULATE_BATCH_SIZE
+        num = first + size * 2 + 50
+        for i in range(num):
+            lng = 152.9742 + (i % 100) * 0.00001
+            lat = -27.4756 + (i // 100) * 0.00001
+            self.session.add(
+                Plant(
+                    accession=acc,
+                    location=loc,
+                    code=f"b{i}",
+                    quantity=1,
+                    geojson={"type": "Point", "coordinates": [lng, lat]},
+                )
+            )
+        self.session.commit()
+        map_ = GardenMap(Map())
+        presenter = SearchViewMapPresenter(map_)
+        presenter.is_visible = lambda: True
+        with mock.patch.object(
+            presenter, "_schedule_batch", wraps=presenter._schedule_batch
+        ) as mock_schedule:
+            presenter.populate_map([acc])
+            presenter.populate_thread.join()
+        for _i in range(100):
+            if "total" in presenter.populate_timings:
+                break
+            update_gui()
+            sleep(0.05)
+        self.assertIn("total", presenter.populate_timings)
+        self.assertEqual(
+            [len(i.args[0]) for i in mock_schedule.call_args_list],
+            [first, size, size, 50],
+        )
+        self.assertTrue(mock_schedule.call_args.kwargs["last"])
+        self.assertEqual(len(presenter.plt_items), num)
+        self.assertEqual(glib_batch_events, {})
         map_.destroy()
 
     def test_update_map_selects(self):
@@ -1363,22 +1517,19 @@ class TestSearchViewMapPresenter(BaubleTestCase):
             mock_thread.is_alive.assert_called()
             self.assertFalse(mock_thread.is_alive())
 
-    @mock.patch("bauble.utils.tree_model_has")
-    def test_select_plant_by_id_bails_no_gui(self, mock_has):
+    @mock.patch("bauble.view.SearchView.find_rows")
+    def test_select_plant_by_id_bails_no_gui(self, mock_find):
         map_ = Map()
         gmap = GardenMap(map_)
         presenter = SearchViewMapPresenter(gmap)
         # no gui bails
         presenter.select_plant_by_id(1)
         # should not have go this far
-        mock_has.assert_not_called()
+        mock_find.assert_not_called()
 
     @mock.patch("bauble.plugins.garden.garden_map.get_search_view")
-    @mock.patch("bauble.utils.tree_model_has")
     @mock.patch("bauble.gui")
-    def test_select_plant_by_id_bails_no_model(
-        self, _mock_gui, mock_has, mock_get
-    ):
+    def test_select_plant_by_id_bails_no_model(self, _mock_gui, mock_get):
         map_ = Map()
         gmap = GardenMap(map_)
         presenter = SearchViewMapPresenter(gmap)
@@ -1390,7 +1541,7 @@ class TestSearchViewMapPresenter(BaubleTestCase):
         # no model bails
         presenter.select_plant_by_id(1)
         # should not have go this far
-        mock_has.assert_not_called()
+        mock_search_view.find_rows.assert_not_called()
 
     @mock.patch("bauble.gui")
     def test_select_plant_by_id(self, mock_gui):
@@ -0,0 +1,344 @@
+# pylint: disable=protected-access
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Test the offline tile cache
+"""
+
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from .tile_cache import MBTilesCache
+from .tile_cache import TileServer
+from .tile_cache import count_tiles_in_bbox
+from .tile_cache import deg_to_tile
+from .tile_cache import format_tile_uri
+from .tile_cache import get_url_fetcher
+from .tile_cache import seed
+from .tile_cache import tiles_in_bbox
+
+# a small area around the test data used in test_garden_map
+bbox = (-27.4750, -27.4790, 152.9800, 152.9740)
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Stand-in for an upstream tile server, returns the tile coordinates as
+    the tile content.
+    """
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.server.requests += 1
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", self.server.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.requests = 0
+        self.content_type = "image/png"
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def template(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/#Z/#X/#Y.png"
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class TileMathTests(TestCase):
+    def test_deg_to_tile(self):
+        self.assertEqual(deg_to_tile(0, 0, 0), (0, 0))
+        self.assertEqual(deg_to_tile(0.1, 0.1, 1), (1, 0))
+        self.assertEqual(deg_to_tile(-0.1, -0.1, 1), (0, 1))
+        # clamped at the poles and dateline
+        self.assertEqual(deg_to_tile(90, 180, 2), (3, 0))
+        self.assertEqual(deg_to_tile(-90, -180, 2), (0, 3))
+
+    def test_tiles_in_bbox(self):
+        tiles = list(tiles_in_bbox(*bbox, 14, 18))
+        self.assertEqual(len(tiles), count_tiles_in_bbox(*bbox, 14, 18))
+        self.assertEqual(len(tiles), len(set(tiles)))
+        self.assertEqual({i[0] for i in tiles}, {14, 15, 16, 17, 18})
+        # a single tile at low zoom
+        self.assertEqual(list(tiles_in_bbox(*bbox, 1, 1)), [(1, 1, 1)])
+
+    def test_format_tile_uri(self):
+        self.assertEqual(
+            format_tile_uri("http://a/#Z/#X/#Y.png", 3, 4, 5),
+            "http://a/3/4/5.png",
+        )
+        self.assertEqual(
+            format_tile_uri("http://a/#S/#X/#Y", 3, 4, 5), "http://a/14/4/5"
+        )
+        self.assertEqual(
+            format_tile_uri("http://a/q#Q.png", 3, 3, 5), "http://a/q213.png"
+        )
+        self.assertRegex(
+            format_tile_uri("http://#R.a/#Z", 3, 3, 5), r"http://[0-3].a/3"
+        )
+
+
+class MBTilesCacheTests(TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.path = Path(self.temp_dir.name, "test.mbtiles")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_put_get(self):
+        cache = MBTilesCache(self.path, 1000)
+        self.assertIsNone(cache.get(3, 4, 5))
+        cache.put(3, 4, 5, b"tile")
+        self.assertEqual(cache.get(3, 4, 5), b"tile")
+        self.assertTrue(cache.has(3, 4, 5))
+        self.assertFalse(cache.has(3, 4, 4))
+        self.assertEqual(cache.size, 4)
+        # replace does not double count
+        cache.put(3, 4, 5, b"tiles")
+        self.assertEqual(cache.size, 5)
+        stats = cache.stats()
+        self.assertEqual(stats["tiles"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        cache.close()
+
+    def test_stored_as_mbtiles(self):
+        cache = MBTilesCache(self.path, 1000, name="Test Map")
+        cache.put(3, 4, 5, b"tile")
+        cache.close()
+        with sqlite3.connect(self.path) as conn:
+            # TMS row scheme
+            self.assertEqual(
+                conn.execute(
+                    "SELECT zoom_level, tile_column, tile_row, tile_data "
+                    "FROM tiles"
+                ).fetchall(),
+                [(3, 4, 2, b"tile")],
+            )
+            self.assertEqual(
+                dict(conn.execute("SELECT name, value FROM metadata")),
+                {"name": "Test Map", "format": "png", "type": "baselayer"},
+            )
+
+    def test_content_type(self):
+        cache = MBTilesCache(self.path, 1000)
+        self.assertEqual(cache.content_type, "image/png")
+        cache.put(3, 4, 5, b"tile", "image/jpeg")
+        self.assertEqual(cache.content_type, "image/jpeg")
+        cache.close()
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(
+                dict(conn.execute("SELECT name, value FROM metadata")),
+                {
+                    "name": "test",
+                    "format": "jpg",
+                    "type": "baselayer",
+                    "content_type": "image/jpeg",
+                },
+            )
+        cache = MBTilesCache(self.path, 1000)
+        self.assertEqual(cache.content_type, "image/jpeg")
+        cache.close()
+        # format only (e.g. from another tool)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("DELETE FROM metadata WHERE name = 'content_type'")
+            conn.execute(
+                "UPDATE metadata SET value = 'webp' WHERE name = 'format'"
+            )
+        cache = MBTilesCache(self.path, 1000)
+        self.assertEqual(cache.content_type, "image/webp")
+        cache.close()
+
+    def test_persists(self):
+        cache = MBTilesCache(self.path, 1000)
+        cache.put(3, 4, 5, b"tile")
+        cache.close()
+        cache = MBTilesCache(self.path, 1000)
+        self.assertEqual(cache.size, 4)
+        self.assertEqual(cache.get(3, 4, 5), b"tile")
+        cache.close()
+
+    def test_evicts_least_recently_used(self):
+        cache = MBTilesCache(self.path, 100)
+        for i in range(10):
+            cache.put(10, i, 0, b"x" * 10)
+            # make sure access times are distinct
+            cache._conn.execute(
+                "UPDATE tiles SET last_access = ? WHERE tile_column = ?",
+                (i, i),
+            )
+        self.assertEqual(cache.size, 100)
+        # access the oldest, should now be retained
+        cache._conn.execute(
+            "UPDATE tiles SET last_access = 99 WHERE tile_column = 0"
+        )
+        cache.put(10, 10, 0, b"x" * 10)
+        self.assertLessEqual(cache.size, 90)
+        self.assertTrue(cache.has(10, 0, 0))
+        self.assertTrue(cache.has(10, 10, 0))
+        self.assertFalse(cache.has(10, 1, 0))
+        self.assertFalse(cache.has(10, 2, 0))
+        self.assertTrue(cache.has(10, 3, 0))
+        cache.close()
+
+    def test_set_max_bytes_evicts(self):
+        cache = MBTilesCache(self.path, 100)
+        for i in range(10):
+            cache.put(10, i, 0, b"x" * 10)
+        cache.set_max_bytes(50)
+        self.assertLessEqual(cache.size, 50)
+        self.assertEqual(cache.stats()["tiles"], 5)
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+        cache.close()
+
+
+class TileServerTests(TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.upstream = StandInServer()
+        self.cache = MBTilesCache(Path(self.temp_dir.name, "1.mbtiles"), 2**20)
+        self.server = TileServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.upstream.stop()
+        self.temp_dir.cleanup()
+
+    def test_seed(self):
+        fetch = get_url_fetcher(self.upstream.template)
+        progress = list(seed(self.cache, fetch, bbox, 14, 17))
+        total = count_tiles_in_bbox(*bbox, 14, 17)
+        self.assertEqual(progress[-1], (total, total))
+        self.assertEqual(self.cache.stats()["tiles"], total)
+        self.assertEqual(self.upstream.requests, total)
+        self.assertEqual(
+            self.cache.get(14, 15154, 9493), b"/14/15154/9493.png"
+        )
+        # second run fetches nothing
+        list(seed(self.cache, fetch, bbox, 14, 17))
+        self.assertEqual(self.upstream.requests, total)
+
+    def test_seed_cancel(self):
+        fetch = get_url_fetcher(self.upstream.template)
+        cancel = threading.Event()
+        cancel.set()
+        self.assertEqual(
+            list(seed(self.cache, fetch, bbox, 14, 17, cancel)), []
+        )
+        self.assertEqual(self.upstream.requests, 0)
+
+    def test_serves_offline_from_cache(self):
+        fetch = get_url_fetcher(self.upstream.template)
+        self.server.add_source("1", self.cache, fetch)
+        list(seed(self.cache, fetch, bbox, 16, 16))
+        self.upstream.stop()
+        uri = self.server.get_uri("1")
+        for zoom, x, y in tiles_in_bbox(*bbox, 16, 16):
+            with urllib.request.urlopen(
+                format_tile_uri(uri, zoom, x, y)
+            ) as response:
+                self.assertEqual(
+                    response.read(), f"/{zoom}/{x}/{y}.png".encode()
+                )
+        # not cached and upstream is unavailable
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(format_tile_uri(uri, 2, 1, 1))
+        self.assertEqual(ctx.exception.code, 404)
+
+    def test_fetches_and_stores_missing(self):
+        self.upstream.content_type = "image/jpeg"
+        self.server.add_source(
+            "1", self.cache, get_url_fetcher(self.upstream.template)
+        )
+        uri = self.server.get_uri("1")
+        with urllib.request.urlopen(format_tile_uri(uri, 5, 6, 7)) as resp:
+            self.assertEqual(resp.read(), b"/5/6/7.png")
+            self.assertEqual(resp.headers["Content-Type"], "image/jpeg")
+        self.assertEqual(self.cache.get(5, 6, 7), b"/5/6/7.png")
+        self.assertEqual(self.cache.content_type, "image/jpeg")
+        # served from the cache with the stored content type
+        self.upstream.stop()
+        with urllib.request.urlopen(format_tile_uri(uri, 5, 6, 7)) as resp:
+            self.assertEqual(resp.headers["Content-Type"], "image/jpeg")
+        self.assertEqual(self.upstream.requests, 1)
+
+    def test_unknown_source_or_bad_path_404(self):
+        uri = self.server.get_uri("99")
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(format_tile_uri(uri, 5, 6, 7))
+        host, port = self.server.server_address[:2]
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://{host}:{port}/rubbish")
+
+    def test_cached_pan_requests(self):
+        """Panning back across an area only fetches new tiles upstream."""
+        self.server.add_source(
+            "1", self.cache, get_url_fetcher(self.upstream.template)
+        )
+        uri = self.server.get_uri("1")
+        # pan west to east one tile column at a time with a 4x4 view.
+        zoom = 18
+        x_start, y_start = deg_to_tile(bbox[0], bbox[3], zoom)
+        views = [
+            [
+                (zoom, x, y)
+                for x in range(x_start + step, x_start + step + 4)
+                for y in range(y_start, y_start + 4)
+            ]
+            for step in range(8)
+        ]
+
+        def pan():
+            for view in views:
+                for tile in view:
+                    with urllib.request.urlopen(
+                        format_tile_uri(uri, *tile)
+                    ) as response:
+                        response.read()
+
+        pan()
+        # only the first view and each new column are fetched upstream
+        self.assertEqual(self.upstream.requests, 16 + 7 * 4)
+        self.assertEqual(self.cache.misses, 16 + 7 * 4)
+        # panning again is served entirely from the cache
+        pan()
+        self.assertEqual(self.upstream.requests, 16 + 7 * 4)
+        self.assertEqual(self.cache.hits, 2 * 8 * 16 - (16 + 7 * 4))
@@ -0,0 +1,501 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Offline map tile cache.
+
+Tiles are stored in local MBTiles (SQLite) files, one per map source, with a
+byte budget and least recently used eviction.  A small HTTP server bound to
+localhost serves tiles to OsmGpsMap from the cache, fetching (and storing) any
+missing tiles from the upstream source when a connection is available.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+import math
+import random
+import sqlite3
+import threading
+import time
+import urllib.request
+from collections.abc import Callable
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from bauble import paths
+from bauble import version
+
+TILE_FETCH_TIMEOUT = 10.0
+"""Seconds to wait for an upstream tile before giving up."""
+
+USER_AGENT = f"ghini.desktop/{version.version}"
+
+# the fraction of the budget to evict down to when the budget is exceeded,
+# avoids evicting on every insert once the cache is full.
+_LOW_WATER = 0.9
+
+# only record an access if the previous one is older than this (seconds),
+# avoids a write for every read while panning.
+_ACCESS_RESOLUTION = 60.0
+
+TileFetcher = Callable[[int, int, int], tuple[bytes, str | None] | None]
+"""Returns the tile data and its content type (if known) or None."""
+
+_FORMATS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "application/x-protobuf": "pbf",
+}
+"""Content types mapped to the MBTiles metadata `format` values."""
+
+
+def tile_cache_dir() -> Path:
+    """The directory the MBTiles files are stored in."""
+    return Path(paths.appdata_dir(), "map_tiles")
+
+
+def deg_to_tile(lat: float, long: float, zoom: int) -> tuple[int, int]:
+    """Convert a latitude and longitude to the XYZ (slippy map) tile
+    coordinates that contain it at the supplied zoom.
+    """
+    lat = max(min(lat, 85.0511), -85.0511)
+    count = 2**zoom
+    x = int((long + 180.0) / 360.0 * count)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * count)
+    return min(max(x, 0), count - 1), min(max(y, 0), count - 1)
+
+
+def tiles_in_bbox(
+    max_lat: float,
+    min_lat: float,
+    max_long: float,
+    min_long: float,
+    min_zoom: int,
+    max_zoom: int,
+) -> Iterator[tuple[int, int, int]]:
+    """Yield every (zoom, x, y) tile covering the bounding box for each zoom
+    level from min_zoom to max_zoom inclusive.
+    """
+    for zoom in range(min_zoom, max_zoom + 1):
+        x_min, y_min = deg_to_tile(max_lat, min_long, zoom)
+        x_max, y_max = deg_to_tile(min_lat, max_long, zoom)
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                yield zoom, x, y
+
+
+def count_tiles_in_bbox(
+    max_lat: float,
+    min_lat: float,
+    max_long: float,
+    min_long: float,
+    min_zoom: int,
+    max_zoom: int,
+) -> int:
+    total = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        x_min, y_min = deg_to_tile(max_lat, min_long, zoom)
+        x_max, y_max = deg_to_tile(min_lat, max_long, zoom)
+        total += (x_max - x_min + 1) * (y_max - y_min + 1)
+    return total
+
+
+def format_tile_uri(template: str, zoom: int, x: int, y: int) -> str:
+    """Fill an OsmGpsMap style repo URI template for the supplied tile.
+
+    Supports the #X, #Y, #Z, #S (inverted zoom), #Q (quadtree) and #R
+    (random server) placeholders.
+    """
+    if "#Q" in template:
+        quadkey = ""
+        for i in range(zoom, 0, -1):
+            digit = 0
+            mask = 1 << (i - 1)
+            if x & mask:
+                digit += 1
+            if y & mask:
+                digit += 2
+            quadkey += str(digit)
+        template = template.replace("#Q", quadkey)
+    return (
+        template.replace("#X", str(x))
+        .replace("#Y", str(y))
+        .replace("#Z", str(zoom))
+        .replace("#S", str(17 - zoom))
+        .replace("#R", str(random.randint(0, 3)))
+    )
+
+
+class MBTilesCache:
+    """A tile store backed by an MBTiles file with a byte budget.
+
+    Tiles are addressed using XYZ coordinates (as used by OsmGpsMap) and
+    stored using the TMS row scheme the MBTiles spec requires.  When the total
+    size of the stored tiles exceeds `max_bytes` the least recently used tiles
+    are removed.  The upstream content type is recorded in the metadata table
+    (as `format` and `content_type`) and is available as `content_type`.
+
+    Safe to use from multiple threads.
+
+    :param path: path to the MBTiles file, created if it does not exist.
+    :param max_bytes: the byte budget for tile data.
+    :param name: the tileset name stored in the metadata table.
+    """
+
+    def __init__(
+        self, path: str | Path, max_bytes: int, name: str = ""
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema(name or self.path.stem)
+        self._size = self._conn.execute(
+            "SELECT COALESCE(SUM(tile_size), 0) FROM tiles"
+        ).fetchone()[0]
+        self.content_type = self._get_content_type()
+        self.hits = 0
+        self.misses = 0
+
+    def _create_schema(self, name: str) -> None:
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS metadata (
+                    name TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE TABLE IF NOT EXISTS tiles (
+                    zoom_level INTEGER NOT NULL,
+                    tile_column INTEGER NOT NULL,
+                    tile_row INTEGER NOT NULL,
+                    tile_data BLOB NOT NULL,
+                    tile_size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (zoom_level, tile_column, tile_row)
+                );
+                CREATE INDEX IF NOT EXISTS tiles_last_access
+                    ON tiles (last_access);
+                """)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO metadata VALUES ('name', ?)", (name,)
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO metadata VALUES ('format', 'png')"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO metadata VALUES ('type', 'baselayer')"
+            )
+
+    def _get_content_type(self) -> str:
+        metadata = dict(
+            self._conn.execute(
+                "SELECT name, value FROM metadata "
+                "WHERE name IN ('format', 'content_type')"
+            )
+        )
+        if content_type := metadata.get("content_type"):
+            return content_type
+        for content_type, fmt in _FORMATS.items():
+            if fmt == metadata.get("format"):
+                return content_type
+        return "image/png"
+
+    def _set_content_type(self, content_type: str) -> None:
+        # NOTE must be called with the lock held
+        fmt = _FORMATS.get(content_type, content_type.rpartition("/")[2])
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+            (("format", fmt), ("content_type", content_type)),
+        )
+        self.content_type = content_type
+
+    @staticmethod
+    def _tms_row(zoom: int, y: int) -> int:
+        return (2**zoom - 1) - y
+
+    def get(self, zoom: int, x: int, y: int) -> bytes | None:
+        """Return the tile data or None if not cached."""
+        row = self._tms_row(zoom, y)
+        with self._lock:
+            result = self._conn.execute(
+                "SELECT tile_data, last_access FROM tiles "
+                "WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, x, row),
+            ).fetchone()
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            now = time.time()
+            if now - result[1] > _ACCESS_RESOLUTION:
+                self._conn.execute(
+                    "UPDATE tiles SET last_access = ? "
+                    "WHERE zoom_level = ? AND tile_column = ? "
+                    "AND tile_row = ?",
+                    (now, zoom, x, row),
+                )
+        return result[0]
+
+    def has(self, zoom: int, x: int, y: int) -> bool:
+        with self._lock:
+            result = self._conn.execute(
+                "SELECT 1 FROM tiles "
+                "WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, x, self._tms_row(zoom, y)),
+            ).fetchone()
+        return result is not None
+
+    def put(
+        self,
+        zoom: int,
+        x: int,
+        y: int,
+        data: bytes,
+        content_type: str | None = None,
+    ) -> None:
+        """Store the tile, evicting least recently used tiles if the budget is
+        exceeded.
+
+        :param content_type: the upstream content type, recorded in the
+            metadata table and used when serving tiles, if it has changed.
+        """
+        row = self._tms_row(zoom, y)
+        with self._lock:
+            if content_type and content_type != self.content_type:
+                self._set_content_type(content_type)
+            previous = self._conn.execute(
+                "SELECT tile_size FROM tiles "
+                "WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, x, row),
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?)",
+                (zoom, x, row, data, len(data), time.time()),
+            )
+            self._size += len(data) - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict(int(self.max_bytes * _LOW_WATER))
+
+    def _evict(self, target: int) -> None:
+        # NOTE must be called with the lock held
+        logger.debug("tile cache %s over budget, evicting", self.path)
+        self._conn.execute("BEGIN")
+        try:
+            cursor = self._conn.execute(
+                "SELECT rowid, tile_size FROM tiles ORDER BY last_access"
+            )
+            rowids = []
+            for rowid, size in cursor:
+                if self._size <= target:
+                    break
+                rowids.append((rowid,))
+                self._size -= size
+            cursor.close()
+            self._conn.executemany("DELETE FROM tiles WHERE rowid = ?", rowids)
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        logger.debug("evicted %s tiles", len(rowids))
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            if self._size > self.max_bytes:
+                self._evict(self.max_bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM tiles")
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Total bytes of tile data stored."""
+        return self._size
+
+    def stats(self) -> dict[str, int | str]:
+        """Summary of the cache contents."""
+        with self._lock:
+            count, min_zoom, max_zoom = self._conn.execute(
+                "SELECT COUNT(*), MIN(zoom_level), MAX(zoom_level) FROM tiles"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "tiles": count,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "min_zoom": min_zoom if min_zoom is not None else "",
+            "max_zoom": max_zoom if max_zoom is not None else "",
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_url_fetcher(template: str, proxy: str | None = None) -> TileFetcher:
+    """Return a function that downloads tiles from the supplied OsmGpsMap
+    style repo URI template, returning None on any failure (e.g. offline).
+    """
+    proxies = {"http": proxy, "https": proxy} if proxy else {}
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler(proxies))
+
+    def fetch(zoom: int, x: int, y: int) -> tuple[bytes, str | None] | None:
+        url = format_tile_uri(template, zoom, x, y)
+        request = urllib.request.Request(
+            url, headers={"User-Agent": USER_AGENT}
+        )
+        try:
+            with opener.open(request, timeout=TILE_FETCH_TIMEOUT) as response:
+                if response.status == 200:
+                    content_type = None
+                    if "Content-Type" in response.headers:
+                        content_type = response.headers.get_content_type()
+                    return response.read(), content_type
+        except (OSError, ValueError) as e:
+            logger.debug("%s(%s) fetching %s", type(e).__name__, e, url)
+        return None
+
+    return fetch
+
+
+def seed(
+    cache: MBTilesCache,
+    fetch: TileFetcher,
+    bbox: tuple[float, float, float, float],
+    min_zoom: int,
+    max_zoom: int,
+    cancel: threading.Event | None = None,
+) -> Iterator[tuple[int, int]]:
+    """Pre-seed the cache with all tiles covering a bounding box.
+
+    Tiles already in the cache are not fetched again.  Yields (done, total)
+    after each tile so it can be used to report progress, stops early if
+    `cancel` is set.
+
+    :param bbox: (max_lat, min_lat, max_long, min_long) as used by
+        `OsmGpsMap.Map.zoom_fit_bbox`
+    """
+    total = count_tiles_in_bbox(*bbox, min_zoom, max_zoom)
+    for done, (zoom, x, y) in enumerate(
+        tiles_in_bbox(*bbox, min_zoom, max_zoom), start=1
+    ):
+        if cancel and cancel.is_set():
+            logger.debug("tile cache seeding cancelled")
+            return
+        if not cache.has(zoom, x, y):
+            result = fetch(zoom, x, y)
+            if result and result[0]:
+                cache.put(zoom, x, y, *result)
+        yield done, total
+
+
+class _TileRequestHandler(BaseHTTPRequestHandler):
+    server: "TileServer"
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        try:
+            source, zoom, x, y = self.path.strip("/").split("/")
+            data = self.server.get_tile(source, int(zoom), int(x), int(y))
+        except ValueError:
+            data = None
+        if data is None:
+            self.send_error(404)
+            return
+        content_type = self.server.caches[source].content_type
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class TileServer(ThreadingHTTPServer):
+    """Serve cached tiles to OsmGpsMap over HTTP on localhost.
+
+    Each map source is registered with `add_source` and can then be accessed
+    via the URI template returned by `get_uri`.  Tiles missing from the cache
+    are fetched from the upstream source (if one is available) and stored.
+    """
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _TileRequestHandler)
+        self.caches: dict[str, MBTilesCache] = {}
+        self.fetchers: dict[str, TileFetcher | None] = {}
+        self._thread: threading.Thread | None = None
+
+    def add_source(
+        self,
+        source: str,
+        cache: MBTilesCache,
+        fetch: TileFetcher | None = None,
+    ) -> None:
+        self.caches[source] = cache
+        self.fetchers[source] = fetch
+
+    def get_uri(self, source: str) -> str:
+        """The OsmGpsMap repo URI template for the source."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/{source}/#Z/#X/#Y"
+
+    def get_tile(self, source: str, zoom: int, x: int, y: int) -> bytes | None:
+        cache = self.caches.get(source)
+        if cache is None:
+            return None
+        data = cache.get(zoom, x, y)
+        if data is None and (fetch := self.fetchers.get(source)):
+            result = fetch(zoom, x, y)
+            if result and result[0]:
+                cache.put(zoom, x, y, *result)
+                data = result[0]
+        return data
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="tile_server", daemon=True
+        )
+        self._thread.start()
+        logger.debug("tile server started at %s", self.server_address)
+
+    def stop(self) -> None:
+        if self._thread and self._thread.is_alive():
+            self.shutdown()
+            self._thread.join()
+        self.server_close()
+        for cache in self.caches.values():
+            cache.close()
+        self.caches.clear()
+        self.fetchers.clear()
@@ -26,11 +26,28 @@ Description: plugin to provide importing and exporting
 import csv
 import datetime
 import logging
+import os
+import re
 from abc import ABC
 from abc import abstractmethod
+from collections import deque
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+from itertools import islice
+from multiprocessing import get_context
 from operator import attrgetter
 
+from sqlalchemy import inspect
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +71,86 @@ from bauble.i18n import _
 # table.insert().execute(*list) statement or it will fill in values for
 # missing columns so that all columns will have some value
 
+EXPORT_BATCH_SIZE = 500
+"""The number of items loaded from the database at a time when exporting."""
+
+ATTR_NOTE_RE = re.compile(r"\{([^\{:]+):(.*)}")
+"""Matches the category of a note that provides a dict attribute."""
+
+IMPORT_BATCH_SIZE = 200
+"""The number of records sent to a worker process at a time when importing."""
+
+IMPORT_POOL_MIN_BATCHES = 10
+"""Fewer batches than this are processed in process, starting the worker
+processes (each imports bauble, GTK, etc.) would take longer.
+"""
+
+
+def _batch_result(
+    func: Callable[[list], list], batch: list, future: Future | None
+) -> list:
+    """The result of the batch's future or, if the pool could not process it,
+    of applying func to it in this process.
+    """
+    if future is not None:
+        try:
+            return future.result()
+        except (BrokenProcessPool, OSError) as e:
+            logger.debug("%s(%s)", type(e).__name__, e)
+    return func(batch)
+
+
+def map_in_processes(
+    func: Callable[[list], list],
+    items: Iterable,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    min_batches: int = IMPORT_POOL_MIN_BATCHES,
+) -> Iterator:
+    """Apply func to batches of items in a pool of worker processes, yielding
+    the results in the order of the items.
+
+    Only a few batches more than there are workers are submitted ahead of the
+    results consumed, so items can be a lazy iterator and memory use is
+    limited.  If there are fewer than min_batches, or the pool breaks (e.g. a
+    worker is killed or can not start), the batches are processed in this
+    process instead.
+
+    :param func: called with a list of items, must return a list of the same
+        length.  It, the items and results must be picklable, i.e. a module
+        level function (or `functools.partial` of one).  Workers have no
+        database connection.
+    :param items: the items to process
+    :param batch_size: the number of items sent to a worker at a time
+    :param min_batches: the number of batches required to start the pool
+    """
+    iterator = iter(items)
+    batches = iter(lambda: list(islice(iterator, batch_size)), [])
+    first = list(islice(batches, min_batches))
+    if len(first) < min_batches:
+        for batch in first:
+            yield from func(batch)
+        return
+
+    workers = os.cpu_count() or 1
+    logger.debug("mapping %s in %s processes", func, workers)
+    # spawn, forking a process that is running GTK is not safe
+    executor = ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
+    pending: deque[tuple[list, Future | None]] = deque()
+    try:
+        for batch in chain(first, batches):
+            future = None
+            try:
+                future = executor.submit(func, batch)
+            except (BrokenProcessPool, OSError) as e:
+                logger.debug("%s(%s)", type(e).__name__, e)
+            pending.append((batch, future))
+            if len(pending) > workers * 2:
+                yield from _batch_result(func, *pending.popleft())
+        while pending:
+            yield from _batch_result(func, *pending.popleft())
+    finally:
+        executor.shutdown(cancel_futures=True)
+
 
 def is_importable_attr(domain: type[db.Domain], path: str) -> bool:
     """Check if a path points to an importable attribute (i.e. can be set).
@@ -103,7 +200,6 @@ class GenericImporter(ABC):  # pylint: disable=too-many-instance-attributes
         self._is_new = False
         # view and presenter
         self.presenter = None
-        self.obj_cache = {}
 
     def start(self):
         """Start the importer UI.  On response run the import task.
@@ -217,7 +313,6 @@ class GenericImporter(ABC):  # pylint: disable=too-many-instance-attributes
         :param item: database table instance
         :param record: record as a dict of column names to values
         """
-        self.obj_cache.clear()
         out_dict = {}
         logger.debug("fields = %s", self.fields)
         for col, value in record.items():
@@ -267,7 +362,6 @@ class GenericImporter(ABC):  # pylint: disable=too-many-instance-attributes
         )
         logger.debug("adding to the session item : %s", item)
         session.add(item)
-        self.obj_cache.clear()
 
     def commit_db(self, session):
         """If session is dirty try committing the changes.
@@ -405,18 +499,14 @@ class GenericImporter(ABC):  # pylint: disable=too-many-instance-attributes
         the session to add in the id etc. or the risk of returning identical
         new instances when the query fails.
 
-        Make sure to clear or destroy self.obj_cache after all records are
-        committed so they do not stay in memory.
+        Uses the session's lookup cache (see `db.enable_lookup_cache`) so
+        results are shared across records, i.e. the same genus or location
+        is only looked up once per import.
         """
-        key = (model, tuple(sorted(kwargs.items())))
-        if value := self.obj_cache.get(key):
-            logger.debug("memoized_get_create_or_update returning memoized")
-            return value
-        value = db.get_create_or_update(
+        db.enable_lookup_cache(session)
+        return db.get_create_or_update(
             session, model, create_one_to_one, **kwargs
         )
-        self.obj_cache[key] = value
-        return value
 
     def add_rec_to_db(
         self, session, item, rec
@@ -609,6 +699,82 @@ class GenericExporter(ABC):
     def _export_task(self):
         """Export task, to be implemented in subclasses"""
 
+    @staticmethod
+    def get_loader_options(
+        domain: type[db.Domain], paths: Iterable[str]
+    ) -> list[LoaderOption]:
+        """Plan the loader options needed to eager load the relationships
+        along field paths, and any notes.
+
+        Many-to-one relationships are joined, collections are loaded with
+        a separate `SELECT ... IN` per batch, so the number of queries an
+        export runs does not depend on the number of items.  Paths are
+        followed until they reach an attribute that is not a relationship
+        (column, hybrid property, association proxy, etc.).  The options
+        can be used with ``Query.yield_per``.
+
+        :param domain: the class of the items to be exported
+        :param paths: dotted paths from the domain to the exported
+            attributes, as used in `get_item_record` fields
+        """
+        rel_paths = set()
+        for path in paths:
+            cls = domain
+            rels: tuple = ()
+            for key in path.split("."):
+                prop = inspect(cls).relationships.get(key)
+                if prop is None:
+                    break
+                rels += (prop,)
+                cls = prop.mapper.class_
+            if rels:
+                rel_paths.add(rels)
+
+        if notes := inspect(domain).relationships.get("notes"):
+            rel_paths.add((notes,))
+
+        # any later option for the same relationship takes precedence
+        options = db.yield_per_options(domain)
+        for rels in sorted(rel_paths, key=len):
+            option = None
+            for prop in rels:
+                attr = prop.class_attribute
+                if option is None:
+                    loader = selectinload if prop.uselist else joinedload
+                    option = loader(attr)
+                elif prop.uselist:
+                    option = option.selectinload(attr)
+                else:
+                    option = option.joinedload(attr)
+            options.append(option)
+        logger.debug("loader options for %s: %s", domain, options)
+        return options
+
+    @classmethod
+    def iter_loaded(
+        cls, items: list[db.Domain], paths: Iterable[str]
+    ) -> Iterator[db.Domain]:
+        """Iterate already loaded items, eager loading the relationships
+        needed for the field paths (see `get_loader_options`) in batches.
+
+        :param items: items of the one type, as returned by a search
+        :param paths: dotted paths to the exported attributes
+        """
+        if not items:
+            return
+        domain = type(items[0])
+        options = cls.get_loader_options(domain, paths)
+        for start in range(0, len(items), EXPORT_BATCH_SIZE):
+            batch = items[start : start + EXPORT_BATCH_SIZE]
+            session = object_session(batch[0])
+            if session is not None and options:
+                # populates the unloaded attributes of the items in the
+                # identity map
+                session.query(domain).filter(
+                    domain.id.in_([i.id for i in batch])
+                ).options(*options).all()
+            yield from batch
+
     @staticmethod
     def get_item_value(path, item, date_as_date=False):
         """Get the items value as a string.
@@ -656,9 +822,7 @@ class GenericExporter(ABC):
             category = getattr(note, "category", None)
             if not category:
                 continue
-            import re
-
-            if match := re.match(r"\{([^\{:]+):(.*)}", category):
+            if match := ATTR_NOTE_RE.match(category):
                 attr_notes.append(match.group(1))
             elif category.startswith("[") and category.endswith("]"):
                 attr_notes.append(category[1:-1])
@@ -394,7 +394,8 @@ class CSVExporter(GenericExporter):
             writer.writeheader()
             # first row is the paths used, in case of reimporting
             writer.writerow(fields)
-            for records_done, item in enumerate(self.items):
+            items = self.iter_loaded(self.items, fields.values())
+            for records_done, item in enumerate(items):
                 row = self.get_item_record(item, fields)
                 writer.writerow(row)
                 if records_done % five_percent == 0:
@@ -19,8 +19,12 @@ Export data to shapefiles (zip file with all component files).
 """
 
 import logging
+import queue
+import threading
+from contextlib import suppress
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from zipfile import ZIP_DEFLATED
 from zipfile import ZipFile
 
 logger = logging.getLogger(__name__)
@@ -30,6 +34,7 @@ from gi.repository import GLib
 from gi.repository import Gtk
 from shapefile import Writer  # type: ignore [import-untyped]
 from sqlalchemy.ext.associationproxy import AssociationProxy
+from sqlalchemy.orm import Query
 from sqlalchemy.orm import class_mapper
 
 import bauble
@@ -44,6 +49,7 @@ from bauble.editor import Problem
 # NOTE importing shapefile Writer above wipes out gettext _
 from bauble.i18n import _
 from bauble.meta import get_default
+from bauble.plugins.garden.accession import Accession
 from bauble.plugins.garden.location import Location
 from bauble.plugins.garden.location import (  # noqa pylint: disable=unused-import
     LocationNote,
@@ -57,6 +63,7 @@ from bauble.plugins.garden.plant import (  # noqa pylint: disable=unused-import
 from bauble.search.query_builder import SchemaMenu
 from bauble.utils.geo import ProjDB
 
+from .. import EXPORT_BATCH_SIZE
 from .. import GenericExporter
 from . import LOCATION_SHAPEFILE_PREFS
 from . import PLANT_SHAPEFILE_PREFS
@@ -79,6 +86,8 @@ MAX_LENGTH = 255
 DATETIME_LENGTH = 50
 MAX_PRECIS = 20
 
+_DONE = object()
+
 
 def get_field_properties(model, path):
     """Get the appropriate shapefile type and size proporties for a database
@@ -657,6 +666,69 @@ class ShapefileExportDialogPresenter(GenericEditorPresenter):
         super().cleanup()
 
 
+class ShapefileLayer(threading.Thread):
+    """Write the records for one shape type to a shapefile, then zip it, in a
+    worker thread.
+
+    Records are written in the order they are added.  Call `finish` when done
+    to wait for the shapefile to be written and zipped.
+
+    :param filename: the shapefile's path, without extension, it is zipped to
+        a file of the same name in `dirname`
+    :param dirname: the directory to write the zip file to
+    """
+
+    def __init__(self, filename: str, dirname: str) -> None:
+        super().__init__(daemon=True)
+        self.filename = filename
+        self.dirname = dirname
+        self.writer = Writer(filename)
+        self.exception: Exception | None = None
+        self._queue: queue.Queue = queue.Queue(maxsize=EXPORT_BATCH_SIZE)
+        self._zip = True
+
+    def add(self, record: dict, shape: dict) -> None:
+        """Queue a record and its geojson shape to be written."""
+        self._queue.put((record, shape))
+
+    def run(self) -> None:
+        while (item := self._queue.get()) is not _DONE:
+            if self.exception:
+                # keep consuming so `add` never blocks
+                continue
+            try:
+                self.writer.record(**item[0])
+                self.writer.shape(item[1])
+            except Exception as e:  # pylint: disable=broad-except
+                self.exception = e
+        try:
+            self.writer.close()
+            if self._zip and not self.exception:
+                self.zip()
+        except Exception as e:  # pylint: disable=broad-except
+            self.exception = e
+
+    def zip(self) -> None:
+        in_path = Path(self.filename)
+        logger.debug("zipping shapefile with basename: %s", in_path.name)
+        with ZipFile(
+            f"{self.dirname}/{in_path.name}.zip", "w", ZIP_DEFLATED
+        ) as z:
+            for path in in_path.parent.glob(f"{in_path.name}.*"):
+                z.write(path, arcname=path.name)
+
+    def finish(self, zip_: bool = True) -> None:
+        """Wait for all records to be written and, if zip_, zipped.
+
+        :raises: any error that occurred writing the shapefile
+        """
+        self._zip = zip_
+        self._queue.put(_DONE)
+        self.join()
+        if self.exception:
+            raise self.exception
+
+
 class ShapefileExporter(GenericExporter):
     """The interface for exporting data in a shapefile.
 
@@ -748,15 +820,14 @@ class ShapefileExporter(GenericExporter):
             self.domain = Location
             super().run()
 
-    def _export_task(self):  # pylint: disable=too-many-locals
+    def _export_task(self):
         """The export task.
 
         Yields occasionally to allow the UI to update.
 
-        :param fields: a list of list of field name, type and size to add
-            to the shapefile
-        :param allowable_shapetypes: list of shapefile shapetypes to produce
-            shapefiles for.
+        Items are streamed from the database in batches, the shapefile for
+        each shape type is created when first needed and written, then
+        zipped, in its own worker thread (see `ShapefileLayer`).
         """
         session = db.Session()
 
@@ -766,54 +837,48 @@ class ShapefileExporter(GenericExporter):
             allowable_shapetypes = {"poly", "line", "point"}
             fields = self.plant_fields
 
-        shapetypes, export_items = self.get_shapes_and_items(
-            session, self.domain, allowable_shapetypes
+        query = self.get_export_query(
+            session, self.domain, [i[PATH] for i in fields]
         )
-
-        num_items = len(list(export_items))
-        five_percent = int(num_items / 20) or 1
-
-        if self._generate_points:
-            if "point" not in shapetypes:
-                self._generate_points = 1
-                shapetypes.add("point")
-        # quit if no shapetypes
-        if not shapetypes:
+        num_items = query.count() if query is not None else 0
+        # quit if nothing to export
+        if not num_items:
+            session.close()
             return
 
-        logger.debug("creating shapefiles for %s types", shapetypes)
-        from contextlib import ExitStack
+        five_percent = int(num_items / 20) or 1
+        layers = {}
 
         with TemporaryDirectory() as _temp_dir:
             logger.debug("build directory (_temp_dir) = %s", _temp_dir)
-            to_zip = []
-            shapefiles = {}
-            with ExitStack() as stack:
-                for shape in shapetypes:
+
+            def get_layer(shape):
+                if shape not in allowable_shapetypes:
+                    return None
+                if shape not in layers:
+                    logger.debug("creating %s shapefile", shape)
                     shapefilename = (
                         f"{_temp_dir}/{self.domain.__tablename__.lower()}s"
                         f"_{shape}"
                     )
                     self.create_prj_file(shapefilename)
-                    to_zip.append(shapefilename)
-                    shapefiles[shape] = stack.enter_context(
-                        Writer(shapefilename)
-                    )
+                    layer = ShapefileLayer(shapefilename, self.dirname)
                     # create the columns and their types and size.
-                    self.add_fields(shape, shapefiles, fields)
+                    self.add_fields(layer.writer, fields)
+                    layer.start()
+                    layers[shape] = layer
+                return layers[shape]
 
+            try:
                 # add records
-                for records_done, item in enumerate(export_items):
-                    self.add_shapefile_record(item, fields, shapefiles)
+                for records_done, item in enumerate(
+                    query.yield_per(EXPORT_BATCH_SIZE)
+                ):
+                    self.add_shapefile_record(item, fields, get_layer)
                     if records_done % five_percent == 0:
                         pb_set_fraction(records_done / num_items)
                         yield
 
-                if self._generate_points == -1:
-                    self._generate_points = 0
-                    # don't zip - files removed on completion of _temp_dir
-                    to_zip = [i for i in to_zip if not i.endswith("point")]
-
                 if self.generated_items:
                     task.set_message("shapefile adding generated points")
                     self.generated_items = sorted(
@@ -828,17 +893,35 @@ class ShapefileExporter(GenericExporter):
                             )
                             yield
                         self.add_generated_points(
-                            item, records_done, fields, shapefiles
+                            item, records_done, fields, get_layer
                         )
+            except BaseException:
+                # includes GeneratorExit, i.e. the task was cancelled
+                for layer in layers.values():
+                    with suppress(Exception):
+                        layer.finish(zip_=False)
+                raise
+            finally:
+                task.clear_messages()
+                # best to roll back before closing esp. generated
+                session.rollback()
+                session.close()
+
+            errors = []
+            for layer in layers.values():
+                try:
+                    layer.finish()
+                except Exception as e:  # pylint: disable=broad-except
+                    errors.append(e)
+            if errors:
+                raise errors[0]
+
+        if layers and self.open:
+            from bauble.utils import desktop
 
-            task.clear_messages()
-            if to_zip:
-                self.zip_shapefiles(to_zip)
-
-        session.rollback()  # best to roll back before closing esp. generated
-        session.close()
+            desktop.open(self.dirname)
 
-    def add_generated_points(self, item, records_done, fields, shapefiles):
+    def add_generated_points(self, item, records_done, fields, get_layer):
         increment_x = 0
         increment_y = 0
         if self.gen_settings.get("axis") == "NS":
@@ -853,46 +936,39 @@ class ShapefileExporter(GenericExporter):
         )
         item.geojson = {"type": "Point", "coordinates": [xxx, yyy]}
         logger.debug("adding generated point %s", item.geojson)
-        self.add_shapefile_record(item, fields, shapefiles)
+        self.add_shapefile_record(item, fields, get_layer)
+
+    def get_export_query(self, session, model, paths):
+        """The query for the items to export, excluding private entries if
+        private is not selected.
 
-    def get_shapes_and_items(self, session, model, allowable_shapetypes):
+        :param paths: the field paths to be exported, their relationships are
+            eager loaded.
+        """
         if self.search_or_all == "rb_search_results":
             selection = self.presenter.view.get_selection()
             if model is Plant:
                 from bauble.plugins.report import get_plants_pertinent_to
 
-                export_items = get_plants_pertinent_to(selection, session)
+                query = get_plants_pertinent_to(selection, session)
             elif model is Location:
                 from bauble.plugins.report import get_locations_pertinent_to
 
-                export_items = get_locations_pertinent_to(selection, session)
+                query = get_locations_pertinent_to(selection, session)
+            if not isinstance(query, Query):
+                # e.g. an empty tag
+                return None
         else:
-            export_items = (
-                session.query(model).filter(model.geojson.isnot(None)).all()
+            query = (
+                session.query(model)
+                .filter(model.geojson.isnot(None))
+                .order_by(model.id)
             )
 
-        # collate the shapefile types to create. Drop any private entries if
-        # private is not selected.
-        shapetypes = set()
-        final = []
-        logger.debug("iterate export_items")
-        for item in export_items:
-            if model is Plant and not self.private:
-                if item.accession.private:
-                    logger.debug("skipping private entry")
-                    # don't consider this entry for shapetypes
-                    continue
-                final.append(item)
-            if item.geojson:
-                logger.debug("json is not none for item: %s", item)
-                shapetype = self.SHAPE_MAP.get(item.geojson.get("type"))
-                if shapetype in allowable_shapetypes:
-                    shapetypes.add(shapetype)
-
-        if final:
-            export_items = final
-
-        return (shapetypes, export_items)
+        if model is Plant and not self.private:
+            query = query.filter(~Plant.accession.has(Accession.private))
+
+        return query.options(*self.get_loader_options(model, paths))
 
     def create_prj_file(self, shapefilename):
         # TODO a way to save the settings for reuse in importing etc.
@@ -930,12 +1006,12 @@ class ShapefileExporter(GenericExporter):
         else:
             shapefile.field(field_name, field_type)
 
-    def add_fields(self, shape, shapefiles, fields):
+    def add_fields(self, writer, fields):
         """Adds the field definitions to the shapefile."""
         for name, typ, size, __ in fields:
-            self.add_field(shapefiles.get(shape), name, typ, size)
+            self.add_field(writer, name, typ, size)
 
-    def add_shapefile_record(self, item, fields, shapefiles):
+    def add_shapefile_record(self, item, fields, get_layer):
         try:
             shape_type = item.geojson.get("type")
         except AttributeError as e:
@@ -953,13 +1029,15 @@ class ShapefileExporter(GenericExporter):
 
                     message_dialog(msg)
                     self.generated_items = []
-                    self._generate_points -= 2
+                    self._generate_points = 0
                     return
                 logger.debug("appending to generated_items")
                 self.generated_items.append(item)
             return
-        shape = self.SHAPE_MAP.get(shape_type)
-        record = {}
+        layer = get_layer(self.SHAPE_MAP.get(shape_type))
+        if layer is None:
+            logger.debug("skipping unsupported shape type: %s", shape_type)
+            return
 
         record = self.get_item_record(
             item,
@@ -967,20 +1045,4 @@ class ShapefileExporter(GenericExporter):
             date_types=[i[0] for i in fields if i[1] == "D"],
         )
 
-        shapefiles.get(shape).record(**record)
-        shapefiles.get(shape).shape(item.geojson)
-
-    def zip_shapefiles(self, to_zip):
-        for shapefilename in to_zip:
-            in_path = Path(shapefilename)
-            in_paths = Path(in_path.parent).glob(f"{in_path.name}.*")
-            basename = in_path.name
-            logger.debug("zipping shapefile with basename: %s", basename)
-            with ZipFile(f"{self.dirname}/{basename}.zip", "w") as z:
-                for path in in_paths:
-                    z.write(path, arcname=path.name)
-
-        if self.open:
-            from bauble.utils import desktop
-
-            desktop.open(self.dirname)
+        layer.add(record, item.geojson)
@@ -22,6 +22,8 @@ import logging
 import weakref
 from collections.abc import Callable
 from contextlib import contextmanager
+from functools import partial
+from itertools import tee
 from pathlib import Path
 from typing import Any
 from typing import cast
@@ -53,9 +55,11 @@ from bauble.plugins.garden.plant import Plant
 from bauble.search.query_builder import SchemaMenu
 from bauble.utils.geo import DEFAULT_IN_PROJ
 from bauble.utils.geo import ProjDB
-from bauble.utils.geo import transform
+from bauble.utils.geo import get_system_crs
+from bauble.utils.geo import transform_many
 
 from .. import GenericImporter
+from .. import map_in_processes
 from . import LOCATION_SHAPEFILE_PREFS
 from . import PLANT_SHAPEFILE_PREFS
 from . import SHAPEFILE_IGNORE_PREF
@@ -815,6 +819,14 @@ class ShapefileImporter(GenericImporter):
             logger.debug("error - no type set")
             raise BaubleError('No "type" set for the records.')
 
+        # projecting is slow, for large imports do it in worker processes
+        transform_geometries = partial(
+            transform_many,
+            in_crs=self.projection,
+            out_crs=get_system_crs(),
+            always_xy=self.always_xy,
+        )
+
         for shape_reader in self.shape_readers:
             shape_reader.filter_conditions = filter_conditions
             msg = (
@@ -823,7 +835,14 @@ class ShapefileImporter(GenericImporter):
             )
             task.set_message(msg)
             with shape_reader.get_records() as records:
-                for line, record in enumerate(records, start=1):
+                records, geo_records = tee(records)
+                geometries = map_in_processes(
+                    transform_geometries,
+                    (self.get_geo_interface(i) for i in geo_records),
+                )
+                for line, (record, geojson) in enumerate(
+                    zip(records, geometries), start=1
+                ):
                     rec_dict = record.record.as_dict()
                     record_dict = {
                         k: v for k, v in rec_dict.items() if self.fields.get(k)
@@ -851,7 +870,7 @@ class ShapefileImporter(GenericImporter):
 
                     if item.geojson:
                         if options.get("update"):
-                            if not self.add_db_geo(session, item, record):
+                            if not self.add_db_geo(session, item, geojson):
                                 logger.debug("add_db_geo failed")
                                 continue
                             records_added += 1
@@ -873,7 +892,7 @@ class ShapefileImporter(GenericImporter):
                                     continue
                     else:
                         if self._is_new or options.get("add_geo"):
-                            if not self.add_db_geo(session, item, record):
+                            if not self.add_db_geo(session, item, geojson):
                                 logger.debug("add_db_geo failed")
                                 continue
                             records_added += 1
@@ -911,24 +930,31 @@ class ShapefileImporter(GenericImporter):
         if bauble.gui and (view := bauble.gui.get_view()):
             view.update()
 
-    def add_db_geo(self, session, item, record):
-        """Add the __geo_interface__ data from the shapefile record to the
-        database item's geojson field
+    @staticmethod
+    def get_geo_interface(record):
+        """The __geo_interface__ data from the shapefile record or None if the
+        shape has none (e.g. null shapes).
+
+        :param record: a shapefile.Record().shapefileRecord() value
+        """
+        try:
+            return record.shape.__geo_interface__
+        except Exception as e:  # pylint: disable=broad-except
+            logger.debug("%s(%s)", type(e).__name__, e)
+            return None
 
-        Coordinates are projected to the system CRS as needed.
+    def add_db_geo(self, session, item, geojson):
+        """Add the geojson data, projected to the system CRS, from the
+        shapefile record to the database item's geojson field
 
         :param session: instance of db.Session()
         :param item: database instance
-        :param record: a shapefile.Record().shapefileRecord() value
+        :param geojson: the record's geometry transformed to the system CRS,
+            None if it could not be transformed.
         """
         logger.debug("adding geojson data")
-        geojson = transform(
-            record.shape.__geo_interface__,
-            in_crs=self.projection,
-            always_xy=self.always_xy,
-        )
         if not geojson:
-            logger.debug("error transforming %s", record)
+            logger.debug("error transforming geometry for %s", item)
             return False
         item.geojson = geojson
 
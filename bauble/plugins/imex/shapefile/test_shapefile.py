@@ -65,6 +65,7 @@ from . import PLANT_SHAPEFILE_PREFS
 from .export_tool import ShapefileExportDialogPresenter
 from .export_tool import ShapefileExporter
 from .export_tool import ShapefileExportSettingsBox as ExpSetBox
+from .export_tool import ShapefileLayer
 from .export_tool import get_field_properties
 from .import_tool import FILTER
 from .import_tool import FILTER_OPS
@@ -1358,6 +1359,48 @@ class ShapefileExportTestsEmptyDB(ShapefileTestCase):
         self.assertEqual(len(out), 0)
 
 
+class ShapefileLayerTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = TemporaryDirectory()
+        self.out_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        super().tearDown()
+        self.temp_dir.cleanup()
+        self.out_dir.cleanup()
+
+    def test_writes_in_order_and_zips(self):
+        layer = ShapefileLayer(
+            f"{self.temp_dir.name}/plants_point", self.out_dir.name
+        )
+        layer.writer.field("plt_id", "N")
+        layer.start()
+        for i in range(1000):
+            layer.add({"plt_id": i}, epsg4326_point_xy)
+        layer.finish()
+        out = [str(i) for i in Path(self.out_dir.name).glob("*.zip")]
+        self.assertEqual(len(out), 1)
+        self.assertTrue(out[0].endswith("plants_point.zip"))
+        with ZippedShapefile(out[0], "r") as shpf:
+            self.assertEqual(
+                [i["plt_id"] for i in shpf.records()], list(range(1000))
+            )
+
+    def test_error_raised_on_finish_and_not_zipped(self):
+        layer = ShapefileLayer(
+            f"{self.temp_dir.name}/plants_point", self.out_dir.name
+        )
+        layer.writer.field("plt_id", "N")
+        layer.start()
+        layer.add({"plt_id": 1}, {"type": "Bogus", "coordinates": []})
+        # keeps consuming after an error
+        for i in range(1000):
+            layer.add({"plt_id": i}, epsg4326_point_xy)
+        self.assertRaises(Exception, layer.finish)
+        self.assertFalse(list(Path(self.out_dir.name).glob("*.zip")))
+
+
 class ShapefileExportTests(ShapefileTestCase):
     def setUp(self):  # pylint: disable=too-many-locals
         super().setUp()
@@ -2159,6 +2202,20 @@ class ShapefileExportTests(ShapefileTestCase):
         self.assertEqual(len(out), 2)
         self.assertEqual(exporter.error, 2)
 
+    def test_exports_search_only_private_plants_not_private(self):
+        objs = self.session.query(Plant).filter_by(accession_id=2).all()
+        exporter = self.exporter
+        exporter.presenter.view.selection = objs
+        exporter.proj_db.add(prj=prj_str_4326, crs="epsg:4326")
+        exporter.search_or_all = "rb_search_results"
+        exporter.private = False
+        exporter.export_locations = False
+        exporter.export_plants = True
+        exporter.dirname = self.temp_dir.name
+        exporter.run()
+        out = [str(i) for i in Path(self.temp_dir.name).glob("*.zip")]
+        self.assertEqual(out, [])
+
     def test_exports_search_locations(self):
         objs = self.session.query(Family).filter_by(family="Myrtaceae").all()
         exporter = self.exporter
@@ -26,11 +26,13 @@ logger = logging.getLogger(__name__)
 import os
 import shutil
 import tempfile
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date
 from datetime import datetime
 from pathlib import Path
 
 from dateutil.parser import parse as date_parse
+from sqlalchemy import inspect
 from sqlalchemy.exc import IntegrityError
 
 import bauble
@@ -46,12 +48,16 @@ from bauble.plugins.garden.accession import Voucher
 from bauble.plugins.plants import Family
 from bauble.plugins.plants import Genus
 from bauble.plugins.plants import Species
+from bauble.sql_stats import track_statements
+from bauble.task import TaskState
 from bauble.test import BaubleTestCase
 from bauble.test import get_setUp_data_funcs
+from bauble.test import wait_for_tasks
 
 from . import GenericExporter
 from . import GenericImporter
 from . import is_importable_attr
+from . import map_in_processes
 from .csv_ import QUOTE_CHAR
 from .csv_ import QUOTE_STYLE
 from .csv_ import CSVBackup
@@ -467,7 +473,9 @@ class XMLExporterTests(BaubleTestCase):
         exporter = XMLExporter()
         exporter.one_file = True
         with tempfile.TemporaryDirectory() as temp_dir:
-            exporter.start(path=temp_dir)
+            bg_task = exporter.start(path=temp_dir)
+            wait_for_tasks()
+            self.assertEqual(bg_task.state, TaskState.DONE)
             out = Path(temp_dir, "test_xml.xml")
             self.assertTrue(out.exists())
             with out.open("r", encoding="utf8") as file:
@@ -487,7 +495,9 @@ class XMLExporterTests(BaubleTestCase):
         exporter = XMLExporter()
         exporter.one_file = True
         with tempfile.TemporaryDirectory() as temp_dir:
-            exporter.start(path=temp_dir)
+            bg_task = exporter.start(path=temp_dir)
+            wait_for_tasks()
+            self.assertEqual(bg_task.state, TaskState.DONE)
             out = Path(temp_dir, "test_xml.xml")
             self.assertTrue(out.exists())
             with out.open("r", encoding="utf8") as file:
@@ -504,7 +514,9 @@ class XMLExporterTests(BaubleTestCase):
         exporter = XMLExporter()
         exporter.one_file = False
         with tempfile.TemporaryDirectory() as temp_dir:
-            exporter.start(path=temp_dir)
+            bg_task = exporter.start(path=temp_dir)
+            wait_for_tasks()
+            self.assertEqual(bg_task.state, TaskState.DONE)
             out_dir = Path(temp_dir)
             files = [i.stem for i in out_dir.glob("*.xml")]
             for table in db.metadata.tables:
@@ -518,6 +530,20 @@ class XMLExporterTests(BaubleTestCase):
                     data = file.readline()
                     self.assertGreater(len(data), 10, data)
 
+    @mock.patch("bauble.plugins.imex.xml.utils.message_details_dialog")
+    def test_export_error_shows_dialog(self, mock_dialog):
+        exporter = XMLExporter()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with mock.patch(
+                "bauble.plugins.imex.xml.element_factory",
+                side_effect=ValueError("bad value"),
+            ):
+                bg_task = exporter.start(path=temp_dir)
+                wait_for_tasks()
+        self.assertEqual(bg_task.state, TaskState.FAILED)
+        mock_dialog.assert_called_once()
+        self.assertEqual(mock_dialog.call_args.args[0], "bad value")
+
     def test_raises_bad_path(self):
         exporter = XMLExporter()
         self.assertRaises(
@@ -1326,8 +1352,92 @@ class GenericExporterTests(BaubleTestCase):
         )
         self.assertEqual(val, {"locale": "Somewhere", "collector": "Someone"})
 
+    def count_export_queries(self, paths):
+        fields = {str(i): path for i, path in enumerate(paths)}
+        options = GenericExporter.get_loader_options(Plant, paths)
+        with track_statements() as stats, db.Session() as session:
+            for item in session.query(Plant).options(*options):
+                GenericExporter.get_item_record(item, fields)
+        return stats.count
+
+    def test_get_loader_options_query_count_independent_of_items(self):
+        paths = [
+            "code",
+            "accession.species.genus.family.epithet",
+            "accession.source.source_detail.name",
+            "location.code",
+            "Note",
+        ]
+        before = self.count_export_queries(paths)
+        for i in range(10):
+            self.session.add(
+                Plant(
+                    code=str(i + 10), accession_id=1, location_id=1, quantity=1
+                )
+            )
+        self.session.commit()
+        self.assertEqual(self.count_export_queries(paths), before)
+
+    def test_get_loader_options_can_yield_per(self):
+        options = GenericExporter.get_loader_options(
+            Plant, ["accession.species.epithet", "location.code"]
+        )
+        plants = self.session.query(Plant).options(*options).yield_per(1)
+        self.assertEqual(
+            [i.id for i in plants],
+            [i.id for i in self.session.query(Plant)],
+        )
+
+    def test_iter_loaded(self):
+        items = self.session.query(Plant).order_by(Plant.id).all()
+        self.assertIn("location", inspect(items[0]).unloaded)
+        loaded = list(GenericExporter.iter_loaded(items, ["location.code"]))
+        self.assertEqual(loaded, items)
+        self.assertNotIn("location", inspect(items[0]).unloaded)
+        self.assertNotIn("notes", inspect(items[0]).unloaded)
+
 
 class GlobalFunctionsTests(BaubleTestCase):
+    def test_map_in_processes(self):
+        # single batch, in process
+        self.assertEqual(list(map_in_processes(sorted, [3, 1, 2])), [1, 2, 3])
+        self.assertEqual(list(map_in_processes(sorted, [])), [])
+        items = list(range(100, 0, -1))
+        expected = [
+            j for i in range(0, 100, 10) for j in sorted(items[i : i + 10])
+        ]
+        # fewer than min_batches, in process
+        with mock.patch(
+            "bauble.plugins.imex.ProcessPoolExecutor"
+        ) as mock_executor:
+            self.assertEqual(
+                list(map_in_processes(sorted, iter(items), batch_size=10)),
+                expected,
+            )
+            mock_executor.assert_not_called()
+        # multiple batches, in worker processes, in order
+        self.assertEqual(
+            list(
+                map_in_processes(
+                    sorted, iter(items), batch_size=10, min_batches=2
+                )
+            ),
+            expected,
+        )
+        # a broken pool falls back to in process
+        with mock.patch(
+            "bauble.plugins.imex.ProcessPoolExecutor.submit",
+            side_effect=BrokenProcessPool(),
+        ):
+            self.assertEqual(
+                list(
+                    map_in_processes(
+                        sorted, iter(items), batch_size=10, min_batches=2
+                    )
+                ),
+                expected,
+            )
+
     def test_is_importable_attr(self):
         self.assertTrue(is_importable_attr(Species, "epithet"))
         self.assertTrue(is_importable_attr(Species, "sp"))
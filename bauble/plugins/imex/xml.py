@@ -33,7 +33,6 @@ from gi.repository import Gtk  # noqa
 
 import bauble
 from bauble import db
-from bauble import pb_set_fraction
 from bauble import pluginmgr
 from bauble import task
 from bauble import utils
@@ -113,8 +112,7 @@ class XMLExporter:
                     _("XML Export: path does not exist.\n%s") % path
                 )
             self.filename = path.strip()
-            self.run()
-            return None
+            return self.run()
         response = self.presenter.start()
         if response == Gtk.ResponseType.OK:
             self.run()
@@ -123,57 +121,68 @@ class XMLExporter:
         return response
 
     def run(self):
-        """Queues the export task"""
+        """Submit the export as a background task.
+
+        :return: the task
+        """
         task.clear_messages()
         task.set_message("exporting XML")
-        task.queue(self._export_task(self.filename, self.one_file))
+        return task.submit(
+            self._export_task,
+            self.filename,
+            self.one_file,
+            name=_("XML export"),
+            on_done=self.on_export_done,
+            on_error=self.on_export_error,
+        )
+
+    @staticmethod
+    def on_export_done(_result):
         task.set_message("export completed")
 
     @staticmethod
-    def _export_task(path, one_file=True):
+    def on_export_error(exc):
+        task.clear_messages()
+        utils.message_details_dialog(
+            utils.xml_safe(exc),
+            "".join(traceback.format_exception(exc)),
+            Gtk.MessageType.ERROR,
+        )
+
+    @staticmethod
+    def _export_task(session, bg_task, path, one_file=True):
+        """Background task function, see `bauble.task.submit`."""
+        connection = session.connection()
         ntables = len(db.metadata.tables)
-        steps_so_far = 0
-        five_percent = int(ntables / 20) or 1
         if one_file:
             tableset_el = etree.Element("tableset")
 
-        for table_name, table in db.metadata.tables.items():
-            steps_so_far += 1
+        for steps_so_far, (table_name, table) in enumerate(
+            db.metadata.tables.items()
+        ):
+            bg_task.progress(steps_so_far / ntables, table_name)
             if not one_file:
                 tableset_el = etree.Element("tableset")
             logger.info("exporting %s…", table_name)
             table_el = element_factory(
                 tableset_el, "table", attrib={"name": table_name}
             )
-            results = table.select().execute().fetchall()
+            results = connection.execute(table.select())
             columns = list(table.c.keys())
-            try:
-                for row in results:
-                    row_el = element_factory(table_el, "row")
-                    for col in columns:
-                        element_factory(
-                            row_el,
-                            "column",
-                            attrib={"name": col},
-                            text=row[col],
-                        )
-            except ValueError as e:
-                utils.message_details_dialog(
-                    utils.xml_safe(e),
-                    traceback.format_exc(),
-                    Gtk.MessageType.ERROR,
-                )
-                return
-            else:
-                if not one_file:
-                    tree = etree.ElementTree(tableset_el)
-                    filename = os.path.join(path, f"{table_name}.xml")
-                    logger.debug("writing xml to %s", filename)
-                    tree.write(filename, encoding="utf8", xml_declaration=True)
-
-            if ntables % five_percent == 0:
-                pb_set_fraction(steps_so_far / ntables)
-                yield
+            for row in results:
+                row_el = element_factory(table_el, "row")
+                for col in columns:
+                    element_factory(
+                        row_el,
+                        "column",
+                        attrib={"name": col},
+                        text=row[col],
+                    )
+            if not one_file:
+                tree = etree.ElementTree(tableset_el)
+                filename = os.path.join(path, f"{table_name}.xml")
+                logger.debug("writing xml to %s", filename)
+                tree.write(filename, encoding="utf8", xml_declaration=True)
 
         if one_file:
             tree = etree.ElementTree(tableset_el)
@@ -156,13 +156,19 @@ class SynonymsPresenter(editor.GenericEditorPresenter):
     def syn_get_completions(self, text):
         # Skip current synonyms, self and already added synonyms
         result = self.completions_seed(self.session, text)
-        ids = [i[0] for i in self.session.query(self.synonym_model.synonym_id)]
+        # current synonyms as a subquery rather than loading every id
+        current = self.session.query(self.synonym_model.synonym_id)
+        ids = []
         for syn in self.model._synonyms:
-            if syn.synonym and (id_ := syn.synonym.id) not in ids:
+            if syn.synonym and (id_ := syn.synonym.id) is not None:
                 ids.append(id_)
         if id_ := self.model.id:
             ids.append(id_)
-        return result.filter(type(self.model).id.notin_(ids)).limit(100)
+        id_col = type(self.model).id
+        result = result.filter(id_col.notin_(current.scalar_subquery()))
+        if ids:
+            result = result.filter(id_col.notin_(ids))
+        return result.limit(100)
 
     def on_select(self, value):
         sensitive = True
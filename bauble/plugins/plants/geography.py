@@ -21,6 +21,9 @@ The geography module,
 
 World Geographical Scheme for Recording Plant Distributions (WGSRPD)
 """
+
+import hashlib
+import itertools
 import logging
 import threading
 import traceback
@@ -62,10 +65,12 @@ from sqlalchemy.orm import backref
 from sqlalchemy.orm import deferred
 from sqlalchemy.orm import object_session
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm import undefer
 
 import bauble
 from bauble import btypes as types
 from bauble import db
+from bauble import paths
 from bauble import pb_set_fraction
 from bauble import prefs
 from bauble import utils
@@ -106,6 +111,29 @@ map_action = Action(
 
 geography_context_menu = [map_action]
 
+DIST_MAP_WIDTH = 360
+"""Width, in pixels, of distribution map images."""
+
+DIST_MAP_HEIGHT = 180
+"""Height, in pixels, of distribution map images."""
+
+DIST_MAP_RENDER_VERSION = 1
+"""Included in the disk cache key of rendered distribution map images, bump
+when the rendering changes to invalidate previously stored images.
+"""
+
+DIST_MAP_CACHE_MAX_FILES = 2000
+"""The maximum number of rendered images kept in the disk cache, the least
+recently used are removed when exceeded.
+"""
+
+DIST_MAP_CACHE_PRUNE_EVERY = 100
+"""Prune the disk cache on the first and then every this many images saved to
+it, rather than listing it on every save.
+"""
+
+_dist_map_cache_saves = itertools.count()
+
 
 def get_species_in_geography(geo):
     """Return all the Species that have distribution in geo"""
@@ -629,13 +657,85 @@ def get_world_paths(fill: str, pacific_centric: bool) -> str:
     """All continent level WGSRPD areas as an string of SVG paths."""
     svg_paths = []
     with db.Session() as session:
-        for geo in session.query(Geography).filter_by(level=1):
+        for geo in (
+            session.query(Geography)
+            .filter_by(level=1)
+            .options(undefer(Geography.geojson))
+        ):
             svg_paths.append(
                 geo.as_svg_paths(fill=fill, pacific_centric=pacific_centric)
             )
     return "".join(svg_paths)
 
 
+def dist_map_cache_dir() -> Path:
+    """The directory rendered distribution map images are stored in."""
+    return Path(paths.appdata_dir(), "dist_map_cache")
+
+
+def dist_map_cache_name(svg: str) -> str:
+    """The name to store the rendered SVG under in the disk cache.
+
+    A digest of the SVG itself (which contains the geography data and image
+    size) and `DIST_MAP_RENDER_VERSION`.
+    """
+    return hashlib.sha1(
+        f"{DIST_MAP_RENDER_VERSION}|{svg}".encode()
+    ).hexdigest()
+
+
+def prune_dist_map_cache(max_files: int = DIST_MAP_CACHE_MAX_FILES) -> None:
+    """Remove the least recently used images from the disk cache when it
+    holds more than `max_files`.
+    """
+    try:
+        files = sorted(
+            (path.stat().st_mtime, path)
+            for path in dist_map_cache_dir().glob("*.png")
+        )
+        for _mtime, path in files[: max(len(files) - max_files, 0)]:
+            path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.debug("%s(%s)", type(e).__name__, e)
+
+
+def rasterise_svg(svg: str, cache: bool = False) -> GdkPixbuf.Pixbuf:
+    """Rasterise the SVG string to a pixbuf.
+
+    If `cache` is True first try loading the PNG from the disk cache, when
+    not available render and save it there for next time.
+    """
+    path = None
+    if cache:
+        path = dist_map_cache_dir() / f"{dist_map_cache_name(svg)}.png"
+        if path.exists():
+            try:
+                pixbuf = GdkPixbuf.Pixbuf.new_from_file(str(path))
+                # record the use for pruning
+                path.touch()
+                return pixbuf
+            except (OSError, GLib.Error) as e:
+                logger.debug("%s(%s)", type(e).__name__, e)
+
+    loader = GdkPixbuf.PixbufLoader()
+    loader.write(svg.encode())
+    loader.close()
+    pixbuf = loader.get_pixbuf()
+
+    if path:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write then move so other threads never read a partial file
+            temp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            pixbuf.savev(str(temp), "png", [], [])
+            temp.replace(path)
+        except (OSError, GLib.Error) as e:
+            logger.debug("%s(%s)", type(e).__name__, e)
+        if next(_dist_map_cache_saves) % DIST_MAP_CACHE_PRUNE_EVERY == 0:
+            prune_dist_map_cache()
+    return pixbuf
+
+
 class DistMapCache(OrderedDict[int, Gtk.Image]):
     """Limited size LRU image cache dict.
 
@@ -684,15 +784,17 @@ class DistributionMap:
         self._zoom_map: str = ""
         self._current_max_mins: tuple[float, float, float, float] | None = None
 
-    def get_areas(self) -> Iterable[Geography]:
-
+    def get_areas(self) -> list[Geography]:
+        """Load the areas, with their geojson, in a single query."""
         with db.Session() as session:
             return (
                 session.query(Geography)
                 .filter(
                     cast(QueryableAttribute, Geography.id).in_(self._area_ids)
                 )
+                .options(undefer(Geography.geojson))
                 .order_by(Geography.code)  # for hash: _image_cache_key
+                .all()
             )
 
     @property
@@ -717,7 +819,7 @@ class DistributionMap:
             world_paths = get_world_paths("lightgrey", True)
             self._zoom_map = (
                 '<svg xmlns="http://www.w3.org/2000/svg" '
-                'width="360" height="180" '
+                f'width="{DIST_MAP_WIDTH}" height="{DIST_MAP_HEIGHT}" '
                 'viewBox="{viewbox}">'
                 '<g transform="scale(1, -1)">'
                 f"{world_paths}"
@@ -782,7 +884,8 @@ class DistributionMap:
 
         world_paths = get_world_paths("lightgrey", pacific_centric)
         cls._world = (
-            '<svg xmlns="http://www.w3.org/2000/svg" width="360" height="180" '
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{DIST_MAP_WIDTH}" height="{DIST_MAP_HEIGHT}" '
             f'viewBox="{viewbox}">'
             '<g transform="scale(1, -1)">'
             f"{world_paths}"
@@ -790,11 +893,9 @@ class DistributionMap:
             "</g>"
             "</svg>"
         )
-        loader = GdkPixbuf.PixbufLoader()
-        loader.write(cls._world.format(selected="").encode())
-        loader.close()
-        pixbuf = loader.get_pixbuf()
-        cls._world_pixbuf = pixbuf
+        cls._world_pixbuf = rasterise_svg(
+            cls._world.format(selected=""), cache=True
+        )
 
     def _generate_image(self) -> None:
         """Generate an appropriate image pixbuf for the supplied geographies
@@ -803,32 +904,45 @@ class DistributionMap:
         Run in a thread while the image, with a placeholder pixbuf, is used
         replacing it's pixbuf when it becomes available.
         """
-        loader = GdkPixbuf.PixbufLoader()
-        loader.write(str(self).encode())
-        loader.close()
-        pixbuf = loader.get_pixbuf()
-        if self._image:  # type guard
+        self._render_image(str(self), True)
+
+    def _render_image(self, svg: str, cache: bool) -> None:
+        """Rasterise svg and `idle_add` setting it as the image's pixbuf.
+
+        Run in a thread.
+        """
+        pixbuf = rasterise_svg(svg, cache=cache)
+        GLib.idle_add(self._set_image_pixbuf, svg, pixbuf)
+
+    def _set_image_pixbuf(self, svg: str, pixbuf: GdkPixbuf.Pixbuf) -> bool:
+        # ignore renders that have been superseded, e.g. zooming repeatedly
+        if self._image and svg == self._map:
             logger.debug("setting image pixbuf")
-            GLib.idle_add(self._image.set_from_pixbuf, pixbuf)
+            self._image.set_from_pixbuf(pixbuf)
+        return GLib.SOURCE_REMOVE
 
-    def replace_image(self, svg: str) -> None:
-        """Temperarily replace the image (e.g. zoom)"""
+    def replace_image(self, svg: str, zoom: float | None = None) -> None:
+        """Temperarily replace the image (e.g. zoom)
+
+        The image is rasterised in a thread, its pixbuf is replaced when it
+        becomes available.
+
+        :param zoom: if supplied the image is cached on disk.
+        """
         self._map = svg
-        loader = GdkPixbuf.PixbufLoader()
-        loader.write(str(svg).encode())
-        loader.close()
-        pixbuf = loader.get_pixbuf()
         if self._image:  # type guard
             logger.debug("replacing image pixbuf")
-            self._image.set_from_pixbuf(pixbuf)
             # delete from cache so it refreshes next access
             if self._image_cache.get(self._image_cache_key):
                 del self._image_cache[self._image_cache_key]
+            threading.Thread(
+                target=self._render_image, args=(svg, bool(zoom))
+            ).start()
 
     def zoom_to_level(self, zoom: float) -> None:
         logger.debug("zooming to level: %s", zoom)
         svg = self.zoom_map.format(viewbox=self.get_zoom_viewbox(zoom))
-        self.replace_image(svg)
+        self.replace_image(svg, zoom)
 
     def detach_image(self) -> None:
 
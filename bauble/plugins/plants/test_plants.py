@@ -26,16 +26,22 @@ import logging
 logging.basicConfig()
 # logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
 
+import itertools
 import os
+import threading
 from datetime import datetime
 from datetime import timedelta
 from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from tempfile import mkstemp
 from unittest import TestCase
 from unittest import mock
 
 from gi.repository import Gdk
+from gi.repository import GdkPixbuf
 from gi.repository import Gtk
+from sqlalchemy import inspect
 from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.exc import StatementError
@@ -92,8 +98,12 @@ from .geography import _path_string
 from .geography import calculate_zoom_buffer
 from .geography import consolidate_geographies
 from .geography import consolidate_geographies_by_percent_area
+from .geography import dist_map_cache_name
 from .geography import get_species_in_geography
 from .geography import get_viewbox
+from .geography import get_world_paths
+from .geography import prune_dist_map_cache
+from .geography import rasterise_svg
 from .geography import split_lats_longs
 from .geography import straddles_antimeridian
 from .geography import update_all_approx_areas_handler
@@ -4811,6 +4821,14 @@ class DistributionMapTests(BaubleClassTestCase):
         DistributionMap._world = ""
         DistributionMap._world_pixbuf = None
         DistributionMap._image_cache = DistMapCache()
+        self.temp_dir = TemporaryDirectory()
+        patcher = mock.patch(
+            "bauble.plugins.plants.geography.dist_map_cache_dir",
+            return_value=Path(self.temp_dir.name),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
 
     def test_world_template(self):
         # calling world generates the template
@@ -4926,6 +4944,121 @@ class DistributionMapTests(BaubleClassTestCase):
             [i.code for i in dist.get_areas()], ["MXI-RA", "NFK-NI"]
         )
 
+    def test_get_areas_loads_geojson_once(self):
+        dist = DistributionMap([657, 683])
+        self.assertIsInstance(dist.areas, list)
+        for area in dist.areas:
+            self.assertNotIn("geojson", inspect(area).unloaded)
+        dist.world
+        # generating the maps does not query the database again
+        with mock.patch.object(db, "Session") as mock_session:
+            str(dist)
+            dist.get_max_zoom()
+            dist.get_zoom_viewbox(4)
+            mock_session.assert_not_called()
+
+    def test_get_world_paths_is_cached(self):
+        get_world_paths("lightgrey", True)
+        with mock.patch.object(db, "Session") as mock_session:
+            self.assertTrue(get_world_paths("lightgrey", True))
+            mock_session.assert_not_called()
+
+    def test_rasterise_svg_uses_disk_cache(self):
+        svg = (
+            '<svg width="10" height="10" xmlns="http://www.w3.org/2000/svg">'
+            '<path fill="green" d="M 0 0 L 0 10 L 10 10 L 10 0 Z"/></svg>'
+        )
+        # not cached
+        pixbuf = rasterise_svg(svg)
+        self.assertEqual(pixbuf.get_width(), 10)
+        self.assertEqual(list(Path(self.temp_dir.name).iterdir()), [])
+        # cached
+        with mock.patch(
+            "bauble.plugins.plants.geography.GdkPixbuf.PixbufLoader",
+            wraps=GdkPixbuf.PixbufLoader,
+        ) as mock_loader:
+            pixbuf = rasterise_svg(svg, cache=True)
+            mock_loader.assert_called()
+            name = dist_map_cache_name(svg)
+            self.assertTrue(Path(self.temp_dir.name, f"{name}.png").exists())
+            mock_loader.reset_mock()
+            pixbuf2 = rasterise_svg(svg, cache=True)
+            mock_loader.assert_not_called()
+        self.assertEqual(pixbuf2.get_width(), pixbuf.get_width())
+
+    def test_dist_map_cache_name_includes_render_version(self):
+        name = dist_map_cache_name("<svg/>")
+        self.assertEqual(name, dist_map_cache_name("<svg/>"))
+        self.assertNotEqual(name, dist_map_cache_name("<svg></svg>"))
+        with mock.patch(
+            "bauble.plugins.plants.geography.DIST_MAP_RENDER_VERSION", 999
+        ):
+            self.assertNotEqual(name, dist_map_cache_name("<svg/>"))
+
+    def test_prune_dist_map_cache(self):
+        for i in range(5):
+            path = Path(self.temp_dir.name, f"{i}.png")
+            path.touch()
+            os.utime(path, (i, i))
+        prune_dist_map_cache(3)
+        self.assertEqual(
+            sorted(i.name for i in Path(self.temp_dir.name).iterdir()),
+            ["2.png", "3.png", "4.png"],
+        )
+
+    def test_rasterise_svg_prunes_periodically(self):
+        svg = (
+            '<svg width="10" height="10" xmlns="http://www.w3.org/2000/svg">'
+            '<path fill="green" d="M 0 0 L 0 {0} L 10 10 L 10 0 Z"/></svg>'
+        )
+        with (
+            mock.patch(
+                "bauble.plugins.plants.geography._dist_map_cache_saves",
+                itertools.count(),
+            ),
+            mock.patch(
+                "bauble.plugins.plants.geography.DIST_MAP_CACHE_PRUNE_EVERY",
+                3,
+            ),
+            mock.patch(
+                "bauble.plugins.plants.geography.prune_dist_map_cache"
+            ) as mock_prune,
+        ):
+            for i in range(7):
+                rasterise_svg(svg.format(i), cache=True)
+            # first, fourth and seventh saves
+            self.assertEqual(mock_prune.call_count, 3)
+            # cache hits are not saves
+            rasterise_svg(svg.format(0), cache=True)
+            self.assertEqual(mock_prune.call_count, 3)
+
+    def test_as_image_populates_from_disk_cache(self):
+        dist = DistributionMap([682])
+        dist.world
+        # a stand in for a previously rendered image
+        stand_in = GdkPixbuf.Pixbuf.new(
+            GdkPixbuf.Colorspace.RGB, False, 8, 20, 10
+        )
+        name = dist_map_cache_name(str(dist))
+        stand_in.savev(
+            str(Path(self.temp_dir.name, f"{name}.png")),
+            "png",
+            [],
+            [],
+        )
+        dist.as_image()
+        wait_on_threads()
+        update_gui()
+        self.assertEqual(dist.as_image().get_pixbuf().get_width(), 20)
+        # a different area renders and is stored
+        dist = DistributionMap([50])
+        dist.as_image()
+        wait_on_threads()
+        update_gui()
+        name = dist_map_cache_name(str(dist))
+        self.assertTrue(Path(self.temp_dir.name, f"{name}.png").exists())
+        self.assertEqual(dist.as_image().get_pixbuf().get_width(), 360)
+
     def test_zoom_map(self):
         dist = DistributionMap([657, 683])
         paths = (
@@ -5005,19 +5138,48 @@ class DistributionMapTests(BaubleClassTestCase):
             '<path stroke="green" stroke-width="0.2" fill="green" d="M 0 0 L '
             '0 100 L 100 100 L 100 0 Z"/></svg>'
         )
-        dist.replace_image(replace)
-        self.assertEqual(replace, dist.map)
+        threads = []
+
+        def rasterise(svg, cache=False):
+            threads.append(threading.current_thread())
+            return rasterise_svg(svg, cache=cache)
+
+        with mock.patch(
+            "bauble.plugins.plants.geography.rasterise_svg", rasterise
+        ):
+            dist.replace_image(replace)
+            self.assertEqual(replace, dist.map)
+            wait_on_threads()
+        # not rendered in the main thread
+        self.assertTrue(threads)
+        self.assertNotIn(threading.main_thread(), threads)
+        update_gui()
         self.assertNotEqual(start_map, dist.map)
         self.assertNotEqual(start_pb, dist.as_image().get_pixbuf())
         self.assertNotIn(dist._image, dist._image_cache.values())
 
+    def test_replace_image_ignores_superseded_renders(self):
+        dist = DistributionMap([657])
+        image = dist.as_image()
+        wait_on_threads()
+        update_gui()
+        current = image.get_pixbuf()
+        stale = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, False, 8, 5, 5)
+        dist._map = "<svg>newer</svg>"
+        dist._set_image_pixbuf("<svg>older</svg>", stale)
+        self.assertIs(image.get_pixbuf(), current)
+        dist._set_image_pixbuf("<svg>newer</svg>", stale)
+        self.assertIs(image.get_pixbuf(), stale)
+
     def test_zoom_to_level(self):
         rocas_alijos = 657
         dist = DistributionMap([rocas_alijos])
         dist._zoom_map = "TEST {viewbox}"
         dist.replace_image = mock.Mock()
         dist.zoom_to_level(8.0)
-        dist.replace_image.assert_called_with("TEST -138.25 -36.203 45.0 22.5")
+        dist.replace_image.assert_called_with(
+            "TEST -138.25 -36.203 45.0 22.5", 8.0
+        )
 
     def test_detach_image(self):
         rocas_alijos = 657
@@ -25,14 +25,33 @@ report plugin.
 import logging
 import os
 import traceback
+from collections.abc import Iterable
+from collections.abc import Iterator
+from importlib import import_module
+from itertools import count
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
 from gi.repository import GLib
 from gi.repository import Gtk
+from sqlalchemy import Column
+from sqlalchemy import Integer
+from sqlalchemy import MetaData
+from sqlalchemy import Table
+from sqlalchemy import false
+from sqlalchemy import func
+from sqlalchemy import literal
+from sqlalchemy import select
+from sqlalchemy import union
+from sqlalchemy.orm import Load
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.expression import Select
+from sqlalchemy.sql.expression import SelectBase
 
 import bauble
+from bauble import db
 from bauble import paths
 from bauble import pluginmgr
 from bauble import prefs
@@ -50,6 +69,7 @@ from bauble.plugins.plants import Geography
 from bauble.plugins.plants import Species
 from bauble.plugins.plants import VernacularName
 from bauble.plugins.tag import Tag
+from bauble.plugins.tag.model import TaggedObj
 
 from .template_downloader import TemplateDownloadTool
 
@@ -73,34 +93,248 @@ Preference key, True if the settings expander is expanded.
 """
 
 
+PERTINENT_BATCH_SIZE = 500
+"""
+The number of objects fetched at a time when iterating the results of a
+``get_*_pertinent_to`` task.
+"""
+
+STAGE_IDS_THRESHOLD = 500
+"""
+Selections of more ids than this are staged in a temporary table rather than
+sent as a list of parameters.
+"""
+
 # to be populated by the dialog box, with fields mentioned in the template
 options: dict[str, Any] = {}
 
+_staging_metadata = MetaData()
+_staged_ids = Table(
+    "report_staged_ids",
+    _staging_metadata,
+    Column("selection", Integer, primary_key=True, autoincrement=False),
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    prefixes=["TEMPORARY"],
+)
+# MSSQL temporary tables are named rather than prefixed
+_mssql_staged_ids = Table(
+    "#report_staged_ids",
+    _staging_metadata,
+    Column("selection", Integer, primary_key=True, autoincrement=False),
+    Column("id", Integer, primary_key=True, autoincrement=False),
+)
+_selections = count()
+
+
+def _stage_ids(
+    ids: Iterable[int] | SelectBase, session: Session
+) -> tuple[Select, int, int]:
+    """Bulk insert ids, or the results of a select of ids, into a temporary
+    table on the session's connection.
+
+    The rows only exist for the session's current transaction (or connection)
+    so the returned select must be used in the same session before it is
+    closed.  The selections staged are recorded in the session's info so they
+    can be deleted when no longer needed, see `_clear_staged_ids`.
+
+    :return: a select of the staged ids for use in an ``in_`` clause, the
+        number of ids staged and the selection they were staged as
+    """
+    connection = session.connection()
+    table = _staged_ids
+    if connection.dialect.name == "mssql":
+        table = _mssql_staged_ids
+    table.create(connection, checkfirst=True)
+    selection = next(_selections)
+    if isinstance(ids, SelectBase):
+        subquery = ids.subquery()
+        result = connection.execute(
+            table.insert().from_select(
+                ["selection", "id"],
+                select(literal(selection, Integer), subquery.c[0]).distinct(),
+            )
+        )
+        num_ids = result.rowcount
+        if num_ids < 0:
+            # driver does not report it
+            num_ids = connection.scalar(
+                select(func.count())
+                .select_from(table)
+                .where(table.c.selection == selection)
+            )
+    else:
+        rows = [{"selection": selection, "id": i} for i in ids]
+        connection.execute(table.insert(), rows)
+        num_ids = len(rows)
+    staged = session.info.setdefault("report_staged_ids", {})
+    staged.setdefault(table, []).append(selection)
+    ids_stmt = select(table.c.id).where(table.c.selection == selection)
+    return ids_stmt, num_ids, selection
+
+
+def _clear_staged_ids(session: Session, selections: Iterable[int]) -> None:
+    """Delete the rows of the selections staged in the session."""
+    staged = session.info.get("report_staged_ids", {})
+    for table, staged_selections in staged.items():
+        to_delete = [i for i in staged_selections if i in selections]
+        if not to_delete:
+            continue
+        session.execute(table.delete().where(table.c.selection.in_(to_delete)))
+        staged[table] = [i for i in staged_selections if i not in to_delete]
+
+
+def _owned_session_results(results: Iterable, session: Session) -> Iterator:
+    """Yield the results then close the session.
+
+    For when `_get_pertinent_objects` creates the session for a task, the
+    session must stay open while the results are iterated.  Closing rolls
+    back any ids staged in it.
+    """
+    try:
+        yield from results
+    finally:
+        session.close()
+
+
+def _select_ids(objs, session: Session) -> set[int] | Select:
+    """The ids of objs for use in an ``in_`` clause.
+
+    Large selections are staged (see `_stage_ids`) so that the size of the
+    statement does not grow with the selection.  objs can also already be a
+    select of ids, e.g. of tagged objects.
+    """
+    if isinstance(objs, Select):
+        return objs
+    ids = {obj.id for obj in objs}
+    if len(ids) > STAGE_IDS_THRESHOLD and not session.info.get(
+        "report_no_staging"
+    ):
+        return _stage_ids(ids, session)[0]
+    return ids
+
+
+def _get_tagged_query(cls, get_query_func, query, tag_ids, session):
+    """Filter query to the cls objects pertinent to the objects tagged with
+    the tags.
+
+    Resolved in the database, one subquery per tagged class, rather than by
+    first loading each tagged object.
 
-def _pertinent_objects_generator(query, order_by):
-    """Generator to return results and update progressbar in tasks."""
+    :param tag_ids: the tag ids as returned from `_select_ids`
+    """
+    classes = (
+        session.query(TaggedObj.obj_class)
+        .filter(TaggedObj.tag_id.in_(tag_ids))
+        .distinct()
+    )
+    stmts = []
+    for (obj_class,) in classes:
+        module_name, _part, cls_name = str(obj_class).rpartition(".")
+        try:
+            klass = getattr(import_module(module_name), cls_name)
+        except (ImportError, AttributeError) as e:
+            logger.warning(
+                "can't resolve tagged class %s: %s(%s)",
+                obj_class,
+                type(e).__name__,
+                e,
+            )
+            continue
+        tagged_ids = select(TaggedObj.obj_id).where(
+            TaggedObj.tag_id.in_(tag_ids), TaggedObj.obj_class == obj_class
+        )
+        stmts.append(
+            get_query_func(klass, tagged_ids, session)
+            .with_entities(cls.id)
+            .statement.correlate(None)
+        )
+    if not stmts:
+        # e.g. an empty tag
+        return query.filter(false())
+    return query.filter(cls.id.in_(union(*stmts)))
+
+
+def _eager_load_options(cls, paths: Iterable[str]) -> list[Load]:
+    """Loader options to select in load the dotted relationship paths from
+    cls.  e.g. ``"accession.species.genus"`` from `Plant`
+    """
+    options = []
+    for path in paths:
+        klass = cls
+        option = None
+        for attr in path.split("."):
+            rel = getattr(klass, attr)
+            if option is None:
+                option = selectinload(rel)
+            else:
+                option = option.selectinload(rel)
+            klass = rel.property.mapper.class_
+        options.append(option)
+    return options
+
+
+def _pertinent_objects_generator(
+    cls, ids_stmt, session, order_by, options
+):  # pylint: disable=too-many-arguments
+    """Generator to return results and update progressbar in tasks.
+
+    The ids of the results are first staged, which provides their number for
+    the progressbar, so that the (potentially expensive) query is only run
+    once.  The results are then fetched in batches and the staged ids deleted
+    once exhausted.
+    """
     from bauble import pb_set_fraction
 
-    num_objs = query.distinct().count()
+    ids, num_objs, selection = _stage_ids(ids_stmt, session)
+    query = (
+        session.query(cls)
+        .filter(cls.id.in_(ids))
+        .options(*db.yield_per_options(cls), *options)
+    )
+    if join := _get_order_by_join(cls, order_by):
+        query = query.join(join)
     if order_by:
         query = query.order_by(*order_by)
     five_percent = int(num_objs / 20) or 1
-    for records_done, item in enumerate(query):
+    for records_done, item in enumerate(query.yield_per(PERTINENT_BATCH_SIZE)):
         if records_done % five_percent == 0:
             pb_set_fraction(records_done / num_objs)
         yield item
+    _clear_staged_ids(session, {selection})
+
+
+def _get_order_by_join(cls, order_by):
+    """The class, if any, order_by requires joining to query cls."""
+    join = None
+    for col in order_by or []:
+        if (klass := col.class_) is not cls:
+            join = klass
+    return join
 
 
-def _get_pertinent_objects(
-    cls, get_query_func, objs, session, as_task=False, order_by=None
+def _get_pertinent_objects(  # pylint: disable=too-many-arguments
+    cls,
+    get_query_func,
+    objs,
+    session,
+    as_task=False,
+    order_by=None,
+    eager_load=(),
 ):
     """
     :param cls: class of the objects to return
     :param get_query_func:
     :param objs:
-    :param session:
+    :param session: if None a session is created.  For tasks it is closed
+        once the results are exhausted, objects that the results are accessed
+        via after that point should be loaded with eager_load.  Otherwise, as
+        the returned query uses it, large selections are not staged in it
+        (see `_select_ids`), supply a session for that.
     :param as_task: if True return a generator appropriate for use in tasks.
     :param order_by: columns to order_by
+    :param eager_load: dotted relationship paths from cls to load with the
+        results, see `_eager_load_options`
+    :return: a query or, if as_task is True, a generator of the results
     """
     close_session = False
     if session is None:
@@ -108,6 +342,9 @@ def _get_pertinent_objects(
 
         session = db.Session()
         close_session = True
+        if not as_task:
+            # the returned query would outlive the staged ids
+            session.info["report_no_staging"] = True
 
     if not isinstance(objs, (tuple, list)):
         objs = [objs]
@@ -121,40 +358,44 @@ def _get_pertinent_objects(
         get_query_func(cls, objs, session) for cls, objs in grouped.items()
     ]
 
-    if queries:
-        query = queries[0]
-    else:
+    if not queries:
         # e.g. an empty tag
+        if close_session:
+            session.close()
         return []
 
+    options = _eager_load_options(cls, eager_load)
+
+    if as_task:
+        from bauble import task
+
+        ids_stmt = union(*(i.with_entities(cls.id).statement for i in queries))
+        results = _pertinent_objects_generator(
+            cls, ids_stmt, session, order_by, options
+        )
+        if close_session:
+            results = _owned_session_results(results, session)
+        return task.queue(results, yielding=True)
+
+    query = queries[0]
     has_union = len(queries) > 1
     if has_union:
         query = query.union(*queries[1:])
 
-    join = None
-    for col in order_by:
-        if (klass := col.class_) is not cls:
-            join = klass
-    # this ugly hack because query._join_entities is deprecated and the
-    # SQL output is predictable
+    join = _get_order_by_join(cls, order_by)
+    # this ugly hack because query._join_entities is deprecated and the SQL
+    # output is predictable
     if join and (f"JOIN {join.__tablename__}" not in str(query) or has_union):
         query = query.join(join)
 
-    try:
-        if as_task:
-            from bauble import task
-
-            return task.queue(
-                _pertinent_objects_generator(query, order_by), yielding=True
-            )
-
-        if order_by:
-            query = query.order_by(*order_by)
+    if order_by:
+        query = query.order_by(*order_by)
 
-        return query
-    finally:
-        if close_session:
-            session.close()
+    query = query.options(*options)
+    if close_session:
+        # the query reopens it as required
+        session.close()
+    return query
 
 
 # pylint: disable=too-many-return-statements
@@ -165,7 +406,7 @@ def get_plant_query(cls, objs, session):
         # filter out inactive
         query = query.filter(Plant.active.is_(True))
 
-    ids = {obj.id for obj in objs}
+    ids = _select_ids(objs, session)
     if cls is Family:
         return query.join("accession", "species", "genus", "family").filter(
             Family.id.in_(ids)
@@ -199,25 +440,30 @@ def get_plant_query(cls, objs, session):
             SourceDetail.id.in_(ids)
         )
     if cls is Tag:
-        plants = get_plants_pertinent_to(
-            [i for obj in objs for i in obj.objects], session
-        )
-        return query.filter(Plant.id.in_([plt.id for plt in plants]))
+        return _get_tagged_query(Plant, get_plant_query, query, ids, session)
     raise BaubleError(_("Can't get plants from a %s") % cls.__name__)
 
 
-def get_plants_pertinent_to(objs, session=None, as_task=False):
+def get_plants_pertinent_to(objs, session=None, as_task=False, eager_load=()):
     """
     :param objs: an instance of a mapped object
     :param session: the session to use for the queries
     :param as_task: if True will yield results and update progressbar as
         appropriate for use in a yielding task
+    :param eager_load: dotted relationship paths to load with the results,
+        e.g. ``["accession.species.genus", "location"]``
 
     Return all the plants found in objs.
     """
     order_by = [Accession.code, Plant.code]
     return _get_pertinent_objects(
-        Plant, get_plant_query, objs, session, as_task, order_by=order_by
+        Plant,
+        get_plant_query,
+        objs,
+        session,
+        as_task,
+        order_by=order_by,
+        eager_load=eager_load,
     )
 
 
@@ -228,7 +474,7 @@ def get_accession_query(cls, objs, session):
         # filter out inactive
         query = query.filter(Accession.active.is_(True))
 
-    ids = {obj.id for obj in objs}
+    ids = _select_ids(objs, session)
     if cls is Family:
         return query.join("species", "genus", "family").filter(
             Family.id.in_(ids)
@@ -260,19 +506,22 @@ def get_accession_query(cls, objs, session):
             SourceDetail.id.in_(ids)
         )
     if cls is Tag:
-        accessions = get_accessions_pertinent_to(
-            [i for obj in objs for i in obj.objects], session
+        return _get_tagged_query(
+            Accession, get_accession_query, query, ids, session
         )
-        return query.filter(Accession.id.in_([acc.id for acc in accessions]))
     raise BaubleError(_("Can't get accessions from a %s") % cls.__name__)
 
 
-def get_accessions_pertinent_to(objs, session=None, as_task=False):
+def get_accessions_pertinent_to(
+    objs, session=None, as_task=False, eager_load=()
+):
     """
     :param objs: an instance of a mapped object
     :param session: the session to use for the queries
     :param as_task: if True will yield results and update progressbar as
         appropriate for use in a yielding task
+    :param eager_load: dotted relationship paths to load with the results,
+        e.g. ``["species.genus.family", "source"]``
 
     Return all the accessions found in objs.
     """
@@ -283,6 +532,7 @@ def get_accessions_pertinent_to(objs, session=None, as_task=False):
         session,
         as_task,
         order_by=[Accession.code],
+        eager_load=eager_load,
     )
 
 
@@ -293,7 +543,7 @@ def get_species_query(cls, objs, session):
         # filter out inactive
         query = query.filter(Species.active.is_(True))
 
-    ids = {obj.id for obj in objs}
+    ids = _select_ids(objs, session)
     if cls is Family:
         return query.join("genus", "family").filter(cls.id.in_(ids))
     if cls is Genus:
@@ -321,19 +571,20 @@ def get_species_query(cls, objs, session):
             cls.id.in_(ids)
         )
     if cls is Tag:
-        species = get_species_pertinent_to(
-            [i for obj in objs for i in obj.objects], session
+        return _get_tagged_query(
+            Species, get_species_query, query, ids, session
         )
-        return query.filter(Species.id.in_([sp.id for sp in species]))
     raise BaubleError(_("Can't get species from a %s") % cls.__name__)
 
 
-def get_species_pertinent_to(objs, session=None, as_task=False):
+def get_species_pertinent_to(objs, session=None, as_task=False, eager_load=()):
     """
     :param objs: an instance of a mapped object
     :param session: the session to use for the queries
     :param as_task: if True will yield results and update progressbar as
         appropriate for use in a yielding task
+    :param eager_load: dotted relationship paths to load with the results,
+        e.g. ``["genus.family", "vernacular_names"]``
 
     Return all the species found in objs.
     """
@@ -344,12 +595,13 @@ def get_species_pertinent_to(objs, session=None, as_task=False):
         session,
         as_task,
         order_by=[Genus.genus, Species.sp],
+        eager_load=eager_load,
     )
 
 
 def get_location_query(cls, objs, session):
     query = session.query(Location)
-    ids = {obj.id for obj in objs}
+    ids = _select_ids(objs, session)
     if cls is Location:
         return query.filter(cls.id.in_(ids))
     if cls is Plant:
@@ -385,19 +637,22 @@ def get_location_query(cls, objs, session):
             "plants", "accession", "source", "source_detail"
         ).filter(cls.id.in_(ids))
     if cls is Tag:
-        locs = get_locations_pertinent_to(
-            [i for obj in objs for i in obj.objects], session
+        return _get_tagged_query(
+            Location, get_location_query, query, ids, session
         )
-        return query.filter(Location.id.in_([loc.id for loc in locs]))
     raise BaubleError(_("Can't get Location from a %s") % cls.__name__)
 
 
-def get_locations_pertinent_to(objs, session=None, as_task=False):
+def get_locations_pertinent_to(
+    objs, session=None, as_task=False, eager_load=()
+):
     """
     :param objs: an instance of a mapped object
     :param session: the session to use for the queries
     :param as_task: if True will yield results and update progressbar as
         appropriate for use in a yielding task
+    :param eager_load: dotted relationship paths to load with the results,
+        e.g. ``["plants.accession.species"]``
 
     Return all the locations found in objs.
     """
@@ -408,12 +663,13 @@ def get_locations_pertinent_to(objs, session=None, as_task=False):
         session,
         as_task,
         order_by=[Location.code],
+        eager_load=eager_load,
     )
 
 
 def get_geography_query(cls, objs, session):
     query = session.query(Geography)
-    ids = {obj.id for obj in objs}
+    ids = _select_ids(objs, session)
     if cls is Geography:
         return query.filter(cls.id.in_(ids))
     if cls is Plant:
@@ -450,22 +706,25 @@ def get_geography_query(cls, objs, session):
             "distribution", "species", "accessions", "source", "source_detail"
         ).filter(cls.id.in_(ids))
     if cls is Tag:
-        geographies = get_geographies_pertinent_to(
-            [i for obj in objs for i in obj.objects], session
+        return _get_tagged_query(
+            Geography, get_geography_query, query, ids, session
         )
-        return query.filter(Geography.id.in_([geo.id for geo in geographies]))
     raise BaubleError(_("Can't get Geography from a %s") % cls.__name__)
 
 
 # pylint: enable=too-many-return-statements
 
 
-def get_geographies_pertinent_to(objs, session=None, as_task=False):
+def get_geographies_pertinent_to(
+    objs, session=None, as_task=False, eager_load=()
+):
     """
     :param objs: an instance of a mapped object
     :param session: the session to use for the queries
     :param as_task: if True will yield results and update progressbar as
         appropriate for use in a yielding task
+    :param eager_load: dotted relationship paths to load with the results,
+        e.g. ``["distribution.species"]``
 
     Return all the locations found in objs.
     """
@@ -476,6 +735,7 @@ def get_geographies_pertinent_to(objs, session=None, as_task=False):
         session,
         as_task,
         order_by=[Geography.name],
+        eager_load=eager_load,
     )
 
 
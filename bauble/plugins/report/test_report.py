@@ -23,7 +23,9 @@ from pathlib import Path
 from unittest import mock
 
 from gi.repository import Gtk
+from sqlalchemy.orm import Query
 
+from bauble import db
 from bauble import prefs
 from bauble.plugins.garden import Accession
 from bauble.plugins.garden import Collection
@@ -39,6 +41,7 @@ from bauble.plugins.plants import SpeciesDistribution
 from bauble.plugins.plants import VernacularName
 from bauble.plugins.plants.test_plants import setup_geographies
 from bauble.plugins.tag.model import Tag
+from bauble.plugins.tag.model import TaggedObj
 from bauble.plugins.tag.model import tag_objects
 from bauble.test import BaubleTestCase
 from bauble.test import check_dupids
@@ -633,6 +636,129 @@ class ReportTests(BaubleTestCase):
         ids = get_ids(get_plants_pertinent_to([geo1, geo2], self.session))
         self.assertCountEqual(ids, [1, 2, 3, 4])
 
+    def test_large_selections_staged(self):
+        families = self.session.query(Family).all()
+        expected = get_ids(get_plants_pertinent_to(families, self.session))
+        with mock.patch("bauble.plugins.report.STAGE_IDS_THRESHOLD", 0):
+            query = get_plants_pertinent_to(families, self.session)
+            self.assertIn("report_staged_ids", str(query))
+            self.assertEqual(get_ids(query), expected)
+            # staging twice in the same session and without a session
+            plants = self.session.query(Plant).filter(Plant.id < 5).all()
+            self.assertCountEqual(
+                get_ids(get_locations_pertinent_to(plants, self.session)),
+                [1, 2, 3, 4],
+            )
+            self.assertEqual(
+                get_ids(get_plants_pertinent_to(families)), expected
+            )
+
+    def test_staged_ids_cleared_when_exhausted(self):
+        families = self.session.query(Family).all()
+        expected = get_ids(get_plants_pertinent_to(families, self.session))
+        with mock.patch("bauble.plugins.report.STAGE_IDS_THRESHOLD", 0):
+            # supplied session, the task stages its results
+            ids = get_ids(
+                get_plants_pertinent_to(families, self.session, as_task=True)
+            )
+            self.assertEqual(ids, expected)
+            staged = self.session.info["report_staged_ids"]
+            for table, selections in staged.items():
+                # only the families selection remains
+                self.assertEqual(len(selections), 1)
+                self.assertEqual(
+                    self.session.query(table.c.selection).distinct().all(),
+                    [(selections[0],)],
+                )
+            # owned session, a task closes it once exhausted
+            session = db.Session()
+            with (
+                mock.patch("bauble.db.Session", return_value=session),
+                mock.patch.object(
+                    session, "close", wraps=session.close
+                ) as mock_close,
+            ):
+                results = get_plants_pertinent_to(families, as_task=True)
+                mock_close.assert_not_called()
+                self.assertEqual(get_ids(results), expected)
+                mock_close.assert_called_once()
+            # owned session, a query is returned and nothing staged for it
+            session = db.Session()
+            with mock.patch("bauble.db.Session", return_value=session):
+                query = get_plants_pertinent_to(families)
+            self.assertIsInstance(query, Query)
+            self.assertEqual(get_ids(query), expected)
+            self.assertEqual(query.count(), len(expected))
+            self.assertNotIn("report_staged_ids", session.info)
+            session.close()
+
+    def test_as_task_matches_query(self):
+        families = self.session.query(Family).all()
+        plant = self.session.query(Plant).get(16)
+        expected = get_ids(
+            get_plants_pertinent_to(families + [plant], self.session)
+        )
+        with mock.patch("bauble.pb_set_fraction") as mock_fraction:
+            ids = get_ids(
+                get_plants_pertinent_to(
+                    families + [plant], self.session, as_task=True
+                )
+            )
+        self.assertEqual(ids, expected)
+        mock_fraction.assert_called_with(15 / 16)
+
+        species = self.session.query(Species).filter(Species.id < 3).all()
+        self.assertEqual(
+            get_ids(get_species_pertinent_to(species, as_task=True)), [1, 2]
+        )
+
+    def test_eager_load(self):
+        family = self.session.query(Family).get(1)
+        paths = ["accession.species.genus", "location"]
+        for as_task in (False, True):
+            plants = list(
+                get_plants_pertinent_to(
+                    [family], as_task=as_task, eager_load=paths
+                )
+            )
+            self.assertEqual(len(plants), 8)
+            for plant in plants:
+                self.assertIn("location", plant.__dict__)
+                self.assertIn("genus", plant.accession.species.__dict__)
+        # the docstring examples
+        for func, paths in (
+            (get_accessions_pertinent_to, ["species.genus.family", "source"]),
+            (get_species_pertinent_to, ["genus.family", "vernacular_names"]),
+            (get_locations_pertinent_to, ["plants.accession.species"]),
+            (get_geographies_pertinent_to, ["distribution.species"]),
+        ):
+            for obj in func([family], as_task=True, eager_load=paths):
+                for path in paths:
+                    self.assertIn(path.split(".")[0], obj.__dict__)
+
+    def test_tags_resolved_in_database(self):
+        family = self.session.query(Family).get(1)
+        plant = self.session.query(Plant).get(16)
+        tag_objects("test", [family, plant])
+        tag = self.session.query(Tag).filter_by(tag="test").one()
+        tag.objects_.append(
+            TaggedObj(obj_class="bauble.plugins.nothing.Nothing", obj_id=1)
+        )
+        self.session.commit()
+        with mock.patch.object(Tag, "get_tagged_objects") as mock_get:
+            with self.assertLogs(level="WARNING") as logs:
+                ids = get_ids(get_plants_pertinent_to([tag], self.session))
+            mock_get.assert_not_called()
+        self.assertCountEqual(ids, list(range(1, 9)) + [16])
+        self.assertTrue(any("Nothing" in i for i in logs.output))
+
+        empty = Tag(tag="Empty")
+        self.session.add(empty)
+        self.session.commit()
+        self.assertEqual(
+            get_ids(get_species_pertinent_to([empty], self.session)), []
+        )
+
 
 class ReportToolDialogNoFOPTests(BaubleTestCase):
     def setUp(self):
@@ -22,6 +22,7 @@ Sync changes from a previously cloned database.
 import importlib
 import json
 import logging
+from collections.abc import Callable
 from collections.abc import Iterator
 from pathlib import Path
 from typing import Any
@@ -44,6 +45,7 @@ from sqlalchemy.engine import Connection
 from sqlalchemy.engine import Engine
 from sqlalchemy.engine import Row
 from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql import Executable
 from sqlalchemy.sql import func
@@ -362,70 +364,77 @@ def _get_clone_history_id(connection: Connection) -> str:
     return start
 
 
-def _rebase(uri: URL | str) -> None:
-    """Revert the history on the clone to where they diverged then reinstate
-    all changes from the current database
-    """
-
-    clone_engine = create_engine(uri)
-
-    # from the clone get the start point and revert to it
-    with clone_engine.begin() as connection:
-        start = _get_clone_history_id(connection)
-        db.History.revert_to(int(start), clone_engine)
-        # for postgres need to reset the sequences
-        for table in db.metadata.sorted_tables:
-            for col in table.c:
-                utils.reset_sequence(col, clone_engine)
+def _replay_net(
+    connection: Connection, clone_conn: Connection, start: str
+) -> tuple[set[Table], int]:
+    """Replay the history from start on the clone as net changes.
 
+    :return: the tables changed and the id of the last history line.
+    """
     history = db.History.__table__
+    select_stmt = (
+        select(history.c).where(history.c.id >= start).order_by(history.c.id)
+    )
+    changes = db.NetChanges(revert=False)
+    last_hist_id = 1
+    result = connection.execution_options(stream_results=True).execute(
+        select_stmt
+    )
+    for rows in result.partitions(db.HISTORY_BATCH_SIZE):
+        for row in rows:
+            changes.add(row)
+        # pylint: disable=protected-access
+        clone_conn.execute(
+            history.insert(), [dict(row._mapping) for row in rows]
+        )
+        last_hist_id = rows[-1]["id"]
 
-    # get the history changes from the current db
-    with db.engine.begin() as connection:
+    logger.debug("rows to rebase = %s", len(changes))
+    return changes.apply(clone_conn), last_hist_id
 
-        select_stmt = select(history.c).where(history.c.id >= start)
-        rows = connection.execute(select_stmt).all()
-        logger.debug("rows to rebase = %s", len(rows))
 
-    # apply history changes to the clone
-    with clone_engine.begin() as connection:
-        stmt: Executable
-        last_hist_id = 1
-
-        for row in rows:
-            table = db.metadata.tables[row["table_name"]]
-
-            if row["operation"] == "insert":
-                stmt = table.insert().values(**row["values"])
-            elif row["operation"] == "delete":
-                stmt = table.delete().where(table.c.id == row["table_id"])
-            elif row["operation"] == "update":
-                # reverse of revert (i.e. first value)
-                values = {
-                    k: v[0]
-                    for k, v in row["values"].items()
-                    if isinstance(v, list)
-                }
-
-                if "_last_updated" not in values:
-                    # ensure _last_updated is always recorded, even when not
-                    # a list (i.e. tests or otherwise generated rapidly)
-                    values["_last_updated"] = row["values"]["_last_updated"]
-
-                logger.debug("update values = %s", values)
-                stmt = (
-                    table.update()
-                    .where(table.c.id == row["table_id"])
-                    .values(**values)
-                )
+def _replay_each(
+    connection: Connection, clone_conn: Connection, start: str
+) -> tuple[set[Table], int]:
+    """Replay the history from start on the clone one line at a time.
 
-            logger.debug("rebase values: %s", row["values"])
-            logger.debug("%s rebase stmt: %s", row["operation"], stmt)
-            connection.execute(stmt)
-            # pylint: disable=protected-access
-            stmt = history.insert().values(**row._mapping)
-            connection.execute(stmt)
-            last_hist_id = row["id"]
+    :return: the tables changed and the id of the last history line.
+    """
+    history = db.History.__table__
+    select_stmt = (
+        select(history.c).where(history.c.id >= start).order_by(history.c.id)
+    )
+    tables = set()
+    last_hist_id = 1
+    result = connection.execution_options(stream_results=True).execute(
+        select_stmt
+    )
+    for row in result:
+        stmt = db.NetChanges.line_statement(row, revert=False)
+        logger.debug("rebase values: %s", row["values"])
+        logger.debug("%s rebase stmt: %s", row["operation"], stmt)
+        clone_conn.execute(stmt)
+        tables.add(db.metadata.tables[row["table_name"]])
+        # pylint: disable=protected-access
+        clone_conn.execute(history.insert().values(**row._mapping))
+        last_hist_id = row["id"]
+    return tables, last_hist_id
+
+
+def _replay(
+    replay_func: Callable[
+        [Connection, Connection, str], tuple[set[Table], int]
+    ],
+    start: str,
+    clone_engine: Engine,
+) -> set[Table]:
+    """Replay the history from start on the clone, in one transaction, with
+    replay_func and update the clone's clone_history_id.
+
+    :return: the tables changed.
+    """
+    with db.engine.begin() as connection, clone_engine.begin() as clone_conn:
+        tables, last_hist_id = replay_func(connection, clone_conn, start)
 
         # update clone_history_id
         meta_table = meta.BaubleMeta.__table__
@@ -434,7 +443,40 @@ def _rebase(uri: URL | str) -> None:
             .where(meta_table.c.name == "clone_history_id")
             .values({"name": "clone_history_id", "value": last_hist_id})
         )
-        connection.execute(stmt)
+        clone_conn.execute(stmt)
+    return tables
+
+
+def _rebase(uri: URL | str) -> None:
+    """Revert the history on the clone to where they diverged then reinstate
+    all changes from the current database
+
+    The changes are streamed from the current database and collapsed to their
+    net effect on each row before being applied (see `db.NetChanges`).  If
+    that fails on a constraint (e.g. values swapped between rows) the changes
+    are replayed one line at a time instead.
+    """
+
+    clone_engine = create_engine(uri)
+
+    # from the clone get the start point and revert to it
+    with clone_engine.begin() as connection:
+        start = _get_clone_history_id(connection)
+    tables = db.History.revert_to(int(start), clone_engine)
+
+    # apply history changes from the current db to the clone
+    try:
+        tables |= _replay(_replay_net, start, clone_engine)
+    except IntegrityError as e:
+        logger.debug(
+            "%s(%s) replaying one line at a time", type(e).__name__, e
+        )
+        tables |= _replay(_replay_each, start, clone_engine)
+
+    # for postgres need to reset the sequences of the changed tables
+    for table in tables | {db.History.__table__}:
+        for col in table.c:
+            utils.reset_sequence(col, clone_engine)
 
     clone_engine.dispose()
 
@@ -24,6 +24,7 @@ from unittest import mock
 
 from gi.repository import Gtk
 from sqlalchemy import create_engine
+from sqlalchemy import func
 from sqlalchemy import select
 from sqlalchemy.engine import make_url
 from sqlalchemy.exc import SQLAlchemyError
@@ -43,6 +44,7 @@ from bauble.plugins.plants import Species
 from bauble.test import BaubleTestCase
 from bauble.test import uri
 
+from . import sync
 from .clone import DBCloner
 from .clone import DBCloneTool
 from .sync import RESPONSE_QUIT
@@ -2729,3 +2731,39 @@ class GlobalFunctionsTests(BaubleTestCase):
         self.assertEqual(clone_loc._last_updated, loc._last_updated)
 
         clone_session.close()
+
+    def test_rebase_swapped_unique_values(self):
+        loc1 = Location(code="LOC1")
+        loc2 = Location(code="LOC2")
+        self.session.add_all([loc1, loc2])
+        self.session.commit()
+        cloner = DBCloner()
+        temp_dir = tempfile.mkdtemp()
+        clone_uri = make_url(f"sqlite:///{temp_dir}/test.db")
+        cloner.uri = clone_uri
+        bauble.task.queue(cloner.run())
+        # swap the unique codes in the current db
+        loc1.code = "TEMP"
+        self.session.commit()
+        loc2.code = "LOC1"
+        self.session.commit()
+        loc1.code = "LOC2"
+        self.session.commit()
+        # the net changes clash on the unique code before all are applied
+        with mock.patch(
+            "bauble.plugins.synclone.sync._replay_each",
+            wraps=sync._replay_each,
+        ) as mock_each:
+            _rebase(clone_uri)
+        mock_each.assert_called_once()
+        clone_session = sessionmaker(bind=cloner.clone_engine)()
+        self.assertEqual(
+            clone_session.query(Location.code).order_by(Location.id).all(),
+            [("LOC2",), ("LOC1",)],
+        )
+        with cloner.clone_engine.begin() as conn:
+            self.assertEqual(
+                int(_get_clone_history_id(conn)),
+                self.session.query(func.max(db.History.id)).scalar(),
+            )
+        clone_session.close()
@@ -22,13 +22,15 @@ Users, permissions, roles etc... postgresql only.
 """
 
 import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 from gi.repository import Gtk
 from sqlalchemy import Integer
-from sqlalchemy.exc import ProgrammingError
+from sqlalchemy import text
 
 try:
     from psycopg2 import DatabaseError
@@ -257,97 +259,122 @@ _table_privs = [
 _sequence_privs = ["USAGE", "SELECT", "UPDATE", "ALL"]
 
 
-def can_connect(role):
-    conn = db.engine.raw_connection()
-    cur = conn.cursor()
-    stmt = "SELECT has_database_privilege({role}, {db}, 'CONNECT')"
-    stmt = SQL(stmt).format(
-        role=Literal(role), db=Literal(db.engine.url.database)
+@dataclass
+class RoleState:
+    """A role's current state as it relates to this database."""
+
+    name: str
+    can_login: bool
+    can_connect: bool
+    privilege: str | None
+
+
+_ROLES_STATE_STMT = """
+SELECT r.rolname,
+       r.rolcanlogin,
+       r.rolcreaterole,
+       has_database_privilege(r.oid, current_database(), 'CONNECT'),
+       has_database_privilege(r.oid, current_database(), 'CREATE'),
+       coalesce(bool_and(has_table_privilege(r.oid, c.oid, 'SELECT')), true),
+       coalesce(
+           bool_and(
+               has_table_privilege(r.oid, c.oid, 'INSERT')
+               AND has_table_privilege(r.oid, c.oid, 'UPDATE')
+               AND has_table_privilege(r.oid, c.oid, 'DELETE')
+               AND has_table_privilege(r.oid, c.oid, 'REFERENCES')
+               AND has_table_privilege(r.oid, c.oid, 'TRIGGER')
+           ),
+           true
+       ),
+       coalesce(
+           bool_or(
+               has_table_privilege(
+                   r.oid, c.oid, 'INSERT, UPDATE, DELETE, REFERENCES, TRIGGER'
+               )
+           ),
+           false
+       )
+FROM pg_roles r
+LEFT JOIN pg_class c
+    ON c.relname = ANY(:tables)
+    AND c.relkind IN ('r', 'p')
+    AND c.relnamespace = (
+        SELECT oid FROM pg_namespace WHERE nspname = current_schema()
     )
-    cur.execute(stmt)
-    result = cur.fetchone()[0]
-    cur.close()
-    conn.close()
+WHERE r.rolname NOT LIKE 'pg\\_%' {roles_clause}
+GROUP BY r.oid, r.rolname, r.rolcanlogin, r.rolcreaterole
+"""
+
+
+def _privilege_level(
+    create_role: bool,
+    db_create: bool,
+    all_select: bool,
+    all_write: bool,
+    any_write: bool,
+) -> str | None:
+    """Return the privilege level that the supplied catalog state amounts to.
+
+    Levels are exclusive, e.g. a role with admin privileges does not have the
+    write level.
+    """
+    if db_create:
+        # if the user has all on database with grant privileges and he has
+        # the grant privilege on the database then he has admin and he can
+        # create roles
+        if create_role and all_select and all_write:
+            return "admin"
+        return None
+    if all_select and all_write:
+        return "write"
+    if all_select and not any_write:
+        return "read"
+    return None
+
+
+def get_roles_state(
+    roles: Sequence[str] | None = None,
+) -> dict[str, RoleState]:
+    """Return the state of all roles, or only those supplied, keyed by name.
+
+    Uses a single catalog query regardless of the number of roles or tables.
+    Tables in the metadata that don't exist in the database are ignored (i.e.
+    run on a mismatched version of bauble).
+    """
+    params: dict[str, list[str]] = {
+        "tables": [table.name for table in db.metadata.sorted_tables]
+    }
+    roles_clause = ""
+    if roles is not None:
+        roles_clause = "AND r.rolname = ANY(:roles)"
+        params["roles"] = list(roles)
+    stmt = text(_ROLES_STATE_STMT.format(roles_clause=roles_clause))
+    with db.engine.connect() as conn:
+        rows = conn.execute(stmt, params).all()
+    result = {}
+    for name, can_login, create_role, connect, *privs in rows:
+        result[name] = RoleState(
+            name=name,
+            can_login=can_login,
+            can_connect=connect,
+            privilege=_privilege_level(create_role, *privs),
+        )
     return result
 
 
+def can_connect(role):
+    state = get_roles_state([role]).get(role)
+    return bool(state) and state.can_connect
+
+
 def has_privileges(role, privilege):
     """Return True/False if role has the specified privilege level.
 
     :param role:
     :param privilege:
     """
-    conn = db.engine.raw_connection()
-    cur = conn.cursor()
-    # if the user has all on database with grant privileges and he has
-    # the grant privilege on the database then he has admin and he can
-    # create roles
-    # test admin privileges on the database
-    # for priv in _database_privs:
-    stmt = "SELECT has_database_privilege({role}, {db}, 'CREATE')"
-    stmt = SQL(stmt).format(
-        role=Literal(role), db=Literal(db.engine.url.database)
-    )
-    cur.execute(stmt)
-    result = cur.fetchone()[0]
-
-    if result and privilege != "admin":
-        cur.close()
-        conn.close()
-        return False
-    if not result and privilege == "admin":
-        cur.close()
-        conn.close()
-        return False
-
-    if privilege == "admin":
-        privs = set(_table_privs).intersection(_privileges["write"])
-    else:
-        privs = set(_table_privs).intersection(_privileges[privilege])
-
-    # test the privileges on the tables and sequences
-    for table in db.metadata.sorted_tables:
-        for priv in set(_table_privs).intersection(_privileges["write"]):
-            stmt = "SELECT has_table_privilege({role}, {table}, {priv})"
-            stmt = SQL(stmt).format(
-                role=Literal(role),
-                table=Literal(table.name),
-                priv=Literal(priv),
-            )
-            cur.execute(stmt)
-            try:
-                result = cur.fetchone()[0]
-                if result and priv not in privs:
-                    cur.close()
-                    conn.close()
-                    return False
-                if not result and priv in privs:
-                    cur.close()
-                    conn.close()
-                    return False
-            except ProgrammingError:
-                # we get here if the table doesn't exists, if it
-                # doesn't exist we don't care if we have permissions
-                # on it...this usually happens if we are checking
-                # permissions on a table in the metadata which doesn't
-                # exist in the database which can happen if this
-                # plugin is run on a mismatched version of bauble
-                pass
-
-    # if admin check that the user can also create roles
-    stmt = (
-        "SELECT rolname FROM pg_roles WHERE rolcreaterole IS TRUE AND "
-        "rolname = {role}"
-    )
-    stmt = SQL(stmt).format(role=Literal(role))
-    cur.execute(stmt)
-    result = cur.fetchone()
-    cur.close()
-    conn.close()
-    if not result and privilege == "admin":
-        return False
-
-    return True
+    state = get_roles_state([role]).get(role)
+    return bool(state) and state.privilege == privilege
 
 
 def has_implicit_sequence(column):
@@ -362,100 +389,81 @@ def has_implicit_sequence(column):
     )
 
 
+def _privilege_statements(roles, privilege, database, schema):
+    """Return the statements required to set the roles' privileges.
+
+    Uses schema wide grants so the number of statements does not depend on the
+    number of tables.
+    """
+    fmt = {
+        "roles": SQL(", ").join(Identifier(role) for role in roles),
+        "db": Identifier(database),
+        "schema": Identifier(schema),
+    }
+    stmts = [
+        "REVOKE ALL ON ALL SEQUENCES IN SCHEMA {schema} FROM {roles}",
+        "REVOKE ALL ON ALL TABLES IN SCHEMA {schema} FROM {roles}",
+        "REVOKE ALL ON DATABASE {db} FROM {roles}",
+    ]
+    create_role = "NOCREATEROLE"
+
+    if privilege:
+        privs = _privileges[privilege]
+        grant_option = ""
+        if privilege == "admin":
+            create_role = "CREATEROLE"
+            grant_option = " WITH GRANT OPTION"
+            stmts.append(
+                "GRANT ALL ON DATABASE {db} TO {roles}" + grant_option
+            )
+        # privs should be fine for f-string.
+        tbl_privs = ", ".join(x for x in privs if x in _table_privs)
+        seq_privs = ", ".join(x for x in privs if x in _sequence_privs)
+        stmts.append(
+            f"GRANT {tbl_privs} ON ALL TABLES IN SCHEMA {{schema}} TO {{roles}}"
+            + grant_option
+        )
+        stmts.append(
+            f"GRANT {seq_privs} ON ALL SEQUENCES IN SCHEMA {{schema}} "
+            "TO {roles}" + grant_option
+        )
+
+    composed = [SQL(stmt).format(**fmt) for stmt in stmts]
+    composed.extend(
+        SQL(f"ALTER ROLE {{role}} WITH {create_role}").format(
+            role=Identifier(role)
+        )
+        for role in roles
+    )
+    return composed
+
+
 def set_privilege(role, privilege):
     """Set the role's privileges.
 
-    :param role:
-    :param privilege:
+    All statements are sent in a single round trip.
+
+    :param role: a role name or a sequence of role names to set the same
+        privileges on.
+    :param privilege: one of "read", "write", "admin" or None to revoke all
     """
     check(
         privilege in ("read", "write", "admin", None),
         f"invalid privilege: {privilege}",
     )
+    roles = [role] if isinstance(role, str) else list(role)
     conn = db.engine.raw_connection()
     cur = conn.cursor()
 
-    if privilege:
-        privs = _privileges[privilege]
-
     try:
-        # revoke everything first
-        for table in db.metadata.sorted_tables:
-            for col in table.c:
-                if has_implicit_sequence(col):
-                    sequence_name = f"{table.name}_{col.name}_seq"
-                    stmt = "REVOKE ALL ON SEQUENCE {seq} FROM {role}"
-                    stmt = SQL(stmt).format(
-                        seq=Identifier(sequence_name), role=Identifier(role)
-                    )
-                    cur.execute(stmt)
-            stmt = "REVOKE ALL ON TABLE {table_name} FROM {role}"
-            stmt = SQL(stmt).format(
-                table_name=Identifier(table.name), role=Identifier(role)
-            )
-            cur.execute(stmt)
-
-        stmt = "REVOKE ALL ON DATABASE {db} FROM {role}"
-        stmt = SQL(stmt).format(
-            db=Identifier(db.engine.url.database), role=Identifier(role)
+        cur.execute("SELECT current_schema()")
+        schema = cur.fetchone()[0]
+        stmts = _privilege_statements(
+            roles, privilege, db.engine.url.database, schema
         )
+        stmt = SQL("; ").join(stmts)
+        logger.debug(stmt.as_string(cur))
         cur.execute(stmt)
-
-        stmt = "ALTER ROLE {role} WITH nocreaterole"
-        stmt = SQL(stmt).format(role=Identifier(role))
-        cur.execute(stmt)
-
-        # privilege is None so all permissions are revoked
-        if not privilege:
-            conn.commit()
-            return
-
-        # change privileges on the database
-        if privilege == "admin":
-            stmt = "GRANT ALL ON DATABASE {db} TO {role} WITH GRANT OPTION"
-            stmt = SQL(stmt).format(
-                db=Identifier(db.engine.url.database), role=Identifier(role)
-            )
-            cur.execute(stmt)
-            stmt = "ALTER ROLE {role} WITH CREATEROLE"
-            stmt = SQL(stmt).format(role=Identifier(role))
-            cur.execute(stmt)
-
-        # grant privileges on the tables and sequences
-        tbl_privs = [x for x in privs if x in _table_privs]
-        seq_privs = [x for x in privs if x in _sequence_privs]
-        for table in db.metadata.sorted_tables:
-            logger.debug("granting privileges on table %s", table)
-            for priv in tbl_privs:
-                # priv should be fine for f-string.
-                stmt = f"GRANT {priv} ON {{table_name}} TO {{role}}"
-                if privilege == "admin":
-                    stmt += " WITH GRANT OPTION"
-                stmt = SQL(stmt).format(
-                    table_name=Identifier(table.name), role=Identifier(role)
-                )
-                logger.debug(stmt.as_string(cur))
-                cur.execute(stmt)
-            for col in table.c:
-                for priv in seq_privs:
-                    if has_implicit_sequence(col):
-                        sequence_name = f"{table.name}_{col.name}_seq"
-                        logger.debug(
-                            "column %s of table %s has associated "
-                            "sequence %s",
-                            col,
-                            table,
-                            sequence_name,
-                        )
-                        stmt = f"GRANT {priv} ON SEQUENCE {{seq}} TO {{role}}"
-                        if privilege == "admin":
-                            stmt += " WITH GRANT OPTION"
-                        stmt = SQL(stmt).format(
-                            seq=Identifier(sequence_name),
-                            role=Identifier(role),
-                        )
-                        logger.debug(stmt.as_string(cur))
-                        cur.execute(stmt)
     except Exception as e:
         logger.error("users.set_privilege(): %s(%s)", type(e).__name__, e)
         conn.rollback()
@@ -510,6 +518,7 @@ class UsersDialogPresenter(editor.GenericEditorPresenter):
 
     def __init__(self, view):
         super().__init__(model=None, view=view, session=False)
+        self.roles: dict[str, RoleState] = {}
         self.view.widgets.users_column.set_cell_data_func(
             self.view.widgets.users_cell_renderer, utils.default_cell_data_func
         )
@@ -542,18 +551,12 @@ class UsersDialogPresenter(editor.GenericEditorPresenter):
                 self.view.widgets.none_button.set_active(True)
 
         role = self.get_selected_user()
-        if role not in get_users():
+        state = self.roles.get(role)
+        if not state or not state.can_login:
             _set_buttons(None)
             return
 
-        if has_privileges(role, "admin"):
-            _set_buttons("admin")
-        elif has_privileges(role, "write"):
-            _set_buttons("write")
-        elif has_privileges(role, "read"):
-            _set_buttons("read")
-        else:
-            _set_buttons(None)
+        _set_buttons(state.privilege)
 
     def on_filter_check_toggled(self, button, *_args):
         active = button.get_active()
@@ -568,12 +571,17 @@ class UsersDialogPresenter(editor.GenericEditorPresenter):
         tree = self.view.widgets.users_tree
         utils.clear_model(tree)
         model = Gtk.ListStore(str)
-        if has_privileges(current_user(), "admin"):
-            for user in get_users():
-                if only_bauble and can_connect(user):
-                    model.append([user])
+        # one query for all roles rather than several per role
+        self.roles = get_roles_state()
+        user = current_user()
+        if user in self.roles and self.roles[user].privilege == "admin":
+            for name, state in sorted(self.roles.items()):
+                if not state.can_login:
+                    continue
+                if only_bauble and state.can_connect:
+                    model.append([name])
                 elif not only_bauble:
-                    model.append([user])
+                    model.append([name])
         else:
             model.append([current_user()])
             self.view.widgets.users_box.set_sensitive(False)
@@ -585,7 +593,8 @@ class UsersDialogPresenter(editor.GenericEditorPresenter):
     def on_toggled(self, button, priv=None):
         role = self.get_selected_user()
         active = button.get_active()
-        if active and not has_privileges(role, priv):
+        state = self.roles.get(role)
+        if active and state and state.privilege != priv:
             logger.debug("grant %s to %s", priv, role)
             try:
                 set_privilege(role, priv)
@@ -595,6 +604,8 @@ class UsersDialogPresenter(editor.GenericEditorPresenter):
                     Gtk.MessageType.ERROR,
                     parent=self.view.get_window(),
                 )
+            else:
+                state.privilege = priv
         return True
 
     def on_add_button_clicked(self, _button, *_args):
@@ -622,6 +633,7 @@ class UsersDialogPresenter(editor.GenericEditorPresenter):
             )
             model.remove(model.get_iter(path))
         else:
+            self.roles.update(get_roles_state([name]))
             self.view.widgets.read_button.set_active(True)
 
     def on_remove_button_clicked(self, _button, *_args):
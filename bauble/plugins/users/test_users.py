@@ -170,3 +170,65 @@ class UsersTests(BaubleTestCase):
     def test_tool(self):
         raise unittest.SkipTest("Not Implemented")
         users.UsersEditor().start()
+
+
+class PrivilegeLevelTests(unittest.TestCase):
+    def test_privilege_level(self):
+        # create_role, db_create, all_select, all_write, any_write
+        level = users._privilege_level
+        self.assertEqual(level(True, True, True, True, True), "admin")
+        self.assertIsNone(level(False, True, True, True, True))
+        self.assertIsNone(level(True, True, True, False, True))
+        self.assertEqual(level(False, False, True, True, True), "write")
+        self.assertEqual(level(True, False, True, True, True), "write")
+        self.assertEqual(level(False, False, True, False, False), "read")
+        self.assertIsNone(level(False, False, True, False, True))
+        self.assertIsNone(level(False, False, False, False, False))
+
+
+class PrivilegeStatementsTests(unittest.TestCase):
+    def setUp(self):
+        if not hasattr(users, "SQL"):
+            raise unittest.SkipTest("psycopg2 not available")
+
+    def test_statements_do_not_depend_on_table_count(self):
+        for priv, count in (("read", 6), ("write", 6), ("admin", 7)):
+            stmts = users._privilege_statements(["u1"], priv, "db", "public")
+            self.assertEqual(len(stmts), count)
+        stmts = users._privilege_statements(["u1", "u2"], None, "db", "public")
+        # revokes are for all roles in one, alter role is per role.
+        self.assertEqual(len(stmts), 5)
+
+    def test_admin_grants_with_grant_option(self):
+        stmts = users._privilege_statements(["u1"], "admin", "db", "public")
+        strs = [repr(i) for i in stmts]
+        self.assertTrue(any("GRANT ALL ON DATABASE" in i for i in strs))
+        self.assertTrue(all("WITH GRANT OPTION" in i for i in strs[3:6]))
+        self.assertIn("WITH CREATEROLE", strs[-1])
+
+
+class RolesStateTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        if db.engine.name != "postgresql":
+            raise unittest.SkipTest("users management only on PostgreSQL")
+        self.user = "_test_user"
+        if self.user not in users.get_users():
+            users.create_user(self.user)
+
+    def tearDown(self):
+        if db.engine.name == "postgresql":
+            users.drop(self.user, revoke=True)
+        super().tearDown()
+
+    def test_set_privilege_and_get_roles_state(self):
+        for priv in ("admin", "write", "read", None):
+            users.set_privilege(self.user, priv)
+            state = users.get_roles_state([self.user])[self.user]
+            self.assertEqual(state.privilege, priv)
+            self.assertTrue(state.can_login)
+            for level in ("admin", "write", "read"):
+                self.assertEqual(
+                    users.has_privileges(self.user, level), level == priv
+                )
+        self.assertIn(self.user, users.get_roles_state())
@@ -22,6 +22,7 @@ Search functionailty.
 To run a search call `search(text, session)`
 """
 
+from .search import TooManyResults
 from .search import search
 
-__all__ = ["search"]
+__all__ = ["search", "TooManyResults"]
@@ -122,6 +122,8 @@ table ::= 'family'
          | ... (any table)
          ;
 """
+
+from functools import lru_cache
 from typing import cast
 
 # from pyparsing import quoted_string
@@ -173,6 +175,13 @@ from .tokens import StringToken
 from .tokens import ValueListToken
 from .tokens import ValueToken
 
+PARSE_CACHE_SIZE = 128
+"""The maximum number of parsed search strings kept."""
+
+# NOTE packrat memoises results by element and position within each
+# parse_string call.  This is safe as the parse actions only construct tokens
+# and clauses, without side effects.  The cache is bounded and locked by
+# pyparsing so searches can be parsed in worker threads.
 ParserElement.enable_packrat()
 
 date_str_token = (
@@ -457,13 +466,25 @@ statement = (
 )
 
 
+_domains_version = 0
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_string(text: str, _version: int) -> ParseResults:
+    return statement.parse_string(text)
+
+
 def parse_string(text: str) -> ParseResults:
     """Request pyparsing object to parse text
 
     pyparsing object parses the input text and returns a pyparsing.ParseResults
     object that represents the input.
+
+    Results are cached by text and the version of the domains (see
+    `update_domains`) so rerunning a search does not parse it again.  The
+    results are shared, they must not be modified.
     """
-    return statement.parse_string(text)
+    return _parse_string(text, _domains_version)
 
 
 def update_domains() -> None:
@@ -474,5 +495,7 @@ def update_domains() -> None:
     from .strategies import MapperSearch
 
     domain_values = " ".join(MapperSearch.get_domain_classes().keys())
-    global domain  # pylint: disable=global-statement
+    global domain, _domains_version  # pylint: disable=global-statement
     domain <<= one_of(domain_values.strip()).set_name("domain")
+    _domains_version += 1
+    _parse_string.cache_clear()
@@ -0,0 +1,100 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Viewer for the search profiles recorded by `bauble.search.profiler`.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+from pathlib import Path
+from typing import cast
+
+from gi.repository import Gtk
+
+from bauble import prefs
+from bauble.i18n import _
+
+from .profiler import SEARCH_PROFILE_PREF
+from .profiler import clear_profiles
+from .profiler import get_profiles
+
+
+@Gtk.Template(
+    filename=str(Path(__file__).resolve().parent / "search_profile_dialog.ui")
+)
+class SearchProfileDialog(Gtk.Dialog):
+    """Dialog listing the recorded search profiles, most recent first, with
+    the SQL and query plan of the selected query.
+    """
+
+    __gtype_name__ = "SearchProfileDialog"
+
+    profile_liststore = cast(Gtk.ListStore, Gtk.Template.Child())
+    profile_treeview = cast(Gtk.TreeView, Gtk.Template.Child())
+    detail_textbuffer = cast(Gtk.TextBuffer, Gtk.Template.Child())
+    record_all_check = cast(Gtk.CheckButton, Gtk.Template.Child())
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.profiles = get_profiles()
+        self.record_all_check.set_active(
+            prefs.prefs.get(SEARCH_PROFILE_PREF, False)
+        )
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Reload the list of recorded search profiles."""
+        self.profile_liststore.clear()
+        self.detail_textbuffer.set_text("")
+        for search_index in reversed(range(len(self.profiles))):
+            profile = self.profiles[search_index]
+            for query_index, query in enumerate(profile.queries):
+                self.profile_liststore.append(
+                    [
+                        profile.started.strftime("%X"),
+                        profile.text,
+                        query.strategy,
+                        f"{query.duration * 1000:.1f}",
+                        query.rows,
+                        search_index,
+                        query_index,
+                    ]
+                )
+
+    @Gtk.Template.Callback()
+    def on_selection_changed(self, selection: Gtk.TreeSelection) -> None:
+        model, treeiter = selection.get_selected()
+        if not treeiter:
+            self.detail_textbuffer.set_text("")
+            return
+        profile = self.profiles[model[treeiter][5]]
+        query = profile.queries[model[treeiter][6]]
+        plan = query.plan or _("not available")
+        self.detail_textbuffer.set_text(
+            f"{profile.text}\n\n{query.sql}\n\n{_('Query plan:')}\n{plan}"
+        )
+
+    @Gtk.Template.Callback()
+    def on_clear_button_clicked(self, _button: Gtk.Button) -> None:
+        clear_profiles()
+        self.profiles = []
+        self.refresh()
+
+    @Gtk.Template.Callback()
+    def on_record_all_toggled(self, check: Gtk.CheckButton) -> None:
+        prefs.prefs[SEARCH_PROFILE_PREF] = check.get_active()
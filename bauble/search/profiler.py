@@ -0,0 +1,192 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Search profiling.
+
+Records, for searches, the SQL each search strategy ran, how long it took,
+the number of rows returned and the database's query plan.  Records are kept
+in a ring buffer (`profiles`) that can be viewed with
+`bauble.search.profile_viewer.SearchProfileDialog`.
+
+Every search is recorded when the `SEARCH_PROFILE_PREF` is set, otherwise
+only searches with queries slower than `SEARCH_SLOW_THRESHOLD_PREF` are,
+these are also logged as warnings.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+import threading
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from time import perf_counter
+
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import Session
+
+from bauble import prefs
+
+SEARCH_PROFILE_PREF = "bauble.search.profile"
+"""Preference key, record the profile of every search."""
+
+SEARCH_SLOW_THRESHOLD_PREF = "bauble.search.slow_threshold"
+"""Preference key, the time in seconds a search strategy's query can take
+before it is logged and recorded as slow.
+"""
+
+SEARCH_PROFILE_SIZE = 50
+"""The maximum number of search profiles kept."""
+
+
+@dataclass
+class QueryProfile:
+    strategy: str
+    sql: str
+    duration: float
+    rows: int
+    plan: str = ""
+
+
+@dataclass
+class SearchProfile:
+    text: str
+    started: datetime = field(default_factory=datetime.now)
+    queries: list[QueryProfile] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return sum(i.duration for i in self.queries)
+
+
+profiles: deque[SearchProfile] = deque(maxlen=SEARCH_PROFILE_SIZE)
+"""Ring buffer of the most recent search profiles, oldest first."""
+
+_lock = threading.Lock()
+
+
+def get_profiles() -> list[SearchProfile]:
+    """A snapshot of the recorded search profiles, oldest first."""
+    with _lock:
+        return list(profiles)
+
+
+def clear_profiles() -> None:
+    with _lock:
+        profiles.clear()
+
+
+def compile_sql(query: Query, session: Session) -> str | None:
+    """The SQL of the query, for the session's database, with the parameters
+    in place.  None if any parameter can not be rendered.
+    """
+    dialect = session.get_bind().dialect
+    try:
+        return str(
+            query.statement.compile(
+                dialect=dialect, compile_kwargs={"literal_binds": True}
+            )
+        )
+    except Exception as e:  # pylint: disable=broad-except
+        logger.debug("%s(%s)", type(e).__name__, e)
+        return None
+
+
+def explain(sql: str, session: Session) -> str:
+    """The database's query plan for the SQL, if available."""
+    connection = session.connection()
+    dialect_name = connection.dialect.name
+    if dialect_name == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect_name == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return ""
+
+    try:
+        if dialect_name == "postgresql":
+            # don't abort the session's transaction on error
+            with connection.begin_nested():
+                result = connection.exec_driver_sql(prefix + sql).all()
+            return "\n".join(i[0] for i in result)
+        result = connection.exec_driver_sql(prefix + sql).all()
+        # id, parent, notused, detail
+        depths = {0: 0}
+        lines = []
+        for id_, parent, _notused, detail in result:
+            depths[id_] = depths.get(parent, 0) + 1
+            lines.append("  " * (depths[id_] - 1) + detail)
+        return "\n".join(lines)
+    except Exception as e:  # pylint: disable=broad-except
+        logger.debug("%s(%s)", type(e).__name__, e)
+        return ""
+
+
+class SearchProfiler:
+    """Run and time the queries of a search, recording them in `profiles`
+    when required.
+
+    :param text: the search string
+    :param session: the session the search runs in
+    """
+
+    def __init__(self, text: str, session: Session) -> None:
+        self.session = session
+        self.profile = SearchProfile(text)
+        self.record_all = prefs.prefs.get(SEARCH_PROFILE_PREF, False)
+        self.threshold = prefs.prefs.get(SEARCH_SLOW_THRESHOLD_PREF, 2.0)
+
+    def run(self, strategy: str, query: Query | Iterable) -> list:
+        """Return the results of the query (or any other iterable), recording
+        its profile if required.
+        """
+        start = perf_counter()
+        result = list(query)
+        duration = perf_counter() - start
+        slow = duration >= self.threshold
+
+        if not (slow or self.record_all):
+            return result
+
+        sql = plan = ""
+        if isinstance(query, Query):
+            if literal_sql := compile_sql(query, self.session):
+                sql = literal_sql
+                plan = explain(sql, self.session)
+            else:
+                sql = str(query)
+
+        if slow:
+            logger.warning(
+                "slow search (%.3fs, %s rows) %s - %s:\n%s\n%s",
+                duration,
+                len(result),
+                strategy,
+                self.profile.text,
+                sql,
+                plan,
+            )
+
+        with _lock:
+            if not self.profile.queries:
+                profiles.append(self.profile)
+            self.profile.queries.append(
+                QueryProfile(strategy, sql, duration, len(result), plan)
+            )
+        return result
@@ -0,0 +1,127 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Run searches in a worker thread.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+import queue
+import threading
+from collections.abc import Callable
+from collections.abc import Iterator
+
+from sqlalchemy.orm.util import identity_key
+
+from bauble import db
+
+from .search import iter_search
+
+_DONE = object()
+
+
+class SearchThread(threading.Thread):
+    """Run a search in its own session, in a worker thread.
+
+    The identity keys of each search strategy's results are made available,
+    as each strategy completes, via `results`.  Objects are not shared
+    between threads, load the keys in the session that needs them.
+
+    Cancelling also interrupts any query currently running in the database.
+
+    :param text: the search string
+    :param max_results: see `bauble.search.search.iter_search`
+    """
+
+    def __init__(self, text: str, max_results: int | None = None) -> None:
+        super().__init__(daemon=True)
+        self.text = text
+        self.max_results = max_results
+        self._queue: queue.Queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._dbapi_conn = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the search, interrupting any running query."""
+        logger.debug("cancelling search %s", self.text)
+        self._cancel.set()
+        with self._lock:
+            conn = self._dbapi_conn
+            if conn is None:
+                return
+            try:
+                if hasattr(conn, "interrupt"):
+                    # sqlite3
+                    conn.interrupt()
+                elif hasattr(conn, "cancel"):
+                    # psycopg2, equivalent of pg_cancel_backend
+                    conn.cancel()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.debug("%s(%s)", type(e).__name__, e)
+
+    def run(self) -> None:
+        with db.Session() as session:
+            try:
+                with self._lock:
+                    connection = session.connection().connection
+                    self._dbapi_conn = connection.dbapi_connection
+                for result in iter_search(
+                    self.text, session, self.max_results
+                ):
+                    if self.cancelled:
+                        break
+                    self._queue.put(
+                        [identity_key(instance=obj) for obj in result]
+                    )
+            except Exception as e:  # pylint: disable=broad-except
+                if not self.cancelled:
+                    self._queue.put(e)
+            finally:
+                with self._lock:
+                    self._dbapi_conn = None
+        self._queue.put(_DONE)
+
+    def results(
+        self, idle: Callable[[], None] | None = None, interval: float = 0.05
+    ) -> Iterator[list[tuple]]:
+        """Yield the identity keys of each batch of results as they become
+        available.
+
+        Any exception raised by the search (including `TooManyResults`) is
+        reraised here.  Stops early if cancelled.
+
+        :param idle: called every ``interval`` seconds while waiting, e.g. to
+            keep the UI responsive.
+        """
+        while not self.cancelled:
+            try:
+                item = self._queue.get(timeout=interval)
+            except queue.Empty:
+                if idle:
+                    idle()
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
@@ -31,11 +31,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+from collections.abc import Iterator
+
 from sqlalchemy.orm import Query
 from sqlalchemy.orm import Session
 
 from bauble import prefs
 
+from .profiler import SearchProfiler
 from .strategies import get_strategies
 
 result_cache: dict[str, list[Query]] = {}
@@ -44,16 +47,48 @@ repeatedly. Results should be available in the same order that the search
 strategies where added to `strategies._search_strategies`."""
 
 
-def search(text: str, session: Session) -> list:
-    """Given a query string run the appropriate SearchStrategy(s) and return
-    the collated results as a list.
+class TooManyResults(Exception):
+    """Raised by `search` when there are more than ``max_results`` results.
+
+    Rather than the results it carries id only queries that will return them,
+    see `id_query`, and any objects that could not be expressed as a query
+    (e.g. the results of raw SQL).
+    """
+
+    def __init__(self, queries: list[Query], objects: list) -> None:
+        super().__init__("too many results")
+        self.queries = queries
+        self.objects = objects
+
+
+def id_query(query: Query) -> Query:
+    """Return a query of only the ids of the entities ``query`` returns."""
+    entity = query.column_descriptions[0]["type"]
+    return query.with_entities(entity.id).order_by(None)
+
+
+def iter_search(
+    text: str, session: Session, max_results: int | None = None
+) -> Iterator[list]:
+    """Given a query string run the appropriate SearchStrategy(s) yielding the
+    results of each in turn.
+
+    :param max_results: if supplied and there are more results than this
+        `TooManyResults` is raised once all strategies have run.  No more than
+        ``max_results`` objects are loaded, nothing more is yielded once
+        exceeded.
     """
     text = text.strip()  # belt and braces
     logger.debug("searching: `%s`", text)
-    results = set()
     # clear the cache
     result_cache.clear()
     strategies = get_strategies(text)
+    # only used when max_results is supplied
+    count = 0
+    queries_run: list[Query] = []
+    objects: list = []
+    too_many: TooManyResults | None = None
+    profiler = SearchProfiler(text, session)
     for strategy in strategies:
         strategy_name = type(strategy).__name__
         logger.debug(
@@ -83,8 +118,52 @@ def search(text: str, session: Session) -> list:
             #     ),
             # )
 
-            result.extend(query)
+            if max_results is None:
+                result.extend(profiler.run(strategy_name, query))
+                continue
+
+            if too_many:
+                if isinstance(query, Query):
+                    too_many.queries.append(id_query(query))
+                else:
+                    too_many.objects.extend(query)
+                continue
+
+            if isinstance(query, Query):
+                queries_run.append(query)
+                loaded = profiler.run(
+                    strategy_name, query.limit(max_results - count + 1)
+                )
+            else:
+                loaded = profiler.run(strategy_name, query)
+                objects.extend(loaded)
+
+            count += len(loaded)
+            result.extend(loaded)
+
+            if count > max_results:
+                logger.debug("search exceeded %s results", max_results)
+                too_many = TooManyResults(
+                    [id_query(i) for i in queries_run], objects
+                )
 
         result_cache[strategy_name] = result
+        if not too_many:
+            yield result
+
+    if too_many:
+        raise too_many
+
+
+def search(
+    text: str, session: Session, max_results: int | None = None
+) -> list:
+    """Given a query string run the appropriate SearchStrategy(s) and return
+    the collated results as a list.
+
+    :param max_results: see `iter_search`
+    """
+    results = set()
+    for result in iter_search(text, session, max_results):
         results.update(result)
     return list(results)
@@ -47,6 +47,7 @@ from bauble.i18n import _
 
 from .clauses import QueryHandler
 from .operations import OPERATIONS
+from .text_index import text_index
 from .tokens import ValueListToken
 
 if typing.TYPE_CHECKING:
@@ -215,33 +216,24 @@ class ValueListStatement(StatementAction["ValueListSearch"]):
 
         queries = []
         for cls, columns in search_strategy.properties.items():
-            column_cross_value = []
-            for column in columns:
-                for value in self.values:
-                    if value.value and hasattr(value.value, "raw_value"):
-                        value = value.value.raw_value
-                    else:
-                        query = search_strategy.session.query(cls)
-                        value = value.express(
-                            QueryHandler(
-                                session=search_strategy.session,
-                                domain=cls,
-                                query=query,
-                            )
+            values = []
+            for value in self.values:
+                if value.value and hasattr(value.value, "raw_value"):
+                    value = value.value.raw_value
+                else:
+                    query = search_strategy.session.query(cls)
+                    value = value.express(
+                        QueryHandler(
+                            session=search_strategy.session,
+                            domain=cls,
+                            query=query,
                         )
-                    column_cross_value.append((column, value))
+                    )
+                values.append(value)
 
-            table = class_mapper(cls)
             query = (
                 search_strategy.session.query(cls)
-                .filter(
-                    or_(
-                        *[
-                            utils.ilike(table.c[c], f"%{v}%")
-                            for c, v in column_cross_value
-                        ]
-                    )
-                )
+                .filter(text_index.contains_any(cls, columns, values))
                 .distinct()
             )
             queries.append(query)
@@ -0,0 +1,372 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Text indexes to speed up "contains" (i.e. ``ilike '%value%'``) searches.
+
+Used by ValueListSearch.  Indexes are only created when opted in to, via the
+`SEARCH_TEXT_INDEX_PREF` preference, by `create_indexes` (run in the
+background when a connection is opened), never while searching:
+
+- PostgreSQL: ``pg_trgm`` GIN indexes (created concurrently), used directly by
+  ``ILIKE``.
+- SQLite: FTS5 trigram tables, kept in sync with their content table by
+  triggers, used to find candidate rows.
+
+Dropping a table (e.g. restoring from CSV or `db.create`) drops its SQLite
+index and a table's index is checked again once it is (re)created.
+
+Otherwise, or if the indexes can not be created (e.g. insufficient
+privileges), plain ``ilike`` is used.  In all cases the result sets are the
+same.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+import threading
+from collections.abc import Mapping
+from collections.abc import Sequence
+
+from sqlalchemy import String
+from sqlalchemy import Table
+from sqlalchemy import and_
+from sqlalchemy import column
+from sqlalchemy import event
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import table
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import class_mapper
+from sqlalchemy.sql import ColumnElement
+
+from bauble import db
+from bauble import prefs
+from bauble import utils
+
+SEARCH_TEXT_INDEX_PREF = "bauble.search.text_index"
+"""Preference key, create and use text indexes, where the database supports
+them, to speed up value list searches.  Default False.
+
+NOTE: on SQLite the index triggers require FTS5 trigram support (SQLite
+3.34+), writes to the indexed tables fail for any other client using an
+older SQLite build.
+"""
+
+_MIN_TRIGRAM = 3
+_LIKE_SPECIAL = ("%", "_", "\\")
+
+
+def _is_text(col) -> bool:
+    type_ = getattr(col.type, "impl", col.type)
+    if isinstance(type_, type):
+        return issubclass(type_, String)
+    return isinstance(type_, String)
+
+
+def _fts_query(columns: Sequence[str], values: Sequence[str]) -> str:
+    phrases = " OR ".join('"' + i.replace('"', '""') + '"' for i in values)
+    cols = " ".join(f'"{i}"' for i in columns)
+    return f"{{{cols}}} : ({phrases})"
+
+
+def _fts_create(table_name: str, columns: Sequence[str]) -> str:
+    cols = ", ".join(f'"{i}"' for i in columns)
+    return (
+        f"CREATE VIRTUAL TABLE {table_name}_fts USING fts5({cols}, "
+        f"content='{table_name}', content_rowid='id', "
+        "tokenize='trigram')"
+    )
+
+
+class TextIndex:
+    """Create, check and use the text indexes for the current connection.
+
+    Whether each table's SQLite index is current is checked once per engine
+    and remembered, searches do not query the catalog again until the table
+    is dropped or created.
+    """
+
+    def __init__(self) -> None:
+        self._engine: Engine | None = None
+        self._current: dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def _check_engine(self, engine: Engine) -> None:
+        # NOTE must be called with the lock held
+        if engine is not self._engine:
+            self._engine = engine
+            self._current = {}
+
+    def invalidate(self, table_name: str) -> None:
+        """Forget whether the index for table_name is current."""
+        with self._lock:
+            self._current.pop(table_name, None)
+
+    @staticmethod
+    def _columns(cls: type, columns: Sequence[str]) -> list[str] | None:
+        """The names of the columns, if they are all text columns in the
+        class's own table.
+        """
+        mapper = class_mapper(cls)
+        for name in columns:
+            col = mapper.c.get(name)
+            if (
+                col is None
+                or col.table is not mapper.local_table
+                or not _is_text(col)
+            ):
+                return None
+        return [mapper.c[i].name for i in columns]
+
+    @staticmethod
+    def _table_columns(cls: type) -> list[str]:
+        """All the text columns of the class's own table.
+
+        On SQLite these are all indexed, regardless of which are searched, so
+        that the index does not need rebuilding when they differ.
+        """
+        local_table = class_mapper(cls).local_table
+        return [i.name for i in local_table.c if _is_text(i)]
+
+    @staticmethod
+    def _sqlite_is_current(conn: Connection, cls: type) -> bool:
+        table_name = class_mapper(cls).local_table.name
+        fts = f"{table_name}_fts"
+        existing = dict(
+            conn.execute(
+                text(
+                    "SELECT name, sql FROM sqlite_master "
+                    "WHERE name IN (:fts, :ai, :ad, :au)"
+                ),
+                {
+                    "fts": fts,
+                    "ai": f"{fts}_ai",
+                    "ad": f"{fts}_ad",
+                    "au": f"{fts}_au",
+                },
+            ).all()
+        )
+        # missing, out of date or the content table has been recreated
+        # (dropping a table drops its triggers)
+        return len(existing) == 4 and existing[fts] == _fts_create(
+            table_name, TextIndex._table_columns(cls)
+        )
+
+    def is_current(self, cls: type) -> bool:
+        """Is the SQLite index for cls's table current and usable.
+
+        Checked once per engine.
+        """
+        engine = db.engine
+        if engine is None or engine.name != "sqlite":
+            return False
+        table_name = class_mapper(cls).local_table.name
+        with self._lock:
+            self._check_engine(engine)
+            if table_name not in self._current:
+                with engine.connect() as conn:
+                    self._current[table_name] = self._sqlite_is_current(
+                        conn, cls
+                    )
+            return self._current[table_name]
+
+    @staticmethod
+    def _create_postgresql(
+        engine: Engine, table_name: str, columns: list[str]
+    ) -> None:
+        names = {f"ix_{table_name}_{i}_trgm": i for i in columns}
+        with engine.connect() as conn:
+            valid = set(
+                conn.execute(
+                    text(
+                        "SELECT c.relname FROM pg_class c "
+                        "JOIN pg_index i ON i.indexrelid = c.oid "
+                        "WHERE i.indisvalid AND c.relname = ANY(:names)"
+                    ),
+                    {"names": list(names)},
+                ).scalars()
+            )
+        missing = {k: v for k, v in names.items() if k not in valid}
+        if not missing:
+            return
+        logger.debug("creating trigram indexes %s", list(missing))
+        with engine.connect() as conn:
+            # CONCURRENTLY can not run in a transaction, does not block writes
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for index, col in missing.items():
+                # a failed concurrent build leaves an invalid index
+                conn.execute(
+                    text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index}"')
+                )
+                conn.execute(
+                    text(
+                        f'CREATE INDEX CONCURRENTLY "{index}" ON '
+                        f'"{table_name}" USING gin ("{col}" gin_trgm_ops)'
+                    )
+                )
+
+    def _create_sqlite(self, engine: Engine, cls: type) -> None:
+        table_name = class_mapper(cls).local_table.name
+        columns = self._table_columns(cls)
+        with engine.connect() as conn:
+            if self._sqlite_is_current(conn, cls):
+                return
+        fts = f"{table_name}_fts"
+        cols = ", ".join(f'"{i}"' for i in columns)
+        new = ", ".join(f'new."{i}"' for i in columns)
+        old = ", ".join(f'old."{i}"' for i in columns)
+        logger.debug("creating %s", fts)
+        with engine.begin() as conn:
+            for trigger in ("ai", "ad", "au"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{trigger}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+            # fails, leaving nothing behind, where trigram is not supported
+            conn.execute(text(_fts_create(table_name, columns)))
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table_name} "
+                    f"BEGIN INSERT INTO {fts}(rowid, {cols}) "
+                    f"VALUES (new.id, {new}); END"
+                )
+            )
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table_name} "
+                    f"BEGIN INSERT INTO {fts}({fts}, rowid, {cols}) "
+                    f"VALUES ('delete', old.id, {old}); END"
+                )
+            )
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table_name} "
+                    f"BEGIN INSERT INTO {fts}({fts}, rowid, {cols}) "
+                    f"VALUES ('delete', old.id, {old}); "
+                    f"INSERT INTO {fts}(rowid, {cols}) "
+                    f"VALUES (new.id, {new}); END"
+                )
+            )
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+    def create(self, cls: type, columns: Sequence[str]) -> bool:
+        """Create, or bring up to date, the index for these columns of cls.
+
+        :return: True if the index is available.
+        """
+        engine = db.engine
+        if engine is None or engine.name not in ("postgresql", "sqlite"):
+            return False
+        col_names = self._columns(cls, columns)
+        if col_names is None:
+            return False
+        table_name = class_mapper(cls).local_table.name
+        try:
+            if engine.name == "postgresql":
+                self._create_postgresql(engine, table_name, col_names)
+            else:
+                self._create_sqlite(engine, cls)
+        except DBAPIError as e:
+            # e.g. no privileges or fts5 trigram not supported
+            logger.debug("%s(%s)", type(e).__name__, e)
+            logger.info("text index not available for %s", table_name)
+            return False
+        with self._lock:
+            self._check_engine(engine)
+            self._current[table_name] = True
+        return True
+
+    def create_all(self, properties: Mapping[type, Sequence[str]]) -> None:
+        """Create the indexes for each class and its searched columns (e.g.
+        ValueListSearch.properties).
+        """
+        for cls, columns in properties.items():
+            self.create(cls, columns)
+
+    def contains_any(
+        self, cls: type, columns: Sequence[str], values: Sequence
+    ) -> ColumnElement:
+        """Return a filter clause matching any of the values contained in any
+        of the columns, case insensitive, using the index where possible.
+
+        Never creates indexes (see `create_all`).
+        """
+        mapper = class_mapper(cls)
+        values = [str(i) for i in values]
+        clause = or_(
+            *[
+                utils.ilike(mapper.c[c], f"%{v}%")
+                for c in columns
+                for v in values
+            ]
+        )
+        # NOTE trigram indexes are used by ilike directly on PostgreSQL
+        if (
+            not prefs.prefs.get(SEARCH_TEXT_INDEX_PREF, False)
+            or any(
+                len(v) < _MIN_TRIGRAM or any(i in v for i in _LIKE_SPECIAL)
+                for v in values
+            )
+            or (col_names := self._columns(cls, columns)) is None
+            or not self.is_current(cls)
+        ):
+            return clause
+
+        fts = table(f"{mapper.local_table.name}_fts", column("rowid"))
+        candidates = select(fts.c.rowid).where(
+            text(f"{fts.name} MATCH :fts_query").bindparams(
+                fts_query=_fts_query(col_names, values)
+            )
+        )
+        # candidates can include false positives (e.g. unicode case folding)
+        return and_(mapper.c.id.in_(candidates), clause)
+
+
+text_index = TextIndex()
+
+
+def create_indexes() -> None:
+    """Create, or bring up to date, the indexes for the columns that
+    ValueListSearch searches, if opted in to (`SEARCH_TEXT_INDEX_PREF`).
+
+    Can be slow, run it in the background.
+    """
+    if not prefs.prefs.get(SEARCH_TEXT_INDEX_PREF, False):
+        return
+    # avoid circular imports
+    from .strategies import get_strategy
+
+    vl_search = get_strategy("ValueListSearch")
+    if vl_search:
+        text_index.create_all(vl_search.properties)
+
+
+@event.listens_for(Table, "after_drop")
+def _table_dropped(target: Table, connection: Connection, **_kw) -> None:
+    """Drop the SQLite index with its table, its triggers already are and its
+    content would otherwise be stale when the table is recreated.
+    """
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {target.name}_fts"))
+    text_index.invalidate(target.name)
+
+
+@event.listens_for(Table, "after_create")
+def _table_created(target: Table, _connection: Connection, **_kw) -> None:
+    text_index.invalidate(target.name)
@@ -0,0 +1,130 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Count the SQL statements an operation issues.
+
+Intended to find "N+1" query patterns (e.g. lazy loading a relationship for
+every object in a list) and for tests to assert statement budgets.  e.g.::
+
+    with track_statements("populate") as stats:
+        view.populate(results)
+    self.assertLessEqual(stats.count, 5)
+
+Statements are grouped by a fingerprint of their SQL, with literal values
+removed, any fingerprint repeated more than `REPEAT_THRESHOLD` times is logged
+at debug level when the operation completes.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+import re
+import threading
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from bauble import db
+from bauble.error import check
+
+REPEAT_THRESHOLD = 5
+"""The number of times a statement can be repeated within an operation before
+it is flagged as a possible N+1 pattern.
+"""
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_PARAM_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_PARAM_RE = re.compile(r"%\(\w+\)s|:\w+|%s|\$\d+|\?")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalise SQL so that statements that only differ in their parameters
+    or literal values are the same.
+    """
+    statement = _STRING_RE.sub("?", statement)
+    statement = _PARAM_RE.sub("?", statement)
+    statement = _NUMBER_RE.sub("?", statement)
+    statement = _PARAM_LIST_RE.sub("(?)", statement)
+    return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+class StatementStats:
+    """The statements executed within an operation.
+
+    :param name: the operation's name, used in logs
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.fingerprints: Counter[str] = Counter()
+
+    @property
+    def count(self) -> int:
+        """The total number of statements executed."""
+        return self.fingerprints.total()
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> dict[str, int]:
+        """The fingerprints of statements executed more than threshold
+        times, most repeated first.
+        """
+        return {
+            sql: count
+            for sql, count in self.fingerprints.most_common()
+            if count > threshold
+        }
+
+    def __repr__(self) -> str:
+        return f"<StatementStats {self.name}: {self.count} statements>"
+
+
+@contextmanager
+def track_statements(
+    name: str = "", engine: Engine | None = None
+) -> Iterator[StatementStats]:
+    """Context manager that counts the statements the current thread executes
+    with the engine (default `bauble.db.engine`).
+    """
+    engine = engine or db.engine
+    check(engine is not None, "not connected to a database")
+    stats = StatementStats(name)
+    thread_id = threading.get_ident()
+
+    # pylint: disable=too-many-arguments
+    def before_cursor_execute(
+        _conn, _cursor, statement, _parameters, _context, _executemany
+    ) -> None:
+        if threading.get_ident() == thread_id:
+            stats.fingerprints[fingerprint(statement)] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        logger.debug("%s", stats)
+        for sql, count in stats.repeated().items():
+            logger.debug(
+                "possible N+1, statement executed %s times in %s: %s",
+                count,
+                name,
+                sql,
+            )
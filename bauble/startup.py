@@ -0,0 +1,134 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Startup timing and lazy imports.
+
+While recording (between `start` and `finish`, i.e. application startup) the
+time spent in each `timed` block is recorded, blocks can be nested.  The
+report is logged at info level on `finish`, to see it add ``bauble.startup``
+to the debug logging prefs.
+
+Use `lazy_import` for modules that are slow to import and not needed until
+first use.  e.g.::
+
+    pyproj = lazy_import("pyproj")
+
+    def transform(...):
+        transformer = pyproj.Transformer.from_crs(...)
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from importlib import import_module
+from time import perf_counter
+from types import ModuleType
+from typing import Any
+
+
+@dataclass
+class Timing:
+    name: str
+    depth: int
+    duration: float = 0.0
+
+
+timings: list[Timing] = []
+_recording = False
+_depth = 0
+
+
+def start() -> None:
+    """Clear any previous timings and start recording."""
+    global _recording  # pylint: disable=global-statement
+    timings.clear()
+    _recording = True
+
+
+def finish() -> None:
+    """Stop recording and log the report."""
+    global _recording  # pylint: disable=global-statement
+    _recording = False
+    logger.info("startup timings:\n%s", report())
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Context manager that records the time spent within it, while
+    recording.
+    """
+    global _depth  # pylint: disable=global-statement
+    if not _recording:
+        yield
+        return
+    timing = Timing(name, _depth)
+    timings.append(timing)
+    _depth += 1
+    start_time = perf_counter()
+    try:
+        yield
+    finally:
+        timing.duration = perf_counter() - start_time
+        _depth -= 1
+
+
+def report() -> str:
+    """The recorded timings, in the order started, nested blocks indented."""
+    lines = [
+        f"{i.duration * 1000:9.1f} ms  {'  ' * i.depth}{i.name}"
+        for i in timings
+    ]
+    total = sum(i.duration for i in timings if i.depth == 0)
+    lines.append(f"{total * 1000:9.1f} ms  total")
+    return "\n".join(lines)
+
+
+class _LazyModule(ModuleType):
+    """Module proxy that imports the module on first attribute access."""
+
+    def __init__(
+        self, name: str, on_import: Callable[[ModuleType], None] | None
+    ) -> None:
+        super().__init__(name)
+        self._on_import = on_import
+        self._module: ModuleType | None = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            with timed(f"lazy import {self.__name__}"):
+                module = import_module(self.__name__)
+                if self._on_import:
+                    self._on_import(module)
+            self._module = module
+        return getattr(self._module, attr)
+
+
+def lazy_import(
+    name: str, on_import: Callable[[ModuleType], None] | None = None
+) -> Any:
+    """Return a proxy for the named module that only imports it when first
+    used.
+
+    :param name: the absolute module name
+    :param on_import: called with the module when it is imported, e.g. to
+        configure it
+    """
+    return _LazyModule(name, on_import)
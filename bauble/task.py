@@ -19,19 +19,40 @@
 #
 # task.py
 """
-The bauble.task module allows you to queue up long running tasks. The
-running tasks still block but allows the GUI to update.
+The bauble.task module allows you to queue up long running tasks.
+
+Tasks queued with `queue` are generators run on the main loop, they still
+block but allow the GUI to update between steps.
+
+Database work that does not need the GUI should instead be submitted with
+`submit`, it runs in a worker thread, in its own session, without blocking
+the GUI.  Progress and results are returned to the main loop.  e.g.::
+
+    def count_plants(session, task, location_id):
+        task.progress(message=_("counting"))
+        query = session.query(Plant).filter_by(location_id=location_id)
+        return query.count()
+
+    task.submit(count_plants, loc.id, name=_("count"), on_done=show_count)
 """
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+import heapq
+import threading
+from collections.abc import Callable
+from enum import Enum
+from itertools import count
+from typing import Any
+
+from gi.repository import GLib
 from gi.repository import Gtk  # noqa
 
 import bauble
-
-# TODO: provide a way to create background tasks that don't call set_busy()
+from bauble import db
+from bauble.i18n import _
 
 __running = False
 __kill = False
@@ -39,18 +60,19 @@ __message_ids = None
 
 
 def running():
-    """Return True/False if a task is running."""
-    return __running
+    """Return True/False if a task is running, including background tasks."""
+    return __running or bool(executor.tasks)
 
 
 def kill():
-    """Kill the current task.
+    """Kill the current task and cancel all background tasks.
 
     This will kill the task when it goes idle and not while it's
     running.  A task is idle after it yields.
     """
     global __kill
     __kill = True
+    executor.cancel_all()
 
 
 def _idle():
@@ -169,3 +191,340 @@ def clear_messages():
         return
     for mid in __message_ids:
         bauble.gui.widgets.statusbar.remove(_context_id, mid)
+
+
+PRIORITY_HIGH = 0
+PRIORITY_DEFAULT = 50
+PRIORITY_LOW = 100
+
+MAX_WORKERS = 4
+"""The maximum number of background tasks run concurrently."""
+
+
+class TaskCancelled(Exception):
+    """Raised within a background task that has been cancelled."""
+
+
+class CancelToken:
+    """Thread safe cancellation flag shared by a background task and the
+    main loop.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def check(self) -> None:
+        """Raise `TaskCancelled` if cancelled."""
+        if self._event.is_set():
+            raise TaskCancelled()
+
+
+class TaskState(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class BackgroundTask:  # pylint: disable=too-many-instance-attributes
+    """A function run in a worker thread by an `Executor`.
+
+    The function is called as ``func(session, task, *args, **kwargs)`` where
+    session is a new `db.Session`, closed when it returns, and task is this
+    instance, use it to report progress and check for cancellation.  As the
+    session is closed the result should not contain database objects, return
+    ids or plain values instead.
+
+    The state, progress and callbacks are only set/called on the main loop.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: dict[str, Any],
+        name: str,
+        priority: int,
+        on_done: Callable[[Any], None] | None,
+        on_error: Callable[[Exception], None] | None,
+        on_progress: Callable[["BackgroundTask"], None] | None,
+    ) -> None:
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name or getattr(func, "__name__", "")
+        self.priority = priority
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.token = CancelToken()
+        self.state = TaskState.PENDING
+        self.fraction: float | None = None
+        self.message = ""
+        self.listeners: set[Callable[[BackgroundTask], None]] = set()
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name} {self.state.value}>"
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    @property
+    def finished(self) -> bool:
+        return self.state not in (TaskState.PENDING, TaskState.RUNNING)
+
+    def cancel(self) -> None:
+        """Request cancellation, a pending task will not run, a running task
+        stops the next time it reports progress or checks its token.
+        """
+        logger.debug("cancelling %s", self)
+        self.token.cancel()
+        if not self.finished:
+            self._notify()
+
+    def progress(
+        self, fraction: float | None = None, message: str | None = None
+    ) -> None:
+        """Report progress from the worker thread.
+
+        Also acts as a cancellation point, raises `TaskCancelled` if the task
+        has been cancelled.
+
+        :param fraction: 0 to 1, None to pulse
+        :param message: if not None replaces the current message
+        """
+        self.token.check()
+        GLib.idle_add(self._set_progress, fraction, message)
+
+    def _set_progress(
+        self, fraction: float | None, message: str | None
+    ) -> None:
+        self.fraction = fraction
+        if message is not None:
+            self.message = message
+        if self.on_progress:
+            self.on_progress(self)
+        self._notify()
+
+    def _set_state(self, state: TaskState) -> None:
+        self.state = state
+        self._notify()
+
+    def _notify(self) -> None:
+        for listener in list(self.listeners):
+            listener(self)
+
+    def run(self) -> None:
+        """Run the task in the current (worker) thread."""
+        if self.cancelled:
+            GLib.idle_add(self._finish, TaskState.CANCELLED, None, None)
+            return
+        GLib.idle_add(self._set_state, TaskState.RUNNING)
+        result = error = None
+        try:
+            with db.Session() as session:
+                result = self.func(session, self, *self.args, **self.kwargs)
+            state = TaskState.CANCELLED if self.cancelled else TaskState.DONE
+        except TaskCancelled:
+            state = TaskState.CANCELLED
+        except Exception as e:  # pylint: disable=broad-except
+            state = TaskState.FAILED
+            error = e
+        GLib.idle_add(self._finish, state, result, error)
+
+    def _finish(
+        self, state: TaskState, result: Any, error: Exception | None
+    ) -> None:
+        self.state = state
+        try:
+            if state is TaskState.DONE and self.on_done:
+                self.on_done(result)
+            elif state is TaskState.FAILED:
+                if self.on_error:
+                    self.on_error(error)
+                else:
+                    logger.warning(
+                        "%s failed: %s(%s)",
+                        self.name,
+                        type(error).__name__,
+                        error,
+                        exc_info=error,
+                    )
+        finally:
+            logger.debug("%s finished", self)
+            self._notify()
+
+
+class Executor:
+    """Run background tasks in up to ``max_workers`` worker threads, in
+    priority order (lowest first) then in the order submitted.
+
+    Workers are started as needed and exit when there is nothing left to do.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS) -> None:
+        self.max_workers = max_workers
+        self.tasks: list[BackgroundTask] = []
+        """Pending and running tasks, only modified on the main loop."""
+        self.listeners: set[Callable[[BackgroundTask], None]] = set()
+        """Called on the main loop when a task is submitted, changes state,
+        reports progress or finishes.
+        """
+        self._pending: list[tuple[int, int, BackgroundTask]] = []
+        self._counter = count()
+        self._workers = 0
+        self._lock = threading.Lock()
+
+    def submit(  # pylint: disable=too-many-arguments
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        name: str = "",
+        priority: int = PRIORITY_DEFAULT,
+        on_done: Callable[[Any], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+        on_progress: Callable[[BackgroundTask], None] | None = None,
+        **kwargs: Any,
+    ) -> BackgroundTask:
+        """Queue ``func(session, task, *args, **kwargs)`` to run in a worker
+        thread.  Call from the main loop.
+
+        :param name: displayed in the task monitor, defaults to the function
+            name
+        :param priority: e.g. `PRIORITY_HIGH`, lower runs first
+        :param on_done: called on the main loop with the function's return
+            value
+        :param on_error: called on the main loop with any exception raised,
+            if not provided the exception is logged
+        :param on_progress: called on the main loop with the task each time
+            it reports progress
+        :return: the task, use it to cancel
+        """
+        task = BackgroundTask(
+            func, args, kwargs, name, priority, on_done, on_error, on_progress
+        )
+        task.listeners.add(self._on_task_changed)
+        self.tasks.append(task)
+        with self._lock:
+            heapq.heappush(
+                self._pending, (priority, next(self._counter), task)
+            )
+            if self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(
+                    target=self._work,
+                    name=f"task-worker-{self._workers}",
+                    daemon=True,
+                ).start()
+        self._on_task_changed(task)
+        return task
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._workers -= 1
+                    return
+                task = heapq.heappop(self._pending)[-1]
+            task.run()
+
+    def _on_task_changed(self, task: BackgroundTask) -> None:
+        if task.finished and task in self.tasks:
+            self.tasks.remove(task)
+        for listener in list(self.listeners):
+            listener(task)
+
+    def cancel_all(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+
+
+executor = Executor()
+"""The default executor used by `submit`."""
+
+
+def submit(
+    func: Callable[..., Any], *args: Any, **kwargs: Any
+) -> BackgroundTask:
+    """Submit a background task to the default executor.
+
+    See `Executor.submit`.
+    """
+    return executor.submit(func, *args, **kwargs)
+
+
+class TaskMonitor(Gtk.MenuButton):
+    """Statusbar button, only visible while there are background tasks, that
+    pops up a list of them with their progress and a cancel button for each.
+    """
+
+    def __init__(self, executor_: Executor | None = None) -> None:
+        super().__init__()
+        self.executor = executor_ or executor
+        self.set_relief(Gtk.ReliefStyle.NONE)
+        self.set_no_show_all(True)
+        self.label = Gtk.Label()
+        self.add(self.label)
+        self.label.show()
+        self.listbox = Gtk.ListBox(selection_mode=Gtk.SelectionMode.NONE)
+        self.listbox.set_size_request(300, -1)
+        popover = Gtk.Popover()
+        popover.add(self.listbox)
+        self.set_popover(popover)
+        self.rows: dict[BackgroundTask, Gtk.ListBoxRow] = {}
+        self._bars: dict[BackgroundTask, Gtk.ProgressBar] = {}
+        self.executor.listeners.add(self.update)
+        self.connect("destroy", self.on_destroy)
+
+    def on_destroy(self, _widget: Gtk.Widget) -> None:
+        self.executor.listeners.discard(self.update)
+
+    def _add_row(self, task: BackgroundTask) -> None:
+        box = Gtk.Box(spacing=6, margin=6)
+        label = Gtk.Label(label=task.name, xalign=0)
+        box.pack_start(label, False, False, 0)
+        progressbar = Gtk.ProgressBar(show_text=True, valign=Gtk.Align.CENTER)
+        box.pack_start(progressbar, True, True, 0)
+        button = Gtk.Button.new_from_icon_name(
+            "process-stop-symbolic", Gtk.IconSize.BUTTON
+        )
+        button.set_tooltip_text(_("Cancel"))
+        button.connect("clicked", lambda _button: task.cancel())
+        box.pack_end(button, False, False, 0)
+        row = Gtk.ListBoxRow()
+        row.add(box)
+        row.show_all()
+        self.listbox.add(row)
+        self.rows[task] = row
+        self._bars[task] = progressbar
+
+    def update(self, task: BackgroundTask) -> None:
+        if task.finished:
+            if row := self.rows.pop(task, None):
+                self.listbox.remove(row)
+                del self._bars[task]
+        else:
+            if task not in self.rows:
+                self._add_row(task)
+            progressbar = self._bars[task]
+            text = task.message or task.state.value
+            if task.cancelled:
+                text = _("cancelling")
+            progressbar.set_text(text)
+            if task.fraction is None:
+                progressbar.pulse()
+            else:
+                progressbar.set_fraction(task.fraction)
+        self.label.set_text(_("tasks: %s") % len(self.rows))
+        self.set_visible(bool(self.rows))
+        if not self.rows:
+            self.get_popover().popdown()
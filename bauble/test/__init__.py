@@ -87,6 +87,27 @@ def update_gui():
         Gtk.main_iteration()
 
 
+def wait_for_tasks(executor=None, timeout=5):
+    """Run the main loop until all the executor's background tasks have
+    finished.
+
+    :param executor: defaults to `bauble.task.executor`
+    """
+    from time import monotonic
+
+    from gi.repository import GLib
+
+    from bauble import task
+
+    executor = executor or task.executor
+    context = GLib.MainContext.default()
+    end = monotonic() + timeout
+    while executor.tasks and monotonic() < end:
+        context.iteration(False)
+    while context.pending():
+        context.iteration(False)
+
+
 def wait_on_threads():
     """Wait for any still running threads to complete"""
     import threading
@@ -0,0 +1,323 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+Synthetic garden collection generator.
+
+Fills the database with a deterministic (for a given seed) but realistic
+looking collection for performance testing.  e.g.::
+
+    with db.Session() as session:
+        generate(session, SIZES["medium"], seed=1)
+
+All records are added via the ORM, in batches, so that history is recorded
+just as it would be for data entered in the editors.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+import random
+from collections.abc import Iterator
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from itertools import count
+
+from sqlalchemy.orm import Session
+
+from bauble import db
+from bauble.plugins.garden.accession import Accession
+from bauble.plugins.garden.location import Location
+from bauble.plugins.garden.plant import Plant
+from bauble.plugins.garden.plant import PlantChange
+from bauble.plugins.garden.plant import PlantPicture
+from bauble.plugins.garden.source import Source
+from bauble.plugins.garden.source import SourceDetail
+from bauble.plugins.plants import Family
+from bauble.plugins.plants import Genus
+from bauble.plugins.plants import Species
+from bauble.plugins.tag.model import Tag
+
+BATCH_SIZE = 500
+"""The number of top level objects added before each commit."""
+
+
+@dataclass(frozen=True)
+class DatasetSize:
+    """The number of records to generate."""
+
+    families: int
+    genera_per_family: int
+    species_per_genus: int
+    locations: int
+    source_details: int
+    accessions: int
+    max_plants_per_accession: int = 3
+    tags: int = 10
+
+
+SIZES = {
+    "tiny": DatasetSize(3, 2, 2, 4, 2, 10, tags=2),
+    "small": DatasetSize(20, 5, 5, 50, 20, 1000),
+    "medium": DatasetSize(100, 10, 8, 200, 100, 10000),
+    "large": DatasetSize(300, 15, 10, 1000, 500, 50000),
+}
+"""Preset dataset sizes."""
+
+ORIGIN = (152.97, -27.47)
+"""Longitude, latitude of the generated garden's south west corner."""
+
+_SYLLABLES = (
+    "ab al an ar bel bra ca cha cor da del dra fa fil ga gla ha her ia ja "
+    "ka la lep li lo ma mel mo na ne no o pa pe phy pi po ra rho ri ro sa "
+    "scu si ta the ti to u va ve xa ze zo"
+).split()
+_SP_SUFFIXES = ("a", "us", "um", "is", "ensis", "oides", "iana", "ifolia")
+_CHANGE_REASONS = ("TRAN", "HOSP", "ERRO", "OTHR", None)
+_SOURCE_TYPES = ("Expedition", "BG", "Commercial", "Individual", "Other")
+_PICTURE_CATEGORIES = ("habit", "flower", "fruit", "leaf", None)
+
+
+class _Names:
+    """Unique, Latin like, names."""
+
+    def __init__(self, rand: random.Random) -> None:
+        self.rand = rand
+        self.used: set[str] = set()
+
+    def stem(self) -> str:
+        while True:
+            stem = "".join(
+                self.rand.choice(_SYLLABLES)
+                for _ in range(self.rand.randint(2, 4))
+            )
+            if stem not in self.used:
+                self.used.add(stem)
+                return stem
+
+
+def _batches(items: Sequence, size: int = BATCH_SIZE) -> Iterator[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _point(rand: random.Random) -> dict:
+    return {
+        "type": "Point",
+        "coordinates": [
+            round(ORIGIN[0] + rand.random() / 100, 7),
+            round(ORIGIN[1] + rand.random() / 100, 7),
+        ],
+    }
+
+
+def _polygon(rand: random.Random) -> dict:
+    x = ORIGIN[0] + rand.random() / 100
+    y = ORIGIN[1] + rand.random() / 100
+    step = 0.0002
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [
+                [round(x, 7), round(y, 7)],
+                [round(x + step, 7), round(y, 7)],
+                [round(x + step, 7), round(y + step, 7)],
+                [round(x, 7), round(y + step, 7)],
+                [round(x, 7), round(y, 7)],
+            ]
+        ],
+    }
+
+
+def generate_taxa(
+    session: Session, size: DatasetSize, rand: random.Random
+) -> list[int]:
+    """Add families, genera and species, returns the species ids."""
+    names = _Names(rand)
+    species = []
+    for _fam in range(size.families):
+        family = Family(epithet=names.stem().capitalize() + "aceae")
+        for _gen in range(size.genera_per_family):
+            genus = Genus(family=family, epithet=names.stem().capitalize())
+            for _sp in range(size.species_per_genus):
+                species.append(
+                    Species(
+                        genus=genus,
+                        epithet=names.stem() + rand.choice(_SP_SUFFIXES),
+                        sp_author=rand.choice(("L.", "Sm.", "Benth.", None)),
+                    )
+                )
+        session.add(family)
+    session.commit()
+    return [i.id for i in species]
+
+
+def generate_locations(
+    session: Session, size: DatasetSize, rand: random.Random
+) -> list[int]:
+    """Add locations, about half with polygons, returns their ids."""
+    locations = [
+        Location(
+            code=f"LOC{i:04d}",
+            name=f"Bed {i}",
+            geojson=_polygon(rand) if rand.random() < 0.5 else None,
+        )
+        for i in range(size.locations)
+    ]
+    session.add_all(locations)
+    session.commit()
+    return [i.id for i in locations]
+
+
+def generate_source_details(
+    session: Session, size: DatasetSize, rand: random.Random
+) -> list[int]:
+    """Add source details (contacts), returns their ids."""
+    details = [
+        SourceDetail(
+            name=f"Contact {i}", source_type=rand.choice(_SOURCE_TYPES)
+        )
+        for i in range(size.source_details)
+    ]
+    session.add_all(details)
+    session.commit()
+    return [i.id for i in details]
+
+
+def generate_accessions(  # pylint: disable=too-many-arguments
+    session: Session,
+    size: DatasetSize,
+    rand: random.Random,
+    species_ids: list[int],
+    location_ids: list[int],
+    source_detail_ids: list[int],
+) -> None:
+    """Add accessions, with sources, and their plants, with changes and
+    pictures.
+    """
+    codes = count()
+    start = datetime(2000, 1, 1)
+    for batch in _batches(range(size.accessions)):
+        for _i in batch:
+            recvd = start + timedelta(days=rand.randrange(9000))
+            accession = Accession(
+                code=f"{recvd.year}.{next(codes):06d}",
+                species_id=rand.choice(species_ids),
+                date_recvd=recvd.date(),
+                date_accd=recvd.date(),
+                quantity_recvd=rand.randint(1, 10),
+            )
+            if rand.random() < 0.7:
+                accession.source = Source(
+                    source_detail_id=rand.choice(source_detail_ids),
+                    sources_code=str(rand.randrange(100000)),
+                )
+            for plt_code in range(
+                rand.randint(1, size.max_plants_per_accession)
+            ):
+                plant = Plant(
+                    accession=accession,
+                    code=str(plt_code + 1),
+                    quantity=rand.randint(0, 5),
+                    location_id=rand.choice(location_ids),
+                    geojson=_point(rand) if rand.random() < 0.8 else None,
+                )
+                plant.changes.append(
+                    PlantChange(
+                        quantity=plant.quantity,
+                        to_location_id=plant.location_id,
+                        reason="PLTD",
+                        date=recvd.astimezone(),
+                    )
+                )
+                if rand.random() < 0.1:
+                    plant.pictures.append(
+                        PlantPicture(
+                            picture=f"{accession.code}.{plant.code}.jpg",
+                            category=rand.choice(_PICTURE_CATEGORIES),
+                        )
+                    )
+            session.add(accession)
+        session.commit()
+        session.expunge_all()
+
+
+def generate_transfers(
+    session: Session, rand: random.Random, location_ids: list[int]
+) -> None:
+    """Move about a fifth of the plants, recording update history and a
+    further change for each.
+    """
+    plant_ids = [id_ for id_, in session.query(Plant.id)]
+    moved = rand.sample(plant_ids, len(plant_ids) // 5)
+    for batch in _batches(sorted(moved)):
+        for plant in session.query(Plant).filter(Plant.id.in_(batch)):
+            to_location_id = rand.choice(location_ids)
+            plant.changes.append(
+                PlantChange(
+                    quantity=plant.quantity,
+                    from_location_id=plant.location_id,
+                    to_location_id=to_location_id,
+                    reason=rand.choice(_CHANGE_REASONS),
+                )
+            )
+            plant.location_id = to_location_id
+        session.commit()
+        session.expunge_all()
+
+
+def generate_tags(
+    session: Session, size: DatasetSize, rand: random.Random
+) -> None:
+    """Add tags to a random selection of species, accessions and plants."""
+    for i in range(size.tags):
+        tag = Tag(tag=f"tag{i}", description=f"Test tag {i}")
+        session.add(tag)
+        for cls in (Species, Accession, Plant):
+            ids = [id_ for id_, in session.query(cls.id)]
+            sample = rand.sample(ids, max(1, len(ids) // 50))
+            for batch in _batches(sorted(sample)):
+                tag.tag_objects(
+                    session.query(cls).filter(cls.id.in_(batch)).all()
+                )
+        session.commit()
+
+
+def generate(
+    session: Session, size: DatasetSize = SIZES["small"], seed: int = 1
+) -> None:
+    """Fill the database with a synthetic collection.
+
+    Expects an empty database, the same size and seed will always generate
+    the same data.
+    """
+    rand = random.Random(seed)
+    logger.debug("generating %s with seed %s", size, seed)
+    species_ids = generate_taxa(session, size, rand)
+    location_ids = generate_locations(session, size, rand)
+    source_detail_ids = generate_source_details(session, size, rand)
+    generate_accessions(
+        session, size, rand, species_ids, location_ids, source_detail_ids
+    )
+    generate_transfers(session, rand, location_ids)
+    generate_tags(session, size, rand)
+    logger.debug(
+        "generated %s plants, %s history rows",
+        session.query(Plant).count(),
+        session.query(db.History).count(),
+    )
@@ -0,0 +1,233 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.completion
+"""
+import threading
+from unittest import mock
+
+from gi.repository import Gtk
+
+from bauble import completion
+from bauble import db
+from bauble.completion import CompletionDispatcher
+from bauble.completion import get_prefix_index
+from bauble.completion import prefix_filter
+from bauble.completion import update_completion_model
+from bauble.plugins.plants import Family
+from bauble.sql_stats import track_statements
+from bauble.test import BaubleTestCase
+from bauble.test import update_gui
+from bauble.test import wait_on_threads
+
+
+class PrefixIndexTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        for epithet in ["Myrtaceae", "Moraceae", "Malvaceae", "Orchidaceae"]:
+            self.session.add(Family(epithet=epithet))
+        self.session.commit()
+
+    def test_get_prefix_index(self):
+        index = get_prefix_index(Family.family)
+        # synonyms resolve to the same index
+        self.assertIs(get_prefix_index(Family.epithet), index)
+        self.assertEqual(index.table_name, "family")
+        self.assertEqual(index.column_name, "family")
+        # not a plain column
+        self.assertIsNone(get_prefix_index(Family.active))
+        self.assertIsNone(get_prefix_index(Family.genera))
+
+    def test_lookup(self):
+        index = get_prefix_index(Family.epithet)
+        self.assertEqual(
+            index.lookup("m"), ["Malvaceae", "Moraceae", "Myrtaceae"]
+        )
+        self.assertEqual(index.lookup("MO"), ["Moraceae"])
+        self.assertEqual(index.lookup("m", 2), ["Malvaceae", "Moraceae"])
+        self.assertEqual(index.lookup("x"), [])
+
+    def test_loads_once(self):
+        index = get_prefix_index(Family.epithet)
+        index.lookup("m")
+        with (
+            mock.patch.object(index, "_load") as mock_load,
+            mock.patch.object(index, "_refresh") as mock_refresh,
+        ):
+            index.lookup("mo")
+            index.lookup("or")
+            mock_load.assert_not_called()
+            mock_refresh.assert_not_called()
+
+    def test_refreshed_from_history(self):
+        index = get_prefix_index(Family.epithet)
+        self.assertEqual(index.lookup("my"), ["Myrtaceae"])
+        with mock.patch.object(index, "_load") as mock_load:
+            fam = (
+                self.session.query(Family).filter_by(epithet="Myrtaceae").one()
+            )
+            fam.epithet = "Myrsinaceae"
+            self.session.add(Family(epithet="Myristicaceae"))
+            self.session.delete(
+                self.session.query(Family).filter_by(epithet="Moraceae").one()
+            )
+            self.session.commit()
+            self.assertEqual(
+                index.lookup("m"),
+                ["Malvaceae", "Myristicaceae", "Myrsinaceae"],
+            )
+            mock_load.assert_not_called()
+
+    def test_reloads_on_revert_or_new_connection(self):
+        index = get_prefix_index(Family.epithet)
+        index.lookup("m")
+        start = self.session.query(db.History).order_by(db.History.id).first()
+        db.History.revert_to(start.id)
+        self.assertEqual(index.lookup("m"), [])
+        index.lookup("m")
+        with mock.patch.object(db, "engine", mock.Mock()):
+            with mock.patch.object(index, "_load") as mock_load:
+                index.lookup("m")
+                mock_load.assert_called()
+
+    def test_prefix_filter(self):
+        clause = prefix_filter(Family.epithet, "m")
+        self.assertIn("IN", str(clause))
+        self.assertEqual(
+            self.session.query(Family.epithet)
+            .filter(clause)
+            .order_by(Family.epithet)
+            .all(),
+            [("Malvaceae",), ("Moraceae",), ("Myrtaceae",)],
+        )
+        # too many values falls back to ilike
+        clause = prefix_filter(Family.epithet, "m", 2)
+        self.assertIn("LIKE", str(clause))
+        self.assertEqual(
+            self.session.query(Family.epithet).filter(clause).count(), 3
+        )
+
+    def test_lookups_do_not_query(self):
+        """Once loaded, keystroke lookups are served without any SQL."""
+        for i in range(200):
+            self.session.add(Family(epithet=f"Testaceae{i}"))
+        self.session.commit()
+        index = get_prefix_index(Family.epithet)
+        with track_statements() as stats:
+            index.lookup("te")
+        self.assertGreater(stats.count, 0)
+        with track_statements() as stats:
+            for text in ["t", "te", "tes", "testaceae", "testaceae1"]:
+                index.lookup(text, 10)
+        self.assertEqual(stats.count, 0)
+        self.assertEqual(len(index.lookup("testaceae1", 10)), 10)
+
+
+class UpdateCompletionModelTests(BaubleTestCase):
+    def test_creates_model(self):
+        comp = Gtk.EntryCompletion()
+        update_completion_model(comp, ["a", "b"])
+        self.assertEqual([i[0] for i in comp.get_model()], ["a", "b"])
+        # wrong type replaced
+        comp.set_model(Gtk.ListStore(str))
+        update_completion_model(comp, [1, 2], object)
+        self.assertEqual([i[0] for i in comp.get_model()], [1, 2])
+
+    def test_updates_in_place(self):
+        comp = Gtk.EntryCompletion()
+        update_completion_model(comp, ["aa", "ab", "ac", "ad"])
+        model = comp.get_model()
+        deleted = []
+        model.connect("row-deleted", lambda *_: deleted.append(1))
+        # narrowing only removes rows
+        update_completion_model(comp, ["ab", "ad"])
+        self.assertIs(comp.get_model(), model)
+        self.assertEqual([i[0] for i in model], ["ab", "ad"])
+        self.assertEqual(len(deleted), 2)
+        # inserts in order
+        update_completion_model(comp, ["aa", "ab", "ac", "ad", "ae"])
+        self.assertEqual([i[0] for i in model], ["aa", "ab", "ac", "ad", "ae"])
+        self.assertEqual(len(deleted), 2)
+        # reordered
+        update_completion_model(comp, ["ae", "aa"])
+        self.assertEqual([i[0] for i in model], ["ae", "aa"])
+
+
+class CompletionDispatcherTests(BaubleTestCase):
+    def test_debounces_and_applies_latest(self):
+        get_completions = mock.Mock(side_effect=lambda t: [t + "1", t + "2"])
+        dispatcher = CompletionDispatcher(get_completions, delay=50)
+        comp = Gtk.EntryCompletion()
+        for text in ["ab", "abc", "abcd"]:
+            dispatcher.request(text, comp)
+        update_gui()
+        # nothing yet
+        get_completions.assert_not_called()
+        while dispatcher._timer_id:
+            update_gui()
+        wait_on_threads()
+        update_gui()
+        get_completions.assert_called_once_with("abcd")
+        self.assertEqual([i[0] for i in comp.get_model()], ["abcd1", "abcd2"])
+
+    def test_stale_results_discarded(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def get_completions(text):
+            if text == "slow":
+                started.set()
+                release.wait()
+            return [text]
+
+        dispatcher = CompletionDispatcher(get_completions, delay=0)
+        comp = Gtk.EntryCompletion()
+        dispatcher.request("slow", comp)
+        while not started.is_set():
+            update_gui()
+        dispatcher.request("fast", comp)
+        release.set()
+        while dispatcher._timer_id:
+            update_gui()
+        wait_on_threads()
+        update_gui()
+        self.assertEqual([i[0] for i in comp.get_model()], ["fast"])
+
+    def test_cancel(self):
+        get_completions = mock.Mock(return_value=["a"])
+        dispatcher = CompletionDispatcher(get_completions, delay=0)
+        comp = Gtk.EntryCompletion()
+        dispatcher.request("ab", comp)
+        dispatcher.cancel()
+        update_gui()
+        wait_on_threads()
+        update_gui()
+        get_completions.assert_not_called()
+        self.assertIsNone(comp.get_model())
+
+    def test_errors_logged(self):
+        get_completions = mock.Mock(side_effect=ValueError("boom"))
+        dispatcher = CompletionDispatcher(get_completions, delay=0)
+        comp = Gtk.EntryCompletion()
+        with self.assertLogs(completion.logger, level="DEBUG") as logs:
+            dispatcher.request("ab", comp)
+            while dispatcher._timer_id:
+                update_gui()
+            wait_on_threads()
+            update_gui()
+        self.assertTrue(any("boom" in i for i in logs.output))
+        self.assertIsNone(comp.get_model())
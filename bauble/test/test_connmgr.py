@@ -762,6 +762,46 @@ class ConnectionModelTests(BaubleTestCase):
         with self.assertNoLogs(level="DEBUG"):
             model.save()
 
+    def test_pool(self):
+        prefs.prefs[bauble.CONN_LIST_PREF] = {
+            "quisquis": {
+                "passwd": False,
+                "directory": "",
+                "db": "quisquis",
+                "host": "localhost",
+                "port": "5432",
+                "user": "foo",
+                "type": "PostgreSQL",
+                "pool": {"pool_size": "10"},
+            }
+        }
+        model = ConnectionModel("quisquis")
+        self.assertEqual(model.pool, {"pool_size": "10"})
+        self.assertEqual(model.get_params()["pool"], {"pool_size": "10"})
+        model.pool = {}
+        self.assertNotIn("pool", model.get_params())
+        model.dbtype = "SQLite"
+        model.pool = {"pool_size": "10"}
+        self.assertNotIn("pool", model.get_params())
+
+    def test_pragmas(self):
+        prefs.prefs[bauble.CONN_LIST_PREF] = {
+            "quisquis": {
+                "type": "SQLite",
+                "default": False,
+                "directory": "./quisquis",
+                "file": "./quisquis.db",
+                "pragmas": {"journal_mode": "DELETE"},
+            }
+        }
+        model = ConnectionModel("quisquis")
+        self.assertEqual(model.pragmas, {"journal_mode": "DELETE"})
+        self.assertEqual(
+            model.get_params()["pragmas"], {"journal_mode": "DELETE"}
+        )
+        model.pragmas = {}
+        self.assertNotIn("pragmas", model.get_params())
+
     def test_save_no_prefs_creates(self):
         model = ConnectionModel("spam")
         del prefs.prefs[bauble.CONN_LIST_PREF]
@@ -0,0 +1,65 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.test.dataset
+"""
+from bauble import db
+from bauble.plugins.garden.accession import Accession
+from bauble.plugins.garden.plant import Plant
+from bauble.plugins.garden.plant import PlantChange
+from bauble.plugins.plants import Species
+from bauble.plugins.tag.model import Tag
+from bauble.test import BaubleTestCase
+from bauble.test.dataset import SIZES
+from bauble.test.dataset import generate
+
+
+class GenerateTests(BaubleTestCase):
+    def test_generate_tiny(self):
+        size = SIZES["tiny"]
+        generate(self.session, size, seed=3)
+        self.assertEqual(
+            self.session.query(Species).count(),
+            size.families * size.genera_per_family * size.species_per_genus,
+        )
+        self.assertEqual(
+            self.session.query(Accession).count(), size.accessions
+        )
+        plants = self.session.query(Plant).count()
+        self.assertGreaterEqual(plants, size.accessions)
+        self.assertGreater(self.session.query(PlantChange).count(), plants)
+        self.assertEqual(self.session.query(Tag).count(), size.tags)
+        self.assertTrue(
+            self.session.query(db.History)
+            .filter(db.History.operation == "update")
+            .count()
+        )
+
+    def test_generate_deterministic(self):
+        generate(self.session, SIZES["tiny"], seed=3)
+        first = [
+            (i.code, i.species_id, i.date_recvd)
+            for i in self.session.query(Accession).order_by(Accession.id)
+        ]
+        self.tearDown()
+        self.setUp()
+        generate(self.session, SIZES["tiny"], seed=3)
+        second = [
+            (i.code, i.species_id, i.date_recvd)
+            for i in self.session.query(Accession).order_by(Accession.id)
+        ]
+        self.assertEqual(first, second)
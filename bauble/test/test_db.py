@@ -17,7 +17,10 @@
 # You should have received a copy of the GNU General Public License
 # along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
 
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import mock
+from unittest import skipUnless
 
 from dateutil import parser
 from sqlalchemy import Column
@@ -27,7 +30,12 @@ from sqlalchemy import Unicode
 from sqlalchemy import create_engine
 from sqlalchemy import func
 from sqlalchemy import inspect
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import relationship
+from sqlalchemy.pool import QueuePool
 
 from bauble import btypes
 from bauble import db
@@ -46,8 +54,10 @@ from bauble.plugins.plants.genus import Genus
 from bauble.plugins.plants.genus import Species
 from bauble.plugins.plants.species_model import VernacularName
 from bauble.search.strategies import MapperSearch
+from bauble.sql_stats import track_statements
 from bauble.test import BaubleTestCase
 from bauble.test import get_setUp_data_funcs
+from bauble.test import uri
 
 
 class HistoryTests(BaubleTestCase):
@@ -381,6 +391,106 @@ class HistoryTests(BaubleTestCase):
         for note in parent_model.notes:
             self.assertEqual(note.note, "TEST")
 
+    def _add_family_history(self):
+        start = self.session.query(func.max(db.History.id)).scalar() or 0
+        family = Family(epithet="Familya")
+        genus = Genus(epithet="Genusa", family=family)
+        self.session.add(genus)
+        self.session.commit()
+        family.epithet = "Familyb"
+        self.session.commit()
+        genus.epithet = "Genusb"
+        self.session.commit()
+        family.epithet = "Familyc"
+        self.session.commit()
+        self.session.delete(genus)
+        self.session.commit()
+        existing = Family(epithet="Existing")
+        self.session.add(existing)
+        self.session.commit()
+        mid = self.session.query(func.max(db.History.id)).scalar() + 1
+        existing.epithet = "Existingb"
+        self.session.commit()
+        return start + 1, mid
+
+    def test_revert_to_collapses_changes(self):
+        start, mid = self._add_family_history()
+        callback = mock.Mock()
+        with mock.patch.object(
+            db.History, "history_revert_callbacks", [callback]
+        ):
+            tables = db.History.revert_to(mid)
+        self.assertEqual(tables, {Family.__table__})
+        callback.assert_called_once_with(Family.__table__)
+        self.session.expire_all()
+        self.assertEqual(
+            [i.epithet for i in self.session.query(Family)],
+            ["Familyc", "Existing"],
+        )
+        tables = db.History.revert_to(start)
+        # the genus was inserted and deleted, no net change
+        self.assertEqual(tables, {Family.__table__})
+        self.assertEqual(self.session.query(Family).count(), 0)
+        self.assertEqual(self.session.query(Genus).count(), 0)
+        self.assertFalse(
+            self.session.query(db.History)
+            .filter(db.History.id >= start)
+            .count()
+        )
+
+    def test_revert_to_falls_back_to_each_line(self):
+        loc1 = Location(code="LOC1")
+        loc2 = Location(code="LOC2")
+        self.session.add_all([loc1, loc2])
+        self.session.commit()
+        start = self.session.query(func.max(db.History.id)).scalar() + 1
+        # swap the unique codes
+        loc1.code = "TEMP"
+        self.session.commit()
+        loc2.code = "LOC1"
+        self.session.commit()
+        loc1.code = "LOC2"
+        self.session.commit()
+        # the net change to loc1 clashes with loc2 before loc2 is reverted
+        with mock.patch.object(
+            db.History, "_revert_each", wraps=db.History._revert_each
+        ) as mock_each:
+            tables = db.History.revert_to(start)
+        mock_each.assert_called_once()
+        self.assertEqual(tables, {Location.__table__})
+        self.session.expire_all()
+        self.assertEqual(loc1.code, "LOC1")
+        self.assertEqual(loc2.code, "LOC2")
+        self.assertFalse(
+            self.session.query(db.History)
+            .filter(db.History.id >= start)
+            .count()
+        )
+
+    def test_net_changes_delete_then_insert_updates(self):
+        family = Family(epithet="Familya")
+        self.session.add(family)
+        self.session.commit()
+        family_id = family.id
+        start = self.session.query(func.max(db.History.id)).scalar() + 1
+        self.session.delete(family)
+        self.session.commit()
+        self.session.add(Family(id=family_id, epithet="Familyb"))
+        self.session.commit()
+        history = db.History.__table__
+        changes = db.NetChanges(revert=True)
+        with db.engine.begin() as connection:
+            for row in connection.execute(
+                select(history)
+                .where(history.c.id >= start)
+                .order_by(history.c.id.desc())
+            ):
+                changes.add(row)
+            self.assertEqual(len(changes), 1)
+            changes.apply(connection)
+        self.session.expire_all()
+        self.assertEqual(self.session.query(Family).one().epithet, "Familya")
+
     def test_event_add_delete(self):
         table = meta.BaubleMeta.__table__
         instance = meta.get_default("test", "test value")
@@ -462,6 +572,19 @@ class BaseTests(BaubleTestCase):
 
 
 class GlobalFunctionsTests(BaubleTestCase):
+    def test_yield_per_options(self):
+        for setup in get_setUp_data_funcs():
+            setup()
+        # Plant.accession is eager loaded with a subquery by default
+        self.assertEqual(len(db.yield_per_options(Plant)), 1)
+        self.assertEqual(db.yield_per_options(Location), [])
+        for plant in (
+            self.session.query(Plant)
+            .options(*db.yield_per_options(Plant))
+            .yield_per(10)
+        ):
+            self.assertIsNotNone(plant.accession)
+
     def test_get_related_class(self):
         self.assertEqual(db.get_related_class(Plant, "accession"), Accession)
         self.assertEqual(
@@ -484,6 +607,209 @@ class GlobalFunctionsTests(BaubleTestCase):
             db.get_related_class(Species, "vernacular_names"), VernacularName
         )
 
+    def test_lookup_cache(self):
+        db.enable_lookup_cache(self.session)
+        fam = db.get_create_or_update(
+            self.session, Family, epithet="Myrtaceae"
+        )
+        self.session.commit()
+        with mock.patch.object(
+            self.session, "query", side_effect=AssertionError
+        ):
+            # no queries, across commits
+            self.assertIs(
+                db.get_create_or_update(
+                    self.session, Family, epithet="Myrtaceae"
+                ),
+                fam,
+            )
+        loc = db.get_or_create(self.session, Location, code="XYZ001")
+        self.assertIs(
+            db.get_or_create(self.session, Location, code="XYZ001"), loc
+        )
+        # changed values
+        fam.epithet = "Proteaceae"
+        self.assertIsNot(
+            db.get_create_or_update(self.session, Family, epithet="Myrtaceae"),
+            fam,
+        )
+        # cleared on rollback
+        self.session.rollback()
+        self.assertEqual(self.session.info[db.LOOKUP_CACHE], {})
+        # deleted
+        fam = db.get_create_or_update(
+            self.session, Family, epithet="Myrtaceae"
+        )
+        self.session.delete(fam)
+        self.session.flush()
+        self.assertEqual(self.session.info[db.LOOKUP_CACHE], {})
+
+    def test_lookup_cache_not_enabled(self):
+        fam = db.get_create_or_update(
+            self.session, Family, epithet="Myrtaceae"
+        )
+        self.assertNotIn(db.LOOKUP_CACHE, self.session.info)
+        self.session.commit()
+        self.assertEqual(
+            db.get_create_or_update(self.session, Family, epithet="Myrtaceae"),
+            fam,
+        )
+
+    def test_get_pool_args(self):
+        self.assertEqual(db.get_pool_args(None), db.POOL_DEFAULTS)
+        with self.assertLogs(db.logger, level="WARNING") as logs:
+            args = db.get_pool_args(
+                {
+                    "pool_size": "10",
+                    "pool_pre_ping": "false",
+                    "pool_timeout": "spam",
+                    "eggs": "1",
+                }
+            )
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(args["pool_size"], 10)
+        self.assertIs(args["pool_pre_ping"], False)
+        self.assertEqual(
+            args["pool_timeout"], db.POOL_DEFAULTS["pool_timeout"]
+        )
+        self.assertNotIn("eggs", args)
+
+    def test_open_conn_pool_args(self):
+        sqlite_uri = db.engine.url
+        uri = sqlite_uri.set(drivername="postgresql")
+        with (
+            mock.patch("bauble.db.sa.create_engine") as mock_create,
+            mock.patch("bauble.db.track_pool"),
+            mock.patch("bauble.db.first_connect_callbacks", []),
+            mock.patch("bauble.db._Session"),
+            mock.patch("bauble.db.engine"),
+            mock.patch("bauble.db.pool_stats"),
+            mock.patch("bauble.db.metadata"),
+        ):
+            db.open_conn(uri, verify=False, pool={"pool_size": "2"})
+            kwargs = mock_create.call_args.kwargs
+            self.assertTrue(kwargs["pool_pre_ping"])
+            self.assertEqual(kwargs["pool_size"], 2)
+            # not used for sqlite
+            db.open_conn(sqlite_uri, verify=False, pool={"pool_size": "2"})
+            self.assertNotIn("pool_size", mock_create.call_args.kwargs)
+
+    def test_track_pool(self):
+        engine = create_engine("sqlite://", poolclass=QueuePool)
+        stats = db.track_pool(engine)
+        with engine.connect():
+            with engine.connect():
+                self.assertEqual(stats.checked_out, 2)
+        self.assertEqual(stats.checked_out, 0)
+        self.assertEqual(stats.max_checked_out, 2)
+        self.assertEqual(stats.checkouts, 2)
+        self.assertEqual(stats.connects, 2)
+        with engine.connect() as connection:
+            with self.assertLogs(db.logger, level="WARNING"):
+                connection.invalidate(ValueError("test"))
+        self.assertEqual(stats.invalidations, 1)
+        engine.dispose()
+
+    def test_retry_on_disconnect(self):
+        lost = DBAPIError(
+            "SELECT", {}, Exception(), connection_invalidated=True
+        )
+        func = mock.Mock(side_effect=[lost, 1])
+        with self.assertLogs(db.logger, level="WARNING"):
+            self.assertEqual(db.retry_on_disconnect(self.session, func), 1)
+        self.assertEqual(func.call_count, 2)
+        # other errors
+        func = mock.Mock(side_effect=DBAPIError("SELECT", {}, Exception()))
+        with self.assertRaises(DBAPIError):
+            db.retry_on_disconnect(self.session, func)
+        func.assert_called_once()
+        # pending changes
+        self.session.add(Family(epithet="Testaceae"))
+        func = mock.Mock(side_effect=[lost, 1])
+        with self.assertRaises(DBAPIError):
+            db.retry_on_disconnect(self.session, func)
+        func.assert_called_once()
+
+    def test_get_sqlite_pragmas(self):
+        self.assertEqual(db.get_sqlite_pragmas(None), db.SQLITE_PRAGMAS)
+        self.assertNotIn("journal_mode", db.get_sqlite_pragmas(None))
+        with self.assertLogs(db.logger, level="WARNING") as logs:
+            pragmas = db.get_sqlite_pragmas(
+                {
+                    "journal_mode": "DELETE",
+                    "cache_size": "-2000",
+                    "synchronous": "OFF; DROP TABLE plant",
+                    "spam": "1",
+                }
+            )
+        self.assertEqual(len(logs.output), 2)
+        self.assertEqual(pragmas["journal_mode"], "DELETE")
+        self.assertEqual(pragmas["cache_size"], "-2000")
+        self.assertNotIn("synchronous", pragmas)
+        self.assertNotIn("spam", pragmas)
+        # opting in to WAL
+        pragmas = db.get_sqlite_pragmas({"journal_mode": "WAL"})
+        self.assertEqual(pragmas["synchronous"], "NORMAL")
+        pragmas = db.get_sqlite_pragmas(
+            {"journal_mode": "wal", "synchronous": "FULL"}
+        )
+        self.assertEqual(pragmas["synchronous"], "FULL")
+
+    def test_open_conn_sqlite_pragmas(self):
+        with (
+            TemporaryDirectory() as tmp,
+            mock.patch("bauble.db.first_connect_callbacks", []),
+            mock.patch("bauble.db._Session"),
+            mock.patch("bauble.db.engine"),
+            mock.patch("bauble.db.pool_stats"),
+            mock.patch("bauble.db.metadata"),
+        ):
+            url = make_url(f"sqlite:///{Path(tmp, 'test.db')}")
+            # the journal mode is left as is by default
+            engine = db.open_conn(url, verify=False)
+            with engine.connect() as connection:
+                pragma = connection.exec_driver_sql
+                self.assertEqual(
+                    pragma("PRAGMA journal_mode").scalar(), "delete"
+                )
+                self.assertEqual(pragma("PRAGMA temp_store").scalar(), 2)
+                self.assertEqual(pragma("PRAGMA foreign_keys").scalar(), 1)
+            engine.dispose()
+            engine = db.open_conn(
+                url, verify=False, pragmas={"journal_mode": "WAL"}
+            )
+            with engine.connect() as connection:
+                pragma = connection.exec_driver_sql
+                self.assertEqual(pragma("PRAGMA journal_mode").scalar(), "wal")
+                self.assertEqual(pragma("PRAGMA synchronous").scalar(), 1)
+            engine.dispose()
+
+    def test_optimize(self):
+        with TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{Path(tmp, 'test.db')}")
+            with engine.begin() as connection:
+                connection.exec_driver_sql(
+                    "CREATE TABLE spam (id INTEGER PRIMARY KEY, name TEXT)"
+                )
+                connection.exec_driver_sql(
+                    "CREATE INDEX ix_name ON spam(name)"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO spam (name) VALUES ('eggs'), ('ham')"
+                )
+            with track_statements(engine=engine) as stats:
+                db.optimize(engine)
+                db.optimize(engine, analyze=True, vacuum=True)
+            self.assertTrue(inspect(engine).has_table("sqlite_stat1"))
+            # sampled, not a full ANALYZE
+            self.assertEqual(stats.fingerprints["PRAGMA analysis_limit=?"], 2)
+            self.assertEqual(stats.fingerprints["ANALYZE"], 1)
+            engine.dispose()
+        not_sqlite = mock.Mock()
+        not_sqlite.name = "postgresql"
+        db.optimize(not_sqlite, analyze=True, vacuum=True)
+        not_sqlite.connect.assert_not_called()
+
     def test_get_create_or_update(self):
         loc1 = {
             "code": "XYZ001",
@@ -844,3 +1170,32 @@ class GlobalFunctionsTests(BaubleTestCase):
         db._create_all()
 
         self.assertTrue(inspect(db.engine).has_table("spam_250606_table"))
+
+
+@skipUnless(uri.startswith("postgresql"), "PostgreSQL only")
+class DisconnectTests(BaubleTestCase):
+    @staticmethod
+    def terminate(pid):
+        with db.engine.connect() as connection:
+            connection.execute(
+                text("SELECT pg_terminate_backend(:pid)"), {"pid": pid}
+            )
+
+    def test_pre_ping_replaces_dropped_pooled_connection(self):
+        with db.Session() as session:
+            pid = session.execute(text("SELECT pg_backend_pid()")).scalar()
+        self.terminate(pid)
+        invalidations = db.pool_stats.invalidations
+        with db.Session() as session:
+            self.assertEqual(session.execute(select(1)).scalar(), 1)
+        self.assertGreater(db.pool_stats.invalidations, invalidations)
+
+    def test_retry_on_disconnect(self):
+        with db.Session() as session:
+            pid = session.execute(text("SELECT pg_backend_pid()")).scalar()
+            self.terminate(pid)
+            with self.assertLogs(db.logger, level="WARNING"):
+                result = db.retry_on_disconnect(
+                    session, lambda: session.execute(select(1)).scalar()
+                )
+            self.assertEqual(result, 1)
@@ -0,0 +1,133 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.lazy_results
+"""
+from unittest import mock
+
+from gi.repository import Gtk
+from sqlalchemy import inspect
+from sqlalchemy.orm.util import identity_key
+
+from bauble.lazy_results import LazyResultsModel
+from bauble.lazy_results import get_result_keys
+from bauble.plugins.plants import Family
+from bauble.plugins.plants import Genus
+from bauble.search.search import id_query
+from bauble.sql_stats import track_statements
+from bauble.test import BaubleTestCase
+
+
+class LazyResultsTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(25):
+            fam = Family(epithet=f"Testaceae{i:02}")
+            self.session.add_all([fam, Genus(family=fam, epithet=f"Gen{i}")])
+        self.session.commit()
+
+    def get_model(self, **kwargs):
+        ids = self.session.query(Family.id).order_by(Family.id)
+        keys = [identity_key(Family, i) for i, in ids]
+        return LazyResultsModel(self.session, keys, **kwargs)
+
+    def test_get_result_keys(self):
+        queries = [
+            id_query(self.session.query(Family).filter(Family.id <= 3)),
+            id_query(self.session.query(Family).filter(Family.id >= 2)),
+            id_query(self.session.query(Genus).filter(Genus.id <= 2)),
+        ]
+        extra = [self.session.query(Genus).get(9)]
+        keys = get_result_keys(
+            self.session,
+            queries,
+            extra,
+            {Family: lambda q: q.order_by(Family.epithet.desc())}.get,
+        )
+        self.assertEqual(len(keys), 25 + 3)
+        self.assertEqual(keys[0], identity_key(Family, 25))
+        self.assertEqual(keys[24], identity_key(Family, 1))
+        self.assertEqual(
+            keys[25:],
+            [identity_key(Genus, i) for i in (1, 2, 9)],
+        )
+
+    def test_model_rows(self):
+        model = self.get_model()
+        self.assertEqual(len(model), 25)
+        self.assertEqual(model.iter_n_children(None), 25)
+        self.assertEqual(
+            [row[0].epithet for row in model],
+            [f"Testaceae{i:02}" for i in range(25)],
+        )
+        self.assertEqual(model[24][0].epithet, "Testaceae24")
+        with self.assertRaises(ValueError):
+            model.get_iter(Gtk.TreePath.new_from_indices([25]))
+        treeiter = model.get_iter_first()
+        self.assertFalse(model.iter_has_child(treeiter))
+        self.assertIsNone(model.iter_parent(treeiter))
+        self.assertIsNone(model.iter_previous(treeiter))
+        self.assertEqual(model.type_counts(), {Family: 25})
+
+    def test_loads_pages_and_limits_cached(self):
+        model = self.get_model(page_size=5, max_pages=2)
+        with mock.patch.object(
+            model, "_load_page", wraps=model._load_page
+        ) as mock_load:
+            self.assertEqual(model[0][0].epithet, "Testaceae00")
+            self.assertEqual(model[4][0].epithet, "Testaceae04")
+            mock_load.assert_called_once_with(0)
+            model[5][0]
+            model[10][0]
+            self.assertEqual(list(model._pages), [1, 2])
+            model[0][0]
+            self.assertEqual(mock_load.call_count, 4)
+
+    def test_load_page_statement_budget(self):
+        model = self.get_model(page_size=25)
+        with track_statements("load page") as stats:
+            rows = [row[0] for row in model]
+        self.assertEqual(len(rows), 25)
+        # one query per type, not per row
+        self.assertEqual(stats.count, 1)
+
+    def test_find_and_expire(self):
+        model = self.get_model(page_size=5)
+        fam = model[7][0]
+        key = inspect(fam).key
+        found = model.find(key)
+        self.assertEqual(len(found), 1)
+        self.assertEqual(model.get_path(found[0]).get_indices(), [7])
+        self.assertEqual(model.find(identity_key(Family, 999)), [])
+
+        changed = []
+        model.connect("row-changed", lambda _m, p, _i: changed.append(str(p)))
+        self.session.delete(fam.genera[0])
+        self.session.delete(fam)
+        self.session.commit()
+        model.expire([key])
+        self.assertEqual(changed, ["7"])
+        # deleted returns None
+        self.assertIsNone(model[7][0])
+        self.assertEqual(model[8][0].epithet, "Testaceae08")
+
+    def test_clear_cache(self):
+        model = self.get_model()
+        model[0][0]
+        self.assertTrue(model._pages)
+        model.clear_cache()
+        self.assertFalse(model._pages)
@@ -0,0 +1,97 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.maintenance
+"""
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest import mock
+from unittest import skipUnless
+
+from bauble import db
+from bauble import maintenance
+from bauble import meta
+from bauble import prefs
+from bauble.search.text_index import SEARCH_TEXT_INDEX_PREF
+from bauble.test import BaubleTestCase
+from bauble.test import uri
+
+
+class MaintenanceTests(BaubleTestCase):
+    def set_last_run(self, key, value):
+        self.session.add(meta.BaubleMeta(name=key, value=value))
+        self.session.commit()
+
+    def test_is_due(self):
+        key = maintenance.LAST_ANALYZE_KEY
+        self.assertFalse(maintenance.is_due(key, 0))
+        self.assertTrue(maintenance.is_due(key, 7))
+        self.set_last_run(key, datetime.now(timezone.utc).isoformat())
+        self.assertFalse(maintenance.is_due(key, 7))
+        key = maintenance.LAST_VACUUM_KEY
+        last = datetime.now(timezone.utc) - timedelta(days=8)
+        self.set_last_run(key, last.isoformat())
+        self.assertTrue(maintenance.is_due(key, 7))
+        self.set_last_run("last_spam", "spam")
+        self.assertTrue(maintenance.is_due("last_spam", 7))
+
+    @mock.patch("bauble.maintenance.db.optimize")
+    def test_run_maintenance(self, mock_optimize):
+        bg_task = mock.Mock()
+        with db.Session() as session:
+            maintenance.run_maintenance(session, bg_task, True, False)
+        mock_optimize.assert_called_once_with(
+            db.engine, analyze=True, vacuum=False
+        )
+        bg_task.progress.assert_called()
+        self.assertFalse(maintenance.is_due(maintenance.LAST_ANALYZE_KEY, 1))
+        self.assertIsNone(meta.get_cached_value(maintenance.LAST_VACUUM_KEY))
+
+    @skipUnless(uri.startswith("sqlite"), "SQLite only")
+    @mock.patch("bauble.maintenance.task.submit")
+    def test_schedule(self, mock_submit):
+        maintenance.schedule()
+        mock_submit.assert_called_once()
+        self.assertEqual(mock_submit.call_args.args[1:], (True, False))
+        mock_submit.reset_mock()
+        prefs.prefs[maintenance.ANALYZE_DAYS_PREF] = 0
+        prefs.prefs[maintenance.VACUUM_DAYS_PREF] = 30
+        maintenance.schedule()
+        self.assertEqual(mock_submit.call_args.args[1:], (False, True))
+
+    @mock.patch("bauble.maintenance.task.submit")
+    def test_schedule_text_indexes(self, mock_submit):
+        maintenance.schedule()
+        self.assertNotIn(
+            maintenance.create_text_indexes,
+            [i.args[0] for i in mock_submit.call_args_list],
+        )
+        mock_submit.reset_mock()
+        prefs.prefs[SEARCH_TEXT_INDEX_PREF] = True
+        maintenance.schedule()
+        self.assertIs(
+            mock_submit.call_args_list[0].args[0],
+            maintenance.create_text_indexes,
+        )
+
+    @mock.patch("bauble.maintenance.text_index.create_indexes")
+    def test_create_text_indexes(self, mock_create_indexes):
+        bg_task = mock.Mock()
+        maintenance.create_text_indexes(None, bg_task)
+        bg_task.progress.assert_called()
+        mock_create_indexes.assert_called_once_with()
@@ -198,6 +198,7 @@ class GlobalFunctionsTests(TestCase):
 
     def tearDown(self):
         pluginmgr.plugins = {}
+        pluginmgr._deferred.clear()
 
     def test_create_dependency_pairs(self):
         plug_a = A()
@@ -215,6 +216,29 @@ class GlobalFunctionsTests(TestCase):
         )
         self.assertEqual(unmet, {})
 
+    def test_defer_replaces_queued_work_of_same_name(self):
+        first = mock.Mock()
+        second = mock.Mock()
+        other = mock.Mock()
+        pluginmgr.defer(first, "test")
+        pluginmgr.defer(other)
+        pluginmgr.defer(second, "test")
+        self.assertTrue(pluginmgr.deferred_pending())
+        pluginmgr.run_deferred()
+        first.assert_not_called()
+        second.assert_called_once()
+        other.assert_called_once()
+        self.assertFalse(pluginmgr.deferred_pending())
+
+    def test_run_deferred_continues_after_error(self):
+        good = mock.Mock()
+        pluginmgr.defer(mock.Mock(side_effect=ValueError("boom")), "bad")
+        pluginmgr.defer(good, "good")
+        with self.assertLogs(pluginmgr.logger, level="ERROR") as logs:
+            pluginmgr.run_deferred()
+        good.assert_called_once()
+        self.assertIn("deferred bad failed", logs.output[0])
+
     def test_create_dependency_pairs_missing_base(self):
         plug_b = B()
         plug_c = C()
@@ -394,6 +418,31 @@ class StandalonePluginMgrTests(TestCase):
         # just for the coverage
         self.assertIsNone(DumbHandler.get_view())
 
+    def test_init_runs_deferred_init_without_gui(self):
+        db.open_conn(make_url(uri), verify=False)
+        db.create(False)
+        pluginmgr.plugins[A.__name__] = A()
+        with mock.patch.object(A, "deferred_init") as mock_deferred:
+            pluginmgr.init(force=True)
+        mock_deferred.assert_called_once()
+        self.assertFalse(pluginmgr.deferred_pending())
+
+    @mock.patch("bauble.pluginmgr.GLib.idle_add")
+    def test_init_schedules_deferred_init_with_gui(self, mock_idle):
+        db.open_conn(make_url(uri), verify=False)
+        db.create(False)
+        pluginmgr.plugins[A.__name__] = A()
+        with (
+            mock.patch("bauble.gui"),
+            mock.patch.object(A, "deferred_init") as mock_deferred,
+        ):
+            pluginmgr.init(force=True)
+            mock_deferred.assert_not_called()
+            mock_idle.assert_called_with(pluginmgr._run_next_deferred)
+            self.assertTrue(pluginmgr.deferred_pending())
+            self.assertFalse(pluginmgr._run_next_deferred())
+        mock_deferred.assert_called_once()
+
     @mock.patch("bauble.pluginmgr.utils.message_dialog")
     @mock.patch("bauble.pluginmgr._get_registered_unregistered")
     def test_init_unregistered(self, mock_unreg, mock_dialog):
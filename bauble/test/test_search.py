@@ -214,6 +214,43 @@ class SearchParserTests(BaubleClassTestCase):
                 parseAll=True,
             )
 
+    def test_parse_string_cached(self):
+        s = "plant where accession.species.genus.epithet = Maxillaria"
+        parser._parse_string.cache_clear()
+        with patch.object(
+            parser.statement,
+            "parse_string",
+            wraps=parser.statement.parse_string,
+        ) as mock_parse:
+            results = parser.parse_string(s)
+            self.assertIs(parser.parse_string(s), results)
+            mock_parse.assert_called_once_with(s)
+            # domains changing invalidates the cache
+            parser.update_domains()
+            self.assertIsNot(parser.parse_string(s), results)
+            self.assertEqual(mock_parse.call_count, 2)
+        self.assertEqual(str(parser.parse_string(s).query), str(results.query))
+
+    def test_parse_string_cache_info(self):
+        s = (
+            "accession where count(plants.location[code in RBW, URBW].id) "
+            "= 1 and quantity_recvd = (sum(plant.quantity) correlate)"
+        )
+        parser._parse_string.cache_clear()
+        results = parser.parse_string(s)
+        for _i in range(5):
+            self.assertIs(parser.parse_string(s), results)
+        info = parser._parse_string.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (5, 1, 1))
+        # bumping the domains version invalidates the cached results
+        version = parser._domains_version
+        parser.update_domains()
+        self.assertEqual(parser._domains_version, version + 1)
+        self.assertEqual(parser._parse_string.cache_info().currsize, 0)
+        self.assertIsNot(parser.parse_string(s), results)
+        info = parser._parse_string.cache_info()
+        self.assertEqual((info.hits, info.misses), (0, 1))
+
 
 class SearchTests(BaubleClassTestCase):
 
@@ -3008,6 +3045,36 @@ class BaubleSearchSearchTest(BaubleTestCase):
         result = search.search(string, self.session)
         self.assertEqual(result, [])
 
+    def test_search_max_results(self):
+        for i in range(5):
+            self.session.add(Family(epithet=f"Testaceae{i}"))
+        self.session.commit()
+        result = search.search("family=*", self.session, max_results=5)
+        self.assertEqual(len(result), 5)
+
+        with self.assertRaises(search.TooManyResults) as ctx:
+            search.search("family=*", self.session, max_results=4)
+        self.assertEqual(ctx.exception.objects, [])
+        self.assertEqual(len(ctx.exception.queries), 1)
+        self.assertCountEqual(
+            [i for i, in ctx.exception.queries[0]],
+            [i for i, in self.session.query(Family.id)],
+        )
+
+    @patch("bauble.search.strategies.current_user")
+    def test_search_max_results_raw_sql(self, mock_cur_usr):
+        mock_cur_usr.is_admin = True
+        prefs.prefs[prefs.enable_raw_sql_search_pref] = True
+        for i in range(5):
+            self.session.add(Family(epithet=f"Testaceae{i}"))
+        self.session.commit()
+        with self.assertRaises(search.TooManyResults) as ctx:
+            search.search(
+                "SQL: family 'SELECT * FROM family'", self.session, 4
+            )
+        self.assertEqual(ctx.exception.queries, [])
+        self.assertEqual(len(ctx.exception.objects), 5)
+
 
 class HelperTests(unittest.TestCase):
     def test_infix_notation(self):
@@ -0,0 +1,91 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.search.profile_viewer
+"""
+from bauble import prefs
+from bauble.search import profiler
+from bauble.search.profile_viewer import SearchProfileDialog
+from bauble.search.profiler import SEARCH_PROFILE_PREF
+from bauble.search.profiler import QueryProfile
+from bauble.search.profiler import SearchProfile
+from bauble.test import BaubleTestCase
+
+
+class SearchProfileDialogTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        profiler.clear_profiles()
+        profiler.profiles.extend(
+            [
+                SearchProfile(
+                    "fam=Rosa",
+                    queries=[QueryProfile("DomainSearch", "SELECT 1", 0.1, 2)],
+                ),
+                SearchProfile(
+                    "rosa",
+                    queries=[
+                        QueryProfile("ValueListSearch", "SELECT 2", 0.2, 3),
+                        QueryProfile("ValueListSearch", "SELECT 3", 1, 0, "X"),
+                    ],
+                ),
+            ]
+        )
+
+    def tearDown(self):
+        profiler.clear_profiles()
+        super().tearDown()
+
+    def test_lists_most_recent_first(self):
+        dialog = SearchProfileDialog()
+        rows = [tuple(i)[1:5] for i in dialog.profile_liststore]
+        self.assertEqual(
+            rows,
+            [
+                ("rosa", "ValueListSearch", "200.0", 3),
+                ("rosa", "ValueListSearch", "1000.0", 0),
+                ("fam=Rosa", "DomainSearch", "100.0", 2),
+            ],
+        )
+        dialog.destroy()
+
+    def test_selection_shows_sql_and_plan(self):
+        dialog = SearchProfileDialog()
+        buffer = dialog.detail_textbuffer
+        dialog.profile_treeview.get_selection().select_path("1")
+        text = buffer.get_text(*buffer.get_bounds(), False)
+        self.assertIn("SELECT 3", text)
+        self.assertTrue(text.endswith("X"))
+        dialog.profile_treeview.get_selection().select_path("2")
+        text = buffer.get_text(*buffer.get_bounds(), False)
+        self.assertIn("SELECT 1", text)
+        self.assertTrue(text.endswith("not available"))
+        dialog.destroy()
+
+    def test_clear(self):
+        dialog = SearchProfileDialog()
+        dialog.on_clear_button_clicked(None)
+        self.assertEqual(len(dialog.profile_liststore), 0)
+        self.assertEqual(profiler.get_profiles(), [])
+        dialog.destroy()
+
+    def test_record_all_toggled(self):
+        dialog = SearchProfileDialog()
+        self.assertFalse(dialog.record_all_check.get_active())
+        dialog.record_all_check.set_active(True)
+        self.assertTrue(prefs.prefs[SEARCH_PROFILE_PREF])
+        dialog.destroy()
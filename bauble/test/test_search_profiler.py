@@ -0,0 +1,114 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.search.profiler
+"""
+from unittest import mock
+
+from bauble import prefs
+from bauble.plugins.plants import Family
+from bauble.search import profiler
+from bauble.search.profiler import SEARCH_PROFILE_PREF
+from bauble.search.profiler import SEARCH_SLOW_THRESHOLD_PREF
+from bauble.search.profiler import SearchProfiler
+from bauble.search.profiler import compile_sql
+from bauble.search.profiler import explain
+from bauble.search.profiler import get_profiles
+from bauble.search.search import search
+from bauble.test import BaubleTestCase
+
+
+class SearchProfilerTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        profiler.clear_profiles()
+        self.session.add_all(
+            [Family(epithet="Orchidaceae"), Family(epithet="Rosaceae")]
+        )
+        self.session.commit()
+
+    def tearDown(self):
+        profiler.clear_profiles()
+        super().tearDown()
+
+    def test_not_recorded_by_default(self):
+        prof = SearchProfiler("test", self.session)
+        result = prof.run("TestStrategy", self.session.query(Family))
+        self.assertEqual(len(result), 2)
+        self.assertEqual(get_profiles(), [])
+
+    def test_record_all(self):
+        prefs.prefs[SEARCH_PROFILE_PREF] = True
+        query = self.session.query(Family).filter(Family.epithet == "Rosaceae")
+        prof = SearchProfiler("test", self.session)
+        prof.run("TestStrategy", query)
+        prof.run("OtherStrategy", [1, 2, 3])
+        profiles = get_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0].text, "test")
+        first, second = profiles[0].queries
+        self.assertEqual(first.strategy, "TestStrategy")
+        self.assertEqual(first.rows, 1)
+        self.assertIn("'Rosaceae'", first.sql)
+        self.assertTrue(first.plan)
+        self.assertEqual(second.rows, 3)
+        self.assertEqual(second.sql, "")
+        self.assertEqual(
+            profiles[0].duration, first.duration + second.duration
+        )
+
+    def test_slow_queries_recorded_and_logged(self):
+        prefs.prefs[SEARCH_SLOW_THRESHOLD_PREF] = 0.0
+        prof = SearchProfiler("test", self.session)
+        with self.assertLogs(profiler.logger, level="WARNING") as logs:
+            prof.run("TestStrategy", self.session.query(Family))
+        self.assertIn("slow search", logs.output[0])
+        self.assertEqual(len(get_profiles()), 1)
+
+    def test_ring_buffer_bounded(self):
+        prefs.prefs[SEARCH_PROFILE_PREF] = True
+        for i in range(profiler.SEARCH_PROFILE_SIZE + 5):
+            SearchProfiler(f"test{i}", self.session).run("Test", [])
+        profiles = get_profiles()
+        self.assertEqual(len(profiles), profiler.SEARCH_PROFILE_SIZE)
+        self.assertEqual(profiles[-1].text, "test54")
+
+    def test_compile_sql_and_explain(self):
+        query = self.session.query(Family).filter(Family.epithet == "Rosa")
+        sql = compile_sql(query, self.session)
+        self.assertIn("'Rosa'", sql)
+        if self.session.get_bind().dialect.name in ("sqlite", "postgresql"):
+            self.assertTrue(explain(sql, self.session))
+        self.assertEqual(explain("NOT SQL", self.session), "")
+
+        mock_query = mock.Mock()
+        mock_query.statement.compile.side_effect = ValueError
+        self.assertIsNone(compile_sql(mock_query, self.session))
+
+    def test_search_records_each_strategy(self):
+        prefs.prefs[SEARCH_PROFILE_PREF] = True
+        search("family where epithet = Rosaceae", self.session)
+        search("orchidaceae", self.session, max_results=10)
+        profiles = get_profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(
+            [i.strategy for i in profiles[0].queries], ["MapperSearch"]
+        )
+        self.assertEqual(profiles[0].queries[0].rows, 1)
+        self.assertIn(
+            "ValueListSearch", [i.strategy for i in profiles[1].queries]
+        )
@@ -0,0 +1,104 @@
+# pylint: disable=protected-access
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.search.runner
+"""
+import threading
+from unittest import mock
+
+from pyparsing import ParseException
+from sqlalchemy import inspect
+from sqlalchemy import text
+
+from bauble.plugins.plants import Family
+from bauble.search import runner
+from bauble.search.runner import SearchThread
+from bauble.search.search import TooManyResults
+from bauble.test import BaubleTestCase
+
+ENDLESS = (
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+    "SELECT count(*) FROM c"
+)
+
+
+class SearchThreadTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.families = [Family(epithet=f"Testaceae{i}") for i in range(3)]
+        self.session.add_all(self.families)
+        self.session.commit()
+
+    def test_results(self):
+        thread = SearchThread("family=*")
+        thread.start()
+        batches = list(thread.results())
+        thread.join()
+        self.assertEqual(len(batches), 1)
+        self.assertCountEqual(
+            batches[0], [inspect(i).key for i in self.families]
+        )
+
+    def test_results_streams_each_strategy(self):
+        def iter_search(_text, session, _max_results):
+            yield session.query(Family).filter_by(epithet="Testaceae0")
+            yield session.query(Family).filter_by(epithet="Testaceae1")
+
+        idle = mock.Mock()
+        with mock.patch("bauble.search.runner.iter_search", iter_search):
+            thread = SearchThread("test")
+            thread.start()
+            batches = list(thread.results(idle))
+        self.assertEqual(
+            batches,
+            [[inspect(self.families[0]).key], [inspect(self.families[1]).key]],
+        )
+
+    def test_errors_reraised(self):
+        thread = SearchThread("family where (")
+        thread.start()
+        with self.assertRaises(ParseException):
+            list(thread.results())
+
+        thread = SearchThread("family=*", max_results=2)
+        thread.start()
+        with self.assertRaises(TooManyResults) as ctx:
+            list(thread.results())
+        self.assertEqual(len(ctx.exception.queries), 1)
+
+    def test_cancel_interrupts_running_query(self):
+        started = threading.Event()
+
+        def iter_search(_text, session, _max_results):
+            started.set()
+            session.execute(text(ENDLESS)).scalar()
+            yield []
+
+        with mock.patch("bauble.search.runner.iter_search", iter_search):
+            thread = SearchThread("test")
+            thread.start()
+            started.wait(5)
+            for _ in range(50):
+                thread.cancel()
+                thread.join(0.1)
+                if not thread.is_alive():
+                    break
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(thread.cancelled)
+        # the interrupted query's error is not reported
+        self.assertIs(thread._queue.get_nowait(), runner._DONE)
@@ -0,0 +1,230 @@
+# pylint: disable=protected-access
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.search.text_index
+"""
+from unittest import mock
+from unittest import skipUnless
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from bauble import db
+from bauble import prefs
+from bauble.plugins.plants import Family
+from bauble.plugins.plants import Genus
+from bauble.search import strategies
+from bauble.search.text_index import SEARCH_TEXT_INDEX_PREF
+from bauble.search.text_index import TextIndex
+from bauble.search.text_index import _fts_query
+from bauble.search.text_index import create_indexes
+from bauble.search.text_index import text_index
+from bauble.sql_stats import track_statements
+from bauble.test import BaubleTestCase
+from bauble.test import uri
+
+
+@skipUnless(uri.startswith("sqlite"), "SQLite only")
+class SQLiteTextIndexTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        prefs.prefs[SEARCH_TEXT_INDEX_PREF] = True
+        self.index = TextIndex()
+        fam = Family(epithet="Orchidaceae")
+        self.session.add_all(
+            [
+                fam,
+                Family(epithet="Rosaceae", qualifier="s. lat."),
+                Family(epithet="Myrtaceae"),
+                Genus(family=fam, epithet="Dendrobium", author='"quoted"'),
+            ]
+        )
+        self.session.commit()
+
+    def search(self, cls, columns, values):
+        clause = self.index.contains_any(cls, columns, values)
+        return sorted(
+            i.epithet for i in self.session.query(cls).filter(clause)
+        )
+
+    def test_fts_query(self):
+        self.assertEqual(
+            _fts_query(["epithet", "author"], ["abc", 'a"b']),
+            '{"epithet" "author"} : ("abc" OR "a""b")',
+        )
+
+    def test_contains_any_never_creates(self):
+        with track_statements() as stats:
+            clause = self.index.contains_any(Family, ["epithet"], ["ACEA"])
+        self.assertNotIn("MATCH", str(clause))
+        self.assertFalse(
+            any(
+                i.startswith(("CREATE", "DROP", "INSERT"))
+                for i in stats.fingerprints
+            )
+        )
+        self.assertFalse(self.index.is_current(Family))
+
+    def test_contains_any_uses_index(self):
+        self.index.create_all({Family: ["epithet"], Genus: ["epithet"]})
+        clause = self.index.contains_any(Family, ["epithet"], ["ACEA"])
+        self.assertIn("family_fts MATCH", str(clause))
+        self.assertEqual(
+            self.search(Family, ["epithet"], ["ACEA"]),
+            ["Myrtaceae", "Orchidaceae", "Rosaceae"],
+        )
+        self.assertEqual(
+            self.search(Family, ["epithet", "qualifier"], ["orch", "lat."]),
+            ["Orchidaceae", "Rosaceae"],
+        )
+        self.assertEqual(
+            self.search(Genus, ["epithet", "author"], ['"quo']),
+            ["Dendrobium"],
+        )
+
+    def test_catalog_checked_once(self):
+        self.index.contains_any(Family, ["epithet"], ["acea"])
+        with track_statements() as stats:
+            self.index.contains_any(Family, ["epithet"], ["acea"])
+        self.assertEqual(stats.count, 0)
+        # a new connection is checked again
+        with mock.patch.object(self.index, "_engine", None):
+            with track_statements() as stats:
+                self.index.contains_any(Family, ["epithet"], ["acea"])
+        self.assertEqual(stats.count, 1)
+
+    def test_contains_any_falls_back_to_ilike(self):
+        self.index.create_all({Family: ["epithet"]})
+        for values in (["ae"], ["ace%"], ["ros_"]):
+            clause = self.index.contains_any(Family, ["epithet"], values)
+            self.assertNotIn("MATCH", str(clause))
+        self.assertEqual(
+            self.search(Family, ["epithet"], ["ae"]),
+            ["Myrtaceae", "Orchidaceae", "Rosaceae"],
+        )
+        # not a text column
+        clause = self.index.contains_any(Family, ["id"], ["123"])
+        self.assertNotIn("MATCH", str(clause))
+
+        prefs.prefs[SEARCH_TEXT_INDEX_PREF] = False
+        clause = self.index.contains_any(Family, ["epithet"], ["acea"])
+        self.assertNotIn("MATCH", str(clause))
+
+    def test_index_kept_in_sync(self):
+        self.assertTrue(self.index.create(Family, ["epithet"]))
+        fam = self.session.query(Family).filter_by(epithet="Myrtaceae").one()
+        fam.epithet = "Zingiberaceae"
+        self.session.add(Family(epithet="Myrtaceae"))
+        self.session.commit()
+        self.session.execute(
+            text("INSERT INTO family (epithet) VALUES ('Coreinsertaceae')")
+        )
+        self.session.commit()
+        self.assertEqual(
+            self.search(Family, ["epithet"], ["myrt", "zing", "core"]),
+            ["Coreinsertaceae", "Myrtaceae", "Zingiberaceae"],
+        )
+        self.session.delete(fam)
+        self.session.commit()
+        self.assertEqual(self.search(Family, ["epithet"], ["zing"]), [])
+
+    def test_index_not_used_or_rebuilt_when_triggers_missing(self):
+        self.assertTrue(self.index.create(Family, ["epithet"]))
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER family_fts_ai"))
+            conn.execute(
+                text("INSERT INTO family (epithet) VALUES ('Missingaceae')")
+            )
+        index = TextIndex()
+        self.assertFalse(index.is_current(Family))
+        self.assertEqual(
+            sorted(
+                i.epithet
+                for i in self.session.query(Family).filter(
+                    index.contains_any(Family, ["epithet"], ["missing"])
+                )
+            ),
+            ["Missingaceae"],
+        )
+        self.assertTrue(index.create(Family, ["epithet"]))
+        self.assertTrue(index.is_current(Family))
+        self.assertTrue(TextIndex().is_current(Family))
+
+    def test_restored_table_not_searched_with_stale_index(self):
+        self.assertTrue(self.index.create(Family, ["epithet"]))
+        self.assertTrue(self.index.is_current(Family))
+        with mock.patch("bauble.search.text_index.text_index", self.index):
+            db.create(import_defaults=False)
+        with db.engine.connect() as conn:
+            self.assertIsNone(
+                conn.execute(
+                    text("SELECT name FROM sqlite_master WHERE name = :name"),
+                    {"name": "family_fts"},
+                ).scalar()
+            )
+        self.session.add(Family(epithet="Restoredaceae"))
+        self.session.commit()
+        self.assertFalse(self.index.is_current(Family))
+        self.assertEqual(
+            self.search(Family, ["epithet"], ["restored"]), ["Restoredaceae"]
+        )
+        # and once recreated the index is used again
+        self.assertTrue(self.index.create(Family, ["epithet"]))
+        clause = self.index.contains_any(Family, ["epithet"], ["restored"])
+        self.assertIn("family_fts MATCH", str(clause))
+        self.assertEqual(
+            self.search(Family, ["epithet"], ["restored"]), ["Restoredaceae"]
+        )
+
+    def test_unavailable_falls_back(self):
+        with mock.patch.object(
+            self.index,
+            "_create_sqlite",
+            side_effect=DBAPIError("", {}, Exception()),
+        ):
+            with self.assertLogs(level="INFO"):
+                self.assertFalse(self.index.create(Family, ["epithet"]))
+        self.assertFalse(self.index.is_current(Family))
+        self.assertEqual(
+            self.search(Family, ["epithet"], ["rosa"]), ["Rosaceae"]
+        )
+
+    def test_value_list_search_same_results(self):
+        vl_search = strategies.get_strategy("ValueListSearch")
+        text_index.create_all(vl_search.properties)
+        results = []
+        for i in vl_search.search("orchid rosa", self.session):
+            results.extend(i)
+        prefs.prefs[SEARCH_TEXT_INDEX_PREF] = False
+        plain = []
+        for i in vl_search.search("orchid rosa", self.session):
+            plain.extend(i)
+        self.assertCountEqual(results, plain)
+        self.assertCountEqual(
+            [i.epithet for i in results], ["Orchidaceae", "Rosaceae"]
+        )
+
+    @mock.patch("bauble.search.text_index.text_index.create_all")
+    def test_create_indexes_opt_in(self, mock_create_all):
+        prefs.prefs[SEARCH_TEXT_INDEX_PREF] = False
+        create_indexes()
+        mock_create_all.assert_not_called()
+        prefs.prefs[SEARCH_TEXT_INDEX_PREF] = True
+        create_indexes()
+        vl_search = strategies.get_strategy("ValueListSearch")
+        mock_create_all.assert_called_once_with(vl_search.properties)
@@ -0,0 +1,96 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.sql_stats
+"""
+import threading
+from unittest import TestCase
+
+from sqlalchemy.orm import selectinload
+
+from bauble import db
+from bauble import sql_stats
+from bauble.plugins.plants import Family
+from bauble.plugins.plants import Genus
+from bauble.sql_stats import fingerprint
+from bauble.sql_stats import track_statements
+from bauble.test import BaubleTestCase
+
+
+class FingerprintTests(TestCase):
+    def test_fingerprint_removes_values(self):
+        self.assertEqual(
+            fingerprint(
+                "SELECT *\n  FROM genus WHERE family_id = 1 AND epithet = "
+                "'it''s' AND id IN (?, ?, ?) AND x = :x_1 OR y = %(y_1)s"
+            ),
+            "SELECT * FROM genus WHERE family_id = ? AND epithet = ? AND "
+            "id IN (?) AND x = ? OR y = ?",
+        )
+
+    def test_fingerprint_keeps_names(self):
+        self.assertEqual(
+            fingerprint("SELECT table1.col2 FROM table1 LIMIT 10"),
+            "SELECT table1.col2 FROM table1 LIMIT ?",
+        )
+
+
+class TrackStatementsTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(10):
+            fam = Family(epithet=f"Testaceae{i}")
+            self.session.add_all([fam, Genus(family=fam, epithet=f"Gen{i}")])
+        self.session.commit()
+        self.session.expunge_all()
+
+    def test_lazy_loads_flagged(self):
+        with self.assertLogs(sql_stats.logger, level="DEBUG") as logs:
+            with track_statements("lazy") as stats:
+                for fam in self.session.query(Family):
+                    self.assertTrue(fam.genera[0].epithet)
+        self.assertGreaterEqual(stats.count, 11)
+        repeated = stats.repeated()
+        self.assertEqual(list(repeated.values()), [10])
+        self.assertIn("FROM genus", list(repeated)[0])
+        self.assertTrue(any("possible N+1" in i for i in logs.output))
+
+    def test_eager_load_within_budget(self):
+        with track_statements("eager") as stats:
+            for fam in self.session.query(Family).options(
+                selectinload(Family.genera)
+            ):
+                self.assertTrue(fam.genera[0].epithet)
+        self.assertLessEqual(stats.count, 2)
+        self.assertEqual(stats.repeated(), {})
+
+    def test_only_counts_current_thread(self):
+        def other():
+            with db.Session() as session:
+                session.query(Family).all()
+
+        with track_statements() as stats:
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join()
+        self.assertEqual(stats.count, 0)
+
+    def test_stops_counting_on_exit(self):
+        with track_statements() as stats:
+            self.session.query(Family).all()
+        self.session.query(Family).all()
+        self.assertEqual(stats.count, 1)
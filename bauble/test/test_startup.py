@@ -0,0 +1,84 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.startup
+"""
+import sys
+from unittest import TestCase
+from unittest import mock
+
+from bauble import startup
+from bauble.startup import lazy_import
+from bauble.startup import timed
+
+
+class TimedTests(TestCase):
+    def tearDown(self):
+        # pylint: disable=protected-access
+        startup._recording = False
+        startup.timings.clear()
+
+    def test_not_recorded_unless_started(self):
+        with timed("test"):
+            pass
+        self.assertEqual(startup.timings, [])
+
+    def test_nested_timings_and_report(self):
+        startup.start()
+        with timed("outer"):
+            with timed("inner"):
+                pass
+        with timed("second"):
+            pass
+        self.assertEqual(
+            [(i.name, i.depth) for i in startup.timings],
+            [("outer", 0), ("inner", 1), ("second", 0)],
+        )
+        self.assertGreaterEqual(
+            startup.timings[0].duration, startup.timings[1].duration
+        )
+        with self.assertLogs(startup.logger, level="INFO") as logs:
+            startup.finish()
+        lines = logs.output[0].splitlines()
+        self.assertTrue(lines[2].endswith("    inner"))
+        self.assertTrue(lines[-1].endswith("total"))
+        with timed("after"):
+            pass
+        self.assertEqual(len(startup.timings), 3)
+
+    def test_records_on_exception(self):
+        startup.start()
+        with self.assertRaises(ValueError):
+            with timed("fails"):
+                raise ValueError
+        with timed("next"):
+            pass
+        self.assertEqual(startup.timings[1].depth, 0)
+
+
+class LazyImportTests(TestCase):
+    def test_imports_on_first_use(self):
+        with mock.patch.dict(sys.modules):
+            sys.modules.pop("colorsys", None)
+            on_import = mock.Mock()
+            colorsys = lazy_import("colorsys", on_import=on_import)
+            self.assertNotIn("colorsys", sys.modules)
+            self.assertEqual(colorsys.rgb_to_hsv(0, 0, 0), (0, 0, 0))
+            self.assertIn("colorsys", sys.modules)
+            on_import.assert_called_once_with(sys.modules["colorsys"])
+            colorsys.hsv_to_rgb(0, 0, 0)
+            on_import.assert_called_once()
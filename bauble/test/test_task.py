@@ -0,0 +1,177 @@
+# Copyright (c) 2026 Ross Demuth <rossdemuth123@gmail.com>
+#
+# This file is part of ghini.desktop.
+#
+# ghini.desktop is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ghini.desktop is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ghini.desktop. If not, see <http://www.gnu.org/licenses/>.
+"""
+test for bauble.task
+"""
+import threading
+from unittest import mock
+
+from gi.repository import GLib
+
+from bauble import task
+from bauble.plugins.plants import Family
+from bauble.task import Executor
+from bauble.task import TaskMonitor
+from bauble.task import TaskState
+from bauble.test import BaubleTestCase
+from bauble.test import wait_for_tasks
+
+
+class ExecutorTests(BaubleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.executor = Executor()
+
+    def test_runs_in_own_session(self):
+        self.session.add(Family(epithet="Testaceae"))
+        self.session.commit()
+
+        def count_families(session, _task, epithet):
+            self.assertIsNot(session, self.session)
+            self.assertIsNot(
+                threading.current_thread(), threading.main_thread()
+            )
+            return session.query(Family).filter_by(epithet=epithet).count()
+
+        on_done = mock.Mock()
+        bg_task = self.executor.submit(
+            count_families, "Testaceae", on_done=on_done
+        )
+        self.assertIn(bg_task, self.executor.tasks)
+        wait_for_tasks(self.executor)
+        on_done.assert_called_once_with(1)
+        self.assertEqual(bg_task.state, TaskState.DONE)
+        self.assertEqual(self.executor.tasks, [])
+
+    def test_priority_order(self):
+        executor = Executor(max_workers=1)
+        gate = threading.Event()
+        order = []
+        executor.submit(lambda _s, _t: gate.wait(5))
+        for i, priority in enumerate(
+            (task.PRIORITY_LOW, task.PRIORITY_DEFAULT, task.PRIORITY_HIGH)
+        ):
+            executor.submit(
+                lambda _s, _t, i: order.append(i), i, priority=priority
+            )
+        gate.set()
+        wait_for_tasks(executor)
+        self.assertEqual(order, [2, 1, 0])
+
+    def test_progress_on_main_loop(self):
+        progress = []
+
+        def on_progress(bg_task):
+            self.assertIs(threading.current_thread(), threading.main_thread())
+            progress.append((bg_task.fraction, bg_task.message))
+
+        def work(_session, bg_task):
+            bg_task.progress(0.5, "half")
+            bg_task.progress()
+
+        self.executor.submit(work, on_progress=on_progress)
+        wait_for_tasks(self.executor)
+        self.assertEqual(progress, [(0.5, "half"), (None, "half")])
+
+    def test_error(self):
+        def work(_session, _task):
+            raise ValueError("test")
+
+        on_done = mock.Mock()
+        on_error = mock.Mock()
+        bg_task = self.executor.submit(
+            work, on_done=on_done, on_error=on_error
+        )
+        wait_for_tasks(self.executor)
+        on_done.assert_not_called()
+        self.assertIsInstance(on_error.call_args.args[0], ValueError)
+        self.assertEqual(bg_task.state, TaskState.FAILED)
+
+        with self.assertLogs(task.logger, level="WARNING"):
+            self.executor.submit(work)
+            wait_for_tasks(self.executor)
+
+    def test_cancel(self):
+        executor = Executor(max_workers=1)
+        started = threading.Event()
+        gate = threading.Event()
+        ran = mock.Mock()
+
+        def work(_session, bg_task):
+            started.set()
+            gate.wait(5)
+            bg_task.progress()
+            ran()
+
+        on_done = mock.Mock()
+        running = executor.submit(work, on_done=on_done)
+        pending = executor.submit(work, on_done=on_done)
+        started.wait(5)
+        executor.cancel_all()
+        gate.set()
+        wait_for_tasks(executor)
+        ran.assert_not_called()
+        on_done.assert_not_called()
+        self.assertEqual(running.state, TaskState.CANCELLED)
+        self.assertEqual(pending.state, TaskState.CANCELLED)
+
+    def test_running_and_kill(self):
+        gate = threading.Event()
+        with mock.patch("bauble.task.executor", self.executor):
+            self.assertFalse(task.running())
+            bg_task = task.submit(lambda _s, t: gate.wait(5) and t.progress())
+            self.assertTrue(task.running())
+            task.kill()
+            self.assertTrue(bg_task.cancelled)
+            gate.set()
+            wait_for_tasks(self.executor)
+            self.assertFalse(task.running())
+        # reset the generator task kill flag
+        with self.assertRaises(StopIteration):
+            task._idle()  # pylint: disable=protected-access
+        self.assertEqual(bg_task.state, TaskState.CANCELLED)
+
+
+class TaskMonitorTests(BaubleTestCase):
+    def test_rows(self):
+        executor = Executor()
+        monitor = TaskMonitor(executor)
+        self.assertFalse(monitor.get_visible())
+        gate = threading.Event()
+
+        def work(_session, bg_task):
+            bg_task.progress(0.25, "quarter")
+            gate.wait(5)
+
+        bg_task = executor.submit(work, name="test task")
+        self.assertTrue(monitor.get_visible())
+        self.assertEqual(len(monitor.rows), 1)
+        self.assertEqual(monitor.label.get_text(), "tasks: 1")
+        context = GLib.MainContext.default()
+        while bg_task.fraction is None:
+            context.iteration(False)
+        # pylint: disable=protected-access
+        self.assertEqual(monitor._bars[bg_task].get_fraction(), 0.25)
+        self.assertEqual(monitor._bars[bg_task].get_text(), "quarter")
+        bg_task.cancel()
+        self.assertEqual(monitor._bars[bg_task].get_text(), "cancelling")
+        gate.set()
+        wait_for_tasks(executor)
+        self.assertFalse(monitor.get_visible())
+        self.assertEqual(monitor.rows, {})
+        monitor.destroy()
+        self.assertFalse(executor.listeners)
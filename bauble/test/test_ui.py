@@ -717,10 +717,13 @@ class GUITests(BaubleTestCase):
 
         gui.destroy()
 
+    @mock.patch("bauble.ui.maintenance.schedule")
     @mock.patch("bauble.ui.start_connection_manager")
     @mock.patch("bauble.ui.db.open_conn")
     @mock.patch("bauble.ui.bauble.command_handler")
-    def test_on_file_menu_open(self, mock_handler, mock_open, mock_start):
+    def test_on_file_menu_open(
+        self, mock_handler, mock_open, mock_start, mock_schedule
+    ):
         gui = GUI()
         # back out
         mock_start.return_value = (None, None)
@@ -740,6 +743,7 @@ class GUITests(BaubleTestCase):
         self.assertTrue(stbar_style.has_class("not-default"))
         mock_handler.assert_called()
         mock_open.assert_called()
+        mock_schedule.assert_called()
         # connection changed back to default
         mock_start.return_value = ("test2", "test_conn2")
         gui.on_file_menu_open(None, None)
@@ -965,6 +969,15 @@ class GUITests(BaubleTestCase):
 
         gui.destroy()
 
+    @mock.patch("bauble.ui.SearchProfileDialog")
+    def test_on_search_profile_activated(self, mock_dialog):
+        gui = GUI()
+        gui.on_search_profile_activated(None, None)
+        mock_dialog.assert_called_once_with(transient_for=gui.window)
+        mock_dialog().run.assert_called_once()
+        mock_dialog().destroy.assert_called_once()
+        gui.destroy()
+
     @mock.patch("bauble.ui.db.current_user")
     @mock.patch("bauble.ui.SQLSearchDialog.run")
     def test_on_raw_sql_search_activated(
@@ -873,6 +873,21 @@ class TimedCacheTest(TestCase):
 
         self.assertEqual(mock_func.call_count, 11)
 
+    def test_invalidate(self):
+        mock_func = mock.Mock()
+        mock_func.return_value = "result"
+        decorated = utils.timed_cache(size=100, secs=10)(mock_func)
+        decorated("test1")
+        decorated("test2")
+        self.assertEqual(mock_func.call_count, 2)
+
+        decorated.invalidate("test1")
+        decorated("test1")
+        decorated("test2")
+        self.assertEqual(mock_func.call_count, 3)
+        # not cached does not error
+        decorated.invalidate("test3")
+
 
 class ImageLoaderTests(BaubleTestCase):
     def setUp(self):
@@ -1027,6 +1042,55 @@ class ImageLoaderTests(BaubleTestCase):
 
 
 class UIUtilsTests(BaubleTestCase):
+    def test_run_in_main_thread(self):
+        import threading
+
+        main = threading.main_thread()
+        self.assertEqual(
+            utils.run_in_main_thread(threading.current_thread), main
+        )
+        results = []
+
+        def worker():
+            results.append(utils.run_in_main_thread(threading.current_thread))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        while thread.is_alive():
+            update_gui()
+        self.assertEqual(results, [main])
+
+    def test_run_in_main_thread_cancelled(self):
+        import threading
+
+        results = []
+
+        def worker():
+            results.append(
+                utils.run_in_main_thread(mock.Mock(), default="default")
+            )
+
+        thread = threading.Thread(target=worker)
+        thread.cancelled = True
+        thread.start()
+        thread.join()
+        self.assertEqual(results, ["default"])
+
+    @mock.patch("bauble.utils.create_yes_no_dialog")
+    def test_yes_no_dialog_from_worker_thread(self, mock_create):
+        import threading
+
+        mock_create.return_value.run.return_value = Gtk.ResponseType.YES
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(utils.yes_no_dialog("msg"))
+        )
+        thread.start()
+        while thread.is_alive():
+            update_gui()
+        self.assertEqual(results, [True])
+        mock_create.assert_called_with("msg", None)
+
     def test_get_widget_value_label(self):
         label = Gtk.Label(label="Foo")
         self.assertEqual(utils.get_widget_value(label), "Foo")
@@ -22,11 +22,13 @@ from bauble import db
 from bauble.test import BaubleTestCase
 from bauble.utils.geo import KMLMapCallbackFunctor
 from bauble.utils.geo import ProjDB
+from bauble.utils.geo import get_transformer
 from bauble.utils.geo import is_point_within_poly
 from bauble.utils.geo import kml_string_to_geojson
 from bauble.utils.geo import polylabel
 from bauble.utils.geo import prj_crs
 from bauble.utils.geo import transform
+from bauble.utils.geo import transform_many
 from bauble.utils.geo import web_mercator_point_coords_to_geojson
 
 # test data - avoiding tuples as they end up lists in the database anyway
@@ -417,6 +419,25 @@ class GlobalFunctionsTests(BaubleTestCase):
         data = epsg3857_point
         self.assertRaises(MetaTableError, transform, data)
 
+    def test_transform_reuses_transformer(self):
+        get_transformer.cache_clear()
+        for data in (epsg3857_point, epsg3857_line):
+            transform(data, "epsg:3857", "epsg:4326", always_xy=True)
+        info = get_transformer.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 1))
+
+    def test_transform_many(self):
+        data = [epsg3857_point, epsg3857_line, None]
+        out = transform_many(data, "epsg:3857", "epsg:4326", always_xy=True)
+        self.assertEqual(
+            out,
+            [
+                transform(i, "epsg:3857", "epsg:4326", always_xy=True)
+                for i in data
+            ],
+        )
+        self.assertIsNone(out[2])
+
     def test_transform(self):
         def coord_diff(a, b):
             return [abs(i[0] - i[1]) for i in zip(a, b)]
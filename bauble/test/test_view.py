@@ -35,6 +35,7 @@ from unittest import mock
 
 from gi.repository import Gdk
 from gi.repository import Gio
+from gi.repository import GLib
 from gi.repository import Gtk
 from sqlalchemy import Column
 from sqlalchemy import ForeignKey
@@ -54,9 +55,11 @@ from bauble import pluginmgr
 from bauble import prefs
 from bauble import search
 from bauble import utils
+from bauble.lazy_results import LazyResultsModel
 from bauble.plugins.plants.family import Family
 from bauble.plugins.plants.family import FamilyNote
 from bauble.plugins.plants.genus import Genus
+from bauble.plugins.plants.species import on_taxa_clicked
 from bauble.search.strategies import MapperSearch
 from bauble.test import BaubleTestCase
 from bauble.test import get_setUp_data_funcs
@@ -70,8 +73,10 @@ from bauble.view import INFOBOXPAGE_WIDTH_PREF
 from bauble.view import PIC_PANE_PAGE_PREF
 from bauble.view import PIC_PANE_WIDTH_PREF
 from bauble.view import SEARCH_CACHE_SIZE_PREF
+from bauble.view import SEARCH_LAZY_THRESHOLD_PREF
 from bauble.view import SEARCH_POLL_SECS_PREF
 from bauble.view import SEARCH_REFRESH_PREF
+from bauble.view import SEARCH_UPDATE_MAX_CHANGES_PREF
 from bauble.view import BaubleLinkButton
 from bauble.view import DefaultCommandHandler
 from bauble.view import DefaultView
@@ -90,6 +95,7 @@ from bauble.view import SearchView
 from bauble.view import SimpleSearchBox
 from bauble.view import View
 from bauble.view import _Node
+from bauble.view import get_history_changes
 from bauble.view import get_search_view
 from bauble.view import get_search_view_selected
 from bauble.view import select_in_search_results
@@ -428,9 +434,9 @@ class TestSearchView(BaubleTestCase):
             )
         mock_treeview.get_model().remove.assert_not_called()
 
-    @mock.patch("bauble.view.utils.search_tree_model")
+    @mock.patch("bauble.view.SearchView.find_rows")
     def test_on_test_expand_row_invalid_request_returns_true_and_removes(
-        self, mock_search_tm
+        self, mock_find_rows
     ):
         # doesn't propagate
         for func in get_setUp_data_funcs():
@@ -439,7 +445,7 @@ class TestSearchView(BaubleTestCase):
         search_view.search("plant where id = 1")
         model = search_view.results_view.get_model()
         treeiter = model.get_iter_first()
-        mock_search_tm.return_value = [treeiter]
+        mock_find_rows.return_value = [treeiter]
         mock_treeview = mock.Mock()
         mock_treeview.get_model.return_value = model
 
@@ -453,7 +459,7 @@ class TestSearchView(BaubleTestCase):
                     Gtk.TreePath.new_first(),
                 )
             )
-            mock_search_tm.assert_called()
+            mock_find_rows.assert_called()
 
     def test_remove_children(self):
         for func in get_setUp_data_funcs():
@@ -479,6 +485,71 @@ class TestSearchView(BaubleTestCase):
         # parent still exists
         self.assertEqual(start, end)
 
+    def test_find_rows(self):
+        for func in get_setUp_data_funcs():
+            func()
+        search_view = self.search_view
+        search_view.search("genus where id <= 3")
+        model = search_view.results_view.get_model()
+        for row in model:
+            self.assertEqual(
+                [model.get_path(i) for i in search_view.find_rows(row[0])],
+                [row.path],
+            )
+        # children
+        search_view.on_test_expand_row(
+            search_view.results_view,
+            model.get_iter_first(),
+            Gtk.TreePath.new_first(),
+        )
+        kid = model[Gtk.TreePath.new_from_string("0:0")][0]
+        self.assertEqual(
+            [str(model.get_path(i)) for i in search_view.find_rows(kid)],
+            ["0:0"],
+        )
+        # removed
+        search_view.remove_children(model, model.get_iter_first())
+        self.assertEqual(search_view.find_rows(kid), [])
+        self.assertNotIn(inspect(kid).key, search_view._row_index)
+        # not in results
+        self.assertEqual(search_view.find_rows(Family(epithet="Test")), [])
+        self.assertEqual(search_view.find_rows("-"), [])
+
+    def test_find_rows_indexes_new_model(self):
+        for func in get_setUp_data_funcs():
+            func()
+        search_view = self.search_view
+        search_view.search("genus where id <= 3")
+        genus = self.session.query(Genus).get(1)
+        model = Gtk.TreeStore(object)
+        model.append(None, ["-"])
+        itr = model.append(None, [genus])
+        search_view.results_view.set_model(model)
+        self.assertEqual(
+            [model.get_path(i) for i in search_view.find_rows(genus)],
+            [model.get_path(itr)],
+        )
+        # appended rows
+        itr = model.append(itr, [genus])
+        search_view.index_row(model, itr)
+        self.assertEqual(len(search_view.find_rows(genus)), 2)
+
+    def test_find_rows_does_not_traverse_model(self):
+        for i in range(300):
+            self.session.add(Family(epithet=f"Testaceae{i}"))
+        self.session.commit()
+        search_view = self.search_view
+        search_view.search("family where epithet like Testaceae%")
+        model = search_view.results_view.get_model()
+        with mock.patch(
+            "bauble.view.utils.search_tree_model"
+        ) as mock_search_tree_model:
+            for i in (0, 150, 299):
+                obj = model[i][0]
+                [found] = search_view.find_rows(obj)
+                self.assertIs(model[found][0], obj)
+            mock_search_tree_model.assert_not_called()
+
     @mock.patch("bauble.view.task")
     def test_populate_results_large_result_uses_task(self, mock_task):
         search_view = self.search_view
@@ -702,20 +773,147 @@ class TestSearchView(BaubleTestCase):
                 search_view.infobox, search_view.row_meta[klass].infobox
             )
 
-    @mock.patch("bauble.view.search.search")
-    @mock.patch("bauble.view.utils.yes_no_dialog")
-    def test_search_large_result_allows_user_to_bail(
-        self, mock_dialog, mock_search
-    ):
-        mock_dialog.return_value = False
-        mock_search.return_value = range(35000)
+    def test_search_large_result_populates_lazy(self):
+        for i in range(30):
+            self.session.add(Family(epithet=f"Testaceae{i}"))
+        self.session.commit()
         search_view = get_search_view()
-        search_view.search("everything")
-        mock_dialog.assert_called_with(
-            "This query returned 35000 results.  It may take a "
-            "while to display all the data. Are you sure you "
-            "want to continue?"
+        prefs.prefs[SEARCH_LAZY_THRESHOLD_PREF] = 10
+        mock_sb = mock.Mock()
+        with mock.patch("bauble.gui") as mock_gui:
+            mock_gui.widgets.statusbar = mock_sb
+            search_view.search("family where epithet like Testaceae%")
+        model = search_view.results_view.get_model()
+        self.assertIsInstance(model, LazyResultsModel)
+        self.assertEqual(len(model), 30)
+        self.assertEqual(
+            [i[0].epithet for i in model][:3],
+            ["Testaceae0", "Testaceae1", "Testaceae2"],
         )
+        mock_sb.push.assert_called_with(
+            mock_sb.get_context_id(), "size of result: 30 (Family: 30)"
+        )
+        # finds, selects and refreshes
+        fam = model[15][0]
+        self.assertEqual(
+            [model.get_path(i) for i in search_view.find_rows(fam)],
+            [Gtk.TreePath.new_from_indices([15])],
+        )
+        with mock.patch("bauble.gui") as mock_gui:
+            mock_gui.get_view.return_value = search_view
+            select_in_search_results(fam)
+            self.assertEqual(search_view.get_selected_values(), [fam])
+            # not in the results, ignored
+            self.assertIsNone(select_in_search_results(Family(epithet="Test")))
+            self.assertEqual(search_view.get_selected_values(), [fam])
+            # callers that can not find their object do not error
+            from bauble.plugins.plants.species import Species
+
+            genus = Genus(family_id=fam.id, epithet="Testus")
+            species = Species(genus=genus, epithet="testi")
+            self.session.add(species)
+            self.session.commit()
+            on_taxa_clicked(None, None, species)
+            self.assertEqual(search_view.get_selected_values(), [fam])
+            self.assertIsNone(
+                select_in_search_results(species, expand_current_first=True)
+            )
+        # expanding and appending children are no-ops
+        treeiter = model.get_iter_first()
+        path = model.get_path(treeiter)
+        self.assertTrue(
+            search_view.on_test_expand_row(
+                search_view.results_view, treeiter, path
+            )
+        )
+        search_view.append_children(model, treeiter, [Genus()])
+        self.assertEqual(len(model), 30)
+        fam.epithet = "Testaceae15a"
+        search_view.session.commit()
+        search_view.update()
+        self.assertEqual(model[15][0].epithet, "Testaceae15a")
+        # rows can not be expanded
+        self.assertFalse(model.iter_has_child(model.get_iter_first()))
+
+    def test_search_appends_results_progressively(self):
+        fams = [Family(epithet=f"Testaceae{i}") for i in range(3)]
+        self.session.add_all(fams)
+        self.session.commit()
+        search_view = get_search_view()
+
+        def iter_search(_text, session, _max_results):
+            yield session.query(Family).filter(Family.epithet < "Testaceae2")
+            # duplicates ignored
+            yield session.query(Family)
+
+        callback = mock.Mock()
+        with (
+            mock.patch("bauble.search.runner.iter_search", iter_search),
+            mock.patch.object(
+                search_view, "append_results", wraps=search_view.append_results
+            ) as mock_append,
+            mock.patch.object(search_view, "populate_callbacks", [callback]),
+        ):
+            search_view.search("test")
+        mock_append.assert_called_once()
+        self.assertEqual(len(mock_append.call_args.args[0]), 1)
+        model = search_view.results_view.get_model()
+        self.assertEqual(
+            [i[0].epithet for i in model],
+            ["Testaceae0", "Testaceae1", "Testaceae2"],
+        )
+        # indexed once, when first needed, not as each row is appended
+        with mock.patch.object(
+            search_view,
+            "_build_row_index",
+            wraps=search_view._build_row_index,
+        ) as mock_build:
+            self.assertEqual(len(search_view.find_rows(model[2][0])), 1)
+            self.assertEqual(len(search_view.find_rows(model[0][0])), 1)
+        mock_build.assert_called_once_with(model)
+        self.assertEqual(len(callback.call_args.args[0]), 3)
+
+    def test_search_cancel(self):
+        fam = Family(epithet="Testaceae")
+        self.session.add_all([fam, Genus(family=fam, epithet="Testus")])
+        self.session.commit()
+        search_view = get_search_view()
+        started = threading.Event()
+        release = threading.Event()
+
+        def iter_search(_text, session, _max_results):
+            yield session.query(Family)
+            started.set()
+            release.wait(5)
+            yield session.query(Genus)
+
+        def cancel():
+            # wait for the first batch to display
+            if not (started.is_set() and search_view.results_view.get_model()):
+                return True
+            search_view.cancel_search()
+            release.set()
+            return False
+
+        GLib.timeout_add(10, cancel)
+        with mock.patch("bauble.search.runner.iter_search", iter_search):
+            search_view.search("test")
+        self.assertTrue(search_view._search_thread.cancelled)
+        wait_on_threads()
+        model = search_view.results_view.get_model()
+        self.assertEqual([i[0].epithet for i in model], ["Testaceae"])
+
+    def test_search_key_press_escape_cancels(self):
+        search_view = get_search_view()
+        event = Gdk.Event.new(Gdk.EventType.KEY_PRESS)
+        event.keyval = Gdk.KEY_Escape
+        with mock.patch.object(search_view, "cancel_search") as mock_cancel:
+            self.assertTrue(search_view.on_search_key_press(None, event))
+            mock_cancel.assert_called()
+            mock_cancel.reset_mock()
+            event.keyval = Gdk.KEY_a
+            self.assertFalse(search_view.on_search_key_press(None, event))
+            mock_cancel.assert_not_called()
 
     def test_update_statusbar_non_homogeneous_result(self):
         search_view = get_search_view()
@@ -1040,15 +1238,19 @@ class TestSearchView(BaubleTestCase):
         )
 
     @mock.patch("bauble.gui")
-    def test_update_expires_all_and_triggers_selection_change(self, mock_gui):
+    def test_update_all_expires_all_and_triggers_selection_change(
+        self, mock_gui
+    ):
         mock_gui.window.get_size().width = 100
         for func in get_setUp_data_funcs():
             func()
         search_view = self.search_view
         search_view.search("accession where id < 3")
         with self.assertLogs(level="DEBUG") as logs:
-            search_view.update()
-        self.assertTrue(any("SearchView::update" in i for i in logs.output))
+            search_view.update_all()
+        self.assertTrue(
+            any("SearchView::update_all" in i for i in logs.output)
+        )
         self.assertTrue(
             any("SearchView::on_selection_changed" in i for i in logs.output)
         )
@@ -1171,6 +1373,156 @@ class TestSearchView(BaubleTestCase):
 
         self.assertIsNone(model)
 
+    @mock.patch("bauble.gui")
+    def test_update_only_expires_changed(self, mock_gui):
+        mock_gui.window.get_size().width = 100
+        for func in get_setUp_data_funcs():
+            func()
+        search_view = self.search_view
+        search_view.search("accession where id < 5")
+        model = search_view.results_view.get_model()
+        accs = [row[0] for row in model]
+        for acc in accs:
+            acc.code  # pylint: disable=pointless-statement
+        # edit one in another session
+        with db.Session() as session:
+            edited = session.get(type(accs[1]), accs[1].id)
+            edited.code = "EDITED"
+            session.commit()
+
+        with self.assertLogs(level="DEBUG") as logs:
+            with mock.patch.object(search_view, "update_all") as mock_all:
+                search_view.update()
+                mock_all.assert_not_called()
+
+        self.assertTrue(
+            any("SearchView::update_changed" in i for i in logs.output)
+        )
+        self.assertTrue(
+            any("SearchView::on_selection_changed" in i for i in logs.output)
+        )
+        for acc in accs:
+            expired = bool(inspect(acc).expired_attributes)
+            self.assertEqual(expired, acc is accs[1], str(acc))
+        self.assertEqual(accs[1].code, "EDITED")
+
+    @mock.patch("bauble.gui")
+    def test_update_refreshes_parent_keeps_expanded(self, mock_gui):
+        mock_gui.window.get_size().width = 100
+        for func in get_setUp_data_funcs():
+            func()
+        search_view = self.search_view
+        # does not rely on cell_data_func refreshing children
+        search_view.refresh = False
+        search_view.search("species where accessions not Empty")
+        model = search_view.results_view.get_model()
+        for p in ["0", "1"]:
+            path = Gtk.TreePath.new_from_string(p)
+            search_view.on_test_expand_row(
+                search_view.results_view, model.get_iter(path), path
+            )
+            search_view.results_view.expand_to_path(path)
+        species = model[Gtk.TreePath.new_first()][0]
+        start = model.iter_n_children(model.get_iter_first())
+        # also expand an accession with plants
+        acc_row = next(
+            row
+            for row in model[Gtk.TreePath.new_first()].iterchildren()
+            if row[0].plants
+        )
+        first_acc = acc_row[0]
+        search_view.on_test_expand_row(
+            search_view.results_view, acc_row.iter, acc_row.path
+        )
+        search_view.results_view.expand_to_path(acc_row.path)
+        acc_cls = type(first_acc)
+        # as if another user had added an accession
+        with db.Session() as session:
+            session.add(acc_cls(code="NEWACC", species_id=species.id))
+            session.commit()
+
+        with mock.patch.object(search_view, "update_all") as mock_all:
+            search_view.update()
+            mock_all.assert_not_called()
+
+        # parent's children refreshed, still expanded
+        self.assertEqual(
+            model.iter_n_children(model.get_iter_first()), start + 1
+        )
+        self.assertIn(
+            "NEWACC",
+            [
+                row[0].code
+                for row in model[Gtk.TreePath.new_first()].iterchildren()
+            ],
+        )
+        [first_acc_row] = search_view.find_rows(first_acc)
+        self.assertCountEqual(
+            [str(i) for i in search_view.get_expanded_rows()],
+            ["0", "1", str(model.get_path(first_acc_row))],
+        )
+
+    @mock.patch("bauble.gui")
+    def test_update_falls_back_to_update_all(self, mock_gui):
+        mock_gui.window.get_size().width = 100
+        for func in get_setUp_data_funcs():
+            func()
+        search_view = self.search_view
+        search_view.search("accession where id < 5")
+        model = search_view.results_view.get_model()
+        acc = model[Gtk.TreePath.new_first()][0]
+
+        def edit(code):
+            with db.Session() as session:
+                session.get(type(acc), acc.id).code = code
+                session.commit()
+
+        # too many changes
+        prefs.prefs[SEARCH_UPDATE_MAX_CHANGES_PREF] = 1
+        edit("A")
+        edit("B")
+        with mock.patch.object(search_view, "update_all") as mock_all:
+            search_view.update()
+            mock_all.assert_called()
+        # after a revert
+        prefs.prefs[SEARCH_UPDATE_MAX_CHANGES_PREF] = 500
+        search_view.update_all()
+        start = (
+            search_view.session.query(db.History)
+            .order_by(db.History.id.desc())
+            .first()
+        )
+        edit("C")
+        db.History.revert_to(start.id)
+        with mock.patch.object(search_view, "update_all") as mock_all:
+            search_view.update()
+            mock_all.assert_called()
+
+    def test_get_history_changes(self):
+        for setup_func in get_setUp_data_funcs():
+            setup_func()
+        with db.Session() as session:
+            last = session.query(db.History.id).order_by(
+                db.History.id.desc()
+            )
+            start = last.limit(1).scalar()
+            acc = session.query(db.get_model_by_name("accession")).first()
+            plant_cls = db.get_model_by_name("plant")
+            loc_cls = db.get_model_by_name("location")
+            loc = session.query(loc_cls).first()
+            plant = plant_cls(
+                accession=acc, location=loc, code="99", quantity=1
+            )
+            session.add(plant)
+            session.commit()
+            last_id, changed = get_history_changes(session, start, 10)
+            self.assertEqual(last_id, last.limit(1).scalar())
+            self.assertIn(inspect(plant).key, changed)
+            self.assertIn(inspect(acc).key, changed)
+            self.assertIn(inspect(loc).key, changed)
+            # limit exceeded
+            self.assertIsNone(get_history_changes(session, 0, 1))
+
     @mock.patch("bauble.gui")
     def test_rerun_last_search_basic(self, mock_gui):
         mock_gui.window.get_size().width = 100
@@ -3325,6 +3677,13 @@ class SimpleSearchBoxTest(BaubleTestCase):
     def setUp(self):
         super().setUp()
         self.simplesearch = SimpleSearchBox()
+        self.simplesearch.dispatcher.delay = 0
+
+    def wait_on_completions(self):
+        while self.simplesearch.dispatcher._timer_id:
+            update_gui()
+        wait_on_threads()
+        update_gui()
 
     def test_on_domain_combo_changed(self):
         mapper_search = search.strategies.get_strategy("MapperSearch")
@@ -3367,7 +3726,7 @@ class SimpleSearchBoxTest(BaubleTestCase):
         mock_entry.get_completion.return_value = completion
 
         self.simplesearch.on_entry_changed(mock_entry)
-        update_gui()
+        self.wait_on_completions()
 
         self.assertTrue(utils.tree_model_has(completion.get_model(), sp.sp))
 
@@ -3393,13 +3752,40 @@ class SimpleSearchBoxTest(BaubleTestCase):
         ) as mock_getter:
             mock_getter.return_value = ["foo"]
             self.simplesearch.on_entry_changed(mock_entry)
-            update_gui()
+            self.wait_on_completions()
             mock_getter.assert_called_once()
 
         mock_completion.set_model.assert_called()
         liststore = mock_completion.set_model.call_args[0][0]
         self.assertTrue(utils.tree_model_has(liststore, "foo"))
 
+    def test_get_completions_uses_prefix_index(self):
+        for func in get_setUp_data_funcs():
+            func()
+        mapper_search = search.strategies.get_strategy("MapperSearch")
+        # pylint: disable=invalid-name
+        Species = mapper_search.domains["species"][0]
+        self.session.add(Species(genus_id=1, sp="grandiosa"))
+        self.session.add(Species(genus_id=1, sp="Grandis"))
+        self.session.commit()
+        self.simplesearch.domain = Species
+        self.simplesearch.columns = ["sp"]
+        expected = sorted(
+            {
+                i[0]
+                for i in self.session.query(Species.sp).filter(
+                    Species.sp.ilike("gr%")
+                )
+            },
+            key=str.lower,
+        )[:10]
+        self.assertIn("Grandis", expected)
+        self.assertEqual(self.simplesearch.get_completions("gr"), expected)
+        # only the index is used
+        with mock.patch("bauble.view.utils.ilike") as mock_ilike:
+            self.simplesearch.get_completions("gra")
+            mock_ilike.assert_not_called()
+
     def test_update(self):
         self.assertFalse(list(self.simplesearch.domain_combo.get_model()))
         # bails early if no mappersearch
@@ -49,12 +49,14 @@ from pyparsing import rest_of_line
 
 import bauble
 from bauble import db
+from bauble import maintenance
 from bauble import paths
 from bauble import pluginmgr
 from bauble import prefs
 from bauble import utils
 from bauble.i18n import _
 from bauble.prefs import datetime_format_pref
+from bauble.search.profile_viewer import SearchProfileDialog
 from bauble.search.query_builder import QueryBuilder
 from bauble.search.sql_search import SQLSearchDialog
 from bauble.search.stored_queries import StoredQueriesDialog
@@ -65,6 +67,7 @@ from bauble.view import PrefsView
 from bauble.view import SearchView
 from bauble.view import get_search_view
 
+from .connmgr import ConnectionModel
 from .connmgr import start_connection_manager
 
 
@@ -248,6 +251,7 @@ class GUI:
         label = msg_area.get_children()[0]
         label.set_selectable(True)
         msg_area.pack_end(self.progressbar, False, True, 15)
+        msg_area.pack_end(bauble.task.TaskMonitor(), False, True, 0)
         self.build_search_menu()
 
         combo.grab_focus()
@@ -280,6 +284,12 @@ class GUI:
                 Gio.MenuItem.new(_("SQL Search"), f"win.{action_name}")
             )
 
+        action_name = "search_profile"
+        self.add_action(action_name, self.on_search_profile_activated)
+        search_menu.append_item(
+            Gio.MenuItem.new(_("Search profile"), f"win.{action_name}")
+        )
+
         options_section = Gio.Menu()
 
         # exlude inactive
@@ -393,6 +403,15 @@ class GUI:
 
         dialog.destroy()
 
+    def on_search_profile_activated(
+        self,
+        _action: Gio.SimpleAction,
+        _param: GLib.Variant | None,
+    ) -> None:
+        dialog = SearchProfileDialog(transient_for=self.window)
+        dialog.run()
+        dialog.destroy()
+
     def on_return_syns_toggled(
         self,
         action: Gio.SimpleAction,
@@ -1120,7 +1139,10 @@ class GUI:
         engine = None
         try:
             if uri:
-                engine = db.open_conn(uri, True, True)
+                model = ConnectionModel(name)
+                engine = db.open_conn(
+                    uri, True, True, pool=model.pool, pragmas=model.pragmas
+                )
         except Exception as e:  # pylint: disable=broad-except
             msg = _("Could not open connection.\n\n%s") % e
             utils.message_details_dialog(
@@ -1153,6 +1175,7 @@ class GUI:
         self.insert_menu.remove_all()
         self.statusbar_clear()
         pluginmgr.init()
+        maintenance.schedule()
         bauble.command_handler("home", None)
 
     def statusbar_clear(self) -> None:
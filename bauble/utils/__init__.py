@@ -853,16 +853,53 @@ def create_yes_no_dialog(msg, parent=None):
     return dialog
 
 
+def run_in_main_thread(func: Callable, *args, default: Any = None) -> Any:
+    """Call func in the main thread, via the main loop, and wait for its
+    return value.
+
+    Intended for worker threads that need to interact with the UI (e.g. a
+    dialog).  The main loop must be running, or events being processed, for
+    func to be called.  If the calling thread has a ``cancelled`` attribute
+    that becomes True while waiting ``default`` is returned instead.
+    """
+    if threading.current_thread() is threading.main_thread():
+        return func(*args)
+
+    done = threading.Event()
+    result = [default]
+
+    def call() -> bool:
+        try:
+            result[0] = func(*args)
+        finally:
+            done.set()
+        return GLib.SOURCE_REMOVE
+
+    GLib.idle_add(call)
+    thread = threading.current_thread()
+    while not done.wait(0.1):
+        if getattr(thread, "cancelled", False):
+            return default
+    return result[0]
+
+
 def yes_no_dialog(msg, parent=None, yes_delay=-1):
     """Create and run a yes/no dialog.
 
     Return True if the dialog response equals Gtk.ResponseType.YES
 
+    Can be called from a worker thread, the dialog is always run in the main
+    thread.
+
     :param msg: the message to display in the dialog
     :param parent: the dialog's parent
     :param yes_delay: the number of seconds before the yes button should
       become sensitive
     """
+    if threading.current_thread() is not threading.main_thread():
+        return run_in_main_thread(
+            yes_no_dialog, msg, parent, yes_delay, default=False
+        )
     dialog = create_yes_no_dialog(msg, parent)
     if yes_delay > 0:
         dialog.set_response_sensitive(Gtk.ResponseType.YES, False)
@@ -1886,6 +1923,8 @@ def timed_cache(size=200, secs=2.0):
     Cached funtion's arguments must be hashable.
 
     To clear the cache at anytime call clear_cache e.g. `func.clear_cache()`
+    or to remove a single entry call invalidate with the same arguments e.g.
+    `func.invalidate(arg)`
 
     To set the size of the cache either supply the `size` paramater or at
     anytime use set_size e.g. `func.set_size(500)`. For an unlimited cache size
@@ -1920,6 +1959,9 @@ def timed_cache(size=200, secs=2.0):
         def clear_cache():
             cache.clear()
 
+        def invalidate(*args):
+            cache.pop(args, None)
+
         def set_secs(val):
             nonlocal secs
             secs = val
@@ -1929,6 +1971,7 @@ def timed_cache(size=200, secs=2.0):
             size = val
 
         wrapper.clear_cache = clear_cache
+        wrapper.invalidate = invalidate
         wrapper.set_secs = set_secs
         wrapper.set_size = set_size
         return wrapper
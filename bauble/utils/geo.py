@@ -20,9 +20,11 @@ Common helpers useful for spatial data.
 import logging
 import os
 from collections.abc import Sequence
+from functools import cache
 from math import inf
 from math import sqrt
 from queue import PriorityQueue
+from types import ModuleType
 from typing import Any
 from typing import Literal
 from typing import Self
@@ -34,9 +36,6 @@ logger = logging.getLogger(__name__)
 import tempfile
 
 from mako.template import Template  # type: ignore [import-untyped]
-from pyproj import Geod
-from pyproj import ProjError
-from pyproj import Transformer
 from sqlalchemy import Column
 from sqlalchemy import String
 from sqlalchemy import Table
@@ -51,11 +50,16 @@ from bauble.i18n import _
 from bauble.meta import confirm_default
 from bauble.paths import main_dir
 from bauble.paths import main_is_frozen
+from bauble.startup import lazy_import
 
-if main_is_frozen():
-    import pyproj
 
-    pyproj.datadir.set_data_dir(os.path.join(main_dir(), "share", "proj"))
+def _set_proj_data_dir(module: ModuleType) -> None:
+    if main_is_frozen():
+        module.datadir.set_data_dir(os.path.join(main_dir(), "share", "proj"))
+
+
+# NOTE pyproj is slow to import and only needed when working with geojson
+pyproj = lazy_import("pyproj", on_import=_set_proj_data_dir)
 
 PointT = list[float]
 PolygonT = list[PointT]
@@ -86,8 +90,37 @@ CRS_MSG = _(
     "tool and providing a shapefile in the desired CRS."
 )
 
-# set WGS84 as CRS
-geod = Geod(ellps="WGS84")
+
+@cache
+def get_geod():
+    """WGS84 ellipsoid used for area calculations."""
+    return pyproj.Geod(ellps="WGS84")
+
+
+def get_system_crs() -> str:
+    """The system projection, saved to BaubleMeta.
+
+    The first time this is called ensure we have a system CRS string, let the
+    user have the opportunity to select a different preference if they desire.
+
+    :raises MetaTableError: if no system CRS is set
+    """
+    sys_crs = confirm_default("system_proj_string", DEFAULT_SYS_PROJ, CRS_MSG)
+    if not sys_crs:
+        from bauble.error import MetaTableError
+
+        raise MetaTableError(msg="Cannot proceed without a system CRS.")
+    return sys_crs.value
+
+
+@cache
+def get_transformer(in_crs: str, out_crs: str, always_xy: bool) -> Any:
+    """Cached pyproj.Transformer, creating one is slow.
+
+    NOTE: transformers are not thread safe, only use from the main thread (or
+    a worker process).
+    """
+    return pyproj.Transformer.from_crs(in_crs, out_crs, always_xy=always_xy)
 
 
 # pylint: disable=too-many-locals
@@ -111,19 +144,7 @@ def transform(geometry, in_crs=DEFAULT_IN_PROJ, out_crs=None, always_xy=False):
     """
 
     if out_crs is None:
-        # system projection - saved to BaubleMeta
-        # The first time any transformation is attempted ensure we have a
-        # system CRS string, let the user have the opportunity to select a
-        # different preference if they desire
-        sys_crs = confirm_default(
-            "system_proj_string", DEFAULT_SYS_PROJ, CRS_MSG
-        )
-        if sys_crs:
-            out_crs = sys_crs.value
-        else:
-            from bauble.error import MetaTableError
-
-            raise MetaTableError(msg="Cannot proceed without a system CRS.")
+        out_crs = get_system_crs()
     try:
         geometry_type = geometry.get("type")
         geometry_out = geometry.copy()
@@ -131,7 +152,7 @@ def transform(geometry, in_crs=DEFAULT_IN_PROJ, out_crs=None, always_xy=False):
         logger.debug("transform recieved unusable data: %s - %s", geometry, e)
         return None
     coords = []
-    transformer = Transformer.from_crs(in_crs, out_crs, always_xy=always_xy)
+    transformer = get_transformer(in_crs, out_crs, always_xy)
     logger.debug("transform %s >> %s", in_crs, out_crs)
     try:
         if geometry_type == "Polygon":
@@ -151,7 +172,7 @@ def transform(geometry, in_crs=DEFAULT_IN_PROJ, out_crs=None, always_xy=False):
             # avoid anything that doesn't parse
             logger.debug("transform: unsupported geometry: %s", geometry)
             return None
-    except ProjError as e:
+    except pyproj.ProjError as e:
         logger.debug(
             "transform failed for geometry: %s with error: %s", geometry, e
         )
@@ -159,6 +180,17 @@ def transform(geometry, in_crs=DEFAULT_IN_PROJ, out_crs=None, always_xy=False):
     return geometry_out
 
 
+def transform_many(
+    geometries: Sequence[dict], in_crs: str, out_crs: str, always_xy: bool
+) -> list[dict | None]:
+    """Transform a batch of geometries, see `transform`.
+
+    Does not access the database so it can be used in worker processes (e.g.
+    with `bauble.plugins.imex.map_in_processes`).
+    """
+    return [transform(i, in_crs, out_crs, always_xy) for i in geometries]
+
+
 prj_crs = Table(
     "prj_crs",
     db.metadata,
@@ -595,7 +627,7 @@ def polylabel(polygon: MultiPolyT, precision: float = 1.0) -> PointT:
 
 def _area_of_polygon(coords: list[tuple[float, float]]) -> float:
     lons, lats = zip(*coords)
-    area, __ = geod.polygon_area_perimeter(lons, lats)
+    area, __ = get_geod().polygon_area_perimeter(lons, lats)
     return area
 
 
@@ -71,12 +71,17 @@ from pyparsing import one_of
 from pyparsing import printables
 from pyparsing import quoted_string
 from pyparsing import remove_quotes
+from sqlalchemy import Table
 from sqlalchemy import and_
+from sqlalchemy import func
 from sqlalchemy import inspect
+from sqlalchemy import select
 from sqlalchemy.orm import Query
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import object_session
 from sqlalchemy.orm.exc import ObjectDeletedError
+from sqlalchemy.orm.interfaces import MANYTOONE
+from sqlalchemy.orm.util import identity_key
 from sqlalchemy.sql import ColumnElement
 
 import bauble
@@ -87,10 +92,15 @@ from bauble import prefs
 from bauble import search
 from bauble import task
 from bauble import utils
+from bauble.completion import CompletionDispatcher
+from bauble.completion import get_prefix_index
 from bauble.error import BaubleError
 from bauble.error import check
 from bauble.i18n import _
+from bauble.lazy_results import LazyResultsModel
+from bauble.lazy_results import get_result_keys
 from bauble.meta import BaubleMeta
+from bauble.search.runner import SearchThread
 from bauble.utils.web import BaubleLinkButton
 from bauble.utils.web import LinkDict
 from bauble.utils.web import link_button_factory
@@ -118,6 +128,18 @@ SEARCH_REFRESH_PREF = "bauble.search.refresh"
 regularly
 """
 
+SEARCH_UPDATE_MAX_CHANGES_PREF = "bauble.search.update_max_changes"
+"""Preference key, the maximum number of history entries the search view will
+apply individually when updating before it falls back to refreshing
+everything.
+"""
+
+SEARCH_LAZY_THRESHOLD_PREF = "bauble.search.lazy_threshold"
+"""Preference key, the number of search results above which results are
+displayed in a flat list, loaded only as they are scrolled to, rather than a
+tree.
+"""
+
 EXPAND_ON_ACTIVATE_PREF = "bauble.search.expand_on_activate"
 """Preference key, should search view expand the item on double click"""
 
@@ -835,6 +857,7 @@ class ViewMeta(UserDict):
             self.context_menu: Sequence[Action] = []
             self.sorter: Callable = utils.natsort_key
             self.activated_callback: Callable | None = None
+            self.order_by: Callable[[Query], Query] | None = None
 
         # pylint: disable-next=too-many-arguments,too-many-positional-arguments
         def set(
@@ -844,6 +867,7 @@ class ViewMeta(UserDict):
             context_menu: Sequence[Action] | None = None,
             sorter: Callable | None = None,
             activated_callback: Callable | None = None,
+            order_by: Callable[[Query], Query] | None = None,
         ) -> None:
             """Set attributes for the selected meta object.
 
@@ -852,6 +876,9 @@ class ViewMeta(UserDict):
             :param infobox: the infobox for this type
             :param context_menu: a dict describing the context menu used
                 when the user right clicks on this type
+            :param order_by: a callable that applies an approximation of
+                sorter to a query of this type's ids, used to sort very large
+                results in the database.  Sorted by id if not supplied.
             """
             self.children = children
             self.infobox = infobox
@@ -863,6 +890,7 @@ class ViewMeta(UserDict):
                 self.sorter = sorter
 
             self.activated_callback = activated_callback
+            self.order_by = order_by
 
         def get_children(self, obj: db.Domain) -> Sequence[db.Domain]:
             """
@@ -883,6 +911,62 @@ class ViewMeta(UserDict):
         return super().__getitem__(item)
 
 
+def get_history_changes(
+    session: Session, since_id: int, limit: int
+) -> tuple[int, set[tuple]] | None:
+    """Get the identity keys of all objects changed since the history entry
+    ``since_id``.
+
+    Includes the identity keys of the parents (many-to-one relationships) of
+    any object changed, these may have gained or lost children.  For updates
+    that change the parent both old and new parents are included.
+
+    :param session: the session to query
+    :param since_id: the last history id already accounted for
+    :param limit: the maximum number of history entries to consider
+
+    :return: a tuple of the latest history id and the set of identity keys or
+        None if there are more than ``limit`` history entries.
+    """
+    history = db.History
+    rows = session.execute(
+        select(
+            history.id, history.table_name, history.table_id, history.values
+        )
+        .where(history.id > since_id)
+        .order_by(history.id)
+        .limit(limit + 1)
+    ).all()
+
+    if len(rows) > limit:
+        return None
+
+    models: dict[str, type[db.Base] | None] = {}
+    last_id = since_id
+    changed = set()
+
+    for id_, table_name, table_id, values in rows:
+        last_id = id_
+        if table_name not in models:
+            models[table_name] = db.get_model_by_name(table_name)
+        model = models[table_name]
+        if model is None:
+            continue
+
+        changed.add(identity_key(model, table_id))
+
+        for rel in inspect(model).relationships:
+            if rel.direction is not MANYTOONE or len(rel.local_columns) != 1:
+                continue
+            value = values.get(next(iter(rel.local_columns)).name)
+            # updates are stored as [new, old]
+            for parent_id in value if isinstance(value, list) else [value]:
+                if parent_id is not None:
+                    changed.add(identity_key(rel.mapper.class_, parent_id))
+
+    return last_id, changed
+
+
 @Gtk.Template(filename=str(Path(paths.lib_dir(), "search_view.ui")))
 class SearchView(View, Gtk.Box):
     # pylint: disable=too-many-public-methods,too-many-instance-attributes
@@ -946,6 +1030,11 @@ class SearchView(View, Gtk.Box):
     Items are a tuple - (widget name, signal name, handler)
     """
 
+    history_reverts = 0
+    """Count of history reverts, history entries are removed when reverting so
+    a complete refresh is required.
+    """
+
     def __init__(self) -> None:
         logger.debug("SearchView::__init__")
 
@@ -1002,6 +1091,16 @@ class SearchView(View, Gtk.Box):
 
         self.last_search: str = ""
         self.no_result = True
+        self._last_history_id: int | None = None
+        self._history_reverts_seen = self.history_reverts
+        self._row_index: dict[tuple, list[Gtk.TreeRowReference]] = {}
+        self._row_index_model: Gtk.TreeModel | None = None
+        self._search_thread: SearchThread | None = None
+
+    @classmethod
+    def history_callback(cls, _table: Table) -> None:
+        """Flag a complete refresh is required after history revert_to."""
+        cls.history_reverts += 1
 
     def connect_signal(
         self, widget_name: str, signal: str, handler: Callable
@@ -1139,7 +1238,8 @@ class SearchView(View, Gtk.Box):
         model, rows = self.selection.get_selected_rows()
         if model is None or rows is None:
             return []
-        return [model[row][0] for row in rows]
+        # LazyResultsModel rows are None when no longer in the database
+        return [obj for row in rows if (obj := model[row][0]) is not None]
 
     def on_selection_changed(self, _tree_selection) -> None:
         """Update the infobox and bottom notebooks. Switch context_menus,
@@ -1338,6 +1438,9 @@ class SearchView(View, Gtk.Box):
         self.get_markup_pair.clear_cache()  # pylint: disable=no-member
 
         self.session = db.Session()
+        self._set_last_history_id()
+        self._row_index = {}
+        self._row_index_model = None
         # clear last result
         for callback in self.populate_callbacks:
             callback([])
@@ -1360,10 +1463,39 @@ class SearchView(View, Gtk.Box):
 
         error_msg = None
         error_details_msg = None
-        results = []
+        results: dict[db.Domain, None] = {}
+        thread = SearchThread(
+            text, prefs.prefs.get(SEARCH_LAZY_THRESHOLD_PREF, 30000)
+        )
+        self._search_thread = thread
+        self.start_thread(thread)
+        key_handler_id = None
+        if bauble.gui:
+            bauble.gui.progressbar.show()
+            key_handler_id = bauble.gui.window.connect(
+                "key-press-event", self.on_search_key_press
+            )
 
         try:
-            results = search.search(text, self.session)
+            for keys in thread.results(self._search_idle):
+                batch = [
+                    i for i in self._load_keys(keys) if i not in results
+                ]
+                if not batch:
+                    continue
+                if results:
+                    self.append_results(batch)
+                else:
+                    self.populate(text, batch)
+                results.update(dict.fromkeys(batch))
+                if len(results) != len(batch):
+                    self.update_statusbar(list(results))
+                    for callback in self.populate_callbacks:
+                        callback(list(results))
+        except search.TooManyResults as too_many:
+            if not thread.cancelled:
+                self.populate_lazy(text, too_many.queries, too_many.objects)
+            return
         except ParseException as err:
             error_msg = _("Error in search string at column %s") % err.column
             error_details_msg = err.explain()
@@ -1371,6 +1503,15 @@ class SearchView(View, Gtk.Box):
             logger.debug(traceback.format_exc())
             error_msg = _("** Error: %s") % utils.xml_safe(e)
             error_details_msg = utils.xml_safe(traceback.format_exc())
+        finally:
+            if bauble.gui:
+                bauble.gui.window.disconnect(key_handler_id)
+                bauble.gui.progressbar.set_fraction(0)
+                bauble.gui.progressbar.hide()
+
+        if thread.cancelled:
+            logger.debug("search cancelled: %s", text)
+            return
 
         if error_msg and bauble.gui:
             self.last_search = ""
@@ -1380,19 +1521,65 @@ class SearchView(View, Gtk.Box):
             self.on_selection_changed(None)
             return
 
-        self.populate(text, results)
+        if not results:
+            self.populate(text, [])
 
-    def populate(self, text: str, results: Sequence[db.Domain]) -> None:
+    @staticmethod
+    def _search_idle() -> None:
+        """Keep the UI responsive while waiting on search results."""
+        if bauble.gui:
+            bauble.gui.progressbar.pulse()
+        while Gtk.events_pending():
+            Gtk.main_iteration_do(False)
 
-        if len(results) > 30000:
-            msg = _(
-                "This query returned %s results.  It may take a "
-                "while to display all the data. Are you sure you "
-                "want to continue?"
-            ) % len(results)
-            if not utils.yes_no_dialog(msg):
-                return
+    def on_search_key_press(self, _widget, event: Gdk.EventKey) -> bool:
+        if event.keyval == Gdk.KEY_Escape:
+            self.cancel_search()
+            return True
+        return False
+
+    def cancel_search(self) -> None:
+        """Cancel the currently running search, if any."""
+        if self._search_thread and self._search_thread.is_alive():
+            self._search_thread.cancel()
+            if bauble.gui:
+                bauble.gui.show_message_box(_("Search cancelled."))
+
+    def _load_keys(self, keys: Sequence[tuple]) -> list[db.Domain]:
+        """Load the objects for these identity keys into the session."""
+        objs = []
+        keys = sorted(keys, key=lambda i: str(i[0]))
+        for cls, group in itertools.groupby(keys, key=lambda i: i[0]):
+            ids = [i[1][0] for i in group]
+            for start in range(0, len(ids), 500):
+                objs.extend(
+                    self.session.query(cls).filter(
+                        cls.id.in_(ids[start : start + 500])
+                    )
+                )
+        return objs
+
+    def append_results(self, results: Sequence[db.Domain]) -> None:
+        """Add further results to already populated search results.
 
+        The rows are not indexed as they are appended (every row reference is
+        updated on each insert), the index is rebuilt by the next
+        ``find_rows`` instead.
+        """
+        model = self.results_view.get_model()
+        if not isinstance(model, Gtk.TreeStore):
+            return
+        self._row_index = {}
+        self._row_index_model = None
+        for obj in reversed(list(self._group_sort_results(results))):
+            treeiter = model.append(None, [obj])
+            if (
+                not self.refresh
+                and self.row_meta[type(obj)].children is not None
+            ):
+                model.append(treeiter, ["-"])
+
+    def populate(self, text: str, results: Sequence[db.Domain]) -> None:
         # no result (not error)
         if len(results) == 0:
             self.show_error(True, text)
@@ -1408,6 +1595,63 @@ class SearchView(View, Gtk.Box):
                 Gtk.TreePath.new_first(), None, True, 0.5, 0.0
             )
 
+    def populate_lazy(
+        self, text: str, queries: list[Query], objects: list[db.Domain]
+    ) -> None:
+        """Display very large search results in a flat LazyResultsModel.
+
+        Only the ids are fetched up front, sorted in the database according to
+        each type's ``row_meta`` ``order_by``.  Rows can not be expanded.
+
+        :param queries: queries that return the ids of the results
+        :param objects: any results not returned by the queries
+        """
+        keys = get_result_keys(
+            self.session,
+            queries,
+            objects,
+            lambda cls: self.row_meta[cls].order_by,
+        )
+        logger.debug("populate_lazy %s results", len(keys))
+
+        if not keys:
+            self.populate(text, [])
+            return
+
+        model = LazyResultsModel(self.session, keys)
+        self._row_index = {}
+        self._row_index_model = None
+        self.show_error(False)
+        # avoid triggering on_selection_changed
+        self.selection.handler_block(self._selection_changed_sigid)
+        self.results_view.set_model(model)
+        self.selection.handler_unblock(
+            handler_id=self._selection_changed_sigid
+        )
+        self.update_lazy_statusbar(model)
+        # pylint: disable=no-value-for-parameter
+        self.results_view.set_cursor(Gtk.TreePath.new_first())
+
+    @staticmethod
+    def update_lazy_statusbar(
+        model: LazyResultsModel, *, statusbar: Gtk.Statusbar | None = None
+    ) -> None:
+        if statusbar is None:
+            if bauble.gui:
+                statusbar = bauble.gui.widgets.statusbar
+            else:
+                return
+
+        sbcontext_id = statusbar.get_context_id("searchview.nresults")
+        statusbar.pop(sbcontext_id)
+        counts = ", ".join(
+            f"{cls.__name__}: {count}"
+            for cls, count in model.type_counts().items()
+        )
+        statusbar.push(
+            sbcontext_id, _("size of result: %s") % f"{len(model)} ({counts})"
+        )
+
     def show_error(self, active: bool, search_text: str = "") -> None:
         self.no_result = active
         if search_text:
@@ -1589,6 +1833,9 @@ class SearchView(View, Gtk.Box):
             # don't expand when too many or no result
             if (
                 self.no_result is False
+                and not isinstance(
+                    self.results_view.get_model(), LazyResultsModel
+                )
                 and len(selected_paths) < 20
                 and len(expanded_rows) < 20
             ):
@@ -1606,23 +1853,103 @@ class SearchView(View, Gtk.Box):
 
     def refresh_statusbar(self) -> None:
         model = self.results_view.get_model()
-        if model:
+        if isinstance(model, LazyResultsModel):
+            self.update_lazy_statusbar(model)
+        elif model:
             objs = [i[0] for i in model]
             self.update_statusbar(objs)
 
     @staticmethod
-    def remove_children(model: Gtk.TreeStore, parent: Gtk.TreeIter) -> None:
+    def _row_key(obj: Any) -> tuple | None:
+        """The identity key used to index rows containing obj."""
+        if isinstance(obj, db.Base):
+            return inspect(obj).key
+        return None
+
+    def index_row(self, model: Gtk.TreeModel, treeiter: Gtk.TreeIter) -> None:
+        """Add the row to the index used by ``find_rows``.
+
+        Rows added to the results outside of ``_populate_worker`` and
+        ``append_children`` should be indexed with this.
+        """
+        if model is not self._row_index_model:
+            return
+        key = self._row_key(model[treeiter][0])
+        if key is None:
+            return
+        ref = Gtk.TreeRowReference.new(model, model.get_path(treeiter))
+        self._row_index.setdefault(key, []).append(ref)
+
+    def _build_row_index(self, model: Gtk.TreeModel) -> None:
+        logger.debug("building row index")
+        self._row_index = {}
+        self._row_index_model = model
+
+        def index(model, _path, treeiter) -> bool:
+            self.index_row(model, treeiter)
+            return False
+
+        model.foreach(index)
+
+    def _get_rows(self, key: tuple | None) -> list[Gtk.TreeIter]:
+        model = self.results_view.get_model()
+        if key is not None and isinstance(model, LazyResultsModel):
+            return model.find(key)
+        if key is None or not isinstance(model, Gtk.TreeStore):
+            return []
+
+        if model is not self._row_index_model:
+            self._build_row_index(model)
+
+        refs = self._row_index.get(key)
+        if not refs:
+            return []
+
+        valid = [ref for ref in refs if ref.valid()]
+        if not valid:
+            del self._row_index[key]
+        elif len(valid) != len(refs):
+            self._row_index[key] = valid
+
+        return [model.get_iter(ref.get_path()) for ref in valid]
+
+    def find_rows(self, obj: db.Domain) -> list[Gtk.TreeIter]:
+        """Get a Gtk.TreeIter to every row in the results containing obj.
+
+        Rows are looked up by the object's class and id in an index rather
+        than by traversing the model.
+        """
+        return self._get_rows(self._row_key(obj))
+
+    def remove_children(
+        self, model: Gtk.TreeStore, parent: Gtk.TreeIter
+    ) -> None:
         """Remove all children of some parent in the model.
 
         Reverse iterate through them so you don't invalidate the iter.
         """
         logger.debug("remove_children called")
+        keys = set()
+
+        def collect(treeiter: Gtk.TreeIter | None) -> None:
+            while treeiter:
+                if key := self._row_key(model[treeiter][0]):
+                    keys.add(key)
+                collect(model.iter_children(treeiter))
+                treeiter = model.iter_next(treeiter)
+
+        if model is self._row_index_model:
+            collect(model.iter_children(parent))
+
         while model.iter_has_child(parent):
             nkids = model.iter_n_children(parent)
             child = model.iter_nth_child(parent, nkids - 1)
             if child:
                 model.remove(child)
 
+        for key in keys:
+            self._get_rows(key)
+
     @Gtk.Template.Callback()
     def on_test_expand_row(
         self,
@@ -1635,7 +1962,10 @@ class SearchView(View, Gtk.Box):
 
         Returns False to allow expansion, True to reject.
         """
-        model = cast(Gtk.TreeStore, treeview.get_model())
+        model = treeview.get_model()
+        if not isinstance(model, Gtk.TreeStore):
+            # e.g. LazyResultsModel, flat so rows have no children
+            return True
         obj = model.get_value(treeiter, 0)
         treeview.collapse_row(path)
         self.remove_children(model, treeiter)
@@ -1646,7 +1976,10 @@ class SearchView(View, Gtk.Box):
             return cls.__name__, row_sorter(obj)
 
         try:
-            kids = self.row_meta[type(obj)].get_children(obj)
+            get_children = self.row_meta[type(obj)].get_children
+            kids = db.retry_on_disconnect(
+                self.session, lambda: get_children(obj)
+            )
 
             if len(kids) == 0:
                 return True
@@ -1655,7 +1988,7 @@ class SearchView(View, Gtk.Box):
             logger.debug("on_test_expand_row: %s:%s", type(e).__name__, e)
 
             # model no longer in database, remove
-            for found in utils.search_tree_model(model, obj):
+            for found in self.find_rows(obj):
                 model.remove(found)
 
             return True
@@ -1706,7 +2039,7 @@ class SearchView(View, Gtk.Box):
         steps_so_far = 0
 
         # iterate over slice of size "steps", yield every 5%
-        added = set()
+        added: dict[db.Domain, None] = {}
         for obj in self._group_sort_results(results):
 
             if steps_so_far % five_percent == 0:
@@ -1718,7 +2051,7 @@ class SearchView(View, Gtk.Box):
             if obj in added:  # only add unique object
                 continue
 
-            added.add(obj)
+            added[obj] = None
 
             parent = model.prepend(None, [obj])
             steps_so_far += 1
@@ -1729,6 +2062,16 @@ class SearchView(View, Gtk.Box):
             ):
                 model.prepend(parent, ["-"])
 
+        # index the rows, done last as references are updated on every insert
+        self._row_index = {}
+        self._row_index_model = model
+        for i, obj in enumerate(reversed(added)):
+            if key := self._row_key(obj):
+                ref = Gtk.TreeRowReference.new(
+                    model, Gtk.TreePath.new_from_indices([i])
+                )
+                self._row_index.setdefault(key, []).append(ref)
+
         # avoid triggering on_selection_changed
         self.selection.handler_block(self._selection_changed_sigid)
         self.results_view.set_model(model)
@@ -1767,9 +2110,13 @@ class SearchView(View, Gtk.Box):
         :param kids: a list of kids to append
         """
         check(parent is not None, "append_children(): need a parent")
+        if not isinstance(model, Gtk.TreeStore):
+            logger.debug("append_children: %s can not have children", model)
+            return
         for kid in kids:
 
             itr = model.append(parent, [kid])
+            self.index_row(model, itr)
             if self.refresh:
                 if (
                     self.row_meta[type(kid)].children is not None
@@ -1785,9 +2132,12 @@ class SearchView(View, Gtk.Box):
         # NOTE used in testing...
         logger.info("remove_row called")
 
-        model = cast(Gtk.TreeStore, self.results_view.get_model())
+        model = self.results_view.get_model()
+
+        if not isinstance(model, Gtk.TreeStore):
+            return
 
-        for found in utils.search_tree_model(model, obj):
+        for found in self.find_rows(obj):
             model.remove(found)
 
     @utils.timed_cache()
@@ -1827,12 +2177,15 @@ class SearchView(View, Gtk.Box):
         treeiter: Gtk.TreeIter,
         _data,
     ) -> None:
-        model = cast(Gtk.TreeStore, model)
-
         obj = model[treeiter][0]
 
+        if obj is None:
+            # LazyResultsModel, no longer in the database
+            cell.set_property("markup", "")
+            return
+
         try:
-            if self.refresh:
+            if self.refresh and isinstance(model, Gtk.TreeStore):
                 row_meta = self.row_meta[type(obj)]
                 if row_meta.children is not None and self.has_kids(obj):
                     path = model.get_path(treeiter)
@@ -1970,6 +2323,9 @@ class SearchView(View, Gtk.Box):
 
         model = self.results_view.get_model()
 
+        if isinstance(model, LazyResultsModel):
+            return
+
         if not isinstance(model, Gtk.TreeStore):
             # used in test
             logger.warning("results_view is not Treestore")
@@ -1981,9 +2337,43 @@ class SearchView(View, Gtk.Box):
             if not state.persistent:
                 model.remove(row.iter)
 
+    def _set_last_history_id(self) -> None:
+        self._last_history_id = (
+            self.session.execute(select(func.max(db.History.id))).scalar()
+            or 0
+        )
+        self._history_reverts_seen = self.history_reverts
+
+    def _get_history_changes(self) -> set[tuple] | None:
+        """Get the identity keys of objects changed since last checked.
+
+        Returns None if a complete refresh is required.
+        """
+        if (
+            self._last_history_id is None
+            or self._history_reverts_seen != self.history_reverts
+        ):
+            return None
+
+        changes = get_history_changes(
+            self.session,
+            self._last_history_id,
+            prefs.prefs.get(SEARCH_UPDATE_MAX_CHANGES_PREF, 500),
+        )
+
+        if changes is None:
+            return None
+
+        self._last_history_id, changed = changes
+        return changed
+
     def update(self, *_args) -> None:
-        """Expire all the children in the model, collapse everything, reexpand
-        the rows to the previous state where possible.
+        """Refresh the view to reflect changes made since the last update.
+
+        Where possible only the objects changed (as recorded in the history
+        table since last update) and their ancestors are expired and redrawn,
+        leaving the rest of the tree as is.  Otherwise everything is refreshed
+        (see ``update_all``)
 
         Infoboxes are updated in on_selection_changed which this should trigger
         """
@@ -1991,9 +2381,124 @@ class SearchView(View, Gtk.Box):
         logger.debug("SearchView::update")
 
         # remove root nodes that have been deleted first. Nodes on the branches
-        # are dealt with later by collapsing and re-expanding.
+        # are dealt with later when redrawn.
         self.remove_non_persistent_results_view_roots()
 
+        changed = self._get_history_changes()
+
+        if changed is None:
+            self.update_all()
+            return
+
+        self.update_changed(changed)
+
+    def update_changed(self, changed: set[tuple]) -> None:
+        """Expire and redraw only the rows containing the changed objects and
+        their ancestors.
+
+        :param changed: identity keys of the changed objects
+        """
+        logger.debug("SearchView::update_changed %s objects", len(changed))
+        # expire any changed object the session holds, not only those in the
+        # model (e.g. a plant's location)
+        for key in changed:
+            obj = self.session.identity_map.get(key)
+            if obj is not None:
+                self.session.expire(obj)
+
+        self.count_kids.clear_cache()  # pylint: disable=no-member
+        self.get_markup_pair.clear_cache()  # pylint: disable=no-member
+
+        model = self.results_view.get_model()
+
+        if changed and isinstance(model, LazyResultsModel):
+            model.expire(changed)
+        elif changed and isinstance(model, Gtk.TreeStore):
+            changed_paths: dict[str, Gtk.TreePath] = {}
+
+            for key in changed:
+                for treeiter in self._get_rows(key):
+                    path = model.get_path(treeiter)
+                    while path.get_depth() > 0:
+                        changed_paths.setdefault(str(path), path.copy())
+                        path.up()
+
+            for path in changed_paths.values():
+                treeiter = model.get_iter(path)
+                obj = model[treeiter][0]
+                if inspect(obj).persistent:
+                    self.session.expire(obj)
+                # pylint: disable-next=no-member
+                self.has_kids.invalidate(self, obj)
+                model.row_changed(path, treeiter)
+
+            self._refresh_expanded_children(
+                model, changed, changed_paths.values()
+            )
+
+        _model, selected = self.selection.get_selected_rows()
+        cursor_path, _column = self.results_view.get_cursor()
+
+        if not selected and cursor_path:
+            # selected row removed
+            self.results_view.set_cursor(cursor_path)
+        else:
+            self.on_selection_changed(None)
+
+    def _refresh_expanded_children(
+        self,
+        model: Gtk.TreeStore,
+        changed: set[tuple],
+        changed_paths: Iterable[Gtk.TreePath],
+    ) -> None:
+        """Rebuild the children of the expanded rows, of those at
+        `changed_paths`, that are changed or whose number of children differs,
+        restoring the expanded state of their descendants.
+
+        Parents are processed before their descendants, the descendants of a
+        rebuilt row are skipped as they are already refreshed.
+        """
+        rebuilt: list[Gtk.TreePath] = []
+        for path in sorted(changed_paths, key=lambda p: p.get_depth()):
+            if not self.results_view.row_expanded(path) or any(
+                path.is_descendant(i) for i in rebuilt
+            ):
+                continue
+            treeiter = model.get_iter(path)
+            obj = model[treeiter][0]
+            if (
+                not inspect(obj).persistent
+                or self.row_meta[type(obj)].children is None
+            ):
+                continue
+            if self._row_key(obj) not in changed and model.iter_n_children(
+                treeiter
+            ) == self.count_kids(obj):
+                continue
+
+            logger.debug("refreshing children of %s", path)
+            expanded_keys = set()
+            for expanded in self.get_expanded_rows():
+                if expanded.is_descendant(path):
+                    expanded_keys.add(
+                        self._row_key(model[model.get_iter(expanded)][0])
+                    )
+            # collapse so expanding rebuilds via on_test_expand_row
+            self.results_view.collapse_row(path)
+            self.results_view.expand_row(path, False)
+            rebuilt.append(path)
+
+            for key in expanded_keys:
+                for found in self._get_rows(key):
+                    found_path = model.get_path(found)
+                    if found_path.is_descendant(path):
+                        self.results_view.expand_to_path(found_path)
+
+    def update_all(self) -> None:
+        """Expire all the children in the model, collapse everything, reexpand
+        the rows to the previous state where possible.
+        """
+        logger.debug("SearchView::update_all")
         model, tree_paths = self.selection.get_selected_rows()
 
         cursor_path, _column = self.results_view.get_cursor()
@@ -2004,6 +2509,11 @@ class SearchView(View, Gtk.Box):
 
         self.session.expire_all()
         self.has_kids.clear_cache()  # pylint: disable=no-member
+        self._set_last_history_id()
+
+        if isinstance(model, LazyResultsModel):
+            model.clear_cache()
+            self.results_view.queue_draw()
 
         expanded_rows = self.get_expanded_rows()
 
@@ -2099,13 +2609,15 @@ class SearchView(View, Gtk.Box):
         for kid in kids:
 
             if picture in kid.pictures:
-                itr = utils.search_tree_model(model, obj)[0]
+                itr = self.find_rows(obj)[0]
                 path = model.get_path(itr)
                 # expand (on_test_expand_row needed for test)
                 self.on_test_expand_row(self.results_view, itr, path)
                 self.results_view.expand_to_path(path)
                 if kid is picture.owner:
                     itr = select_in_search_results(kid)
+                    if itr is None:
+                        return
                     path = model.get_path(itr)
                     self.results_view.scroll_to_cell(
                         path, None, True, 0.5, 0.0
@@ -2130,6 +2642,9 @@ class SearchView(View, Gtk.Box):
         self._remove_bottom_pages()
 
 
+db.History.history_revert_callbacks.append(SearchView.history_callback)
+
+
 def get_search_view_selected() -> list[db.Domain] | None:
     """If SearchView is the current view return the selected objects."""
     selected: list[db.Domain] | None = None
@@ -2721,15 +3236,21 @@ class HistoryCommandHandler(pluginmgr.CommandHandler):
 pluginmgr.register_command(HistoryCommandHandler)
 
 
-def select_in_search_results(obj, expand_current_first=False) -> Gtk.TreeIter:
+def select_in_search_results(
+    obj, expand_current_first=False
+) -> Gtk.TreeIter | None:
     """Search the tree model for obj if it exists then select it if not
     then add it and select it.
 
+    Large results are displayed in a flat LazyResultsModel that can not be
+    added to or expanded, objects not already in it are not selected.
+
     :param obj: the object the select
     :param expand_current_first: if True and the current selection has
         children then expand it first before searching/adding obj (intended for
         use in infoboxes where the current selection is known)
-    :return: a Gtk.TreeIter to the selected row
+    :return: a Gtk.TreeIter to the selected row or None if it could not be
+        selected
     """
     check(obj is not None, "select_in_search_results: arg is None")
     view = bauble.gui.get_view()
@@ -2741,6 +3262,16 @@ def select_in_search_results(obj, expand_current_first=False) -> Gtk.TreeIter:
             "SearchView."
         )
 
+    model = view.results_view.get_model()
+
+    if isinstance(model, LazyResultsModel):
+        found = view.find_rows(obj)
+        if not found:
+            logger.debug("%s is not in the search results", obj)
+            return None
+        view.results_view.set_cursor(model.get_path(found[0]))
+        return found[0]
+
     if expand_current_first:
         selected = view.get_selected_values()
         if (
@@ -2749,7 +3280,7 @@ def select_in_search_results(obj, expand_current_first=False) -> Gtk.TreeIter:
             and view.row_meta[type(selected[0])].children is not None
         ):
             model = view.results_view.get_model()
-            found = utils.search_tree_model(model, selected[0])
+            found = view.find_rows(selected[0])
             if found and model:
                 path = model.get_path(found[0])
                 view.on_test_expand_row(view.results_view, found[0], path)
@@ -2768,13 +3299,14 @@ def select_in_search_results(obj, expand_current_first=False) -> Gtk.TreeIter:
             "select_in_search_results called when results_view is None."
         )
 
-    found = utils.search_tree_model(model, obj)
+    found = view.find_rows(obj)
     row_iter = None
 
     if len(found) > 0:
         row_iter = found[0]
     else:
         row_iter = model.append(None, [obj])
+        view.index_row(model, row_iter)
         model.append(row_iter, ["-"])
         # NOTE used in test...
         logger.debug("%s added to search results", obj)
@@ -3344,6 +3876,7 @@ class SimpleSearchBox(Gtk.Frame):
         self.entry.connect("changed", self.on_entry_changed)
         box.pack_start(self.entry, True, True, 0)
         self.completion_getter: Callable | None = None
+        self.dispatcher = CompletionDispatcher(self.get_completions)
 
     def on_entry_activated(self, entry: Gtk.Entry) -> None:
         condition = self.cond_combo.get_active_text()
@@ -3379,33 +3912,37 @@ class SimpleSearchBox(Gtk.Frame):
         text = entry.get_text()
         completion = entry.get_completion()
         key_length = completion.get_minimum_key_length()
-        utils.clear_model(completion)
 
         if len(text) < key_length:
+            self.dispatcher.cancel()
+            utils.clear_model(completion)
             return
 
-        completion_model = Gtk.ListStore(str)
+        self.dispatcher.request(text, completion)
+
+    def get_completions(self, text: str) -> list[str]:
+        """Get the completions for the current domain.
 
+        Called from a worker thread by the dispatcher.
+        """
+        vals: list[str] = []
         with db.Session() as session:
             if self.completion_getter:
-                for val in self.completion_getter(session, text):
-                    completion_model.append([val])
-            else:
-                for column in self.columns:
-                    vals = (
-                        session.query(getattr(self.domain, column))
-                        .filter(
-                            utils.ilike(
-                                getattr(self.domain, column), f"{text}%%"
-                            )
-                        )
-                        .distinct()
-                        .limit(10)
-                    )
-                    for val in vals:
-                        completion_model.append([str(val[0])])
-
-        completion.set_model(completion_model)
+                vals.extend(self.completion_getter(session, text))
+                return vals
+            for column in self.columns:
+                attr = getattr(self.domain, column)
+                if index := get_prefix_index(attr):
+                    vals.extend(index.lookup(text, 10))
+                    continue
+                query = (
+                    session.query(attr)
+                    .filter(utils.ilike(attr, f"{text}%%"))
+                    .distinct()
+                    .limit(10)
+                )
+                vals.extend(str(val[0]) for val in query)
+        return vals
 
     def update(self) -> None:
 
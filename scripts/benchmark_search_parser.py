@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Benchmark the search parser over a corpus of typical search strings.
+
+Compares parsing without memoization, with packrat parsing and with the parse
+result cache (as when rerunning a search).
+
+Usage: benchmark_search_parser.py [REPEATS]
+"""
+import os
+import sys
+from tempfile import mkstemp
+from timeit import timeit
+
+from pyparsing import ParserElement
+from sqlalchemy.engine import make_url
+
+from bauble import db
+from bauble import pluginmgr
+from bauble import prefs
+from bauble.search import parser
+
+CORPUS = [
+    "plant where id > 3 and (quantity = 1 or geojson != None)",
+    "plant where _last_updated between 13/2/2009 and 14/2/2009",
+    "plant where accession.species.genus.family.epithet = Orchidaceae",
+    "plant where accession[id in 1 4, quantity_recvd not in 2 10]."
+    "species.id = 1",
+    "plant where count(distinct accession.species.accessions.plants.id) > 3",
+    "accession where code like '2023%' and source.source_detail.name "
+    "contains 'garden'",
+    "accession where count(plants.location[code in RBW, URBW].id) = 1",
+    "accession where quantity_recvd = (sum(plant.quantity) correlate)",
+    "accession where plants.location.code in (location.code where "
+    "description contains 'house')",
+    "species where genus[epithet like Encyc%].species.accessions."
+    "plants.quantity > 1",
+    "species where sum(distribution.geography.approx_area) > 1000 and "
+    "not synonyms.id = None",
+    "genus where species.epithet like za% and count(species.id) > 1",
+    "genus where notes[category='test'].note in 'olim', 'erat', 'nunc'",
+    "family where genera[epithet=genus4,author=me].notes.note = olim",
+    "location where id not in (intended_location.location_id where "
+    "quantity > 0)",
+]
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    db.open_conn(make_url("sqlite:///:memory:"), verify=False)
+    handle, temp = mkstemp(suffix=".cfg", text=True)
+    prefs.default_prefs_file = temp
+    # pylint: disable=protected-access
+    prefs.prefs = prefs._prefs(filename=temp)
+    prefs.prefs.init()
+    pluginmgr.load()
+    db.create(import_defaults=False)
+    pluginmgr.install("all", False)
+    pluginmgr.init()
+
+    def parse_all() -> None:
+        for text in CORPUS:
+            parser.statement.parse_string(text)
+
+    def parse_all_cached() -> None:
+        for text in CORPUS:
+            parser.parse_string(text)
+
+    ParserElement.disable_memoization()
+    plain = timeit(parse_all, number=repeats)
+    ParserElement.enable_packrat()
+    packrat = timeit(parse_all, number=repeats)
+    cached = timeit(parse_all_cached, number=repeats)
+
+    count = len(CORPUS) * repeats
+    print(f"{len(CORPUS)} search strings x {repeats}")
+    for name, total in (
+        ("no memoization", plain),
+        ("packrat", packrat),
+        ("parse cache", cached),
+    ):
+        print(f"{name:>15}: {total / count * 1000:8.3f} ms/parse")
+
+    os.close(handle)
+    os.remove(temp)
+
+    if db.engine:
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()